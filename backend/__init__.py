@@ -55,4 +55,9 @@ def create_app(config_name='default'):
     app.register_blueprint(api_training_bp, url_prefix='/api/training')
     app.register_blueprint(learning_bp)
 
+    # Uploads whose background ingestion was cut short by the last shutdown
+    if not app.config.get('TESTING'):
+        from backend.routes.api_queue import resume_pending_ingestion
+        resume_pending_ingestion(app)
+
     return app
@@ -8,16 +8,38 @@ import numpy as np
 from PIL import Image, ImageOps, ImageFilter, ImageEnhance
 import pytesseract
 from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import Counter
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 from difflib import SequenceMatcher
 import time
 
 # Import existing modules
+from backend.image_context import ImageContext
 from backend.image_quality import analyze_image_quality, ImageQualityMetrics
 from backend.text_correction import apply_text_corrections
+from backend.ocr_engine import OCRCancelled, OCRTimeout, get_ocr_engine
 from backend.ocr_service import extract_text as base_extract_text
+from backend.preprocessing_graph import run_preprocessing
+from backend.logger import get_logger
+
+log = get_logger('ocr')
+
+
+def _env_int(name: str) -> int:
+    """Non-negative integer setting; unset or invalid values mean 0"""
+    value = os.getenv(name)
+    if not value:
+        return 0
+    try:
+        return max(0, int(value))
+    except ValueError:
+        log.warning("[ADAPTIVE-OCR] Ignoring invalid %s=%r", name, value)
+        return 0
+
 
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
@@ -30,6 +52,8 @@ class OCRAttempt:
     confidence: float
     processing_time_ms: int
     quality_score: float
+    # Per-step preprocessing timings ({'step', 'ms', 'cached'})
+    preprocessing_steps: List[Dict] = field(default_factory=list)
 
 
 @dataclass
@@ -66,61 +90,60 @@ class AdaptiveOCRService:
         'simple'        # Finally simple as fallback
     ]
     
+    # Execution of the selected modes: 'sequential' (one after another) or
+    # 'concurrent' (all at once on the OCR worker pool, the rest cancelled
+    # as soon as one reaches TARGET_CONFIDENCE)
+    EXECUTION_MODE = os.getenv('ADAPTIVE_OCR_EXECUTION', 'sequential')
+    
+    # Wall-clock budget per image in ms (0 = unlimited); attempts still
+    # running when it expires are abandoned
+    TIME_BUDGET_MS = _env_int('ADAPTIVE_OCR_BUDGET_MS')
+    
+    _executor = None
+    _executor_lock = threading.Lock()
+    
     @staticmethod
-    def extract_text_adaptive(image_path: str, max_attempts: int = 3) -> EnsembleResult:
+    def extract_text_adaptive(image_path: str, max_attempts: int = 3, execution: str = None,
+                              time_budget_ms: int = None, image_context: ImageContext = None) -> EnsembleResult:
         """
         Main entry point: Extract text using adaptive multi-pass OCR
         
         Args:
             image_path: Path to the image file
             max_attempts: Maximum number of OCR attempts (default 3)
+            execution: 'sequential' or 'concurrent' (default EXECUTION_MODE)
+            time_budget_ms: Wall-clock budget for the image (default TIME_BUDGET_MS, 0 = none)
+            image_context: ImageContext of image_path if the caller already decoded it
             
         Returns:
             EnsembleResult with merged text and confidence scores
         """
         start_time = time.time()
+        execution = execution or AdaptiveOCRService.EXECUTION_MODE
+        if time_budget_ms is None:
+            time_budget_ms = AdaptiveOCRService.TIME_BUDGET_MS
+        deadline = time.monotonic() + time_budget_ms / 1000 if time_budget_ms else None
+        
+        # Decode once: quality analysis and every mode's preprocessing share
+        # this context, so steps common to several modes run only once
+        context = image_context or ImageContext.from_path(image_path)
         
         # Analyze image quality first
-        quality_metrics = analyze_image_quality(image_path)
+        quality_metrics = context.quality()
         quality_score = quality_metrics.quality_score()
         
-        print(f"[ADAPTIVE-OCR] Image quality score: {quality_score:.1f}/100")
-        print(f"[ADAPTIVE-OCR] Starting multi-pass OCR (max {max_attempts} attempts)")
+        log.debug("[ADAPTIVE-OCR] Image quality score: %.1f/100", quality_score)
+        log.debug("[ADAPTIVE-OCR] Starting multi-pass OCR (max %d attempts, %s)", max_attempts, execution)
         
         # Determine which modes to try based on quality
-        modes_to_try = AdaptiveOCRService._select_modes_for_quality(quality_score)
-        
-        attempts = []
-        best_confidence = 0
+        modes_to_try = AdaptiveOCRService._select_modes_for_quality(quality_score)[:max_attempts]
         
-        # Try each mode until we hit target confidence or max attempts
-        for i, mode in enumerate(modes_to_try[:max_attempts]):
-            print(f"[ADAPTIVE-OCR] Attempt {i+1}/{max_attempts}: Using '{mode}' mode")
-            
-            try:
-                result = base_extract_text(image_path, method=mode)
-                
-                attempt = OCRAttempt(
-                    mode=mode,
-                    text=result.get('text', ''),
-                    confidence=result.get('confidence', 0),
-                    processing_time_ms=result.get('processing_time_ms', 0),
-                    quality_score=quality_score
-                )
-                
-                attempts.append(attempt)
-                best_confidence = max(best_confidence, attempt.confidence)
-                
-                print(f"[ADAPTIVE-OCR] Attempt {i+1} confidence: {attempt.confidence:.1f}%")
-                
-                # If we hit target confidence, stop early
-                if attempt.confidence >= AdaptiveOCRService.TARGET_CONFIDENCE:
-                    print(f"[ADAPTIVE-OCR] Target confidence reached! Stopping early.")
-                    break
-                    
-            except Exception as e:
-                print(f"[ADAPTIVE-OCR] Attempt {i+1} failed: {e}")
-                continue
+        if execution == 'concurrent' and len(modes_to_try) > 1:
+            attempts = AdaptiveOCRService._run_concurrent(
+                image_path, context, modes_to_try, quality_score, deadline)
+        else:
+            attempts = AdaptiveOCRService._run_sequential(
+                image_path, context, modes_to_try, quality_score, deadline)
         
         # If no attempts succeeded, return error
         if not attempts:
@@ -136,10 +159,119 @@ class AdaptiveOCRService:
         merged_result = AdaptiveOCRService._ensemble_merge(attempts)
         
         total_time = int((time.time() - start_time) * 1000)
-        print(f"[ADAPTIVE-OCR] Completed in {total_time}ms with final confidence: {merged_result.confidence:.1f}%")
+        log.debug("[ADAPTIVE-OCR] Completed in %dms with final confidence: %.1f%%", total_time, merged_result.confidence)
         
         return merged_result
     
+    @staticmethod
+    def _attempt(image_path: str, context: ImageContext, mode: str, quality_score: float,
+                 cancel_event=None, deadline: float = None) -> OCRAttempt:
+        """Run one mode; raises OCRCancelled / OCRTimeout when stopped early"""
+        result = base_extract_text(image_path, method=mode, image_context=context,
+                                   cancel_event=cancel_event, deadline=deadline)
+        
+        return OCRAttempt(
+            mode=mode,
+            text=result.get('text', ''),
+            confidence=result.get('confidence', 0),
+            processing_time_ms=result.get('processing_time_ms', 0),
+            quality_score=quality_score,
+            preprocessing_steps=result.get('preprocessing_steps', [])
+        )
+    
+    @staticmethod
+    def _run_sequential(image_path: str, context: ImageContext, modes: List[str],
+                        quality_score: float, deadline: float = None) -> List[OCRAttempt]:
+        """Try each mode in turn until one hits target confidence or the budget runs out"""
+        attempts = []
+        
+        for i, mode in enumerate(modes):
+            if deadline is not None and time.monotonic() >= deadline:
+                log.info("[ADAPTIVE-OCR] Time budget exhausted, skipping %s", modes[i:])
+                break
+            
+            log.debug("[ADAPTIVE-OCR] Attempt %d/%d: Using '%s' mode", i + 1, len(modes), mode)
+            
+            try:
+                attempt = AdaptiveOCRService._attempt(image_path, context, mode, quality_score,
+                                                      deadline=deadline)
+                attempts.append(attempt)
+                
+                log.debug("[ADAPTIVE-OCR] Attempt %d confidence: %.1f%%", i + 1, attempt.confidence)
+                
+                # If we hit target confidence, stop early
+                if attempt.confidence >= AdaptiveOCRService.TARGET_CONFIDENCE:
+                    log.debug("[ADAPTIVE-OCR] Target confidence reached! Stopping early.")
+                    break
+                    
+            except Exception as e:
+                log.warning("[ADAPTIVE-OCR] Attempt %d failed: %s", i + 1, e)
+                continue
+        
+        return attempts
+    
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """
+        Shared pool for concurrent attempts, created once.  The engine pool only
+        lends Tesseract instances to the calling thread, so the attempts need
+        threads of their own - as many as there are instances (ADAPTIVE_OCR_WORKERS
+        overrides); more would only queue for an instance.
+        """
+        with cls._executor_lock:
+            if cls._executor is None:
+                workers = _env_int('ADAPTIVE_OCR_WORKERS') or get_ocr_engine().pool_size
+                cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='adaptive-ocr')
+            return cls._executor
+    
+    @staticmethod
+    def _run_concurrent(image_path: str, context: ImageContext, modes: List[str],
+                        quality_score: float, deadline: float = None) -> List[OCRAttempt]:
+        """
+        Launch every mode at once; stop waiting (and cancel the rest) as soon as
+        one reaches target confidence or the budget expires
+        
+        Attempts still running when cancelled stop at their next preprocessing
+        step, or when their recognition timeout (the remaining budget) expires.
+        Finished attempts are returned in mode order so merging is deterministic.
+        """
+        executor = AdaptiveOCRService._get_executor()
+        cancel_event = threading.Event()
+        futures = {
+            executor.submit(AdaptiveOCRService._attempt, image_path, context, mode,
+                            quality_score, cancel_event, deadline): mode
+            for mode in modes
+        }
+        log.debug("[ADAPTIVE-OCR] Launched %d concurrent attempts: %s", len(modes), modes)
+        
+        finished = {}
+        try:
+            for future in as_completed(futures, timeout=None if deadline is None
+                                       else max(0.0, deadline - time.monotonic())):
+                mode = futures[future]
+                try:
+                    attempt = future.result()
+                except (OCRCancelled, OCRTimeout):
+                    continue
+                except Exception as e:
+                    log.warning("[ADAPTIVE-OCR] '%s' attempt failed: %s", mode, e)
+                    continue
+                
+                finished[mode] = attempt
+                log.debug("[ADAPTIVE-OCR] '%s' confidence: %.1f%%", mode, attempt.confidence)
+                
+                if attempt.confidence >= AdaptiveOCRService.TARGET_CONFIDENCE:
+                    log.debug("[ADAPTIVE-OCR] Target confidence reached! Cancelling remaining attempts.")
+                    break
+        except FuturesTimeoutError:
+            log.info("[ADAPTIVE-OCR] Time budget exhausted, abandoning unfinished attempts")
+        finally:
+            cancel_event.set()
+            for future in futures:
+                future.cancel()
+        
+        return [finished[mode] for mode in modes if mode in finished]
+    
     @staticmethod
     def _select_modes_for_quality(quality_score: float) -> List[str]:
         """Select appropriate OCR modes based on image quality"""
@@ -312,14 +444,83 @@ class FieldSpecificOCR:
     REGION_LEFT = (0, 0, 0.5, 1.0)      # Left half
     REGION_RIGHT = (0.5, 0, 0.5, 1.0)   # Right half
     
+    # Header/totals regions are short blocks of text lines: read them as one
+    # uniform block (PSM 6) with the general receipt whitelist
+    REGION_PSM = 6
+    
+    @staticmethod
+    def region_boxes(width: int, height: int,
+                     regions: List[Tuple[float, float, float, float]]) -> List[Tuple[int, int, int, int]]:
+        """Convert (x, y, width, height) ratios into pixel boxes clipped to the image"""
+        boxes = []
+        for rx, ry, rw, rh in regions:
+            x = min(round(rx * width), width)
+            y = min(round(ry * height), height)
+            w = min(round(rw * width), width - x)
+            h = min(round(rh * height), height - y)
+            boxes.append((x, y, w, h))
+        return boxes
+    
     @staticmethod
-    def extract_from_region(image_path: str, region: Tuple[float, float, float, float], 
+    def extract_from_regions(source, regions: Dict[str, Tuple[float, float, float, float]],
+                             preprocessing: str = 'aggressive') -> Dict[str, Dict]:
+        """
+        Extract text from several regions of the image in one engine call
+        
+        Works on slices of the already-decoded OCR base image: each region
+        is preprocessed on its own (planned from the whole image's quality
+        metrics, memoized on the context) and all regions are recognised
+        from memory in one engine call - no temp files, no re-encoding.
+        
+        Args:
+            source: Image path or ImageContext (pass the context used for the
+                full-page OCR to reuse its decode, metrics and OCR base)
+            regions: name -> (x, y, width, height) as ratios (0-1)
+            preprocessing: Preprocessing mode to use
+            
+        Returns:
+            name -> dict with text, raw_text, confidence and box (OCR base pixels)
+        """
+        from backend.decimal_correction import apply_decimal_corrections
+        from backend.dynamic_whitelist import DynamicWhitelist
+        
+        start_time = time.time()
+        context = ImageContext.ensure(source)
+        base = context.ocr_base()
+        names = list(regions)
+        boxes = FieldSpecificOCR.region_boxes(base.shape[1], base.shape[0], [regions[n] for n in names])
+        
+        images = [run_preprocessing(context, method=preprocessing, region=box).image for box in boxes]
+        
+        config = DynamicWhitelist.build_tesseract_config(
+            whitelist_type='general', psm=FieldSpecificOCR.REGION_PSM, oem=1
+        ) + ' -c preserve_interword_spaces=1'
+        recognitions = get_ocr_engine().recognize_many(images, lang='eng', config=config)
+        
+        processing_time = int((time.time() - start_time) * 1000)
+        log.debug("[FIELD-OCR] Read %d region(s) %s in %dms", len(names), names, processing_time)
+        
+        results = {}
+        for name, box, recognition in zip(names, boxes, recognitions):
+            raw_text = recognition.text or ""
+            results[name] = {
+                'text': apply_decimal_corrections(apply_text_corrections(raw_text)),
+                'raw_text': raw_text,
+                'confidence': round(recognition.confidence, 2),
+                'preprocessing_method': preprocessing,
+                'processing_time_ms': processing_time,
+                'box': box
+            }
+        return results
+    
+    @staticmethod
+    def extract_from_region(image_path, region: Tuple[float, float, float, float], 
                            preprocessing: str = 'aggressive') -> Dict:
         """
         Extract text from a specific region of the image
         
         Args:
-            image_path: Path to image
+            image_path: Path to image (or its ImageContext)
             region: (x, y, width, height) as ratios (0-1)
             preprocessing: Preprocessing mode to use
             
@@ -327,64 +528,42 @@ class FieldSpecificOCR:
             Dict with text and confidence
         """
         try:
-            # Load image
-            img = Image.open(image_path)
-            width, height = img.size
-            
-            # Calculate crop coordinates
-            x = int(region[0] * width)
-            y = int(region[1] * height)
-            w = int(region[2] * width)
-            h = int(region[3] * height)
-            
-            # Crop region
-            cropped = img.crop((x, y, x + w, y + h))
-            
-            # Save temporarily for OCR
-            temp_path = image_path + f"_region_{x}_{y}.jpg"
-            cropped.save(temp_path)
-            
-            # Run OCR on cropped region
-            result = base_extract_text(temp_path, method=preprocessing)
-            
-            # Cleanup temp file
-            import os
-            try:
-                os.remove(temp_path)
-            except:
-                pass
-            
-            return result
-            
+            return FieldSpecificOCR.extract_from_regions(image_path, {'region': region}, preprocessing)['region']
         except Exception as e:
-            print(f"[FIELD-OCR] Region extraction failed: {e}")
+            log.warning("[FIELD-OCR] Region extraction failed: %s", e)
             return {'text': '', 'confidence': 0}
     
     @staticmethod
-    def extract_critical_fields(image_path: str, full_text: str) -> Dict[str, Dict]:
+    def extract_critical_fields(image_path, full_text: str) -> Dict[str, Dict]:
         """
         Attempt to extract critical fields using region-specific OCR
         when they're missing from the full text
+        
+        image_path may be an ImageContext, so the full-page decode and
+        preprocessing are reused.
         """
         results = {
             'header': {},
             'totals': {},
             'items': {}
         }
+        regions = {}
         
         # Check if we need header extraction
         if not re.search(r'voucher|supplier|date', full_text, re.IGNORECASE):
-            print("[FIELD-OCR] Header info missing, extracting from top region...")
-            results['header'] = FieldSpecificOCR.extract_from_region(
-                image_path, FieldSpecificOCR.REGION_TOP, 'aggressive'
-            )
+            log.debug("[FIELD-OCR] Header info missing, extracting from top region...")
+            regions['header'] = FieldSpecificOCR.REGION_TOP
         
         # Check if we need totals extraction
         if not re.search(r'total|amount|grand', full_text, re.IGNORECASE):
-            print("[FIELD-OCR] Totals missing, extracting from bottom region...")
-            results['totals'] = FieldSpecificOCR.extract_from_region(
-                image_path, FieldSpecificOCR.REGION_BOTTOM, 'aggressive'
-            )
+            log.debug("[FIELD-OCR] Totals missing, extracting from bottom region...")
+            regions['totals'] = FieldSpecificOCR.REGION_BOTTOM
+        
+        if regions:
+            try:
+                results.update(FieldSpecificOCR.extract_from_regions(image_path, regions, 'aggressive'))
+            except Exception as e:
+                log.warning("[FIELD-OCR] Region extraction failed: %s", e)
         
         return results
 
@@ -503,26 +682,31 @@ class QualityAwarePreprocessor:
 
 
 # Convenience function for easy integration
-def extract_text_robust(image_path: str) -> Dict:
+def extract_text_robust(image_path: str, execution: str = None, time_budget_ms: int = None) -> Dict:
     """
     Main function to extract text with robust handling of poor quality images
     Returns a dictionary compatible with existing code
     """
+    # One decode shared by the adaptive attempts and any region fallback
+    context = ImageContext.from_path(image_path)
+    
     # Run adaptive OCR
-    result = AdaptiveOCRService.extract_text_adaptive(image_path)
+    result = AdaptiveOCRService.extract_text_adaptive(image_path, execution=execution,
+                                                      time_budget_ms=time_budget_ms,
+                                                      image_context=context)
     
     # Apply text corrections
     corrected_text = apply_text_corrections(result.text)
     
     # Check for missing critical fields and try region-specific extraction
     if result.confidence < 70:
-        print("[ROBUST-OCR] Low confidence detected, trying field-specific extraction...")
-        field_results = FieldSpecificOCR.extract_critical_fields(image_path, corrected_text)
+        log.debug("[ROBUST-OCR] Low confidence detected, trying field-specific extraction...")
+        field_results = FieldSpecificOCR.extract_critical_fields(context, corrected_text)
         
         # Merge field-specific results if they improve confidence
         for region, region_result in field_results.items():
             if region_result.get('confidence', 0) > 50:
-                print(f"[ROBUST-OCR] Adding text from {region} region")
+                log.debug("[ROBUST-OCR] Adding text from %s region", region)
                 corrected_text += "\n" + region_result.get('text', '')
     
     return {
@@ -534,7 +718,8 @@ def extract_text_robust(image_path: str) -> Dict:
             {
                 'mode': a.mode,
                 'confidence': a.confidence,
-                'processing_time_ms': a.processing_time_ms
+                'processing_time_ms': a.processing_time_ms,
+                'preprocessing_steps': a.preprocessing_steps
             }
             for a in result.attempts
         ],
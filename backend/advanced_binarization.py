@@ -62,27 +62,117 @@ def sauvola_threshold(gray_image: np.ndarray, window_size: int = 15, k: float =
     Returns:
         Binary image
     """
-    # Ensure window size is odd
-    if window_size % 2 == 0:
-        window_size += 1
-    
-    # Convert to float
-    img_float = gray_image.astype(np.float64)
-    
-    # Calculate local mean
-    mean = cv2.boxFilter(img_float, -1, (window_size, window_size), normalize=True)
-    
-    # Calculate local standard deviation
-    mean_sq = cv2.boxFilter(img_float ** 2, -1, (window_size, window_size), normalize=True)
-    std = np.sqrt(mean_sq - mean ** 2)
+    return LocalStatistics(gray_image, window_size).sauvola(k=k, R=R)
+
+
+# Tiles are processed with a halo of window_size // 2 pixels, so peak memory
+# is a few float32 buffers of this size however large the image is
+BINARIZATION_TILE_SIZE = 1024
+
+
+class LocalStatistics:
+    """
+    Local mean / standard deviation over a sliding window, computed tile by tile
+    
+    Statistics are float32 box filters of the 8-bit image (OpenCV sums the
+    window in integer arithmetic, so no precision is lost to large running
+    sums) and are computed once per tile, then shared by every method
+    requested in the same run(). Other dtypes are used as float64 values,
+    unscaled, as the original whole-image Sauvola did. Tiles overlap by
+    window_size // 2, and the image border is reflected exactly as a whole-image box filter would,
+    so tiled output matches whole-image processing.
+    """
     
-    # Sauvola threshold
-    threshold = mean * (1 + k * ((std / R) - 1))
+    def __init__(self, gray_image: np.ndarray, window_size: int = 15, tile_size: int = None):
+        # Ensure window size is odd
+        if window_size % 2 == 0:
+            window_size += 1
+        if gray_image.dtype == np.uint8:
+            self.ddepth = cv2.CV_32F
+        else:
+            gray_image = gray_image.astype(np.float64)
+            self.ddepth = cv2.CV_64F
+        
+        self.gray = gray_image
+        self.window_size = window_size
+        self.tile_size = max(tile_size or BINARIZATION_TILE_SIZE, window_size)
+    
+    def _tiles(self):
+        """Yield (output slice, gray tile, local mean, local std) for each tile"""
+        height, width = self.gray.shape[:2]
+        halo = self.window_size // 2
+        ksize = (self.window_size, self.window_size)
+        
+        for y in range(0, height, self.tile_size):
+            for x in range(0, width, self.tile_size):
+                y1, x1 = min(y + self.tile_size, height), min(x + self.tile_size, width)
+                hy0, hx0 = max(0, y - halo), max(0, x - halo)
+                hy1, hx1 = min(height, y1 + halo), min(width, x1 + halo)
+                
+                # A halo edge that is also the image edge gets reflected by the
+                # filter, like the whole image would be
+                block = self.gray[hy0:hy1, hx0:hx1]
+                mean = cv2.boxFilter(block, self.ddepth, ksize, normalize=True)
+                std = cv2.sqrBoxFilter(block, self.ddepth, ksize, normalize=True)
+                
+                # std = sqrt(E[x^2] - E[x]^2), in place
+                std -= cv2.multiply(mean, mean)
+                np.maximum(std, 0, out=std)
+                np.sqrt(std, out=std)
+                
+                inner = (slice(y - hy0, y1 - hy0), slice(x - hx0, x1 - hx0))
+                yield (slice(y, y1), slice(x, x1)), block[inner], mean[inner], std[inner]
+    
+    def run(self, sauvola: dict = None, adaptive_mean: dict = None) -> dict:
+        """
+        Compute several outputs from a single pass over the statistics
+        
+        Args:
+            sauvola: {'k': .., 'R': ..} to produce a Sauvola binary image
+            adaptive_mean: {'C': ..} to produce a mean - C binary image
+            
+        Returns:
+            Dict with the requested 'sauvola' / 'adaptive_mean' binary images
+        """
+        results = {}
+        if sauvola is not None:
+            results['sauvola'] = np.empty(self.gray.shape[:2], np.uint8)
+        if adaptive_mean is not None:
+            results['adaptive_mean'] = np.empty(self.gray.shape[:2], np.uint8)
+        
+        for out, gray, mean, std in self._tiles():
+            if adaptive_mean is not None:
+                _binarize(gray, mean - adaptive_mean.get('C', 2), results['adaptive_mean'][out])
+            
+            if sauvola is not None:
+                # T = mean * (1 + k * (std / R - 1)), reusing the std buffer
+                k, R = sauvola.get('k', 0.2), sauvola.get('R', 128)
+                threshold = std
+                threshold *= k / R
+                threshold += 1 - k
+                threshold *= mean
+                _binarize(gray, threshold, results['sauvola'][out])
+        
+        return results
     
-    # Apply threshold
-    binary = np.where(img_float > threshold, 255, 0).astype(np.uint8)
+    def sauvola(self, k: float = 0.2, R: float = 128) -> np.ndarray:
+        """Sauvola binary image (see sauvola_threshold)"""
+        return self.run(sauvola={'k': k, 'R': R})['sauvola']
     
-    return binary
+    def adaptive_mean(self, C: float = 2) -> np.ndarray:
+        """
+        Binary image of pixels brighter than local mean - C
+        
+        Unlike cv2.adaptiveThreshold the mean is not rounded to 8 bits and the
+        border is reflected rather than replicated, so edge pixels may differ.
+        """
+        return self.run(adaptive_mean={'C': C})['adaptive_mean']
+
+
+def _binarize(gray: np.ndarray, threshold: np.ndarray, out: np.ndarray) -> None:
+    """Write 255 where gray > threshold, else 0, into out"""
+    np.greater(gray, threshold, out=out, casting='unsafe')
+    out *= 255
 
 
 def auto_select_binarization(gray_image: np.ndarray, quality_metrics=None) -> Tuple[np.ndarray, str]:
@@ -151,7 +241,7 @@ def compare_binarization_methods(gray_image: np.ndarray) -> dict:
     # Adaptive Gaussian
     results['adaptive_gaussian'] = adaptive_gaussian_threshold(gray_image)
     
-    # Adaptive Mean
+    # Adaptive Mean (cv2, 11px window, replicated border)
     results['adaptive_mean'] = adaptive_mean_threshold(gray_image)
     
     # Sauvola
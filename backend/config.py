@@ -13,6 +13,41 @@ class Config:
     
     # Tesseract Path
     TESSERACT_CMD = os.environ.get('TESSERACT_CMD', r'C:\Program Files\Tesseract-OCR\tesseract.exe')
+    
+    # Performance / storage tuning is read from the environment by the module
+    # that uses it (worker threads and processes have no app context), so
+    # these are not Config attributes:
+    #   OCR_ENGINE                  'auto' | 'pytesseract'            backend/ocr_engine.py
+    #   OCR_POOL_SIZE               default: cores, max 4             backend/ocr_engine.py
+    #   BATCH_OCR_WORKERS           1 = serial                        backend/services/batch_ocr_service.py
+    #   BATCH_OCR_MODE              'process' | 'thread'              backend/services/batch_ocr_service.py
+    #   OCR_CACHE_ENABLED           '1' | '0'                         backend/ocr_cache.py
+    #   OCR_CACHE_DIR               default backend/data/ocr_cache    backend/ocr_cache.py
+    #   OCR_CACHE_MAX_MB            default 256                       backend/ocr_cache.py
+    #   QUALITY_ANALYSIS_MODE       'full' | 'proxy'                  backend/image_quality.py
+    #   QUALITY_PROXY_MAX_SIDE      default 1000                      backend/image_quality.py
+    #   MULTI_SCALE_WORKERS         default: OCR pool size            backend/multi_scale_ocr.py
+    #   ADAPTIVE_OCR_EXECUTION      'sequential' | 'concurrent'       backend/adaptive_ocr_service.py
+    #   ADAPTIVE_OCR_BUDGET_MS      0 = no budget                     backend/adaptive_ocr_service.py
+    #   ADAPTIVE_OCR_WORKERS        default: OCR pool size            backend/adaptive_ocr_service.py
+    #   INGEST_QUEUE_SIZE           per inter-stage queue (8)         backend/services/ingestion_pipeline.py
+    #   INGEST_<STAGE>_WORKERS      threads per stage                 backend/services/ingestion_pipeline.py
+    #   INGEST_AUTO_CROP            '1' = crop confident detections   backend/services/ingestion_pipeline.py
+    #   INGEST_AUTO_OCR             '1' = OCR + parse on upload       backend/services/ingestion_pipeline.py
+    #   QUEUE_STORE_DB              default backend/data/queue_store.db  backend/services/queue_store.py
+    #   QUEUE_CACHE_MAX, QUEUE_CACHE_IDLE_SECONDS, QUEUE_ARCHIVE_*, QUEUE_SWEEP_SECONDS
+    #                                                                 backend/services/queue_store.py
+    #   LEARNING_HISTORY_DIR        default backend/data/learning_history
+    #                                                                 backend/services/learning_history_tracker.py
+    #   SMART_CROP_MAX_SIDE         min long side of the reduced decode (1000)  backend/smart_crop.py
+    #   SMART_CROP_REFINE           '0' = skip full-res edge refit    backend/smart_crop.py
+    #   MODEL_REGISTRY_CHECK_SECONDS  0 = stat every call             backend/ml_models/model_registry.py
+    #   MODEL_STORE_FORMAT          binary | json | both              backend/ml_models/model_store.py
+    #   LOG_DEBUG_VOUCHERS          file names logged at DEBUG in any profile  backend/logger.py
+    
+    # OCR / parsing / batch subsystem logging (backend/logger.py get_logger)
+    LOG_PROFILE = os.environ.get('LOG_PROFILE', 'development')  # development (DEBUG) | production (WARNING, batch + ingest INFO)
+    LOG_LEVELS = os.environ.get('LOG_LEVELS')                    # per subsystem, e.g. 'parser=DEBUG,ocr=INFO'
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -23,6 +58,7 @@ class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
     TESTING = False
+    LOG_PROFILE = os.environ.get('LOG_PROFILE', 'production')
 
 class TestingConfig(Config):
     """Testing configuration."""
@@ -131,6 +131,14 @@ def init_db():
         );
         """)
 
+        # Columns added after the table was first deployed (see scripts/migrate_add_*.py);
+        # validate_voucher writes both, incremental ML training reads (validated_at, id)
+        cur.execute("""
+        ALTER TABLE vouchers_master ADD COLUMN IF NOT EXISTS parsed_json_original JSON DEFAULT NULL;
+        ALTER TABLE vouchers_master ADD COLUMN IF NOT EXISTS validated_at TIMESTAMP DEFAULT NULL;
+        CREATE INDEX IF NOT EXISTS idx_vouchers_master_validated_at ON vouchers_master (validated_at, id);
+        """)
+
         # 2. Items Table (One-to-Many)
         cur.execute("""
         CREATE TABLE IF NOT EXISTS voucher_items (
@@ -0,0 +1,149 @@
+"""
+Image Context - Decode once, share everywhere
+
+A single extract_text() call used to decode the same file three times
+(PIL in preprocess_image, PIL + cv2.imread in analyze_image_quality) and
+bounce the pixels PIL -> NumPy -> PIL between steps.  ImageContext decodes
+the file once, straight to 8-bit grayscale, and carries that array plus any
+derived products (Laplacian variance, edges, upscaled copy, quality metrics) through
+quality analysis, preprocessing and recognition.
+
+Derived products are computed lazily and cached on the context; each one is
+guarded by its own lock so concurrent readers compute it only once.
+"""
+import threading
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+# Pixels are read as stored: like PIL.Image.open (what OCR has always seen),
+# EXIF orientation is not applied.
+_GRAYSCALE_FLAGS = cv2.IMREAD_GRAYSCALE | cv2.IMREAD_IGNORE_ORIENTATION
+
+# preprocess_image: images narrower than this are upscaled 2x before OCR
+OCR_UPSCALE_MIN_WIDTH = 1000
+OCR_UPSCALE_FACTOR = 2
+
+
+class ImageContext:
+    """Decoded grayscale image plus lazily computed, cached derived products"""
+
+    def __init__(self, gray: np.ndarray, path: Optional[str] = None):
+        if gray.ndim != 2 or gray.dtype != np.uint8:
+            raise ValueError("ImageContext expects an 8-bit single-channel array")
+        gray.setflags(write=False)  # shared by every consumer - never mutate in place
+        self.gray = gray
+        self.path = path
+
+        self._derived = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_bytes(cls, data: bytes, path: Optional[str] = None) -> 'ImageContext':
+        """Decode encoded image bytes (JPEG/PNG/...) straight to grayscale"""
+        gray = cv2.imdecode(np.frombuffer(data, np.uint8), _GRAYSCALE_FLAGS)
+        if gray is None:
+            # Formats OpenCV cannot decode (e.g. GIF) - let PIL try
+            import io
+            with Image.open(io.BytesIO(data)) as img:
+                gray = np.array(ImageOps.grayscale(img))
+        return cls(gray, path)
+
+    @classmethod
+    def from_path(cls, path: str) -> 'ImageContext':
+        """Read and decode an image file once"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        return cls.from_bytes(data, path)
+
+    @classmethod
+    def from_array(cls, image: np.ndarray, path: Optional[str] = None) -> 'ImageContext':
+        """Wrap an already-decoded array (BGR, BGRA or grayscale)"""
+        if image.ndim == 3:
+            code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            image = cv2.cvtColor(image, code)
+        return cls(np.ascontiguousarray(image, dtype=np.uint8), path)
+
+    @classmethod
+    def ensure(cls, source) -> 'ImageContext':
+        """Accept either a file path or an existing context"""
+        return source if isinstance(source, cls) else cls.from_path(source)
+
+    # ------------------------------------------------------------------
+    # Basic properties
+    # ------------------------------------------------------------------
+
+    @property
+    def width(self) -> int:
+        return self.gray.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.gray.shape[0]
+
+    @property
+    def resolution(self):
+        return (self.width, self.height)
+
+    # ------------------------------------------------------------------
+    # Cached derived products
+    # ------------------------------------------------------------------
+
+    def cached(self, key, compute: Callable):
+        """Return the product stored under key, computing it exactly once"""
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._derived:
+                value = compute()
+                if isinstance(value, np.ndarray):
+                    value.setflags(write=False)
+                self._derived[key] = value
+            return self._derived[key]
+
+    def laplacian_variance(self) -> float:
+        """Variance of the Laplacian (sharpness); only the scalar is kept, not the float image"""
+        def compute():
+            std = cv2.meanStdDev(cv2.Laplacian(self.gray, cv2.CV_32F))[1][0, 0]
+            return float(std * std)
+
+        return self.cached('laplacian_variance', compute)
+
+    def edges(self) -> np.ndarray:
+        """Canny edges (50/150), used for skew detection"""
+        return self.cached('edges', lambda: cv2.Canny(self.gray, 50, 150, apertureSize=3))
+
+    def quality(self):
+        """ImageQualityMetrics for this image"""
+        from backend.image_quality import analyze_image_quality
+        return self.cached('quality', lambda: analyze_image_quality(self))
+
+    def upscaled(self, factor: float) -> np.ndarray:
+        """Grayscale image resized by factor with Lanczos resampling"""
+        if factor == 1:
+            return self.gray
+
+        def compute():
+            size = (int(self.width * factor), int(self.height * factor))
+            # PIL's Lanczos matches what preprocessing has always used
+            return np.asarray(Image.fromarray(self.gray).resize(size, Image.Resampling.LANCZOS))
+
+        return self.cached(('upscaled', factor), compute)
+
+    def ocr_base(self) -> np.ndarray:
+        """Grayscale input for preprocess_image (small images upscaled 2x)"""
+        if self.width < OCR_UPSCALE_MIN_WIDTH:
+            return self.upscaled(OCR_UPSCALE_FACTOR)
+        return self.gray
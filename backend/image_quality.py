@@ -2,12 +2,47 @@
 Image Quality Analysis Module
 Analyzes image quality metrics to determine appropriate preprocessing
 """
+import os
+
 import cv2
 import numpy as np
-from PIL import Image, ImageStat
 from dataclasses import dataclass
 from typing import Tuple
 
+# 'full' measures every pixel; 'proxy' measures a bounded-size sample of the
+# image (see analyze_image_quality_proxy) - much faster on phone photos
+QUALITY_ANALYSIS_MODE = os.getenv('QUALITY_ANALYSIS_MODE', 'full')
+
+# Pixel budget of the proxy: about PROXY_MAX_SIDE x PROXY_MAX_SIDE pixels
+PROXY_MAX_SIDE = int(os.getenv('QUALITY_PROXY_MAX_SIDE', '1000'))
+
+# Proxy -> full-resolution calibration. NOT FITTED YET: every factor is 1.0,
+# so proxy scores are uncalibrated - the raw sample estimates.  They are
+# meant to be unbiased samples of the full-resolution metrics, but that has
+# not been measured on real receipts; fit these with
+# `python -m scripts.benchmark_quality_proxy --fit` on a receipt corpus
+# before relying on QUALITY_ANALYSIS_MODE=proxy.
+PROXY_CALIBRATION = {
+    'brightness': 1.0,
+    'contrast': 1.0,
+    'sharpness': 1.0,
+    'noise_level': 1.0,
+}
+
+# Grid of full-resolution tiles the proxy samples sharpness and noise from
+PROXY_TILE_GRID = 8
+
+# Hough accumulator threshold (votes ~ line length in pixels) at full resolution
+SKEW_HOUGH_THRESHOLD = 200
+
+# Proxy skew: a text line must span this fraction of the proxy width to vote
+SKEW_PROXY_LINE_FRACTION = 0.2
+SKEW_PROXY_MIN_THRESHOLD = 50
+
+NOISE_KERNEL = np.array([[-1, -1, -1],
+                         [-1,  8, -1],
+                         [-1, -1, -1]])
+
 @dataclass
 class ImageQualityMetrics:
     """Container for image quality metrics"""
@@ -63,20 +98,27 @@ class ImageQualityMetrics:
         return max(0, score)
 
 
-def analyze_image_quality(image_path: str) -> ImageQualityMetrics:
+def analyze_image_quality(image_path, mode: str = None) -> ImageQualityMetrics:
     """
     Analyze image quality and return metrics
     
     Args:
-        image_path: Path to image file
+        image_path: Path to image file, or an ImageContext that already
+                    holds the decoded image (avoids decoding it again)
+        mode: 'full' or 'proxy' (default: QUALITY_ANALYSIS_MODE)
         
     Returns:
         ImageQualityMetrics object with all quality metrics
     """
-    # Load image
-    pil_image = Image.open(image_path)
-    cv_image = cv2.imread(image_path)
-    gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+    from backend.image_context import ImageContext
+    
+    # Load image (decoded once, straight to grayscale)
+    context = ImageContext.ensure(image_path)
+    gray = context.gray
+    
+    # Small images are measured in full either way - the proxy would be the image itself
+    if (mode or QUALITY_ANALYSIS_MODE) == 'proxy' and max(context.resolution) > PROXY_MAX_SIDE:
+        return analyze_image_quality_proxy(context)
     
     # 1. Brightness (mean pixel value)
     brightness = np.mean(gray)
@@ -85,17 +127,16 @@ def analyze_image_quality(image_path: str) -> ImageQualityMetrics:
     contrast = np.std(gray)
     
     # 3. Sharpness (Laplacian variance)
-    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-    sharpness = laplacian.var()
+    sharpness = context.laplacian_variance()
     
     # 4. Noise level (estimate using median absolute deviation)
     noise_level = estimate_noise(gray)
     
     # 5. Skew angle
-    skew_angle = detect_skew(gray)
+    skew_angle = detect_skew(gray, edges=context.edges())
     
     # 6. Resolution
-    resolution = (pil_image.width, pil_image.height)
+    resolution = context.resolution
     
     return ImageQualityMetrics(
         brightness=float(brightness),
@@ -118,12 +159,13 @@ def estimate_noise(gray_image: np.ndarray) -> float:
         Noise level (0-100)
     """
     # Use high-pass filter to isolate noise
-    kernel = np.array([[-1, -1, -1],
-                       [-1,  8, -1],
-                       [-1, -1, -1]])
-    
-    filtered = cv2.filter2D(gray_image, -1, kernel)
+    filtered = cv2.filter2D(gray_image, -1, NOISE_KERNEL)
     
+    return _noise_from_highpass(filtered)
+
+
+def _noise_from_highpass(filtered: np.ndarray) -> float:
+    """Noise level (0-100) from the high-pass response of estimate_noise"""
     # Calculate median absolute deviation
     mad = np.median(np.abs(filtered - np.median(filtered)))
     
@@ -133,38 +175,154 @@ def estimate_noise(gray_image: np.ndarray) -> float:
     return noise_level
 
 
-def detect_skew(gray_image: np.ndarray) -> float:
+def detect_skew(gray_image: np.ndarray, edges: np.ndarray = None) -> float:
     """
     Detect skew angle using Hough Line Transform
     
     Args:
         gray_image: Grayscale image array
+        edges: Precomputed Canny(50, 150) edges of gray_image, if available
         
     Returns:
         Skew angle in degrees
     """
     try:
         # Edge detection
-        edges = cv2.Canny(gray_image, 50, 150, apertureSize=3)
+        if edges is None:
+            edges = cv2.Canny(gray_image, 50, 150, apertureSize=3)
         
         # Hough Line Transform
-        lines = cv2.HoughLines(edges, 1, np.pi/180, 200)
+        lines = cv2.HoughLines(edges, 1, np.pi/180, SKEW_HOUGH_THRESHOLD)
+        
+        return _median_line_angle(lines)
+        
+    except Exception:
+        return 0.0
+
+
+def _median_line_angle(lines) -> float:
+    """Median deviation from horizontal (degrees) of HoughLines output"""
+    if lines is None:
+        return 0.0
+    
+    # Calculate angles
+    angles = []
+    for rho, theta in lines[:, 0]:
+        angle = np.degrees(theta) - 90
+        if -45 < angle < 45:  # Only consider reasonable angles
+            angles.append(angle)
+    
+    if not angles:
+        return 0.0
+    
+    # Return median angle
+    return float(np.median(angles))
+
+
+def analyze_image_quality_proxy(context, max_side: int = None) -> ImageQualityMetrics:
+    """
+    Quality metrics from a bounded-size sample of the image
+    
+    Cost is fixed by max_side rather than by the photo's resolution:
+    - brightness / contrast: every k-th pixel in each direction
+    - sharpness / noise: Laplacian and high-pass response on a grid of
+      full-resolution tiles (downsampling would change both - a blurry
+      photo looks sharp once shrunk)
+    - skew: text lines located on an INTER_AREA-downsampled copy
+    Resolution is always the full image size, so needs_upscaling() is exact.
+    Metrics are scaled by PROXY_CALIBRATION, which is not fitted yet (1.0).
+    
+    Args:
+        context: ImageContext of the image
+        max_side: proxy size budget (default PROXY_MAX_SIDE)
+        
+    Returns:
+        ImageQualityMetrics calibrated to full-resolution equivalents
+    """
+    max_side = max_side or PROXY_MAX_SIDE
+    gray = context.gray
+    height, width = gray.shape
+    
+    # 1-2. Brightness / contrast from a strided subsample
+    step = max(1, -(-max(height, width) // max_side))
+    subsample = gray[::step, ::step]
+    brightness = np.mean(subsample)
+    contrast = np.std(subsample)
+    
+    # 3-4. Sharpness / noise from full-resolution tiles
+    laplacian_values = []
+    highpass_values = []
+    for tile, inner in _sample_tiles(gray, max_side * max_side):
+        laplacian_values.append(cv2.Laplacian(tile, cv2.CV_64F)[inner].ravel())
+        highpass_values.append(cv2.filter2D(tile, -1, NOISE_KERNEL)[inner].ravel())
+    sharpness = np.concatenate(laplacian_values).var()
+    noise_level = _noise_from_highpass(np.concatenate(highpass_values))
+    
+    # 5. Skew angle on the downsampled proxy
+    skew_angle = detect_skew_proxy(gray, max_side)
+    
+    return ImageQualityMetrics(
+        brightness=float(brightness) * PROXY_CALIBRATION['brightness'],
+        contrast=float(contrast) * PROXY_CALIBRATION['contrast'],
+        sharpness=float(sharpness) * PROXY_CALIBRATION['sharpness'],
+        noise_level=min(100.0, float(noise_level) * PROXY_CALIBRATION['noise_level']),
+        skew_angle=float(skew_angle),
+        resolution=context.resolution
+    )
+
+
+def _sample_tiles(gray_image: np.ndarray, pixel_budget: int, grid: int = PROXY_TILE_GRID):
+    """
+    Yield (tile, inner_slice) for a grid x grid lattice of evenly spaced tiles
+    
+    Tiles carry a 1-pixel halo from the surrounding image so 3x3 filters see
+    real neighbours; inner_slice selects the tile proper from the filtered halo.
+    """
+    height, width = gray_image.shape
+    size = int(min(np.sqrt(pixel_budget / (grid * grid)), height / grid, width / grid))
+    size = max(size, 1)
+    
+    for y in np.linspace(0, height - size, grid).astype(int):
+        for x in np.linspace(0, width - size, grid).astype(int):
+            y0, x0 = max(0, y - 1), max(0, x - 1)
+            y1, x1 = min(height, y + size + 1), min(width, x + size + 1)
+            inner = (slice(y - y0, y - y0 + size), slice(x - x0, x - x0 + size))
+            yield gray_image[y0:y1, x0:x1], inner
+
+
+def detect_skew_proxy(gray_image: np.ndarray, max_side: int = None) -> float:
+    """
+    Detect skew on a copy downsampled to max_side on the long edge
+    
+    Character edges are too small to vote for lines once downsampled, so
+    text is binarized and smeared horizontally into line blobs first; the
+    blob edges are then fed to the same Hough / median-angle estimate as
+    detect_skew, at a finer angular step. Only lines spanning
+    SKEW_PROXY_LINE_FRACTION of the width vote, which keeps the threshold
+    independent of the original resolution.
+    
+    Args:
+        gray_image: Grayscale image array
+        max_side: proxy long-edge size (default PROXY_MAX_SIDE)
         
-        if lines is None:
-            return 0.0
+    Returns:
+        Skew angle in degrees (same sign convention as detect_skew)
+    """
+    try:
+        max_side = max_side or PROXY_MAX_SIDE
+        height, width = gray_image.shape
+        scale = min(1.0, max_side / max(height, width))
+        proxy = cv2.resize(gray_image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
         
-        # Calculate angles
-        angles = []
-        for rho, theta in lines[:, 0]:
-            angle = np.degrees(theta) - 90
-            if -45 < angle < 45:  # Only consider reasonable angles
-                angles.append(angle)
+        _, text = cv2.threshold(proxy, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        text = cv2.morphologyEx(text, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+        edges = cv2.Canny(text, 50, 150, apertureSize=3)
         
-        if not angles:
-            return 0.0
+        threshold = max(SKEW_PROXY_MIN_THRESHOLD, int(proxy.shape[1] * SKEW_PROXY_LINE_FRACTION))
+        lines = cv2.HoughLines(edges, 1, np.pi / 720, threshold)
         
-        # Return median angle
-        return float(np.median(angles))
+        return _median_line_angle(lines)
         
     except Exception:
         return 0.0
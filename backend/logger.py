@@ -1,7 +1,26 @@
+import contextvars
 import logging
+import sys
+import threading
+from contextlib import contextmanager
 from logging.handlers import RotatingFileHandler
 import os
 
+# Hot-path subsystems with their own level (get_logger); all log under 'tkfl.'
+SUBSYSTEMS = ('ocr', 'preprocess', 'parser', 'batch', 'smart_crop', 'ingest')
+
+# Default level per subsystem for each LOG_PROFILE; LOG_LEVELS overrides them
+LOG_PROFILES = {
+    'development': {'default': 'DEBUG'},
+    'production': {'default': 'WARNING', 'batch': 'INFO', 'ingest': 'INFO'},
+}
+
+_subsystems_lock = threading.Lock()
+_subsystems_configured = False
+
+# Set by voucher_debug(): everything for the current voucher is logged at DEBUG
+_voucher_debug = contextvars.ContextVar('voucher_debug', default=False)
+
 def configure_logging(app):
     """Configures logging for the application."""
     
@@ -66,3 +85,134 @@ def configure_logging(app):
     ml_logger.addHandler(ml_console)
 
     app.logger.info("ML logger configured (logs/ml.log)")
+
+    # OCR / parsing / batch subsystems (get_logger).  The profile is also
+    # exported: batch OCR worker processes configure themselves from the
+    # environment and must follow the app's profile (e.g. ProductionConfig)
+    profile = app.config.get('LOG_PROFILE')
+    if profile:
+        os.environ['LOG_PROFILE'] = profile
+    configure_subsystem_logging(profile, app.config.get('LOG_LEVELS'), force=True)
+
+
+def _parse_levels(spec):
+    """'parser=DEBUG,ocr=info' -> {'parser': 'DEBUG', 'ocr': 'INFO'}"""
+    levels = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            name, level = part.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at emit time, like print() (redirect_stdout works)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def configure_subsystem_logging(profile=None, levels=None, force=False):
+    """
+    Set the subsystem levels from LOG_PROFILE / LOG_LEVELS (or the arguments)
+
+    Runs once per process on the first get_logger() call, so OCR worker
+    processes get the same levels as the app.  Subsystem output goes to
+    stdout as bare messages, as the print() calls it replaces did.
+    """
+    global _subsystems_configured
+    with _subsystems_lock:
+        if _subsystems_configured and not force:
+            return
+        profile = profile or os.getenv('LOG_PROFILE', 'development')
+        if profile not in LOG_PROFILES:
+            print(f"[LOGGING] Unknown LOG_PROFILE '{profile}', using development")
+            profile = 'development'
+        configured = dict(LOG_PROFILES[profile])
+        configured.update(_parse_levels(levels if levels is not None else os.getenv('LOG_LEVELS')))
+
+        root = logging.getLogger('tkfl')
+        root.setLevel(configured.pop('default', 'WARNING'))
+        root.propagate = False
+        if not root.handlers:
+            handler = _StdoutHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            root.addHandler(handler)
+        for subsystem in SUBSYSTEMS:
+            logging.getLogger(f'tkfl.{subsystem}').setLevel(configured.get(subsystem, logging.NOTSET))
+        _subsystems_configured = True
+
+
+class SubsystemLogger:
+    """
+    A subsystem's logging.Logger with lazy %-style arguments
+
+    Messages below the subsystem level cost one level check - the format
+    string is not applied.  Inside voucher_debug() everything is emitted
+    whatever the level, so one voucher can be traced in production.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+
+    def isEnabledFor(self, level):
+        return _voucher_debug.get() or self.logger.isEnabledFor(level)
+
+    @property
+    def debug_enabled(self):
+        """Guard for work done only to build debug messages"""
+        return self.isEnabledFor(logging.DEBUG)
+
+    def log(self, level, msg, *args, exc_info=None):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, *args, exc_info=exc_info, stacklevel=3)
+        elif _voucher_debug.get():
+            # Below the subsystem level - hand the record straight to the handlers
+            if exc_info and not isinstance(exc_info, tuple):
+                exc_info = sys.exc_info()
+            self.logger.handle(self.logger.makeRecord(self.logger.name, level, '(voucher_debug)', 0,
+                                                      msg, args, exc_info))
+
+    def debug(self, msg, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(logging.WARNING, msg, *args)
+
+    def error(self, msg, *args, exc_info=None):
+        self.log(logging.ERROR, msg, *args, exc_info=exc_info)
+
+    def exception(self, msg, *args):
+        self.log(logging.ERROR, msg, *args, exc_info=True)
+
+
+def get_logger(subsystem):
+    """Levelled logger for one of SUBSYSTEMS (ocr, preprocess, parser, batch, smart_crop, ingest)"""
+    configure_subsystem_logging()
+    return SubsystemLogger(logging.getLogger(f'tkfl.{subsystem}'))
+
+
+@contextmanager
+def voucher_debug(enabled=True):
+    """Log everything at DEBUG for the work done inside this block (this thread/task only)"""
+    token = _voucher_debug.set(bool(enabled) or _voucher_debug.get())
+    try:
+        yield
+    finally:
+        _voucher_debug.reset(token)
+
+
+def debug_requested(name):
+    """Whether LOG_DEBUG_VOUCHERS (comma-separated file names or ids) lists this voucher"""
+    wanted = os.getenv('LOG_DEBUG_VOUCHERS')
+    if not wanted or not name:
+        return False
+    return os.path.basename(str(name)) in {item.strip() for item in wanted.split(',')}
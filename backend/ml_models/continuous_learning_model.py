@@ -9,7 +9,6 @@ This module extends the base ML models with:
 - Performance tracking and metrics
 """
 
-import json
 import os
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
@@ -18,6 +17,8 @@ import statistics
 from typing import Dict, List, Optional, Tuple, Any
 import hashlib
 
+from backend.ml_models.model_store import load_state, save_state
+
 
 class ContinuousLearningModel:
     """
@@ -27,6 +28,10 @@ class ContinuousLearningModel:
     
     MODEL_VERSION = "2.0"
     
+    # Model store kind / layout version of the saved state
+    STORE_KIND = 'continuous_learning'
+    SCHEMA_VERSION = 1
+    
     def __init__(self, model_name: str = "enhanced_model"):
         self.model_name = model_name
         self.model_version = self.MODEL_VERSION
@@ -450,7 +455,7 @@ class ContinuousLearningModel:
                 break
     
     def save_model(self, filename: str = None) -> bool:
-        """Save model to JSON file"""
+        """Save model (binary model store; see backend/ml_models/model_store.py)"""
         if filename is None:
             filename = f'{self.model_name}_v{self.model_version}.json'
         
@@ -502,8 +507,7 @@ class ContinuousLearningModel:
                 'correction_history': list(self.correction_history)[-50:]  # Last 50
             }
             
-            with open(filepath, 'w') as f:
-                json.dump(model_data, f, indent=2)
+            save_state(filepath, self.STORE_KIND, self.SCHEMA_VERSION, model_data)
             
             return True
         except Exception as e:
@@ -511,18 +515,17 @@ class ContinuousLearningModel:
             return False
     
     def load_model(self, filename: str = None) -> bool:
-        """Load model from JSON file"""
+        """Load model from the newer of its binary / JSON files"""
         if filename is None:
             filename = f'{self.model_name}_v{self.model_version}.json'
         
         try:
             filepath = os.path.join(self._model_dir, filename)
             
-            if not os.path.exists(filepath):
+            loaded = load_state(filepath, self.STORE_KIND, self.SCHEMA_VERSION)
+            if loaded is None:
                 return False
-            
-            with open(filepath, 'r') as f:
-                model_data = json.load(f)
+            _, model_data = loaded
             
             # Restore patterns
             for key, data in model_data.get('patterns', {}).items():
@@ -6,13 +6,40 @@ This module contains:
 - ParsingCorrectionModel: Learns and applies field extraction corrections
 """
 
-import json
 import os
 from datetime import datetime
 import re
-from collections import defaultdict
+from collections import Counter, defaultdict
 import statistics
 
+from backend.ml_models.model_store import load_state, save_state
+
+
+def _trie_pattern(words) -> str:
+    """
+    Regex source matching any of words, longest first at each position.
+    
+    Built as a character trie ('S', 'S0', 'SO' -> 'S(?:0|O)?') so matching
+    costs O(longest word) per position however many words there are; a
+    flat 'a|b|c' alternation is tried branch by branch.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    
+    def build(node) -> str:
+        branches = [re.escape(ch) + build(node[ch]) for ch in sorted(k for k in node if k)]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional: a longer word is tried before stopping here
+        return '(?:' + body + ')?' if '' in node else body
+    
+    return build(trie)
+
 
 class OCRCorrectionModel:
     """
@@ -23,6 +50,15 @@ class OCRCorrectionModel:
     
     MODEL_VERSION = "1.0"
     
+    # Model store kind / layout version of the saved state
+    STORE_KIND = 'ocr_corrections'
+    SCHEMA_VERSION = 1
+    
+    # A learned swap is applied globally once its top correction has this
+    # share of the votes and at least this many samples
+    RULE_MIN_CONFIDENCE = 0.8
+    RULE_MIN_SAMPLES = 2
+    
     def __init__(self):
         """Initialize OCR correction model"""
         self.model_version = self.MODEL_VERSION
@@ -31,6 +67,7 @@ class OCRCorrectionModel:
         self.last_trained = None
         self.total_samples = 0
         self._model_dir = os.path.normpath(os.path.abspath(os.path.join(os.path.dirname(__file__))))
+        self._replacer = None  # compiled (regex, rules), rebuilt after learning
         
     def learn_from_correction(self, raw_ocr: str, auto_extracted: str, user_corrected: str, field_name: str = None):
         """
@@ -62,6 +99,7 @@ class OCRCorrectionModel:
                     self.pattern_stats[bad_char][good_char] += 1
                     self.total_samples += 1
                     self.last_trained = datetime.now()
+                    self._replacer = None
     
     def get_correction_suggestion(self, text: str, confidence_threshold: float = 0.7) -> dict:
         """
@@ -112,23 +150,43 @@ class OCRCorrectionModel:
         }
         
     def apply_ocr_corrections(self, text: str) -> str:
-        """Globally apply high-confidence learned character swaps to raw text before parsing."""
+        """
+        Globally apply high-confidence learned character swaps to raw text before parsing.
+        
+        One left-to-right scan: at each position the longest learned pattern
+        wins, and replaced text is never matched again (no chained swaps).
+        """
         if not text or not self.pattern_stats:
             return text
-            
-        corrected_text = text
+        
+        replacer = self._replacer
+        if replacer is None:
+            replacer = self._replacer = self.compile_rules()
+        pattern, rules = replacer
+        if pattern is None:
+            return text
+        return pattern.sub(lambda m: rules[m.group(0)], text)
+    
+    def correction_rules(self) -> dict:
+        """{pattern: replacement} for every swap confident enough to apply globally"""
+        rules = {}
         for bad_char, corrections in self.pattern_stats.items():
             total = sum(corrections.values())
-            if total == 0: continue
-            
-            best_correction = max(corrections.items(), key=lambda x: x[1])
-            confidence = best_correction[1] / total
+            if not bad_char or total < self.RULE_MIN_SAMPLES:
+                continue
             
-            # Safely replace known bad OCR hallucinations with high confidence
-            if confidence >= 0.8 and total >= 2:
-                corrected_text = corrected_text.replace(bad_char, best_correction[0])
-                
-        return corrected_text
+            # Ties go to the correction seen first
+            best, count = max(corrections.items(), key=lambda x: x[1])
+            if count / total >= self.RULE_MIN_CONFIDENCE and best != bad_char:
+                rules[bad_char] = best
+        return rules
+    
+    def compile_rules(self):
+        """Build (regex, rules) for apply_ocr_corrections - regex is None without rules"""
+        rules = self.correction_rules()
+        if not rules:
+            return None, rules
+        return re.compile(_trie_pattern(rules)), rules
     
     def get_stats(self) -> dict:
         """Get model statistics"""
@@ -141,19 +199,18 @@ class OCRCorrectionModel:
         }
     
     def save_model(self, filename: str = 'ocr_corrections_model.json'):
-        """Save model to JSON file"""
+        """Save model (binary model store; see backend/ml_models/model_store.py)"""
         try:
             filepath = os.path.join(self._model_dir, filename)
             model_data = {
                 'version': self.model_version,
-                'trained_at': self.last_trained.isoformat() if self.last_trained else None,
+                'trained_at': self.last_trained.isoformat() if self.last_trained and not isinstance(self.last_trained, str) else self.last_trained,
                 'total_samples': self.total_samples,
                 'ocr_patterns': self.ocr_patterns,
                 'pattern_stats': {k: dict(v) for k, v in self.pattern_stats.items()}
             }
             
-            with open(filepath, 'w') as f:
-                json.dump(model_data, f, indent=2)
+            save_state(filepath, self.STORE_KIND, self.SCHEMA_VERSION, model_data)
             
             return True
         except Exception as e:
@@ -161,15 +218,14 @@ class OCRCorrectionModel:
             return False
     
     def load_model(self, filename: str = 'ocr_corrections_model.json') -> bool:
-        """Load model from JSON file"""
+        """Load model from the newer of its binary / JSON files"""
         try:
             filepath = os.path.join(self._model_dir, filename)
             
-            if not os.path.exists(filepath):
+            loaded = load_state(filepath, self.STORE_KIND, self.SCHEMA_VERSION)
+            if loaded is None:
                 return False
-            
-            with open(filepath, 'r') as f:
-                model_data = json.load(f)
+            _, model_data = loaded
             
             self.model_version = model_data.get('version', self.MODEL_VERSION)
             trained_at_str = model_data.get('trained_at')
@@ -181,6 +237,7 @@ class OCRCorrectionModel:
             self.pattern_stats = {}
             for pattern, stats_dict in model_data.get('pattern_stats', {}).items():
                 self.pattern_stats[pattern] = defaultdict(int, stats_dict)
+            self._replacer = self.compile_rules()
             
             return True
         except Exception as e:
@@ -188,6 +245,80 @@ class OCRCorrectionModel:
             return False
 
 
+class AnchorSearchIndex:
+    """
+    Tokenised view of one voucher's OCR text for learned-anchor lookups
+    
+    apply_learned_corrections looks up the date, voucher number, both totals
+    and every learned deduction in the same text; building this once means
+    lines are split and word windows joined, lowercased and bucketed by
+    length only once.
+    """
+    
+    def __init__(self, raw_ocr: str):
+        self.raw_ocr = raw_ocr
+        self.lines = [line.strip() for line in raw_ocr.split('\n') if line.strip()]
+        self.words = [line.split() for line in self.lines]
+        self._buckets = {}  # {word count: {char length: [(order, line_idx, window_idx, window)]}}
+        self._counts = {}   # {window text: {char: count}}
+    
+    @classmethod
+    def ensure(cls, source) -> 'AnchorSearchIndex':
+        """Accept either OCR text or an existing index"""
+        return source if isinstance(source, cls) else cls(source or '')
+    
+    def _windows_by_length(self, size: int) -> dict:
+        buckets = self._buckets.get(size)
+        if buckets is None:
+            buckets = {}
+            order = 0
+            for line_idx, words in enumerate(self.words):
+                for window_idx in range(len(words) - size + 1):
+                    window = " ".join(words[window_idx:window_idx + size]).lower()
+                    buckets.setdefault(len(window), []).append((order, line_idx, window_idx, window))
+                    order += 1
+            self._buckets[size] = buckets
+        return buckets
+    
+    def _char_counts(self, window: str) -> dict:
+        counts = self._counts.get(window)
+        if counts is None:
+            counts = self._counts[window] = Counter(window)
+        return counts
+    
+    def candidates(self, anchor: str, threshold: float):
+        """
+        Windows of the anchor's word count, in reading order, whose
+        SequenceMatcher(None, anchor, window).ratio() could exceed threshold.
+        
+        Uses the bounds behind real_quick_ratio() (lengths) and quick_ratio()
+        (shared characters), so no window that would match is skipped.
+        """
+        size = len(anchor.split())
+        length = len(anchor)
+        anchor_counts = Counter(anchor).items()
+        
+        in_band = [
+            bucket for window_length, bucket in self._windows_by_length(size).items()
+            if not length + window_length
+            or 2.0 * min(length, window_length) / (length + window_length) > threshold
+        ]
+        windows = in_band[0] if len(in_band) == 1 else sorted(w for bucket in in_band for w in bucket)
+        
+        for _, line_idx, window_idx, window in windows:
+            total = length + len(window)
+            if total:
+                counts = self._char_counts(window)
+                shared = 0
+                for ch, n in anchor_counts:
+                    available = counts.get(ch)
+                    if available:
+                        shared += n if n < available else available
+                if 2.0 * shared / total <= threshold:
+                    continue
+            yield line_idx, window_idx, window
+
+
 class ParsingCorrectionModel:
     """
     Model to learn from parsing corrections and suggest field extractions
@@ -197,6 +328,14 @@ class ParsingCorrectionModel:
     
     MODEL_VERSION = "1.0"
     
+    # Model store kind / layout version of the saved state
+    STORE_KIND = 'parsing_corrections'
+    SCHEMA_VERSION = 1
+    
+    # find_value_by_anchor: minimum SequenceMatcher ratio between a learned
+    # anchor and an OCR word window
+    ANCHOR_MATCH_RATIO = 0.82
+    
     def __init__(self):
         """Initialize parsing correction model"""
         self.model_version = self.MODEL_VERSION
@@ -209,6 +348,9 @@ class ParsingCorrectionModel:
         
         self.last_trained = None
         self.total_samples = 0
+        # Position in the feedback sources this model has consumed (see
+        # MLTrainingService.collect_training_data); None = never trained incrementally
+        self.training_watermark = None
         self._model_dir = os.path.normpath(os.path.abspath(os.path.join(os.path.dirname(__file__))))
     
     def learn_from_correction(self, field_name: str, raw_ocr: str, auto_extracted: str, user_corrected: str):
@@ -368,9 +510,13 @@ class ParsingCorrectionModel:
                 
         return None
 
-    def find_value_by_anchor(self, field_name: str, raw_ocr: str, supplier_name: str) -> dict:
+    def find_value_by_anchor(self, field_name: str, raw_ocr, supplier_name: str) -> dict:
         """
         Scan raw OCR for values using learned fuzzy anchors for this supplier.
+        
+        Args:
+            raw_ocr: OCR text, or an AnchorSearchIndex of it - pass the index
+                when looking up several fields of the same voucher
         """
         if not supplier_name:
             return None
@@ -387,48 +533,49 @@ class ParsingCorrectionModel:
         sorted_anchors = sorted(anchors.items(), key=lambda x: x[1], reverse=True)
         import difflib
         
-        lines = [line.strip() for line in raw_ocr.split('\n') if line.strip()]
+        index = AnchorSearchIndex.ensure(raw_ocr)
+        lines = index.lines
         
         for anchor_text, count in sorted_anchors:
             if count < 1: continue # Ignore noise
             
             anchor_words = anchor_text.split()
             anchor_len = len(anchor_words)
+            anchor_lower = anchor_text.lower()
+            matcher = difflib.SequenceMatcher(None)
+            matcher.set_seq1(anchor_lower)
             
-            for line_idx, line in enumerate(lines):
-                words = line.split()
-                if len(words) < anchor_len:
-                    continue
+            # Sliding window of words to find the anchor; windows that cannot
+            # reach the threshold (length, shared characters) are skipped
+            for line_idx, window_idx, window in index.candidates(anchor_lower, self.ANCHOR_MATCH_RATIO):
+                matcher.set_seq2(window)
+                similarity = matcher.ratio()
                     
-                # Sliding window of words to find the anchor
-                for window_idx in range(len(words) - anchor_len + 1):
-                    window = " ".join(words[window_idx:window_idx + anchor_len])
-                    similarity = difflib.SequenceMatcher(None, anchor_text.lower(), window.lower()).ratio()
+                if similarity > self.ANCHOR_MATCH_RATIO:  # Fuzzy match threshold to ignore bad OCR!
+                    words = index.words[line_idx]
+                    # We found the anchor! The value is what follows it
+                    remaining_line = " ".join(words[window_idx + anchor_len:])
+                    # Clean leading separators
+                    remaining_line = re.sub(r"^[\s:=-]+", "", remaining_line).strip()
                     
-                    if similarity > 0.82:  # Fuzzy match threshold to ignore bad OCR!
-                        # We found the anchor! The value is what follows it
-                        remaining_line = " ".join(words[window_idx + anchor_len:])
-                        # Clean leading separators
-                        remaining_line = re.sub(r"^[\s:=-]+", "", remaining_line).strip()
-                        
-                        value = remaining_line
+                    value = remaining_line
+                    
+                    if not value and line_idx + 1 < len(lines):
+                        # Value is on the next line (Spatial Context)
+                        value = lines[line_idx + 1].strip()
                         
-                        if not value and line_idx + 1 < len(lines):
-                            # Value is on the next line (Spatial Context)
-                            value = lines[line_idx + 1].strip()
-                            
-                        if value:
-                            # Basic cleanup: stop at double space or large gaps
-                            value = re.sub(r"\s{2,}.*", "", value)
-                            return {
-                                'value': value,
-                                'confidence': 0.85 + (min(count, 10) / 100.0), # Active high confidence
-                                'anchor': anchor_text
-                            }
+                    if value:
+                        # Basic cleanup: stop at double space or large gaps
+                        value = re.sub(r"\s{2,}.*", "", value)
+                        return {
+                            'value': value,
+                            'confidence': 0.85 + (min(count, 10) / 100.0), # Active high confidence
+                            'anchor': anchor_text
+                        }
         return None
 
     def save_model(self, filename: str = 'parsing_corrections_model.json'):
-        """Save model to JSON file"""
+        """Save model (binary model store; see backend/ml_models/model_store.py)"""
         try:
             filepath = os.path.join(self._model_dir, filename)
             
@@ -441,18 +588,18 @@ class ParsingCorrectionModel:
 
             model_data = {
                 'version': self.model_version,
-                'trained_at': self.last_trained.isoformat() if self.last_trained else None,
+                'trained_at': self.last_trained.isoformat() if self.last_trained and not isinstance(self.last_trained, str) else self.last_trained,
                 'total_samples': self.total_samples,
                 'parsing_corrections': self.parsing_corrections,
                 'learned_anchors': learned_anchors_dict,
                 'field_stats': {
                     field: {auto: dict(corrections) for auto, corrections in stats.items()}
                     for field, stats in self.field_stats.items()
-                }
+                },
+                'training_watermark': self.training_watermark
             }
             
-            with open(filepath, 'w') as f:
-                json.dump(model_data, f, indent=2)
+            save_state(filepath, self.STORE_KIND, self.SCHEMA_VERSION, model_data)
             
             return True
         except Exception as e:
@@ -460,36 +607,38 @@ class ParsingCorrectionModel:
             return False
     
     def load_model(self, filename: str = 'parsing_corrections_model.json') -> bool:
-        """Load model from JSON file"""
+        """Load model from the newer of its binary / JSON files"""
         try:
             filepath = os.path.join(self._model_dir, filename)
             
-            if not os.path.exists(filepath):
+            loaded = load_state(filepath, self.STORE_KIND, self.SCHEMA_VERSION)
+            if loaded is None:
                 return False
-            
-            with open(filepath, 'r') as f:
-                model_data = json.load(f)
+            _, model_data = loaded
             
             self.model_version = model_data.get('version', self.MODEL_VERSION)
             trained_at_str = model_data.get('trained_at')
             self.last_trained = trained_at_str  # Store as string
             self.total_samples = model_data.get('total_samples', 0)
             self.parsing_corrections = model_data.get('parsing_corrections', {})
+            self.training_watermark = model_data.get('training_watermark')
             
-            # Restore learned anchors
+            # Restore learned anchors (built level by level rather than per anchor)
             anchors_data = model_data.get('learned_anchors', {})
-            self.learned_anchors = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-            for supp, fields in anchors_data.items():
-                for fld, anchors in fields.items():
-                    for anchor, count in anchors.items():
-                        self.learned_anchors[supp][fld][anchor] = count
+            self.learned_anchors = defaultdict(lambda: defaultdict(lambda: defaultdict(int)), {
+                supp: defaultdict(lambda: defaultdict(int), {
+                    fld: defaultdict(int, anchors) for fld, anchors in fields.items()
+                })
+                for supp, fields in anchors_data.items()
+            })
 
             # Restore field_stats
-            self.field_stats = {}
-            for field, stats_dict in model_data.get('field_stats', {}).items():
-                self.field_stats[field] = {}
-                for auto, corrections_dict in stats_dict.items():
-                    self.field_stats[field][auto] = defaultdict(int, corrections_dict)
+            self.field_stats = {
+                field: defaultdict(lambda: defaultdict(int), {
+                    auto: defaultdict(int, corrections_dict) for auto, corrections_dict in stats_dict.items()
+                })
+                for field, stats_dict in model_data.get('field_stats', {}).items()
+            }
             
             return True
         except Exception as e:
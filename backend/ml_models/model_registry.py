@@ -0,0 +1,254 @@
+"""
+Model Registry - Resident learned models with hot reload
+
+apply_learned_corrections used to build fresh OCRCorrectionModel /
+ParsingCorrectionModel objects and json.load both files for every voucher,
+and every smart-crop detection re-read smart_crop_model.json.  The registry
+loads each model once per process and hands readers a ModelSnapshot.
+
+A snapshot is never modified after it is published: a reload builds a new
+model object and swaps the snapshot reference, so a reader holding the old
+one keeps a consistent model for the rest of its voucher.  Readers must
+treat snapshot.model as read-only.
+
+Reloads happen when
+    - training calls reload(name) after saving (same process), or
+    - the (mtime, size, inode) of the model's .bin or .json file changes -
+      checked at most every MODEL_REGISTRY_CHECK_SECONDS, so other worker
+      processes pick up a model trained elsewhere.
+A file that fails to load keeps the previous snapshot in service; a
+deleted file retires it.
+
+Configuration (environment):
+    MODEL_REGISTRY_CHECK_SECONDS   mtime check interval (default 1, 0 = every call)
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from backend.ml_models.ml_correction_model import OCRCorrectionModel, ParsingCorrectionModel
+from backend.ml_models.model_store import load_state, model_paths, resolve
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """One published version of a model"""
+    name: str
+    model: Any
+    generation: int            # +1 for every successful (re)load in this process
+    model_version: Optional[str]
+    trained_at: Optional[str]
+    path: str
+    mtime: float
+    loaded_at: str
+    load_ms: float
+
+
+class _Entry:
+    def __init__(self, name: str, path: str, loader: Callable[[str], Any]):
+        self.name = name
+        self.path = path
+        self.watched = model_paths(path)
+        self.loader = loader
+        self.snapshot: Optional[ModelSnapshot] = None
+        self.signature = None
+        self.checked_at = None
+        self.generation = 0
+        self.loads = 0
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+
+
+def _file_signature(paths):
+    """(mtime, size, inode) of each file, or None when none of them exist"""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+            continue
+        signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+    return tuple(signature) if any(signature) else None
+
+
+class ModelRegistry:
+    """Process-wide store of learned models, reloaded when their file changes"""
+
+    def __init__(self, check_interval: float = None):
+        if check_interval is None:
+            check_interval = float(os.getenv('MODEL_REGISTRY_CHECK_SECONDS', '1'))
+        self.check_interval = check_interval
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, path: str, loader: Callable[[str], Any]) -> None:
+        """
+        Add a model; nothing is read until the first get().
+
+        Args:
+            name: registry key ('ocr_corrections', ...)
+            path: model file; its .bin and .json variants are both watched
+            loader: loader(path) -> model object, or None if it cannot be loaded
+        """
+        with self._lock:
+            self._entries[name] = _Entry(name, path, loader)
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    def get(self, name: str) -> Optional[ModelSnapshot]:
+        """Current snapshot of a model, or None if it is not available"""
+        entry = self._entries[name]
+        checked_at = entry.checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.check_interval:
+            return entry.snapshot
+        with self._lock:
+            self._refresh(entry, force=False)
+            return entry.snapshot
+
+    def model(self, name: str):
+        """Shortcut for get(name).model (None when unavailable)"""
+        snapshot = self.get(name)
+        return snapshot.model if snapshot is not None else None
+
+    # ------------------------------------------------------------------
+    # Reload
+    # ------------------------------------------------------------------
+
+    def reload(self, name: str = None) -> None:
+        """Re-read a model (or all of them) now - call after saving a new version"""
+        with self._lock:
+            names = [name] if name else list(self._entries)
+            for key in names:
+                self._refresh(self._entries[key], force=True)
+
+    def _refresh(self, entry: _Entry, force: bool) -> None:
+        entry.checked_at = time.monotonic()
+        signature = _file_signature(entry.watched)
+        if not force and signature == entry.signature:
+            return
+        entry.signature = signature
+
+        if signature is None:
+            if entry.snapshot is not None:
+                print(f"[MODEL REGISTRY] {entry.name} removed ({entry.path})")
+            entry.snapshot = None
+            return
+
+        start = time.perf_counter()
+        try:
+            model = entry.loader(entry.path)
+            error = None if model is not None else 'loader returned nothing'
+        except Exception as e:
+            model, error = None, str(e)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        if model is None:
+            # Keep serving the previous version
+            entry.failures += 1
+            entry.last_error = error
+            print(f"[MODEL REGISTRY] Failed to load {entry.name}: {error}")
+            return
+
+        replacing = entry.snapshot is not None
+        entry.generation += 1
+        entry.loads += 1
+        entry.reloads += replacing
+        entry.last_error = None
+        entry.snapshot = ModelSnapshot(
+            name=entry.name,
+            model=model,
+            generation=entry.generation,
+            model_version=_model_field(model, 'version', 'model_version'),
+            trained_at=_model_field(model, 'trained_at', 'last_trained'),
+            path=resolve(entry.path) or entry.path,
+            mtime=max(sig[0] for sig in signature if sig) / 1e9,
+            loaded_at=datetime.now().isoformat(),
+            load_ms=round(load_ms, 2),
+        )
+        print(f"[MODEL REGISTRY] {'Reloaded' if replacing else 'Loaded'} {entry.name} "
+              f"gen {entry.generation} (version {entry.snapshot.model_version}, "
+              f"trained {entry.snapshot.trained_at}) in {load_ms:.1f}ms")
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Per-model load counters and the active version"""
+        with self._lock:
+            result = {}
+            for name, entry in self._entries.items():
+                snapshot = entry.snapshot
+                result[name] = {
+                    'path': snapshot.path if snapshot else entry.path,
+                    'loaded': snapshot is not None,
+                    'generation': snapshot.generation if snapshot else None,
+                    'model_version': snapshot.model_version if snapshot else None,
+                    'trained_at': snapshot.trained_at if snapshot else None,
+                    'loaded_at': snapshot.loaded_at if snapshot else None,
+                    'load_ms': snapshot.load_ms if snapshot else None,
+                    'loads': entry.loads,
+                    'reloads': entry.reloads,
+                    'failures': entry.failures,
+                    'last_error': entry.last_error,
+                }
+            return result
+
+
+def _model_field(model, key: str, attr: str):
+    value = model.get(key) if isinstance(model, dict) else getattr(model, attr, None)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# ----------------------------------------------------------------------
+# Loaders for the built-in models
+# ----------------------------------------------------------------------
+
+def load_ocr_corrections(path: str) -> Optional[OCRCorrectionModel]:
+    model = OCRCorrectionModel()
+    return model if model.load_model(path) else None
+
+
+def load_parsing_corrections(path: str) -> Optional[ParsingCorrectionModel]:
+    model = ParsingCorrectionModel()
+    return model if model.load_model(path) else None
+
+
+def load_smart_crop(path: str) -> Optional[Dict]:
+    loaded = load_state(path, 'smart_crop')
+    return loaded[1] if loaded is not None else None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the shared registry with the OCR, parsing and smart-crop models"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = ModelRegistry()
+                registry.register('ocr_corrections',
+                                  os.path.join(MODELS_DIR, 'ocr_corrections_model.json'),
+                                  load_ocr_corrections)
+                registry.register('parsing_corrections',
+                                  os.path.join(MODELS_DIR, 'parsing_corrections_model.json'),
+                                  load_parsing_corrections)
+                registry.register('smart_crop',
+                                  os.path.join(MODELS_DIR, 'smart_crop_model.json'),
+                                  load_smart_crop)
+                _registry = registry
+    return _registry
@@ -0,0 +1,247 @@
+"""
+Model Store - Compact binary files for learned models
+
+Models used to be written as indent=2 JSON, which is large and slow to
+parse once anchor and pattern tables grow.  They are now saved as a small
+versioned binary container next to the JSON name (foo_model.json ->
+foo_model.bin):
+
+    offset  size  field
+    0       4     magic b'TKML'
+    4       2     FORMAT_VERSION (this container layout)
+    6       2     schema version of the model state (owned by the model class)
+    8       24    model kind, ASCII, NUL padded ('ocr_corrections', ...)
+    32      8     payload length
+    40      4     CRC-32 of the payload
+    44      ...   payload: pickle (protocol 5) of the model state
+
+The state is the same plain dict the JSON file holds - dicts with string
+keys, lists, str, int, float, bool, None - normalised exactly as JSON would
+(tuples -> lists, other values -> str).  It is read with an Unpickler that
+resolves no globals, so a model file can only ever produce plain data; a
+file naming any class or function is rejected.
+
+load_state() reads whichever of foo_model.bin / foo_model.json is newer, so
+existing JSON models keep working and a hand-edited JSON export can be put
+back in place.  scripts/model_store_tool.py exports binaries to JSON for
+inspection and converts JSON models to binary.
+
+Configuration (environment):
+    MODEL_STORE_FORMAT   'binary' (default), 'json', or 'both' - what save_state writes
+"""
+import io
+import json
+import os
+import pickle
+import struct
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+MAGIC = b'TKML'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<4sHH24sQI')
+
+BINARY_EXT = '.bin'
+JSON_EXT = '.json'
+
+
+class ModelFormatError(ValueError):
+    """A model file is corrupt, of the wrong kind, or newer than this code"""
+
+
+class _DataOnlyUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        raise ModelFormatError(f"model payload references {module}.{name}; only plain data is allowed")
+
+
+# ----------------------------------------------------------------------
+# Paths
+# ----------------------------------------------------------------------
+
+def binary_path(path: str) -> str:
+    """foo_model.json / foo_model.bin / foo_model -> foo_model.bin"""
+    base, ext = os.path.splitext(path)
+    return (base if ext in (BINARY_EXT, JSON_EXT) else path) + BINARY_EXT
+
+
+def json_path(path: str) -> str:
+    """foo_model.json / foo_model.bin / foo_model -> foo_model.json"""
+    base, ext = os.path.splitext(path)
+    return (base if ext in (BINARY_EXT, JSON_EXT) else path) + JSON_EXT
+
+
+def model_paths(path: str) -> Tuple[str, str]:
+    """(binary, json) files that can hold the model named by path"""
+    return binary_path(path), json_path(path)
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def resolve(path: str) -> Optional[str]:
+    """The file load_state would read: the newer of .bin/.json (binary on a tie)"""
+    bin_file, json_file = model_paths(path)
+    bin_mtime, json_mtime = _mtime(bin_file), _mtime(json_file)
+    if bin_mtime is None and json_mtime is None:
+        return None
+    if json_mtime is None or (bin_mtime is not None and bin_mtime >= json_mtime):
+        return bin_file
+    return json_file
+
+
+# ----------------------------------------------------------------------
+# State normalisation
+# ----------------------------------------------------------------------
+
+def _plain(value):
+    """Convert to what a JSON round trip would give (dict subclasses, deques, datetimes...)"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {_plain_key(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)) or type(value).__name__ == 'deque':
+        return [_plain(v) for v in value]
+    return str(value)
+
+
+def _plain_key(key) -> str:
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps(key)  # same spelling json.dump gives dict keys
+    return str(key)
+
+
+# ----------------------------------------------------------------------
+# Binary container
+# ----------------------------------------------------------------------
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def encode(kind: str, schema_version: int, state: Dict) -> bytes:
+    """Serialise a model state into the binary container"""
+    kind_bytes = kind.encode('ascii')
+    if len(kind_bytes) > 24:
+        raise ValueError(f"model kind too long: {kind}")
+    payload = pickle.dumps(_plain(state), protocol=5)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, schema_version, kind_bytes,
+                          len(payload), zlib.crc32(payload))
+    return header + payload
+
+
+def _parse_header(data: bytes) -> Dict:
+    if len(data) < _HEADER.size:
+        raise ModelFormatError("model file truncated")
+    magic, fmt, schema_version, kind_bytes, length, crc = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ModelFormatError("not a model file")
+    if fmt > FORMAT_VERSION:
+        raise ModelFormatError(f"model container version {fmt} is newer than supported ({FORMAT_VERSION})")
+    return {
+        'format_version': fmt,
+        'schema_version': schema_version,
+        'kind': kind_bytes.rstrip(b'\0').decode('ascii'),
+        'payload_bytes': length,
+        'crc32': crc,
+    }
+
+
+def decode(data: bytes, kind: str = None) -> Tuple[int, Dict]:
+    """Parse a binary container; returns (schema_version, state)"""
+    header = _parse_header(data)
+    if kind is not None and header['kind'] != kind:
+        raise ModelFormatError(f"expected a {kind} model, file holds {header['kind']}")
+
+    payload = memoryview(data)[_HEADER.size:_HEADER.size + header['payload_bytes']]
+    if len(payload) != header['payload_bytes'] or zlib.crc32(payload) != header['crc32']:
+        raise ModelFormatError("model payload is truncated or corrupt")
+    return header['schema_version'], _DataOnlyUnpickler(io.BytesIO(payload)).load()
+
+
+def read_header(path: str) -> Dict:
+    """Kind and versions of a binary model file, without reading the payload"""
+    with open(binary_path(path), 'rb') as f:
+        return _parse_header(f.read(_HEADER.size))
+
+
+# ----------------------------------------------------------------------
+# Save / load
+# ----------------------------------------------------------------------
+
+def save_state(path: str, kind: str, schema_version: int, state: Dict, fmt: str = None) -> str:
+    """
+    Atomically write a model state; returns the primary file written.
+
+    Args:
+        path: model path with or without extension (foo_model.json is fine)
+        kind: model kind stored in the header
+        schema_version: version of the state layout
+        fmt: 'binary', 'json' or 'both' (default MODEL_STORE_FORMAT)
+    """
+    fmt = (fmt or os.getenv('MODEL_STORE_FORMAT', 'binary')).lower()
+    written = None
+    if fmt in ('json', 'both'):
+        payload = dict(_plain(state), schema_version=schema_version)
+        _atomic_write(json_path(path), json.dumps(payload, indent=2).encode('utf-8'))
+        written = json_path(path)
+    if fmt != 'json':
+        # Written last so the binary is the newer file
+        _atomic_write(binary_path(path), encode(kind, schema_version, state))
+        written = binary_path(path)
+    return written
+
+
+def load_state(path: str, kind: str = None, max_schema: int = None) -> Optional[Tuple[int, Dict]]:
+    """
+    Read a model state from the newer of the .bin/.json files.
+
+    Returns (schema_version, state), or None when neither file exists.
+    JSON files written before the binary format count as schema 1.
+    """
+    source = resolve(path)
+    if source is None:
+        return None
+    if source.endswith(BINARY_EXT):
+        with open(source, 'rb') as f:
+            schema_version, state = decode(f.read(), kind)
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        schema_version = state.pop('schema_version', 1)
+    if max_schema is not None and schema_version > max_schema:
+        raise ModelFormatError(f"{os.path.basename(source)} has schema {schema_version}, "
+                               f"this code reads up to {max_schema}")
+    return schema_version, state
+
+
+def export_json(path: str, out_path: str = None) -> str:
+    """
+    Write a binary model as indented JSON for inspection; returns the JSON path.
+
+    The default output is foo_model.export.json, not foo_model.json, so the
+    export does not shadow the binary (load_state prefers the newer file).
+    """
+    with open(binary_path(path), 'rb') as f:
+        data = f.read()
+    kind = _parse_header(data)['kind']
+    schema_version, state = decode(data)
+    out_path = out_path or os.path.splitext(binary_path(path))[0] + '.export' + JSON_EXT
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(state, schema_version=schema_version), f, indent=2)
+    print(f"[MODEL STORE] Exported {kind} schema {schema_version} to {out_path}")
+    return out_path
@@ -1,42 +1,52 @@
 """
 Multi-Scale OCR Processing
 Process images at multiple scales and combine results using voting
+
+The image is decoded once (ImageContext) and every scale is resized from
+that shared grayscale base. Scales run concurrently on a shared thread pool
+(Tesseract releases the GIL, and the engine pool hands each thread its own
+instance). With a target confidence, scales are launched smallest first and
+no larger scale is started once a finished one reaches the target.
+
+Configuration (environment):
+    MULTI_SCALE_WORKERS   concurrent scales (default: OCR engine pool size)
 """
-import pytesseract
-from PIL import Image
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
 import numpy as np
 from collections import Counter
 from typing import List, Dict, Tuple
 
+from backend.image_context import ImageContext
+from backend.logger import get_logger
+from backend.ocr_engine import get_ocr_engine
+
+log = get_logger('ocr')
+
 
-def process_at_scale(image_path: str, scale: float, custom_config: str) -> Dict:
+def process_at_scale(image_path, scale: float, custom_config: str) -> Dict:
     """
     Process image at a specific scale
     
     Args:
-        image_path: Path to image
+        image_path: Path to image, or an ImageContext shared between scales
         scale: Scale factor (1.0 = original, 1.5 = 150%, 2.0 = 200%)
         custom_config: Tesseract configuration
         
     Returns:
         Dictionary with text, confidence, and scale info
     """
-    # Load and scale image
-    img = Image.open(image_path)
-    
-    if scale != 1.0:
-        new_size = (int(img.width * scale), int(img.height * scale))
-        img = img.resize(new_size, Image.Resampling.LANCZOS)
-    
-    # Extract text with confidence
-    data = pytesseract.image_to_data(img, lang="eng", config=custom_config, output_type=pytesseract.Output.DICT)
+    # Scale the shared decoded image (Lanczos, cached per scale)
+    context = ImageContext.ensure(image_path)
+    img = context.upscaled(scale)
     
-    # Calculate average confidence
-    confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-    
-    # Get plain text
-    text = pytesseract.image_to_string(img, lang="eng", config=custom_config)
+    # Single recognition pass gives both word confidences and text
+    recognition = get_ocr_engine().recognize(img, lang="eng", config=custom_config)
+    data = recognition.data
+    avg_confidence = recognition.confidence
+    text = recognition.text
     
     return {
         'text': text.strip(),
@@ -46,8 +56,109 @@ def process_at_scale(image_path: str, scale: float, custom_config: str) -> Dict:
     }
 
 
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_worker_count() -> int:
+    """Concurrent scales - more than the engine pool would only queue for an instance"""
+    workers = os.getenv('MULTI_SCALE_WORKERS')
+    if workers:
+        return max(1, int(workers))
+    return get_ocr_engine().pool_size
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Shared pool so repeated calls do not pay thread start-up.
+
+    Sized once from get_worker_count() and never replaced: concurrent calls
+    with different scale lists share it, and each call caps its own in-flight
+    scales (run_scales' workers).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_worker_count(), thread_name_prefix='multi-scale')
+        return _executor
+
+
+def run_scales(image_path, scales: List[float], custom_config: str, label: str = 'MULTI-SCALE',
+               workers: int = None, target_confidence: float = None) -> List[Dict]:
+    """
+    OCR one image at several scales, concurrently
+    
+    Args:
+        image_path: Path to image or ImageContext
+        scales: Scale factors to try
+        custom_config: Tesseract configuration
+        label: Log prefix of the calling strategy
+        workers: Concurrent scales (default get_worker_count())
+        target_confidence: Stop launching larger scales once a finished
+            scale reaches this confidence (None = always run every scale)
+        
+    Returns:
+        Results of the scales that ran, in the order scales were given
+    """
+    # Decode once - every scale resizes the same grayscale base
+    context = ImageContext.ensure(image_path)
+    workers = max(1, min(workers or get_worker_count(), len(scales)))
+    
+    # Early exit only helps if cheap (small) scales go first
+    launch_order = sorted(scales) if target_confidence is not None else list(scales)
+    pending = list(launch_order)
+    
+    executor = _get_executor() if workers > 1 else None
+    results = {}
+    target_met = False
+    running = {}
+    
+    def launch():
+        scale = pending.pop(0)
+        if executor is None:
+            future = _run_inline(process_at_scale, context, scale, custom_config)
+        else:
+            future = executor.submit(process_at_scale, context, scale, custom_config)
+        running[future] = scale
+    
+    while pending and len(running) < workers:
+        launch()
+    
+    while running:
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for future in done:
+            scale = running.pop(future)
+            try:
+                results[scale] = future.result()
+            except Exception as e:
+                log.warning("[%s] Error at scale %sx: %s", label, scale, e)
+                continue
+            
+            if target_confidence is not None and results[scale]['confidence'] >= target_confidence:
+                target_met = True
+        
+        if target_met and pending:
+            log.debug("[%s] Target confidence %s%% reached - skipping scales %s", label, target_confidence, pending)
+            pending.clear()
+        while pending and len(running) < workers:
+            launch()
+    
+    return [results[scale] for scale in scales if scale in results]
+
+
+def _run_inline(func, *args):
+    """Run func now and wrap the outcome in a completed Future (serial path)"""
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
 def multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0], 
-                    custom_config: str = None) -> Dict:
+                    custom_config: str = None, workers: int = None,
+                    target_confidence: float = None) -> Dict:
     """
     Process image at multiple scales and combine results
     
@@ -55,6 +166,8 @@ def multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0],
         image_path: Path to image
         scales: List of scale factors to try
         custom_config: Tesseract configuration
+        workers: Concurrent scales (default MULTI_SCALE_WORKERS / engine pool size)
+        target_confidence: Skip larger scales once one reaches this confidence
         
     Returns:
         Dictionary with best result and all scale results
@@ -62,17 +175,12 @@ def multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0],
     if custom_config is None:
         custom_config = r'--oem 1 --psm 6'
     
-    results = []
-    
     # Process at each scale
-    for scale in scales:
-        try:
-            result = process_at_scale(image_path, scale, custom_config)
-            results.append(result)
-            print(f"[MULTI-SCALE] Scale {scale}x: {result['confidence']:.1f}% confidence, {result['word_count']} words")
-        except Exception as e:
-            print(f"[MULTI-SCALE] Error at scale {scale}x: {e}")
-            continue
+    results = run_scales(image_path, scales, custom_config, 'MULTI-SCALE',
+                         workers=workers, target_confidence=target_confidence)
+    for result in results:
+        log.debug("[MULTI-SCALE] Scale %sx: %.1f%% confidence, %d words",
+                  result['scale'], result['confidence'], result['word_count'])
     
     if not results:
         raise Exception("All scales failed")
@@ -80,7 +188,7 @@ def multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0],
     # Find best result by confidence
     best_result = max(results, key=lambda x: x['confidence'])
     
-    print(f"[MULTI-SCALE] Best scale: {best_result['scale']}x ({best_result['confidence']:.1f}%)")
+    log.debug("[MULTI-SCALE] Best scale: %sx (%.1f%%)", best_result['scale'], best_result['confidence'])
     
     return {
         'text': best_result['text'],
@@ -91,7 +199,8 @@ def multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0],
 
 
 def voting_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0],
-                           custom_config: str = None) -> Dict:
+                           custom_config: str = None, workers: int = None,
+                           target_confidence: float = None) -> Dict:
     """
     Process at multiple scales and use voting to combine results
     
@@ -99,6 +208,9 @@ def voting_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0
         image_path: Path to image
         scales: List of scale factors
         custom_config: Tesseract configuration
+        workers: Concurrent scales (default MULTI_SCALE_WORKERS / engine pool size)
+        target_confidence: Skip larger scales once one reaches this confidence
+            (fewer voters - leave unset when consensus matters more than speed)
         
     Returns:
         Dictionary with voted result
@@ -106,16 +218,9 @@ def voting_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0
     if custom_config is None:
         custom_config = r'--oem 1 --psm 6'
     
-    results = []
-    
     # Process at each scale
-    for scale in scales:
-        try:
-            result = process_at_scale(image_path, scale, custom_config)
-            results.append(result)
-        except Exception as e:
-            print(f"[VOTING] Error at scale {scale}x: {e}")
-            continue
+    results = run_scales(image_path, scales, custom_config, 'VOTING',
+                         workers=workers, target_confidence=target_confidence)
     
     if not results:
         raise Exception("All scales failed")
@@ -126,7 +231,7 @@ def voting_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0
     # If all different, pick highest confidence
     if len(set(texts)) == len(texts):
         best_result = max(results, key=lambda x: x['confidence'])
-        print(f"[VOTING] All different - using highest confidence: {best_result['scale']}x")
+        log.debug("[VOTING] All different - using highest confidence: %sx", best_result['scale'])
     else:
         # Find most common
         text_counter = Counter(texts)
@@ -135,7 +240,7 @@ def voting_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0
         # Get result with most common text and highest confidence
         matching_results = [r for r in results if r['text'] == most_common_text]
         best_result = max(matching_results, key=lambda x: x['confidence'])
-        print(f"[VOTING] Consensus text found at scale: {best_result['scale']}x")
+        log.debug("[VOTING] Consensus text found at scale: %sx", best_result['scale'])
     
     return {
         'text': best_result['text'],
@@ -146,7 +251,8 @@ def voting_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0
 
 
 def weighted_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2.0],
-                             custom_config: str = None) -> Dict:
+                             custom_config: str = None, workers: int = None,
+                             target_confidence: float = None) -> Dict:
     """
     Process at multiple scales with confidence-weighted selection
     
@@ -154,6 +260,8 @@ def weighted_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2
         image_path: Path to image
         scales: List of scale factors
         custom_config: Tesseract configuration
+        workers: Concurrent scales (default MULTI_SCALE_WORKERS / engine pool size)
+        target_confidence: Skip larger scales once one reaches this confidence
         
     Returns:
         Dictionary with weighted best result
@@ -161,16 +269,9 @@ def weighted_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2
     if custom_config is None:
         custom_config = r'--oem 1 --psm 6'
     
-    results = []
-    
     # Process at each scale
-    for scale in scales:
-        try:
-            result = process_at_scale(image_path, scale, custom_config)
-            results.append(result)
-        except Exception as e:
-            print(f"[WEIGHTED] Error at scale {scale}x: {e}")
-            continue
+    results = run_scales(image_path, scales, custom_config, 'WEIGHTED',
+                         workers=workers, target_confidence=target_confidence)
     
     if not results:
         raise Exception("All scales failed")
@@ -183,7 +284,8 @@ def weighted_multi_scale_ocr(image_path: str, scales: List[float] = [1.0, 1.5, 2
     # Pick best score
     best_result = max(results, key=lambda x: x['score'])
     
-    print(f"[WEIGHTED] Best weighted score: {best_result['scale']}x (conf: {best_result['confidence']:.1f}%, words: {best_result['word_count']})")
+    log.debug("[WEIGHTED] Best weighted score: %sx (conf: %.1f%%, words: %d)",
+              best_result['scale'], best_result['confidence'], best_result['word_count'])
     
     return {
         'text': best_result['text'],
@@ -0,0 +1,246 @@
+"""
+OCR Result Cache - Content-addressed on-disk cache of Tesseract output
+
+Re-uploads, /reprocess, reprocess_db and re_extract used to rerun the whole
+preprocessing + Tesseract pipeline on images we had already read.  Results
+are now stored under a key derived from:
+
+    (image content hash, crop box, preprocessing method,
+     Tesseract config, engine version, PREPROCESSING_VERSION)
+
+so an identical request skips OCR entirely.  Only the raw OCR output is
+cached; text/decimal corrections are cheap and always re-applied, so fixes
+to them take effect without invalidating the cache.  Bump
+PREPROCESSING_VERSION when preprocessing changes in a way that alters output.
+
+Storage is one small JSON file per entry, size-bounded with LRU eviction
+(file mtime is refreshed on every hit).
+
+Configuration (environment):
+    OCR_CACHE_ENABLED   '1' (default) / '0'
+    OCR_CACHE_DIR       default backend/data/ocr_cache
+    OCR_CACHE_MAX_MB    default 256
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Optional, Sequence
+
+from backend.logger import get_logger
+
+log = get_logger('ocr')
+
+# Part of every key - bump when preprocessing output changes
+PREPROCESSING_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'ocr_cache')
+
+
+def hash_file(path: str) -> str:
+    """MD5 of a file's content (same digest as file_lifecycle_meta.file_hash)"""
+    hash_md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def hash_bytes(data: bytes) -> str:
+    """MD5 of bytes already in memory (same digest as hash_file)"""
+    return hashlib.md5(data).hexdigest()
+
+
+class OCRResultCache:
+    """Size-bounded, content-addressed store of OCR results"""
+
+    # After an eviction pass the cache is trimmed to this fraction of the cap
+    EVICT_TARGET = 0.9
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, enabled: bool = None):
+        self.cache_dir = cache_dir or os.getenv('OCR_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('OCR_CACHE_MAX_MB', '256')) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        if enabled is None:
+            enabled = os.getenv('OCR_CACHE_ENABLED', '1').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._size_bytes = None  # lazily measured on first write
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def make_key(content_hash: str, method: str, config: str, engine_version: str,
+                 crop_box: Optional[Sequence[int]] = None) -> str:
+        """
+        Build the cache key for one OCR request.
+
+        Args:
+            content_hash: hash of the image bytes (see hash_file)
+            method: preprocessing method ('optimal', 'enhanced', ...)
+            config: Tesseract config string
+            engine_version: OCREngine.version()
+            crop_box: (x, y, w, h) when only a region of the image is read
+        """
+        parts = [
+            content_hash,
+            ','.join(str(int(v)) for v in crop_box) if crop_box else '',
+            method,
+            config.strip(),
+            engine_version,
+            str(PREPROCESSING_VERSION),
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    # ------------------------------------------------------------------
+    # Read / write
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry or None; a hit refreshes its LRU position"""
+        if not self.enabled:
+            return None
+
+        path = self._path_for(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            entry = None
+        except (OSError, ValueError) as e:
+            log.warning("[OCR CACHE] Unreadable entry %s: %s", key[:12], e)
+            entry = None
+            with self._lock:
+                self._stats['errors'] += 1
+
+        with self._lock:
+            self._stats['hits' if entry is not None else 'misses'] += 1
+        return entry
+
+    def put(self, key: str, entry: Dict) -> None:
+        """Store an entry atomically, evicting least-recently-used entries if over budget"""
+        if not self.enabled:
+            return
+
+        path = self._path_for(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = json.dumps(entry, default=str)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("[OCR CACHE] Failed to write entry %s: %s", key[:12], e)
+            with self._lock:
+                self._stats['errors'] += 1
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._stats['writes'] += 1
+            if self._size_bytes is None:
+                self._size_bytes = self._scan()[1]
+            else:
+                self._size_bytes += len(payload)
+            over_budget = self._size_bytes > self.max_bytes
+
+        if over_budget:
+            self._evict()
+
+    # ------------------------------------------------------------------
+    # Eviction / maintenance
+    # ------------------------------------------------------------------
+
+    def _scan(self):
+        """List (mtime, size, path) for every entry, plus the total size"""
+        entries = []
+        total = 0
+        if not os.path.isdir(self.cache_dir):
+            return entries, total
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for item in os.scandir(shard.path):
+                if not item.name.endswith('.json'):
+                    continue
+                try:
+                    st = item.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another worker
+                entries.append((st.st_mtime, st.st_size, item.path))
+                total += st.st_size
+        return entries, total
+
+    def _evict(self) -> None:
+        """Remove least-recently-used entries until under EVICT_TARGET of the cap"""
+        with self._lock:
+            entries, total = self._scan()
+            target = self.max_bytes * self.EVICT_TARGET
+            evicted = 0
+            for mtime, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+            self._size_bytes = total
+            self._stats['evictions'] += evicted
+        if evicted:
+            log.info("[OCR CACHE] Evicted %d entries", evicted)
+
+    def clear(self) -> int:
+        """Delete every entry; returns how many were removed"""
+        with self._lock:
+            entries, _ = self._scan()
+            for _, _, path in entries:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._size_bytes = 0
+            return len(entries)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters (this process) plus on-disk footprint"""
+        with self._lock:
+            entries, total = self._scan()
+            self._size_bytes = total
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'enabled': self.enabled,
+                'cache_dir': self.cache_dir,
+                'entries': len(entries),
+                'size_bytes': total,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0,
+                **self._stats,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> OCRResultCache:
+    """Return the shared process-wide cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = OCRResultCache()
+    return _cache
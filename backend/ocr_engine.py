@@ -0,0 +1,447 @@
+"""
+OCR Engine - Warm Tesseract instance pool shared by every OCR path
+
+Calling pytesseract spawns the tesseract binary, loads the traineddata model
+and round-trips the image through a temporary PNG on every call.  This module
+keeps a pool of already-initialised Tesseract instances (via the tesserocr
+C-API binding) and feeds them raw pixel buffers instead, so the fixed
+start-up cost is paid once per process rather than once per receipt.
+
+When tesserocr is not installed (or cannot find its language data) the engine
+transparently falls back to pytesseract, so callers never need to care which
+backend is active.
+
+Usage:
+    from backend.ocr_engine import get_ocr_engine
+
+    engine = get_ocr_engine()
+    result = engine.recognize(img, lang='eng', config=config)
+    result.text, result.data, result.confidence
+"""
+import os
+import queue
+import shlex
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+from PIL import Image
+import pytesseract
+
+from backend.logger import get_logger
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+log = get_logger('ocr')
+
+DEFAULT_LANG = 'eng'
+
+# TSV header written by the tesseract CLI renderer (the C-API omits it)
+TSV_HEADER = ('level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\t'
+              'left\ttop\twidth\theight\tconf\ttext')
+
+
+class OCRTimeout(TimeoutError):
+    """Recognition did not finish within the caller's time budget"""
+
+
+class OCRCancelled(Exception):
+    """An OCR attempt was cancelled before it finished (result no longer needed)"""
+
+
+def raise_if_stopped(cancel_event=None, deadline: float = None) -> None:
+    """
+    Cooperative stop check between OCR stages.
+
+    Args:
+        cancel_event: threading.Event set when the result is no longer wanted
+        deadline: time.monotonic() value after which the attempt is abandoned
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise OCRCancelled("OCR attempt cancelled")
+    if deadline is not None and time.monotonic() >= deadline:
+        raise OCRTimeout("OCR time budget exhausted")
+
+
+def remaining_ms(deadline: float = None):
+    """Milliseconds left before deadline (None when there is no deadline)"""
+    if deadline is None:
+        return None
+    return max(0.0, (deadline - time.monotonic()) * 1000)
+
+
+@dataclass
+class RecognitionResult:
+    """Output of a single recognition pass"""
+    text: str   # Same string pytesseract.image_to_string() returns (layout + page separator)
+    data: dict  # Same dict pytesseract.image_to_data(..., output_type=Output.DICT) returns
+
+    @property
+    def confidence(self) -> float:
+        """Average word confidence, ignoring non-word rows (conf <= 0)"""
+        confidences = [int(conf) for conf in self.data.get('conf', []) if int(conf) > 0]
+        return sum(confidences) / len(confidences) if confidences else 0
+
+
+def _default_pool_size() -> int:
+    """Pool size from OCR_POOL_SIZE, otherwise one instance per core (max 4)"""
+    configured = os.getenv('OCR_POOL_SIZE')
+    if configured:
+        try:
+            return max(1, int(configured))
+        except ValueError:
+            log.warning("[OCR ENGINE] Ignoring invalid OCR_POOL_SIZE=%r", configured)
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def parse_tesseract_config(config: str):
+    """
+    Split a pytesseract-style config string into engine settings.
+
+    Args:
+        config: e.g. '--oem 1 --psm 4 -c tessedit_char_whitelist=... -c preserve_interword_spaces=1'
+
+    Returns:
+        (oem, psm, variables) tuple, or None if the config uses options
+        that can only be honoured by the tesseract CLI
+    """
+    tokens = shlex.split(config or '', posix=not sys.platform.startswith('win'))
+
+    oem = None
+    psm = None
+    variables = {}
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if token == '--oem' and value is not None:
+            oem = int(value)
+        elif token == '--psm' and value is not None:
+            psm = int(value)
+        elif token == '--dpi' and value is not None:
+            variables['user_defined_dpi'] = value
+        elif token == '-c' and value is not None and '=' in value:
+            name, var_value = value.split('=', 1)
+            variables[name] = var_value
+        else:
+            return None
+        i += 2
+
+    return oem, psm, variables
+
+
+def _to_pixel_buffer(image):
+    """
+    Convert a PIL image or ndarray into a contiguous uint8 pixel array.
+
+    Mirrors pytesseract.prepare(): ndarrays are interpreted like
+    Image.fromarray() would and alpha is flattened onto white.
+    """
+    if isinstance(image, np.ndarray) and image.dtype == np.uint8 and (
+            image.ndim == 2 or (image.ndim == 3 and image.shape[2] in (3, 4))):
+        pixels = image
+    else:
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        if image.mode not in ('L', 'RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        pixels = np.asarray(image)
+
+    if pixels.ndim == 3 and pixels.shape[2] == 4:
+        # Same as pytesseract: discard alpha over a white background
+        background = Image.new('RGB', (pixels.shape[1], pixels.shape[0]), (255, 255, 255))
+        rgba = Image.fromarray(pixels, 'RGBA')
+        background.paste(rgba, (0, 0), rgba.getchannel('A'))
+        pixels = np.asarray(background)
+
+    return np.ascontiguousarray(pixels)
+
+
+class OCREngine:
+    """
+    Process-wide pool of warm Tesseract instances.
+
+    Instances are keyed by (lang, oem) because both are fixed at
+    initialisation time; page segmentation mode and -c variables are applied
+    per call and restored afterwards, so pooled instances never leak settings
+    between callers.
+    """
+
+    def __init__(self, pool_size: int = None, backend: str = None):
+        self.pool_size = pool_size or _default_pool_size()
+
+        requested = (backend or os.getenv('OCR_ENGINE', 'auto')).lower()
+        if requested == 'pytesseract' or tesserocr is None:
+            self.backend = 'pytesseract'
+        else:
+            self.backend = 'tesserocr'
+
+        self._pools = {}
+        self._created = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'errors': 0,
+            'waits': 0,
+            'total_ms': 0.0,
+        }
+
+        log.info("[OCR ENGINE] Backend: %s (pool size %d)", self.backend, self.pool_size)
+
+    # ------------------------------------------------------------------
+    # Pool management
+    # ------------------------------------------------------------------
+
+    def _new_instance(self, lang: str, oem: int):
+        return tesserocr.PyTessBaseAPI(lang=lang, oem=oem)
+
+    @contextmanager
+    def _acquire(self, lang: str, oem: int):
+        """Borrow a warm instance for (lang, oem), creating one if the pool allows"""
+        key = (lang, oem)
+        api = None
+
+        with self._lock:
+            pool = self._pools.setdefault(key, queue.Queue())
+            try:
+                api = pool.get_nowait()
+            except queue.Empty:
+                if self._created.get(key, 0) < self.pool_size:
+                    self._created[key] = self._created.get(key, 0) + 1
+                    api = False  # create outside the lock
+
+        if api is False:
+            try:
+                api = self._new_instance(lang, oem)
+            except Exception:
+                with self._lock:
+                    self._created[key] -= 1
+                raise
+        elif api is None:
+            with self._lock:
+                self._stats['waits'] += 1
+            api = pool.get()
+
+        try:
+            yield api
+        finally:
+            api.Clear()
+            pool.put(api)
+
+    def _fallback_to_pytesseract(self, error: Exception):
+        log.warning("[OCR ENGINE] tesserocr unavailable (%s), falling back to pytesseract", error)
+        self.backend = 'pytesseract'
+
+    # ------------------------------------------------------------------
+    # Recognition
+    # ------------------------------------------------------------------
+
+    def _run_tesserocr(self, image, lang: str, settings, collect, timeout_ms=None, batch=False):
+        """
+        Recognise one image on a pooled instance and hand it to collect(api)
+
+        With batch=True, image is a list of images recognised in turn on the
+        same borrowed instance, and a list of collect(api) results is returned.
+        """
+        oem, psm, variables = settings
+
+        def recognize(api, image):
+            pixels = _to_pixel_buffer(image)
+            height, width = pixels.shape[:2]
+            if not width or not height:
+                return RecognitionResult(text='', data={})
+            bytes_per_pixel = 1 if pixels.ndim == 2 else pixels.shape[2]
+            api.SetImageBytes(pixels.tobytes(), width, height,
+                              bytes_per_pixel, width * bytes_per_pixel)
+            # Recognize() only reports failure through its return value;
+            # with a deadline set that means the monitor timed it out
+            if not api.Recognize(int(timeout_ms or 0)) and timeout_ms:
+                raise OCRTimeout(f"Recognition exceeded {int(timeout_ms)}ms")
+            return collect(api)
+
+        with self._acquire(lang, 3 if oem is None else oem) as api:
+            previous = {name: api.GetVariableAsString(name) for name in variables}
+            try:
+                for name, value in variables.items():
+                    api.SetVariable(name, value)
+                api.SetPageSegMode(3 if psm is None else psm)
+                if batch:
+                    return [recognize(api, img) for img in image]
+                return recognize(api, image)
+            finally:
+                for name, value in previous.items():
+                    if value is not None:
+                        api.SetVariable(name, value)
+
+    def _run(self, image, lang, config, collect, fallback, timeout_ms=None, batch=False):
+        lang = lang or DEFAULT_LANG
+        start = time.perf_counter()
+
+        try:
+            settings = parse_tesseract_config(config) if self.backend == 'tesserocr' else None
+            if settings is not None:
+                try:
+                    return self._run_tesserocr(image, lang, settings, collect, timeout_ms, batch)
+                except RuntimeError as e:
+                    # Raised by tesserocr when the language data cannot be loaded
+                    self._fallback_to_pytesseract(e)
+            return fallback(image, lang, config)
+        except Exception:
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._stats['calls'] += 1
+                self._stats['total_ms'] += (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def _collect_recognition(api) -> RecognitionResult:
+        data = pytesseract.pytesseract.file_to_dict(
+            f"{TSV_HEADER}\n{api.GetTSVText(0)}", '\t', -1)
+        text = api.GetUTF8Text() + (api.GetVariableAsString('page_separator') or '')
+        return RecognitionResult(text=text, data=data)
+
+    @staticmethod
+    def _pytesseract_recognition(img, lang, config, timeout_ms=None) -> RecognitionResult:
+        tess = pytesseract.pytesseract
+        config = f"-c tessedit_create_tsv=1 -c tessedit_create_txt=1 {config.strip()}"
+        with tess.save(img) as (temp_name, input_filename):
+            try:
+                tess.run_tesseract(input_filename, temp_name, 'tsv', lang, config=config,
+                                   timeout=timeout_ms / 1000 if timeout_ms else 0)
+            except RuntimeError as e:
+                if timeout_ms and 'timeout' in str(e).lower():
+                    raise OCRTimeout(f"Recognition exceeded {int(timeout_ms)}ms") from e
+                raise
+            tsv = tess._read_output(f"{temp_name}{os.extsep}tsv")
+            text = tess._read_output(f"{temp_name}{os.extsep}txt")
+        return RecognitionResult(text=text, data=tess.file_to_dict(tsv, '\t', -1))
+
+    def recognize(self, image, lang: str = None, config: str = '',
+                  timeout_ms: float = None) -> RecognitionResult:
+        """
+        Recognise once and return both the word-level data and the text.
+
+        Both outputs come from the same Tesseract pass (GetTSVText/GetUTF8Text
+        on the C-API, or the tsv and txt renderers of one CLI run), so the
+        text is byte-identical to what a separate pytesseract.image_to_string() call
+        produces - block/paragraph/line breaks and preserve_interword_spaces
+        spacing included.
+
+        With timeout_ms, recognition is abandoned after that long and
+        OCRTimeout is raised.
+        """
+        def fallback(img, lang, config):
+            return self._pytesseract_recognition(img, lang, config, timeout_ms)
+
+        return self._run(image, lang, config, self._collect_recognition, fallback, timeout_ms)
+
+    def recognize_many(self, images, lang: str = None, config: str = '',
+                       timeout_ms: float = None) -> List[RecognitionResult]:
+        """
+        Recognise several images (e.g. regions of one receipt) in a single
+        engine call: one pooled instance is borrowed and configured once and
+        each image is read straight from memory. Empty images give an empty
+        result. timeout_ms applies per image.
+        """
+        def fallback(imgs, lang, config):
+            return [self._pytesseract_recognition(img, lang, config, timeout_ms)
+                    if np.asarray(img).size else RecognitionResult(text='', data={})
+                    for img in imgs]
+
+        return self._run(list(images), lang, config, self._collect_recognition, fallback,
+                         timeout_ms, batch=True)
+
+    def recognize_regions(self, image, boxes, lang: str = None, config: str = '',
+                          timeout_ms: float = None) -> List[RecognitionResult]:
+        """
+        Recognise (x, y, w, h) boxes of one image in a single engine call.
+
+        Boxes are read from slices of the in-memory pixel buffer (clipped to
+        the image), not via SetRectangle, whose LSTM line images come from
+        the wrong rows on Tesseract 5.x. Word coordinates in each result are
+        relative to its box.
+        """
+        pixels = _to_pixel_buffer(image)
+        height, width = pixels.shape[:2]
+        crops = []
+        for x, y, w, h in boxes:
+            x0, y0 = min(max(int(x), 0), width), min(max(int(y), 0), height)
+            crops.append(pixels[y0:min(int(y + h), height), x0:min(int(x + w), width)])
+        return self.recognize_many(crops, lang, config, timeout_ms)
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def version(self) -> str:
+        """Tesseract version string of the active backend (part of OCR cache keys)"""
+        if getattr(self, '_version', None) is None:
+            try:
+                if self.backend == 'tesserocr':
+                    self._version = tesserocr.tesseract_version().split('\n')[0].strip()
+                else:
+                    self._version = f"tesseract {pytesseract.get_tesseract_version()}"
+            except Exception:
+                return 'unknown'
+        return self._version
+
+    def stats(self) -> dict:
+        """Pool usage counters for monitoring"""
+        with self._lock:
+            calls = self._stats['calls']
+            return {
+                'backend': self.backend,
+                'pool_size': self.pool_size,
+                'instances': {f"{lang}/oem{oem}": count for (lang, oem), count in self._created.items()},
+                'calls': calls,
+                'errors': self._stats['errors'],
+                'waits': self._stats['waits'],
+                'avg_ms': round(self._stats['total_ms'] / calls, 2) if calls else 0,
+            }
+
+    def close(self):
+        """Release all pooled instances"""
+        with self._lock:
+            pools, self._pools, self._created = self._pools, {}, {}
+        for pool in pools.values():
+            while True:
+                try:
+                    pool.get_nowait().End()
+                except queue.Empty:
+                    break
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine() -> OCREngine:
+    """Return the shared process-wide engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = OCREngine()
+    return _engine
+
+
+def _reset_after_fork():
+    # Tesseract instances must not be shared across a fork
+    global _engine, _engine_lock
+    _engine = None
+    _engine_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
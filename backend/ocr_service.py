@@ -2,15 +2,22 @@
 Production OCR Service - Enhanced OCR with Tesseract Optimization
 Optimized for receipt processing with adaptive preprocessing
 """
-print(f"[DEBUG] Loaded ocr_service.py from: {__file__}, module: {__name__}")
-
-from PIL import Image, ImageOps, ImageFilter, ImageEnhance
+from PIL import Image, ImageOps, ImageEnhance
 import pytesseract
 import cv2
 import numpy as np
 import os
 import time
 
+from backend.image_context import ImageContext
+from backend.preprocessing_graph import run_preprocessing
+from backend.ocr_engine import OCRCancelled, OCRTimeout, get_ocr_engine, raise_if_stopped, remaining_ms
+from backend.ocr_cache import get_ocr_cache, hash_bytes, hash_file
+from backend.logger import get_logger
+
+log = get_logger('ocr')
+log.debug("[DEBUG] Loaded ocr_service.py from: %s, module: %s", __file__, __name__)
+
 # Tesseract path
 pytesseract.pytesseract.tesseract_cmd = os.getenv('TESSERACT_CMD', r"C:\Program Files\Tesseract-OCR\tesseract.exe")
 
@@ -56,7 +63,7 @@ def deskew_image(image):
         
         return image
     except Exception as e:
-        print(f"[WARN] Deskew failed: {e}, using original image")
+        log.warning("[WARN] Deskew failed: %s, using original image", e)
         return image
 
 def enhance_image_quality(image):
@@ -85,12 +92,15 @@ def enhance_image_quality(image):
     
     return result
 
+# Modes whose result includes the quality metrics used to drive them
+QUALITY_REPORTING_METHODS = ('adaptive', 'optimal', 'aggressive')
+
 def preprocess_image(path, method='enhanced'):
     """
     Beta preprocessing - starting conservative, matching production
     
     Args:
-        path: Image file path
+        path: Image file path (or an ImageContext holding the decoded image)
         method: 'enhanced' (production + Tesseract config), 'simple' (exact production), 
                 'experimental' (advanced), 'adaptive' (quality-aware), 'aggressive' (strong),
                 'optimal' (unified best)
@@ -98,329 +108,146 @@ def preprocess_image(path, method='enhanced'):
     Returns:
         Preprocessed PIL Image or (Image, QualityMetrics) tuple
     """
-    img = Image.open(path)
+    img_array, quality_metrics = preprocess_array(path, method=method)
+    img = Image.fromarray(img_array)
     
-    # IMPROVEMENT: Upscale small images (Tesseract works better with larger images)
-    if img.width < 1000:
-        scale_factor = 2
-        new_size = (img.width * scale_factor, img.height * scale_factor)
-        img = img.resize(new_size, Image.Resampling.LANCZOS)
-        print(f"[INFO] Upscaled image from {img.width // scale_factor}x{img.height // scale_factor} to {img.width}x{img.height}")
-    
-    # Import quality analysis for all modes
-    from backend.image_quality import analyze_image_quality
-    
-    # Analyze image quality for adaptive preprocessing decisions
-    quality_metrics = analyze_image_quality(path)
+    if method in QUALITY_REPORTING_METHODS:
+        return img, quality_metrics
+    return img
+
+def preprocess_array(source, method='enhanced'):
+    """
+    Preprocessing on the decoded grayscale array - no file or PIL round trips
     
-    if method == 'simple':
-        # EXACT PRODUCTION METHOD - proven to work
-        img = ImageOps.grayscale(img)
-        img = img.filter(ImageFilter.MedianFilter(size=3))
-        return img
+    Modes are plans of named steps (backend/preprocessing_graph.py); when
+    source is a shared ImageContext, steps already computed for another
+    mode are reused.
     
-    elif method == 'experimental':
-        # Advanced preprocessing - Now with quality-aware enhancements
-        # Step 1: Grayscale
-        img = ImageOps.grayscale(img)
-        img_array = np.array(img)
-        
-        # Step 2: Quality-aware denoising
-        if quality_metrics.noise_level > 30:
-            print(f"[EXPERIMENTAL] High noise detected ({quality_metrics.noise_level:.1f}), applying bilateral filter")
-            img_array = cv2.bilateralFilter(img_array, 5, 50, 50)
-        else:
-            # Standard median filter
-            img = Image.fromarray(img_array)
-            img = img.filter(ImageFilter.MedianFilter(size=3))
-            img_array = np.array(img)
-        
-        # Step 3: Quality-aware CLAHE
-        if quality_metrics.contrast < 20:
-            clip_limit = 2.5  
-            print(f"[EXPERIMENTAL] Low contrast ({quality_metrics.contrast:.1f}), using CLAHE 2.5")
-        elif quality_metrics.contrast < 30:
-            clip_limit = 1.5  
-        else:
-            clip_limit = 1.2  
-        
-        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8,8))
-        enhanced = clahe.apply(img_array)
-        
-        # Step 4: Otsu's binarization
-        _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # Convert back to PIL
-        img = Image.fromarray(binary)
-        
-        # Step 5: Quality-aware sharpening
-        if quality_metrics.sharpness < 15:
-            print(f"[EXPERIMENTAL] Low sharpness ({quality_metrics.sharpness:.1f}), applying strong sharpening")
-            img = img.filter(ImageFilter.UnsharpMask(radius=1.5, percent=150, threshold=3))
-        else:
-            # Standard sharpening
-            img = img.filter(ImageFilter.UnsharpMask(radius=1, percent=100, threshold=3))
-        
-        return img
+    Args:
+        source: Image file path or ImageContext
+        method: see preprocess_image
     
-    elif method == 'adaptive':
-        # PHASE 1: Adaptive preprocessing based on image quality analysis
-        from backend.image_quality import (
-            apply_gamma_correction,
-            adaptive_clahe,
-            adaptive_sharpen,
-            adaptive_denoise,
-            deskew_image as deskew_quality
-        )
-        
-        print(f"[ADAPTIVE] Quality Analysis:")
-        print(f"  Brightness: {quality_metrics.brightness:.1f}")
-        print(f"  Contrast: {quality_metrics.contrast:.1f}")
-        print(f"  Sharpness: {quality_metrics.sharpness:.1f}")
-        print(f"  Noise: {quality_metrics.noise_level:.1f}")
-        print(f"  Skew: {quality_metrics.skew_angle:.2f}°")
-        print(f"  Quality Score: {quality_metrics.quality_score():.1f}/100")
-        
-        # Convert to grayscale and numpy array
-        img = ImageOps.grayscale(img)
-        img_array = np.array(img)
-        
-        # Step 1: Brightness correction
-        if quality_metrics.needs_brightness_correction():
-            print(f"[ADAPTIVE] Applying brightness correction")
-            if quality_metrics.brightness < 80:
-                gamma = 0.7  
-            else:
-                gamma = 1.3  
-            img_array = apply_gamma_correction(img_array, gamma)
-        
-        # Step 2: Denoising
-        if quality_metrics.needs_denoising():
-            print(f"[ADAPTIVE] Applying denoising")
-            img_array = adaptive_denoise(img_array, quality_metrics.noise_level)
-        
-        # Step 3: Contrast enhancement
-        if quality_metrics.needs_contrast_enhancement():
-            print(f"[ADAPTIVE] Applying contrast enhancement")
-            img_array = adaptive_clahe(img_array, quality_metrics.contrast)
-        
-        # Step 4: Binarization
-        _, binary = cv2.threshold(img_array, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # Step 5: Sharpening
-        if quality_metrics.needs_sharpening():
-            print(f"[ADAPTIVE] Applying sharpening")
-            binary = adaptive_sharpen(binary, quality_metrics.sharpness)
-        
-        # Step 6: Deskewing
-        if quality_metrics.needs_deskewing():
-            print(f"[ADAPTIVE] Applying deskew ({quality_metrics.skew_angle:.2f}°)")
-            binary = deskew_quality(binary, quality_metrics.skew_angle)
-        
-        # Convert back to PIL
-        img = Image.fromarray(binary)
-        
-        return img, quality_metrics
+    Returns:
+        (uint8 ndarray ready for OCR, ImageQualityMetrics)
+    """
+    run = run_preprocessing(source, method=method)
+    return run.image, run.quality_metrics
+
+def _tesseract_config_for(method: str) -> str:
+    """Tesseract configuration extract_text uses for a preprocessing method"""
+    # KEY IMPROVEMENT: Dynamic whitelist based on content
+    from backend.dynamic_whitelist import DynamicWhitelist
     
-    elif method == 'optimal':
-        # UNIFIED OPTIMAL MODE - Combines all Phase 1-3 optimizations
-        from backend.image_quality import (
-            apply_gamma_correction,
-            adaptive_denoise,
-            deskew_image as deskew_quality
+    if method == 'optimal':
+        # OPTIMIZED: Single-pass PSM 4 for receipts (50% faster)
+        # Receipts are columnar documents - PSM 4 consistently outperforms PSM 6
+        # Previous logs show PSM 4 wins: 85.3% vs 58.8%, 82.2% vs 69.3%
+        config = DynamicWhitelist.build_tesseract_config(whitelist_type='general', psm=4, oem=1)
+    else:
+        # Standard single-pass for other modes
+        config = DynamicWhitelist.build_tesseract_config(
+            whitelist_type='general', 
+            psm=6, 
+            oem=1  
         )
-        from backend.advanced_binarization import auto_select_binarization
-        
-        quality_score = quality_metrics.quality_score()
-        
-        print(f"[OPTIMAL] Quality Score: {quality_score:.1f}/100")
-        print(f"[OPTIMAL] Brightness: {quality_metrics.brightness:.1f}, Contrast: {quality_metrics.contrast:.1f}")
-        print(f"[OPTIMAL] Sharpness: {quality_metrics.sharpness:.1f}, Noise: {quality_metrics.noise_level:.1f}")
-        
-        # Convert to grayscale
-        img = ImageOps.grayscale(img)
-        img_array = np.array(img)
-        
-        # Step 2: Brightness correction
-        if quality_metrics.brightness < 80 or quality_metrics.brightness > 200:
-            gamma = 0.7 if quality_metrics.brightness < 80 else 1.3
-            print(f"[OPTIMAL] Applying brightness correction (gamma={gamma})")
-            img_array = apply_gamma_correction(img_array, gamma)
-        
-        # Step 3: Adaptive denoising
-        if quality_metrics.noise_level > 25:
-            print(f"[OPTIMAL] High noise detected, applying strong denoising")
-            img_array = cv2.fastNlMeansDenoising(img_array, None, h=10, templateWindowSize=7, searchWindowSize=21)
-        elif quality_metrics.noise_level > 15:
-            print(f"[OPTIMAL] Moderate noise detected, applying median blur")
-            img_array = cv2.medianBlur(img_array, 3)
-        
-        # Step 4: Adaptive contrast enhancement
-        if quality_metrics.contrast < 30:
-            clip_limit = 2.5 if quality_score < 50 else 1.5
-            print(f"[OPTIMAL] Low contrast, applying CLAHE (clip={clip_limit})")
-            clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8,8))
-            img_array = clahe.apply(img_array)
-        elif quality_metrics.contrast < 40:
-            print(f"[OPTIMAL] Moderate contrast, applying gentle CLAHE")
-            clahe = cv2.createCLAHE(clipLimit=1.2, tileGridSize=(8,8))
-            img_array = clahe.apply(img_array)
-        
-        # Step 5: Adaptive binarization
-        binary, binarization_method = auto_select_binarization(img_array, quality_metrics)
-        print(f"[OPTIMAL] Using {binarization_method} binarization")
-        
-        # Step 6: Adaptive sharpening
-        if quality_metrics.sharpness < 20:
-            print(f"[OPTIMAL] Low sharpness, applying strong sharpening")
-            kernel = np.array([[-1, -1, -1], [-1,  9, -1], [-1, -1, -1]])
-            binary = cv2.filter2D(binary, -1, kernel)
-        elif quality_metrics.sharpness < 30:
-            print(f"[OPTIMAL] Moderate sharpness, applying light sharpening")
-            kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
-            binary = cv2.filter2D(binary, -1, kernel)
-        
-        # Step 7: Deskewing
-        if abs(quality_metrics.skew_angle) > 1.0:
-            print(f"[OPTIMAL] Deskewing image ({quality_metrics.skew_angle:.2f}°)")
-            binary = deskew_quality(binary, quality_metrics.skew_angle)
-        
-        # Step 8: Morphological cleanup
-        kernel = np.ones((2,2), np.uint8)
-        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
-        
-        # Convert back to PIL
-        img = Image.fromarray(binary)
-        
-        print(f"[OPTIMAL] Preprocessing complete")
-        return img, quality_metrics
     
-    elif method == 'aggressive':
-        # PHASE 2: Advanced preprocessing with adaptive binarization
-        from backend.advanced_binarization import auto_select_binarization
-        
-        print(f"[AGGRESSIVE] Quality Analysis:")
-        print(f"  Brightness: {quality_metrics.brightness:.1f}")
-        print(f"  Contrast: {quality_metrics.contrast:.1f}")
-        
-        # Convert to grayscale
-        img = ImageOps.grayscale(img)
-        img_array = np.array(img)
-        
-        # Step 1: Aggressive denoising
-        if quality_metrics.noise_level > 20:
-            print(f"[AGGRESSIVE] Applying strong denoising")
-            img_array = cv2.fastNlMeansDenoising(img_array, None, h=10, templateWindowSize=7, searchWindowSize=21)
-        
-        # Step 2: Aggressive contrast enhancement
-        if quality_metrics.contrast < 40:
-            print(f"[AGGRESSIVE] Applying strong CLAHE")
-            clahe = cv2.createCLAHE(clipLimit=2.5, tileGridSize=(8,8))
-            img_array = clahe.apply(img_array)
-        
-        # Step 3: Adaptive binarization
-        binary, binarization_method = auto_select_binarization(img_array, quality_metrics)
-        print(f"[AGGRESSIVE] Using {binarization_method} binarization")
-        
-        # Step 4: Aggressive sharpening
-        if quality_metrics.sharpness < 25:
-            print(f"[AGGRESSIVE] Applying strong sharpening")
-            kernel = np.array([[-1, -1, -1], [-1,  9, -1], [-1, -1, -1]])
-            binary = cv2.filter2D(binary, -1, kernel)
-        
-        # Step 5: Morphological operations
-        kernel = np.ones((2,2), np.uint8)
-        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
-        
-        # Convert back to PIL
-        img = Image.fromarray(binary)
-        
-        return img, quality_metrics
-    
-    else:  # 'enhanced' (default)
-        # PRODUCTION METHOD + Quality-aware enhancements
-        img = ImageOps.grayscale(img)
-        img_array = np.array(img)
-        
-        # Quality-aware median filter
-        if quality_metrics.noise_level > 25:
-            print(f"[ENHANCED] Noise detected ({quality_metrics.noise_level:.1f}), using median filter size 5")
-            img_array = cv2.medianBlur(img_array, 5)
-        else:
-            img_array = cv2.medianBlur(img_array, 3)
-        
-        # Quality-aware contrast adjustment
-        if quality_metrics.contrast < 35:
-            print(f"[ENHANCED] Low contrast ({quality_metrics.contrast:.1f}), applying gentle CLAHE")
-            clahe = cv2.createCLAHE(clipLimit=1.2, tileGridSize=(8,8))
-            img_array = clahe.apply(img_array)
-        
-        img = Image.fromarray(img_array)
-        return img
+    return config + ' -c preserve_interword_spaces=1'
 
-def extract_text(image_path: str, method='enhanced') -> dict:
+def extract_text(image_path: str, method='enhanced', use_cache=True, image_context=None,
+                 cancel_event=None, deadline=None) -> dict:
     """
     Extract text from image using optimized Tesseract configuration
     
     Args:
         image_path: Path to image file
         method: 'enhanced' (default), 'simple', 'experimental', 'adaptive', 'aggressive', 'optimal'
+        use_cache: Reuse raw OCR output for identical image/method/config (OCR cache)
+        image_context: ImageContext of image_path already decoded by the caller; passing
+            the same context for several modes reuses their common preprocessing steps
+        cancel_event: threading.Event - once set, raises OCRCancelled at the next stage
+        deadline: time.monotonic() budget - preprocessing stops and recognition times
+            out (OCRTimeout) when it passes
     
     Returns:
-        dict with text, confidence, preprocessing_method, processing_time_ms
+        dict with text, confidence, preprocessing_method, processing_time_ms, cache_hit
+        and preprocessing_steps (per-step timings, empty on a cache hit)
     """
     start_time = time.time()
     
     try:
-        # Preprocess image
-        preprocessing_result = preprocess_image(image_path, method=method)
-        
-        # Handle adaptive mode returning tuple (img, quality_metrics)
-        quality_metrics = None
-        if isinstance(preprocessing_result, tuple):
-            img, quality_metrics = preprocessing_result
-        else:
-            img = preprocessing_result
-        
-        # KEY IMPROVEMENT: Dynamic whitelist based on content
-        from backend.dynamic_whitelist import DynamicWhitelist
+        # Warm Tesseract pool shared by the queue thread, /upload and reprocess
+        engine = get_ocr_engine()
+        custom_config = _tesseract_config_for(method)
+        
+        # Read the file once: the same bytes are hashed for the cache and decoded for OCR
+        image_bytes = None
+        if image_context is None:
+            with open(image_path, 'rb') as f:
+                image_bytes = f.read()
+        
+        # Identical image + method + config already OCR'd? Skip straight to corrections
+        cache = get_ocr_cache()
+        cache_key = None
+        cached = None
+        preprocessing_steps = []
+        if use_cache and cache.enabled:
+            if image_bytes is not None:
+                content_hash = hash_bytes(image_bytes)
+            else:
+                content_hash = image_context.cached('content_hash', lambda: hash_file(image_path))
+            cache_key = cache.make_key(content_hash, method, custom_config, engine.version())
+            cached = cache.get(cache_key)
         
-        # Prepare Tesseract configuration
-        custom_config = ''
+        if cached is not None:
+            log.debug("[OCR] Cache hit for %s (%s)", image_path, method)
+            text = cached['raw_text']
+            avg_confidence = cached['confidence']
+            quality_info = cached.get('quality_metrics')
         
-        if method == 'optimal':
-            # OPTIMIZED: Single-pass PSM 4 for receipts (50% faster)
-            # Receipts are columnar documents - PSM 4 consistently outperforms PSM 6
-            # Previous logs show PSM 4 wins: 85.3% vs 58.8%, 82.2% vs 69.3%
+        else:
+            # Decode once; quality analysis, preprocessing and OCR share the array
+            context = image_context or ImageContext.from_bytes(image_bytes, image_path)
+            preprocessing = run_preprocessing(context, method=method,
+                                              cancel_event=cancel_event, deadline=deadline)
+            img, quality_metrics = preprocessing.image, preprocessing.quality_metrics
+            preprocessing_steps = preprocessing.steps
             
-            print(f"[OPTIMAL] Using optimized single-pass PSM 4 (Columnar)")
-            config_psm4 = DynamicWhitelist.build_tesseract_config(whitelist_type='general', psm=4, oem=1)
-            config_psm4 += ' -c preserve_interword_spaces=1'
+            # Only the quality-aware modes report their metrics
+            if method not in QUALITY_REPORTING_METHODS:
+                quality_metrics = None
             
-            data = pytesseract.image_to_data(img, lang="eng", config=config_psm4, output_type=pytesseract.Output.DICT)
-            text = pytesseract.image_to_string(img, lang="eng", config=config_psm4)
-            custom_config = config_psm4
+            if method == 'optimal':
+                log.debug("[OPTIMAL] Using optimized single-pass PSM 4 (Columnar)")
+            else:
+                log.debug("[OCR] Using dynamic whitelist config for %s", method)
             
-        else:
-            # Standard single-pass for other modes
-            custom_config = DynamicWhitelist.build_tesseract_config(
-                whitelist_type='general', 
-                psm=6, 
-                oem=1  
-            )
-            custom_config += ' -c preserve_interword_spaces=1'
+            # Extract text with confidence data (bounded by what is left of the budget)
+            raise_if_stopped(cancel_event, deadline)
+            recognition = engine.recognize(img, lang="eng", config=custom_config,
+                                           timeout_ms=remaining_ms(deadline))
+            data, text = recognition.data, recognition.text
             
-            print(f"[OCR] Using dynamic whitelist config for {method}")
+            # Calculate average confidence from selected data
+            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
+            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
             
-            # Extract text with confidence data
-            data = pytesseract.image_to_data(img, lang="eng", config=custom_config, output_type=pytesseract.Output.DICT)
-            text = pytesseract.image_to_string(img, lang="eng", config=custom_config)
-        
-# Calculate average confidence from selected data
-        confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+            # Add quality metrics if available
+            quality_info = None
+            if quality_metrics:
+                quality_info = {
+                    'quality_score': quality_metrics.quality_score(),
+                    'brightness': quality_metrics.brightness,
+                    'contrast': quality_metrics.contrast,
+                    'sharpness': quality_metrics.sharpness,
+                    'noise_level': quality_metrics.noise_level
+                }
+            
+            if cache_key:
+                cache.put(cache_key, {
+                    'raw_text': text or "",
+                    'confidence': avg_confidence,
+                    'quality_metrics': quality_info
+                })
         
         processing_time = int((time.time() - start_time) * 1000)
         
@@ -428,44 +255,41 @@ def extract_text(image_path: str, method='enhanced') -> dict:
         from backend.text_correction import apply_text_corrections
         from backend.decimal_correction import apply_decimal_corrections
         
-        print(f"[OCR] Starting OCR extraction...")
-        print(f"[OCR] Using image: {image_path}")
+        log.debug("[OCR] Starting OCR extraction...")
+        log.debug("[OCR] Using image: %s", image_path)
         
         # Apply text corrections with feedback
         raw_text = text or ""
         corrected_intermediate = apply_text_corrections(raw_text)
-        print(f"[OCR] Raw OCR length: {len(raw_text)} chars")
-        print(f"[OCR] After text corrections: {len(corrected_intermediate)} chars")
-        
         final_corrected_text = apply_decimal_corrections(corrected_intermediate)
-        print(f"[OCR] After decimal corrections: {len(final_corrected_text)} chars")
-        print(f"[OCR] Text correction rate: {(len(final_corrected_text) - len(raw_text)) / len(raw_text) * 100 if raw_text else 0:.1f}%")
+        if log.debug_enabled:
+            log.debug("[OCR] Raw OCR length: %d chars", len(raw_text))
+            log.debug("[OCR] After text corrections: %d chars", len(corrected_intermediate))
+            log.debug("[OCR] After decimal corrections: %d chars", len(final_corrected_text))
+            log.debug("[OCR] Text correction rate: %.1f%%",
+                      (len(final_corrected_text) - len(raw_text)) / len(raw_text) * 100 if raw_text else 0)
         
         result = {
             'text': final_corrected_text,
             'raw_text': raw_text,
             'confidence': round(avg_confidence, 2),
             'preprocessing_method': method,
-            'processing_time_ms': processing_time
+            'processing_time_ms': processing_time,
+            'cache_hit': cached is not None,
+            'preprocessing_steps': preprocessing_steps
         }
         
-        # Add quality metrics if available
-        if quality_metrics:
-            result['quality_metrics'] = {
-                'quality_score': quality_metrics.quality_score(),
-                'brightness': quality_metrics.brightness,
-                'contrast': quality_metrics.contrast,
-                'sharpness': quality_metrics.sharpness,
-                'noise_level': quality_metrics.noise_level
-            }
+        if quality_info:
+            result['quality_metrics'] = quality_info
             
         return result
         
+    except (OCRCancelled, OCRTimeout):
+        # The caller asked for these - let it tell them apart from OCR failures
+        raise
     except Exception as e:
         processing_time = int((time.time() - start_time) * 1000)
-        print(f"[ERROR] OCR failed: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("[ERROR] OCR failed: %s", e)
         return {
             'text': f"[OCR ERROR] {e}",
             'confidence': 0,
@@ -489,7 +313,7 @@ def extract_numbers_focused(image_path: str) -> dict:
             scale_factor = 2.5
             new_size = (int(img.width * scale_factor), int(img.height * scale_factor))
             img = img.resize(new_size, Image.Resampling.LANCZOS)
-            print(f"[NUMERIC] Upscaled image for number extraction")
+            log.debug("[NUMERIC] Upscaled image for number extraction")
         
         # Convert to grayscale and enhance contrast for numbers
         img = ImageOps.grayscale(img)
@@ -517,11 +341,12 @@ def extract_numbers_focused(image_path: str) -> dict:
         )
         numeric_config += ' -c preserve_interword_spaces=1'
         
-        print(f"[NUMERIC] Using optimized numeric configuration")
+        log.debug("[NUMERIC] Using optimized numeric configuration")
+        engine = get_ocr_engine()
         
         # Extract text with numeric focus
-        data = pytesseract.image_to_data(img, lang="eng", config=numeric_config, output_type=pytesseract.Output.DICT)
-        text = pytesseract.image_to_string(img, lang="eng", config=numeric_config)
+        recognition = engine.recognize(img, lang="eng", config=numeric_config)
+        data, text = recognition.data, recognition.text
         
         # Apply text corrections
         from backend.text_correction import apply_text_corrections
@@ -543,7 +368,7 @@ def extract_numbers_focused(image_path: str) -> dict:
         
     except Exception as e:
         processing_time = int((time.time() - start_time) * 1000)
-        print(f"[ERROR] Numeric extraction failed: {e}")
+        log.error("[ERROR] Numeric extraction failed: %s", e)
         return {
             'text': f"[NUMERIC ERROR] {e}",
             'raw_text': f"[NUMERIC ERROR] {e}",
@@ -0,0 +1,440 @@
+"""
+Preprocessing Graph - OCR preprocessing as chains of named, memoized operations
+
+Every preprocessing mode ('optimal', 'aggressive', 'experimental', ...) is a
+plan: a list of Steps chosen from the image's quality metrics, applied to
+the shared OCR base image (grayscale, upscaled if small). A step's output is
+memoized on the ImageContext under the chain of steps that produced it, so
+modes that start the same way (same denoise, same CLAHE, ...) reuse each
+other's intermediates and a multi-mode attempt only computes the branches
+that differ.
+
+Every run reports per-step timings, marking steps served from the memo.
+Runs can be cancelled (cancel_event) or bounded (deadline) between steps.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageFilter
+
+from backend.image_context import ImageContext
+from backend.image_quality import ImageQualityMetrics, apply_gamma_correction, deskew_image
+from backend.logger import get_logger
+from backend.ocr_engine import raise_if_stopped
+
+log = get_logger('preprocess')
+
+
+# ----------------------------------------------------------------------
+# Operations: name -> fn(image, context, **params) -> image or (image, detail)
+# ----------------------------------------------------------------------
+
+SHARPEN_KERNELS = {
+    'strong': np.array([[-1, -1, -1],
+                        [-1,  9, -1],
+                        [-1, -1, -1]]),
+    'medium': np.array([[0, -1, 0],
+                        [-1, 5, -1],
+                        [0, -1, 0]]),
+    'gentle': np.array([[0, -0.5, 0],
+                        [-0.5, 3, -0.5],
+                        [0, -0.5, 0]]),
+}
+
+
+def _pil_median(image, context, size):
+    return np.asarray(Image.fromarray(image).filter(ImageFilter.MedianFilter(size=size)))
+
+
+def _median(image, context, ksize):
+    return cv2.medianBlur(image, ksize)
+
+
+def _bilateral(image, context, d, sigma_color, sigma_space):
+    return cv2.bilateralFilter(image, d, sigma_color, sigma_space)
+
+
+def _nlmeans(image, context, h):
+    return cv2.fastNlMeansDenoising(image, None, h=h, templateWindowSize=7, searchWindowSize=21)
+
+
+def _gamma(image, context, gamma):
+    return apply_gamma_correction(image, gamma)
+
+
+def _clahe(image, context, clip_limit):
+    return cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8, 8)).apply(image)
+
+
+def _otsu(image, context):
+    return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def _auto_binarize(image, context):
+    from backend.advanced_binarization import auto_select_binarization
+    # Decisions use the original image's metrics, shared by every mode
+    return auto_select_binarization(image, context.quality())
+
+
+def _sharpen(image, context, kernel):
+    return cv2.filter2D(image, -1, SHARPEN_KERNELS[kernel])
+
+
+def _unsharp(image, context, radius, percent, threshold):
+    img = Image.fromarray(image).filter(ImageFilter.UnsharpMask(radius=radius, percent=percent, threshold=threshold))
+    return np.asarray(img)
+
+
+def _deskew(image, context, angle):
+    return deskew_image(image, angle)
+
+
+def _morph_cleanup(image, context):
+    kernel = np.ones((2, 2), np.uint8)
+    image = cv2.morphologyEx(image, cv2.MORPH_CLOSE, kernel)
+    return cv2.morphologyEx(image, cv2.MORPH_OPEN, kernel)
+
+
+OPERATIONS = {
+    'pil_median': _pil_median,
+    'median': _median,
+    'bilateral': _bilateral,
+    'nlmeans': _nlmeans,
+    'gamma': _gamma,
+    'clahe': _clahe,
+    'otsu': _otsu,
+    'auto_binarize': _auto_binarize,
+    'sharpen': _sharpen,
+    'unsharp': _unsharp,
+    'deskew': _deskew,
+    'morph_cleanup': _morph_cleanup,
+}
+
+
+@dataclass(frozen=True)
+class Step:
+    """One operation with its parameters; hashable so chains can key the memo"""
+    op: str
+    params: Tuple[Tuple[str, object], ...] = ()
+    # Logged after the step runs; '%s' is replaced by what the op reported
+    log_result: Optional[str] = field(default=None, compare=False)
+
+    @classmethod
+    def of(cls, op: str, log_result: str = None, **params) -> 'Step':
+        return cls(op, tuple(sorted(params.items())), log_result)
+
+    @property
+    def label(self) -> str:
+        if not self.params:
+            return self.op
+        return f"{self.op}({', '.join(f'{k}={v}' for k, v in self.params)})"
+
+
+@dataclass
+class PreprocessingRun:
+    """Output of one mode plus how long each step took"""
+    method: str
+    image: np.ndarray
+    quality_metrics: ImageQualityMetrics
+    steps: List[Dict]
+
+    @property
+    def total_ms(self) -> float:
+        return sum(step['ms'] for step in self.steps)
+
+
+# ----------------------------------------------------------------------
+# Plans: which steps each mode applies for a given image
+# ----------------------------------------------------------------------
+
+def _plan_simple(q: ImageQualityMetrics) -> List[Step]:
+    # EXACT PRODUCTION METHOD - proven to work
+    return [Step.of('pil_median', size=3)]
+
+
+def _plan_experimental(q: ImageQualityMetrics) -> List[Step]:
+    # Advanced preprocessing - Now with quality-aware enhancements
+    steps = []
+
+    # Quality-aware denoising
+    if q.noise_level > 30:
+        log.debug("[EXPERIMENTAL] High noise detected (%.1f), applying bilateral filter", q.noise_level)
+        steps.append(Step.of('bilateral', d=5, sigma_color=50, sigma_space=50))
+    else:
+        # Standard median filter
+        steps.append(Step.of('pil_median', size=3))
+
+    # Quality-aware CLAHE
+    if q.contrast < 20:
+        clip_limit = 2.5
+        log.debug("[EXPERIMENTAL] Low contrast (%.1f), using CLAHE 2.5", q.contrast)
+    elif q.contrast < 30:
+        clip_limit = 1.5
+    else:
+        clip_limit = 1.2
+    steps.append(Step.of('clahe', clip_limit=clip_limit))
+
+    # Otsu's binarization
+    steps.append(Step.of('otsu'))
+
+    # Quality-aware sharpening
+    if q.sharpness < 15:
+        log.debug("[EXPERIMENTAL] Low sharpness (%.1f), applying strong sharpening", q.sharpness)
+        steps.append(Step.of('unsharp', radius=1.5, percent=150, threshold=3))
+    else:
+        # Standard sharpening
+        steps.append(Step.of('unsharp', radius=1, percent=100, threshold=3))
+
+    return steps
+
+
+def _plan_adaptive(q: ImageQualityMetrics) -> List[Step]:
+    # PHASE 1: Adaptive preprocessing based on image quality analysis
+    if log.debug_enabled:
+        log.debug("[ADAPTIVE] Quality Analysis:")
+        log.debug("  Brightness: %.1f", q.brightness)
+        log.debug("  Contrast: %.1f", q.contrast)
+        log.debug("  Sharpness: %.1f", q.sharpness)
+        log.debug("  Noise: %.1f", q.noise_level)
+        log.debug("  Skew: %.2f°", q.skew_angle)
+        log.debug("  Quality Score: %.1f/100", q.quality_score())
+    steps = []
+
+    # Step 1: Brightness correction
+    if q.needs_brightness_correction():
+        log.debug("[ADAPTIVE] Applying brightness correction")
+        steps.append(Step.of('gamma', gamma=0.7 if q.brightness < 80 else 1.3))
+
+    # Step 2: Denoising (image_quality.adaptive_denoise)
+    if q.needs_denoising():
+        log.debug("[ADAPTIVE] Applying denoising")
+        if q.noise_level >= 40:
+            steps.append(Step.of('nlmeans', h=10))
+        elif q.noise_level >= 20:
+            steps.append(Step.of('bilateral', d=5, sigma_color=30, sigma_space=30))
+
+    # Step 3: Contrast enhancement (image_quality.adaptive_clahe)
+    if q.needs_contrast_enhancement():
+        log.debug("[ADAPTIVE] Applying contrast enhancement")
+        clip_limit = 3.0 if q.contrast < 20 else 2.0 if q.contrast < 30 else 1.5
+        steps.append(Step.of('clahe', clip_limit=clip_limit))
+
+    # Step 4: Binarization
+    steps.append(Step.of('otsu'))
+
+    # Step 5: Sharpening (image_quality.adaptive_sharpen)
+    if q.needs_sharpening():
+        log.debug("[ADAPTIVE] Applying sharpening")
+        kernel = 'strong' if q.sharpness < 10 else 'medium' if q.sharpness < 20 else 'gentle'
+        steps.append(Step.of('sharpen', kernel=kernel))
+
+    # Step 6: Deskewing
+    if q.needs_deskewing():
+        log.debug("[ADAPTIVE] Applying deskew (%.2f°)", q.skew_angle)
+        steps.append(Step.of('deskew', angle=q.skew_angle))
+
+    return steps
+
+
+def _plan_optimal(q: ImageQualityMetrics) -> List[Step]:
+    # UNIFIED OPTIMAL MODE - Combines all Phase 1-3 optimizations
+    quality_score = q.quality_score()
+
+    log.debug("[OPTIMAL] Quality Score: %.1f/100", quality_score)
+    log.debug("[OPTIMAL] Brightness: %.1f, Contrast: %.1f", q.brightness, q.contrast)
+    log.debug("[OPTIMAL] Sharpness: %.1f, Noise: %.1f", q.sharpness, q.noise_level)
+    steps = []
+
+    # Step 2: Brightness correction
+    if q.brightness < 80 or q.brightness > 200:
+        gamma = 0.7 if q.brightness < 80 else 1.3
+        log.debug("[OPTIMAL] Applying brightness correction (gamma=%s)", gamma)
+        steps.append(Step.of('gamma', gamma=gamma))
+
+    # Step 3: Adaptive denoising
+    if q.noise_level > 25:
+        log.debug("[OPTIMAL] High noise detected, applying strong denoising")
+        steps.append(Step.of('nlmeans', h=10))
+    elif q.noise_level > 15:
+        log.debug("[OPTIMAL] Moderate noise detected, applying median blur")
+        steps.append(Step.of('median', ksize=3))
+
+    # Step 4: Adaptive contrast enhancement
+    if q.contrast < 30:
+        clip_limit = 2.5 if quality_score < 50 else 1.5
+        log.debug("[OPTIMAL] Low contrast, applying CLAHE (clip=%s)", clip_limit)
+        steps.append(Step.of('clahe', clip_limit=clip_limit))
+    elif q.contrast < 40:
+        log.debug("[OPTIMAL] Moderate contrast, applying gentle CLAHE")
+        steps.append(Step.of('clahe', clip_limit=1.2))
+
+    # Step 5: Adaptive binarization
+    steps.append(Step.of('auto_binarize', log_result="[OPTIMAL] Using %s binarization"))
+
+    # Step 6: Adaptive sharpening
+    if q.sharpness < 20:
+        log.debug("[OPTIMAL] Low sharpness, applying strong sharpening")
+        steps.append(Step.of('sharpen', kernel='strong'))
+    elif q.sharpness < 30:
+        log.debug("[OPTIMAL] Moderate sharpness, applying light sharpening")
+        steps.append(Step.of('sharpen', kernel='medium'))
+
+    # Step 7: Deskewing
+    if abs(q.skew_angle) > 1.0:
+        log.debug("[OPTIMAL] Deskewing image (%.2f°)", q.skew_angle)
+        steps.append(Step.of('deskew', angle=q.skew_angle))
+
+    # Step 8: Morphological cleanup
+    steps.append(Step.of('morph_cleanup'))
+
+    return steps
+
+
+def _plan_aggressive(q: ImageQualityMetrics) -> List[Step]:
+    # PHASE 2: Advanced preprocessing with adaptive binarization
+    log.debug("[AGGRESSIVE] Quality Analysis:")
+    log.debug("  Brightness: %.1f", q.brightness)
+    log.debug("  Contrast: %.1f", q.contrast)
+    steps = []
+
+    # Step 1: Aggressive denoising
+    if q.noise_level > 20:
+        log.debug("[AGGRESSIVE] Applying strong denoising")
+        steps.append(Step.of('nlmeans', h=10))
+
+    # Step 2: Aggressive contrast enhancement
+    if q.contrast < 40:
+        log.debug("[AGGRESSIVE] Applying strong CLAHE")
+        steps.append(Step.of('clahe', clip_limit=2.5))
+
+    # Step 3: Adaptive binarization
+    steps.append(Step.of('auto_binarize', log_result="[AGGRESSIVE] Using %s binarization"))
+
+    # Step 4: Aggressive sharpening
+    if q.sharpness < 25:
+        log.debug("[AGGRESSIVE] Applying strong sharpening")
+        steps.append(Step.of('sharpen', kernel='strong'))
+
+    # Step 5: Morphological operations
+    steps.append(Step.of('morph_cleanup'))
+
+    return steps
+
+
+def _plan_enhanced(q: ImageQualityMetrics) -> List[Step]:
+    # PRODUCTION METHOD + Quality-aware enhancements
+    steps = []
+
+    # Quality-aware median filter
+    if q.noise_level > 25:
+        log.debug("[ENHANCED] Noise detected (%.1f), using median filter size 5", q.noise_level)
+        steps.append(Step.of('median', ksize=5))
+    else:
+        steps.append(Step.of('median', ksize=3))
+
+    # Quality-aware contrast adjustment
+    if q.contrast < 35:
+        log.debug("[ENHANCED] Low contrast (%.1f), applying gentle CLAHE", q.contrast)
+        steps.append(Step.of('clahe', clip_limit=1.2))
+
+    return steps
+
+
+PLANS = {
+    'simple': _plan_simple,
+    'experimental': _plan_experimental,
+    'adaptive': _plan_adaptive,
+    'optimal': _plan_optimal,
+    'aggressive': _plan_aggressive,
+    'enhanced': _plan_enhanced,
+}
+
+
+def plan_for(method: str, quality_metrics: ImageQualityMetrics) -> List[Step]:
+    """Steps a mode applies to an image with these metrics ('enhanced' for unknown modes)"""
+    return PLANS.get(method, _plan_enhanced)(quality_metrics)
+
+
+# ----------------------------------------------------------------------
+# Execution
+# ----------------------------------------------------------------------
+
+class PreprocessingGraph:
+    """Runs mode plans against one image, memoizing every intermediate on its context"""
+
+    def __init__(self, source):
+        self.context = ImageContext.ensure(source)
+
+    def _memo(self, key, compute):
+        """context.cached() that also reports whether it had to compute"""
+        computed = []
+
+        def run():
+            computed.append(True)
+            return compute()
+
+        start = time.perf_counter()
+        value = self.context.cached(key, run)
+        return value, (time.perf_counter() - start) * 1000, not computed
+
+    def run(self, method: str, cancel_event=None, deadline: float = None,
+            region: Tuple[int, int, int, int] = None) -> PreprocessingRun:
+        """
+        Preprocess the image for one mode
+        
+        With region ((x, y, w, h) in OCR base pixels) only that slice of the
+        base image is preprocessed, planned from the whole image's metrics.
+        
+        Raises OCRCancelled / OCRTimeout between steps once cancel_event is
+        set or deadline (time.monotonic()) has passed.
+        """
+        timings = []
+
+        # Shared roots: upscaled OCR base and quality metrics
+        base, ms, cached = self._memo(('graph', 'ocr_base'), self.context.ocr_base)
+        timings.append({'step': 'ocr_base', 'ms': round(ms, 2), 'cached': cached})
+        if base is not self.context.gray and not cached:
+            log.debug("[INFO] Upscaled image from %sx%s to %sx%s",
+                      self.context.width, self.context.height, base.shape[1], base.shape[0])
+
+        # Same memo key as ImageContext.quality(), so metrics computed by the caller count as cached
+        from backend.image_quality import analyze_image_quality
+        quality_metrics, ms, cached = self._memo('quality', lambda: analyze_image_quality(self.context))
+        timings.append({'step': 'quality', 'ms': round(ms, 2), 'cached': cached})
+
+        image = base
+        chain = ('graph', 'ocr_base')
+        if region is not None:
+            x, y, w, h = (int(v) for v in region)
+            image = base[y:y + h, x:x + w]
+            chain = chain + (('region', x, y, w, h),)
+        for step in plan_for(method, quality_metrics):
+            raise_if_stopped(cancel_event, deadline)
+            chain = chain + (step,)
+            (image, detail), ms, cached = self._memo(chain, lambda s=step, img=image: self._apply(s, img))
+            timings.append({'step': step.label, 'ms': round(ms, 2), 'cached': cached})
+            if step.log_result:
+                log.debug(step.log_result, detail)
+
+        run = PreprocessingRun(method, image, quality_metrics, timings)
+        if log.debug_enabled:
+            computed = ', '.join(f"{t['step']} {'cached' if t['cached'] else str(t['ms']) + 'ms'}" for t in timings)
+            log.debug("[PIPELINE] %s: %.1fms (%s)", method, run.total_ms, computed)
+        return run
+
+    def _apply(self, step: Step, image: np.ndarray):
+        result = OPERATIONS[step.op](image, self.context, **dict(step.params))
+        image, detail = result if isinstance(result, tuple) else (result, None)
+        # Memoized intermediates are shared between modes - never mutate in place
+        image.setflags(write=False)
+        return image, detail
+
+
+def run_preprocessing(source, method: str = 'enhanced', cancel_event=None,
+                      deadline: float = None, region: Tuple[int, int, int, int] = None) -> PreprocessingRun:
+    """Preprocess a path or ImageContext for one mode (intermediates memoized on the context)"""
+    return PreprocessingGraph(source).run(method, cancel_event=cancel_event, deadline=deadline,
+                                          region=region)
@@ -10,6 +10,160 @@ from dataclasses import dataclass
 from enum import Enum
 import json
 
+from backend.logger import get_logger
+
+log = get_logger('parser')
+
+
+# Every fixed pattern the strategies use, compiled once at import
+PATTERNS = {
+    # OCR hallucination fixes applied to the whole text (in this order)
+    'fix_date_sevens': re.compile(r'(\d{2})7(\d{2})7(20\d{2})'),
+    'fix_grand_total': re.compile(r'[6S]rand\s*Total', re.IGNORECASE),
+    'fix_less_for_damages': re.compile(r'1ess\s*For\s*Da[mn]', re.IGNORECASE),
+    'fix_unloading': re.compile(r'Un1oading', re.IGNORECASE),
+    'fix_lf_cash': re.compile(r'(?:1YF|1/F).*Cash', re.IGNORECASE),
+
+    # Voucher number
+    'vn_label': re.compile(r'(?:voucher\s*number|vouchernumber)[:\s]*(\d{2,4})\b', re.IGNORECASE),
+    'vn_ocr_variants': re.compile(r'(?:nu[a-z]*ber|no|number|num|#)[:\s]*(\d{2,4})\b', re.IGNORECASE),
+    'vn_standalone': re.compile(r'^\s*(\d{2,4})\s*$'),
+    'vn_after_voucher': re.compile(r'voucher[:\s#]*(\d{2,4})\b', re.IGNORECASE),
+
+    # Date
+    'date_label': re.compile(r'(?:voucherdate|voucher\s*date)[:\s]*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})',
+                             re.IGNORECASE),
+    'date_general': re.compile(r'(\d{1,2})[\/\-](\d{1,2})[\/\-](20\d{2})'),
+    'date_ddmmyyyy': re.compile(r'\b(\d{2})(\d{2})(20\d{2})\b'),
+    'date_any': re.compile(r'\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}'),
+
+    # Supplier
+    'supp_label': re.compile(r'(?:supp\s*name|suppname|suppnane|nane|nare|ne)[:\s]*'
+                             r'([A-Z]{2,30}(?:/[A-Z])?|.{2,30}?)(?=\n|$|qty|total|price)', re.IGNORECASE),
+    'supp_after_label': re.compile(r'(?:name|nane|nme)[:\s]*(.{2,30}?)(?=\n|$|qty|total)', re.IGNORECASE),
+    'supp_indicator': re.compile(r'\b(supp|name|nane)\b', re.IGNORECASE),
+    'table_words': re.compile(r'\b(qty|price|amount|total)\b', re.IGNORECASE),
+    'table_words_comm': re.compile(r'\b(qty|price|amount|total|comm)\b', re.IGNORECASE),
+    'leading_lower_fragment': re.compile(r'^[a-z]{1,2}\s+'),
+    'trailing_junk': re.compile(r'[\d\W]+$'),
+    'trailing_table_words': re.compile(r'\s*(?:qty|price|amount|total).*$', re.IGNORECASE),
+    'has_letter': re.compile(r'[a-zA-Z]'),
+
+    # Totals
+    'total_line': re.compile(r'(?:^|\s|t)(?:otal|tal)[\s]*(\d+)[\s]*(\d{1,5}\.\d{2})', re.IGNORECASE | re.MULTILINE),
+    'amount_3_5_digits': re.compile(r'\b(\d{3,5}\.\d{2})\b'),
+    'net_explicit': re.compile(r'(?:grand|net)[\s\w]*total[\s:]*(-?\d{1,7}(?:\.\d{2})?)', re.IGNORECASE),
+
+    # Line items
+    'items_header': re.compile(r'(?:qty|quantity|qty|q)[\s\-._]*(?:price|pr|p)[\s\-._]*(?:amount|amt|amnt)',
+                               re.IGNORECASE),
+    'items_deduction_start': re.compile(r'^(?:\(\s*-\s*\)|comm|damage|less|unloading|lf|grand\s*total|deduction)',
+                                        re.IGNORECASE),
+    'items_summary_only': re.compile(r'^(?:total|subtotal)\s*$', re.IGNORECASE),
+    'items_summary_prefix': re.compile(r'^(?:total|subtotal|grand|sum)', re.IGNORECASE),
+    'item_words': re.compile(r'(?:item|product|name)', re.IGNORECASE),
+    'number': re.compile(r'\d+(?:\.\d{2})?'),
+    'item_qty_price_amount': re.compile(r'^(.*?)\s+(\d{1,4})\s+(\d{1,6}(?:\.\d{1,2})?)\s+(\d{1,7}(?:\.\d{1,2})?)$'),
+    'item_amount_price_qty': re.compile(r'^(.*?)\s+(\d{1,7}(?:\.\d{1,2})?)\s+(\d{1,6}(?:\.\d{1,2})?)\s+(\d{1,4})$'),
+    'item_numbers_only': re.compile(r'^(\d{1,4})\s+(\d{1,6}(?:\.\d{1,2})?)\s+(\d{1,7}(?:\.\d{1,2})?)$'),
+    'leading_non_word': re.compile(r'^[^\w]*'),
+    'item_name_artifacts': re.compile(r'\s*(?:qty|price|amount|total|\d+\.\d{2}).*$', re.IGNORECASE),
+    'two_digits': re.compile(r'\d{2,}'),
+    'letters_only': re.compile(r'^[A-Za-z\s]+$'),
+    'whitespace_run': re.compile(r'\s+'),
+    'relaxed_skip': re.compile(r'^(?:total|date|voucher|supplier|qty|price|amount)', re.IGNORECASE),
+    'relaxed_triple': re.compile(r'\b(\d{1,4})\s+(\d{1,6}(?:\.\d{1,2})?)\s+(\d{1,7}(?:\.\d{1,2})?)\b'),
+}
+
+# Replacements for the whole-text OCR fixes, applied in this order
+OCR_TEXT_FIXES = [
+    (PATTERNS['fix_date_sevens'], r'\1/\2/\3'),
+    (PATTERNS['fix_grand_total'], 'GrandTotal'),
+    (PATTERNS['fix_less_for_damages'], 'LessForDam'),
+    (PATTERNS['fix_unloading'], 'UnLoading'),
+    (PATTERNS['fix_lf_cash'], 'L/FAndCash'),
+]
+
+# Deduction patterns with OCR error variations, tried in this order
+DEDUCTION_PATTERNS = {
+    'Unloading': {
+        'patterns': [re.compile(p, re.IGNORECASE) for p in (
+            r'(?:unloading|unload|unld|unlod|unlodin)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+            r'(?:unloading|unload)[^\d\n]*\(?\s*-\s*\)?[^\d\n]*([\d,]+\.?\d{0,2})',
+        )],
+        'max_amount': 200,
+        'typical_range': (10, 150)
+    },
+    'L/F Cash': {
+        'patterns': [re.compile(p, re.IGNORECASE) for p in (
+            r'(?:l[/\s]*f|lf|l\s*f|lfand|l\.f)[^\d\n]*(?:and)?[^\d\n]*(?:cash)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+            r'(?:lfandcash|lfcash|lf\s+cash)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+            r'(?:cash)[^\d\n]*(?:lf)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+            r'\(\s*-\s*\)[^\d\n]*(?:l[/\s]*f|lf)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+        )],
+        'max_amount': 500,
+        'typical_range': (20, 400)
+    },
+    'Commission': {
+        'patterns': [re.compile(p, re.IGNORECASE) for p in (
+            r'(?:comm|comission|commision|com)[^\d\n]*(?:@)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})\s*(?:%)?',
+            r'(?:comm|comission)[^\d\n]*(?:@)?[^\d\n]*(?:4\.?\d*)?\s*(?:%)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+            r'\(\s*-\s*\)[^\d\n]*(?:comm|com)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+        )],
+        'max_amount': 5000,
+        'typical_range': (10, 1000),
+        'is_percentage': True
+    },
+    'Less for Damages': {
+        'patterns': [re.compile(p, re.IGNORECASE) for p in (
+            r'(?:less\s*for\s*damages|lessfordamages|damages|damage)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+            r'(?:less\s*for)[^\d\n]*(?:damages)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+            r'\(\s*-\s*\)[^\d\n]*(?:damage|less)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
+        )],
+        'max_amount': 1000,
+        'typical_range': (20, 500),
+        'is_percentage': True
+    },
+}
+
+
+class VoucherLineIndex:
+    """
+    Lines of one voucher's OCR text, tokenised once and shared by every strategy
+
+    The supplier, line-item and deduction strategies all walk the same lines;
+    keyword hits and number tokens are worked out once per line and
+    remembered, whichever strategy asks first.
+    """
+
+    def __init__(self, text: str):
+        self.lines = [line.strip() for line in text.split('\n') if line.strip()]
+        self._hits = {}     # {(pattern name, line index): match or None}
+        self._numbers = {}  # {line index: number tokens}
+
+    def search(self, name: str, line_idx: int):
+        """PATTERNS[name].search on one line, memoized"""
+        key = (name, line_idx)
+        if key not in self._hits:
+            self._hits[key] = PATTERNS[name].search(self.lines[line_idx])
+        return self._hits[key]
+
+    def first(self, name: str, start: int = 0, stop: int = None) -> Tuple[int, Any]:
+        """(index, match) of the first line in [start, stop) matching PATTERNS[name], or (-1, None)"""
+        stop = len(self.lines) if stop is None else min(stop, len(self.lines))
+        for line_idx in range(start, stop):
+            match = self.search(name, line_idx)
+            if match:
+                return line_idx, match
+        return -1, None
+
+    def numbers(self, line_idx: int) -> List[str]:
+        """Integer / 2-decimal number tokens of one line"""
+        tokens = self._numbers.get(line_idx)
+        if tokens is None:
+            tokens = self._numbers[line_idx] = PATTERNS['number'].findall(self.lines[line_idx])
+        return tokens
+
 
 class ExtractionStatus(Enum):
     HIGH_CONFIDENCE = "high_confidence"      # > 85% - Auto-accept
@@ -130,7 +284,7 @@ class ValidationRules:
             errors.append("Value is a year, not a supplier name")
         
         # Must contain at least one letter
-        if not re.search(r'[a-zA-Z]', value):
+        if not PATTERNS['has_letter'].search(value):
             errors.append("Must contain at least one letter")
         
         # Check for common non-supplier words
@@ -177,17 +331,19 @@ class QualityFocusedExtractor:
     4. Cross-field validation
     """
     
-    def __init__(self, ocr_text: str):
+    def __init__(self, ocr_text: str, debug: bool = None):
         self.raw_text = ocr_text or ""
+        # debug_log is only kept (and [QFEE] lines formatted) while the parser
+        # logger is at DEBUG or voucher_debug() is active, unless debug is given
+        self.debug_enabled = log.debug_enabled if debug is None else debug
         
         # Immediate OCR hallucination fixes globally
-        self.raw_text = re.sub(r'(\d{2})7(\d{2})7(20\d{2})', r'\1/\2/\3', self.raw_text)
-        self.raw_text = re.sub(r'[6S]rand\s*Total', 'GrandTotal', self.raw_text, flags=re.IGNORECASE)
-        self.raw_text = re.sub(r'1ess\s*For\s*Da[mn]', 'LessForDam', self.raw_text, flags=re.IGNORECASE)
-        self.raw_text = re.sub(r'Un1oading', 'UnLoading', self.raw_text, flags=re.IGNORECASE)
-        self.raw_text = re.sub(r'(?:1YF|1/F).*Cash', 'L/FAndCash', self.raw_text, flags=re.IGNORECASE)
-        
-        self.lines = [line.strip() for line in self.raw_text.split('\n') if line.strip()]
+        for pattern, replacement in OCR_TEXT_FIXES:
+            self.raw_text = pattern.sub(replacement, self.raw_text)
+
+        # Tokenised once; every line-based strategy queries the same index
+        self.index = VoucherLineIndex(self.raw_text)
+        self.lines = self.index.lines
         self.debug_log = []
         self.data = {
             'voucher_number': None,
@@ -201,10 +357,14 @@ class QualityFocusedExtractor:
             'deductions': []
         }
     
-    def _log(self, message: str):
-        """Log debug message"""
+    def _log(self, message: str, *args):
+        """Log debug message (%-style args, formatted only when debugging)"""
+        if not self.debug_enabled:
+            return
+        if args:
+            message = message % args
         self.debug_log.append(message)
-        print(f"[QFEE] {message}")
+        log.debug("[QFEE] %s", message)
     
     def extract_all(self) -> Dict:
         """
@@ -237,7 +397,7 @@ class QualityFocusedExtractor:
         if not items:
             items = self._extract_items_relaxed()
         self.data['items'] = items
-        self._log(f"  Found {len(items)} line items")
+        self._log("  Found %d line items", len(items))
         
         # Extract deductions
         self._log("\nExtracting deductions...")
@@ -251,7 +411,7 @@ class QualityFocusedExtractor:
                 'deduction_type': 'Commission @4%',
                 'amount': round(commission, 2)
             })
-            self._log(f"  Commission @4%: {commission:.2f}")
+            self._log("  Commission @4%%: %.2f", commission)
         
         # Always calculate Less for Damages @ 5% of gross  
         if self.data.get('gross_total'):
@@ -261,7 +421,7 @@ class QualityFocusedExtractor:
                 'deduction_type': 'Less for Damages',
                 'amount': round(damage, 2)
             })
-            self._log(f"  Less for Damages @5%: {damage:.2f}")
+            self._log("  Less for Damages @5%%: %.2f", damage)
         
         # Extract other deductions from OCR (Unloading, L/F Cash, Other)
         other_deductions = self._extract_other_deductions()
@@ -297,7 +457,7 @@ class QualityFocusedExtractor:
         deductions = final_deductions
         
         self.data['deductions'] = deductions
-        self._log(f"  Total deductions: {len(deductions)}")
+        self._log("  Total deductions: %d", len(deductions))
         
         # Cross-validate fields
         self._cross_validate(results)
@@ -323,7 +483,7 @@ class QualityFocusedExtractor:
         Extract a single field using multiple strategies
         Returns best valid result with confidence scoring
         """
-        self._log(f"\nExtracting {field_name}...")
+        self._log("\nExtracting %s...", field_name)
         self._log("-" * 60)
         
         # Get extraction strategies for this field
@@ -333,13 +493,13 @@ class QualityFocusedExtractor:
         
         # Try each strategy
         for i, (strategy_name, extractor_func) in enumerate(strategies, 1):
-            self._log(f"  Strategy {i}/{len(strategies)}: {strategy_name}")
+            self._log("  Strategy %d/%d: %s", i, len(strategies), strategy_name)
             
             try:
                 result = extractor_func()
                 
                 if result is None:
-                    self._log(f"    -> No result")
+                    self._log("    -> No result")
                     continue
                 
                 # Validate the result
@@ -360,12 +520,13 @@ class QualityFocusedExtractor:
                 
                 attempts.append(attempt)
                 
-                status = "PASS" if is_valid else "FAIL"
-                error_str = f" (Errors: {', '.join(validation_errors)})" if validation_errors else ""
-                self._log(f"    -> {status}: {result} [Confidence: {confidence}%]{error_str}")
+                if self.debug_enabled:
+                    status = "PASS" if is_valid else "FAIL"
+                    error_str = f" (Errors: {', '.join(validation_errors)})" if validation_errors else ""
+                    self._log("    -> %s: %s [Confidence: %s%%]%s", status, result, confidence, error_str)
                 
             except Exception as e:
-                self._log(f"    -> ERROR: {e}")
+                self._log("    -> ERROR: %s", e)
                 continue
         
         # Select best attempt
@@ -408,7 +569,7 @@ class QualityFocusedExtractor:
             status = ExtractionStatus.LOW_CONFIDENCE
             recommendation = "Low confidence - manual review recommended"
         
-        self._log(f"  [OK] Best result: {best_attempt.value} [Confidence: {best_attempt.confidence}%]")
+        self._log("  [OK] Best result: %s [Confidence: %s%%]", best_attempt.value, best_attempt.confidence)
         
         return FieldResult(
             value=best_attempt.value,
@@ -456,44 +617,37 @@ class QualityFocusedExtractor:
     
     def _extract_vn_label(self) -> Optional[str]:
         """Strategy 1: Look for VoucherNumber label"""
-        pattern = r'(?:voucher\s*number|vouchernumber)[:\s]*(\d{2,4})\b'
-        match = re.search(pattern, self.raw_text, re.IGNORECASE)
+        match = PATTERNS['vn_label'].search(self.raw_text)
         return match.group(1) if match else None
     
     def _extract_vn_ocr_variants(self) -> Optional[str]:
         """Strategy 2: Look for OCR error variants"""
-        pattern = r'(?:nu[a-z]*ber|no|number|num|#)[:\s]*(\d{2,4})\b'
-        match = re.search(pattern, self.raw_text, re.IGNORECASE)
+        match = PATTERNS['vn_ocr_variants'].search(self.raw_text)
         return match.group(1) if match else None
     
     def _extract_vn_standalone(self) -> Optional[str]:
         """Strategy 3: Standalone 2-4 digit number early in doc"""
-        for line in self.lines[:5]:
-            match = re.search(r'^\s*(\d{2,4})\s*$', line)
-            if match:
-                return match.group(1)
-        return None
+        _, match = self.index.first('vn_standalone', stop=5)
+        return match.group(1) if match else None
     
     def _extract_vn_after_voucher(self) -> Optional[str]:
         """Strategy 4: Number after 'Voucher' keyword"""
-        pattern = r'voucher[:\s#]*(\d{2,4})\b'
-        match = re.search(pattern, self.raw_text, re.IGNORECASE)
+        match = PATTERNS['vn_after_voucher'].search(self.raw_text)
         return match.group(1) if match else None
     
     # ==================== DATE STRATEGIES ====================
     
     def _extract_date_label(self) -> Optional[str]:
         """Strategy 1: VoucherDate label"""
-        pattern = r'(?:voucherdate|voucher\s*date)[:\s]*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})'
-        match = re.search(pattern, self.raw_text, re.IGNORECASE)
+        match = PATTERNS['date_label'].search(self.raw_text)
         if match:
             return self._parse_date(match.group(1))
         return None
     
     def _extract_date_general(self) -> Optional[str]:
         """Strategy 2: Generic date pattern"""
-        for line in self.lines[:10]:
-            match = re.search(r'(\d{1,2})[\/\-](\d{1,2})[\/\-](20\d{2})', line)
+        for line_idx in range(min(10, len(self.lines))):
+            match = self.index.search('date_general', line_idx)
             if match:
                 try:
                     day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
@@ -505,8 +659,7 @@ class QualityFocusedExtractor:
     
     def _extract_date_ddmmyyyy(self) -> Optional[str]:
         """Strategy 3: DDMMYYYY without separators"""
-        pattern = r'\b(\d{2})(\d{2})(20\d{2})\b'
-        match = re.search(pattern, self.raw_text)
+        match = PATTERNS['date_ddmmyyyy'].search(self.raw_text)
         if match:
             try:
                 day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
@@ -521,28 +674,23 @@ class QualityFocusedExtractor:
     
     def _extract_supp_label(self) -> Optional[str]:
         """Strategy 1: Supp Name label"""
-        pattern = r'(?:supp\s*name|suppname|suppnane|nane|nare|ne)[:\s]*([A-Z]{2,30}(?:/[A-Z])?|.{2,30}?)(?=\n|$|qty|total|price)'
-        match = re.search(pattern, self.raw_text, re.IGNORECASE)
+        match = PATTERNS['supp_label'].search(self.raw_text)
         if match:
             return self._clean_supplier(match.group(1))
         return None
     
     def _extract_supp_after_label(self) -> Optional[str]:
         """Strategy 2: Text after Name/Nane label on same line"""
-        for line in self.lines:
-            match = re.search(r'(?:name|nane|nme)[:\s]*(.{2,30}?)(?=\n|$|qty|total)', line, re.IGNORECASE)
-            if match:
-                return self._clean_supplier(match.group(1))
-        return None
+        _, match = self.index.first('supp_after_label')
+        return self._clean_supplier(match.group(1)) if match else None
     
     def _extract_supp_next_line(self) -> Optional[str]:
         """Strategy 3: Line after Supp/Name indicator"""
-        for i, line in enumerate(self.lines):
-            if re.search(r'\b(supp|name|nane)\b', line, re.IGNORECASE):
+        for i in range(len(self.lines)):
+            if self.index.search('supp_indicator', i):
                 if i < len(self.lines) - 1:
-                    next_line = self.lines[i + 1]
-                    if not re.search(r'\b(qty|price|amount|total)\b', next_line, re.IGNORECASE):
-                        return self._clean_supplier(next_line)
+                    if not self.index.search('table_words', i + 1):
+                        return self._clean_supplier(self.lines[i + 1])
         return None
     
     def _extract_supp_capitalized(self) -> Optional[str]:
@@ -556,17 +704,13 @@ class QualityFocusedExtractor:
 
     def _extract_supp_positional(self) -> Optional[str]:
         """Strategy 5: Next line after date"""
-        date_line_idx = -1
-        for i, line in enumerate(self.lines):
-            if re.search(r'\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}', line):
-                date_line_idx = i
-                break
+        date_line_idx, _ = self.index.first('date_any')
         
         if date_line_idx != -1 and date_line_idx + 1 < len(self.lines):
             for next_idx in range(date_line_idx + 1, min(date_line_idx + 3, len(self.lines))):
                 pot_supp = self.lines[next_idx].strip()
-                pot_supp = re.sub(r'^[a-z]{1,2}\s+', '', pot_supp)
-                if not re.search(r'\b(qty|price|amount|total|comm)\b', pot_supp, re.IGNORECASE) and 2 <= len(pot_supp) <= 30:
+                pot_supp = PATTERNS['leading_lower_fragment'].sub('', pot_supp)
+                if not PATTERNS['table_words_comm'].search(pot_supp) and 2 <= len(pot_supp) <= 30:
                     if pot_supp.isupper() or '/' in pot_supp:
                         return self._clean_supplier(pot_supp)
         return None
@@ -575,17 +719,16 @@ class QualityFocusedExtractor:
         """Clean supplier name"""
         text = text.strip()
         # Remove trailing non-word characters
-        text = re.sub(r'[\d\W]+$', '', text)
+        text = PATTERNS['trailing_junk'].sub('', text)
         # Remove common artifacts
-        text = re.sub(r'\s*(?:qty|price|amount|total).*$', '', text, flags=re.IGNORECASE)
+        text = PATTERNS['trailing_table_words'].sub('', text)
         return text.strip()
     
     # ==================== TOTAL STRATEGIES ====================
     
     def _extract_total_line(self) -> Optional[float]:
         """Strategy 1: Total line pattern"""
-        pattern = r'(?:^|\s|t)(?:otal|tal)[\s]*(\d+)[\s]*(\d{1,5}\.\d{2})'
-        match = re.search(pattern, self.raw_text, re.IGNORECASE | re.MULTILINE)
+        match = PATTERNS['total_line'].search(self.raw_text)
         if match:
             try:
                 amount = float(match.group(2))
@@ -598,7 +741,7 @@ class QualityFocusedExtractor:
     def _extract_largest_amount(self) -> Optional[float]:
         """Strategy 2: Largest reasonable amount"""
         amounts = []
-        for match in re.finditer(r'\b(\d{3,5}\.\d{2})\b', self.raw_text):
+        for match in PATTERNS['amount_3_5_digits'].finditer(self.raw_text):
             try:
                 amount = float(match.group(1))
                 if 50 <= amount <= 100000:
@@ -617,8 +760,7 @@ class QualityFocusedExtractor:
     
     def _extract_net_explicit(self) -> Optional[float]:
         """Extract explicit net total string match"""
-        pattern = r'(?:grand|net)[\s\w]*total[\s:]*(-?\d{1,7}(?:\.\d{2})?)'
-        match = re.search(pattern, self.raw_text, re.IGNORECASE)
+        match = PATTERNS['net_explicit'].search(self.raw_text)
         if match:
              try:
                  net = float(match.group(1))
@@ -645,9 +787,9 @@ class QualityFocusedExtractor:
         # Look for table header
         for i, line in enumerate(self.lines):
             # Detect table header - various OCR variations
-            if re.search(r'(?:qty|quantity|qty|q)[\s\-._]*(?:price|pr|p)[\s\-._]*(?:amount|amt|amnt)', line, re.IGNORECASE):
+            if self.index.search('items_header', i):
                 table_start_idx = i + 1
-                self._log(f"  Table header found at line {i}: {line}")
+                self._log("  Table header found at line %d: %s", i, line)
                 continue
 
             # Detect table end markers (but allow "Total X XXX.XX" format which contains item data)
@@ -655,21 +797,20 @@ class QualityFocusedExtractor:
                 # Check if line looks like a deduction or summary (not item data)
                 # Deductions usually start with (-), Comm, Damage, etc.
                 # But "Total 8 2490.00" is actually item summary data
-                is_deduction = re.search(r'^(?:\(\s*-\s*\)|comm|damage|less|unloading|lf|grand\s*total|deduction)', line, re.IGNORECASE)
-                is_summary_without_data = re.search(r'^(?:total|subtotal)\s*$', line, re.IGNORECASE)  # Just "Total" with no numbers
+                is_deduction = self.index.search('items_deduction_start', i)
+                is_summary_without_data = self.index.search('items_summary_only', i)  # Just "Total" with no numbers
                 
                 if is_deduction or is_summary_without_data:
                     table_end_idx = i
-                    self._log(f"  Table end at line {i}: {line}")
+                    self._log("  Table end at line %d: %s", i, line)
                     break
 
         # If we didn't find explicit end, try to detect by content change
         if table_start_idx and not table_end_idx:
             for i in range(table_start_idx, len(self.lines)):
-                line = self.lines[i]
                 # If line doesn't have 2-3 numbers, it's probably not an item line
-                numbers = re.findall(r'\d+(?:\.\d{2})?', line)
-                if len(numbers) < 2 and not re.search(r'(?:item|product|name)', line, re.IGNORECASE):
+                numbers = self.index.numbers(i)
+                if len(numbers) < 2 and not self.index.search('item_words', i):
                     table_end_idx = i
                     break
             if not table_end_idx:
@@ -677,7 +818,7 @@ class QualityFocusedExtractor:
 
         # Extract items from table section
         if table_start_idx:
-            self._log(f"  Processing table lines {table_start_idx} to {table_end_idx or len(self.lines)}")
+            self._log("  Processing table lines %s to %s", table_start_idx, table_end_idx or len(self.lines))
 
             for i in range(table_start_idx, table_end_idx or len(self.lines)):
                 line = self.lines[i]
@@ -687,14 +828,15 @@ class QualityFocusedExtractor:
                     continue
 
                 # Skip total/summary lines
-                if re.search(r'^(?:total|subtotal|grand|sum)', line, re.IGNORECASE):
+                if self.index.search('items_summary_prefix', i):
                     continue
 
                 # Try to extract item with enhanced patterns
                 item = self._extract_single_item(line, i, items)
                 if item:
                     items.append(item)
-                    self._log(f"    Found item: {item['item_name'][:30]}... Qty:{item['quantity']} Price:{item['unit_price']} Amount:{item['line_amount']}")
+                    self._log("    Found item: %s... Qty:%s Price:%s Amount:%s", item['item_name'][:30],
+                              item['quantity'], item['unit_price'], item['line_amount'])
 
         return items
 
@@ -703,8 +845,7 @@ class QualityFocusedExtractor:
 
         # Pattern 1: Standard Qty Price Amount (3 numbers)
         # Examples: "Apple 2 50.00 100.00", "2 50.00 100.00", "Apple 2 50 100"
-        pattern1 = r'^(.*?)\s+(\d{1,4})\s+(\d{1,6}(?:\.\d{1,2})?)\s+(\d{1,7}(?:\.\d{1,2})?)$'
-        match = re.match(pattern1, line)
+        match = PATTERNS['item_qty_price_amount'].match(line)
 
         if match:
             try:
@@ -731,8 +872,7 @@ class QualityFocusedExtractor:
                 pass
 
         # Pattern 2: Amount Price Qty (reversed order) - sometimes OCR mixes them up
-        pattern2 = r'^(.*?)\s+(\d{1,7}(?:\.\d{1,2})?)\s+(\d{1,6}(?:\.\d{1,2})?)\s+(\d{1,4})$'
-        match = re.match(pattern2, line)
+        match = PATTERNS['item_amount_price_qty'].match(line)
 
         if match:
             try:
@@ -759,10 +899,9 @@ class QualityFocusedExtractor:
                 pass
 
         # Pattern 3: Just numbers (no name, common in poor OCR)
-        pattern3 = r'^(\d{1,4})\s+(\d{1,6}(?:\.\d{1,2})?)\s+(\d{1,7}(?:\.\d{1,2})?)$'
-        match = re.match(pattern3, line.strip())
+        match = PATTERNS['item_numbers_only'].match(line.strip())
 
-        if match and not re.search(r'[a-zA-Z]', line):
+        if match and not PATTERNS['has_letter'].search(line):
             try:
                 qty = int(match.group(1))
                 price = float(match.group(2))
@@ -831,22 +970,22 @@ class QualityFocusedExtractor:
     def _clean_item_name(self, name: str, line_idx: int) -> str:
         """Clean and enhance item name extraction"""
         # Remove leading non-word characters
-        name = re.sub(r'^[^\w]*', '', name)
+        name = PATTERNS['leading_non_word'].sub('', name)
 
         # Remove common artifacts
-        name = re.sub(r'\s*(?:qty|price|amount|total|\d+\.\d{2}).*$', '', name, flags=re.IGNORECASE)
+        name = PATTERNS['item_name_artifacts'].sub('', name)
 
         # If name is empty, try to get it from previous line
         if not name and line_idx > 0:
             prev_line = self.lines[line_idx - 1]
             # Check if previous line looks like a name (no numbers or just a name)
-            if not re.search(r'\d{2,}', prev_line) or re.match(r'^[A-Za-z\s]+$', prev_line.strip()):
+            if not self.index.search('two_digits', line_idx - 1) or PATTERNS['letters_only'].match(prev_line):
                 name = prev_line.strip()
-                name = re.sub(r'^[^\w]*', '', name)
+                name = PATTERNS['leading_non_word'].sub('', name)
 
         # Clean up
         name = name.strip()
-        name = re.sub(r'\s+', ' ', name)  # Normalize spaces
+        name = PATTERNS['whitespace_run'].sub(' ', name)  # Normalize spaces
 
         return name[:100]  # Limit length
 
@@ -854,13 +993,13 @@ class QualityFocusedExtractor:
         """Extract items with relaxed validation (fallback for poor OCR)"""
         items = []
 
-        for line in self.lines:
+        for i, line in enumerate(self.lines):
             # Skip lines that are clearly not items
-            if re.search(r'^(?:total|date|voucher|supplier|qty|price|amount)', line, re.IGNORECASE):
+            if self.index.search('relaxed_skip', i):
                 continue
 
             # Look for any 3 numbers that could be qty, price, amount
-            numbers = re.findall(r'\b(\d{1,4})\s+(\d{1,6}(?:\.\d{1,2})?)\s+(\d{1,7}(?:\.\d{1,2})?)\b', line)
+            numbers = PATTERNS['relaxed_triple'].findall(line)
 
             for match in numbers:
                 try:
@@ -879,7 +1018,7 @@ class QualityFocusedExtractor:
                             num_match = re.search(r'\b' + re.escape(match[0]) + r'\s+' + re.escape(match[1]), line)
                             if num_match:
                                 item_name = line[:num_match.start()].strip()
-                                item_name = re.sub(r'^[^\w]*', '', item_name)
+                                item_name = PATTERNS['leading_non_word'].sub('', item_name)
 
                             items.append({
                                 'item_name': item_name if item_name else f'Item {len(items) + 1}',
@@ -899,53 +1038,10 @@ class QualityFocusedExtractor:
         """Extract Unloading, L/F Cash, and Other (unnamed) deductions from OCR with comprehensive patterns"""
         deductions = []
         found_amounts = set()  # Track amounts to prevent duplicates
-        
-        # Enhanced patterns with OCR error variations
-        deduction_patterns = {
-            'Unloading': {
-                'patterns': [
-                    r'(?:unloading|unload|unld|unlod|unlodin)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                    r'(?:unloading|unload)[^\d\n]*\(?\s*-\s*\)?[^\d\n]*([\d,]+\.?\d{0,2})',
-                ],
-                'max_amount': 200,
-                'typical_range': (10, 150)
-            },
-            'L/F Cash': {
-                'patterns': [
-                    r'(?:l[/\s]*f|lf|l\s*f|lfand|l\.f)[^\d\n]*(?:and)?[^\d\n]*(?:cash)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                    r'(?:lfandcash|lfcash|lf\s+cash)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                    r'(?:cash)[^\d\n]*(?:lf)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                    r'\(\s*-\s*\)[^\d\n]*(?:l[/\s]*f|lf)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                ],
-                'max_amount': 500,
-                'typical_range': (20, 400)
-            },
-            'Commission': {
-                'patterns': [
-                    r'(?:comm|comission|commision|com)[^\d\n]*(?:@)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})\s*(?:%)?',
-                    r'(?:comm|comission)[^\d\n]*(?:@)?[^\d\n]*(?:4\.?\d*)?\s*(?:%)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                    r'\(\s*-\s*\)[^\d\n]*(?:comm|com)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                ],
-                'max_amount': 5000,
-                'typical_range': (10, 1000),
-                'is_percentage': True
-            },
-            'Less for Damages': {
-                'patterns': [
-                    r'(?:less\s*for\s*damages|lessfordamages|damages|damage)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                    r'(?:less\s*for)[^\d\n]*(?:damages)?[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                    r'\(\s*-\s*\)[^\d\n]*(?:damage|less)[^\d\n]*(-?\s*[\d,]+\.?\d{0,2})',
-                ],
-                'max_amount': 1000,
-                'typical_range': (20, 500),
-                'is_percentage': True
-            },
-        }
-        
         found_types = set()
         
         # Process each deduction type
-        for ded_type, config in deduction_patterns.items():
+        for ded_type, config in DEDUCTION_PATTERNS.items():
             if ded_type in found_types:
                 continue
             
@@ -955,7 +1051,7 @@ class QualityFocusedExtractor:
             is_percentage = config.get('is_percentage', False)
                 
             for pattern in patterns:
-                matches = list(re.finditer(pattern, self.raw_text, re.IGNORECASE))
+                matches = list(pattern.finditer(self.raw_text))
                 
                 for match in matches:
                     try:
@@ -999,7 +1095,7 @@ class QualityFocusedExtractor:
                             })
                             found_types.add(ded_type)
                             found_amounts.add(rounded_amount)
-                            self._log(f"  {ded_type}: {rounded_amount:.2f}")
+                            self._log("  %s: %.2f", ded_type, rounded_amount)
                             break
                     except Exception as e:
                         continue
@@ -1174,9 +1270,9 @@ class QualityFocusedExtractor:
         return int(sum(confidences) / len(confidences))
 
 
-def extract_with_quality(ocr_text: str) -> Dict:
+def extract_with_quality(ocr_text: str, debug: bool = None) -> Dict:
     """Main entry point for quality-focused extraction"""
-    extractor = QualityFocusedExtractor(ocr_text)
+    extractor = QualityFocusedExtractor(ocr_text, debug=debug)
     return extractor.extract_all()
 
 
@@ -3,7 +3,7 @@ Robust OCR Integration Module
 Provides easy integration of adaptive OCR and robust parser into existing workflow
 """
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from backend.adaptive_ocr_service import extract_text_robust, QualityAwarePreprocessor
 from backend.robust_parser import parse_receipt_text_robust
 from backend.services.ml_training_service import MLTrainingService
@@ -104,11 +104,11 @@ class RobustOCRPipeline:
     
     def _apply_ml_to_ocr(self, ocr_result: Dict) -> Dict:
         """Apply ML text corrections to OCR result"""
-        # Load OCR correction model
-        from backend.ml_models.ml_correction_model import OCRCorrectionModel
+        # Resident OCR correction model
+        from backend.ml_models.model_registry import get_model_registry
         
-        model = OCRCorrectionModel()
-        if model.load_model():
+        model = get_model_registry().model('ocr_corrections')
+        if model is not None:
             corrected_text = ocr_result['text']
             
             # Try to apply corrections line by line
@@ -23,6 +23,8 @@ import json
 import shutil
 from backend.services.production_sync_service import ProductionSyncService
 from backend.services.ml_training_service import MLTrainingService
+from backend.ocr_engine import get_ocr_engine
+from backend.ocr_cache import get_ocr_cache
 
 api_bp = Blueprint('api', __name__)
 
@@ -303,7 +305,11 @@ def delete_all_data():
             print("[RESET] Deleted entire ML dataset directory")
         print("[RESET] Deleted all feedback data and training images")
 
-        # 5. Create empty ML directories for future use
+        # 5. Drop cached OCR results for the deleted images
+        removed = get_ocr_cache().clear()
+        print(f"[RESET] Cleared OCR cache ({removed} entries)")
+
+        # 6. Create empty ML directories for future use
         os.makedirs(models_dir, exist_ok=True)
         os.makedirs(dataset_dir, exist_ok=True)
         os.makedirs(os.path.join(dataset_dir, "feedback"), exist_ok=True)
@@ -406,3 +412,12 @@ def reprocess_batch_db(batch_id):
     except Exception as e:
         current_app.logger.error(f"Error starting batch reprocess: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
+
+@api_bp.route("/ocr/stats", methods=["GET"])
+def ocr_stats():
+    """OCR engine pool and OCR result cache counters (hits, misses, evictions)."""
+    return jsonify({
+        "success": True,
+        "engine": get_ocr_engine().stats(),
+        "cache": get_ocr_cache().stats()
+    })
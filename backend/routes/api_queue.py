@@ -26,44 +26,27 @@ def calculate_file_hash(filepath):
     return hash_md5.hexdigest()
 
 import json
+import threading
 from backend.services.batch_service import BatchService
 from backend.smart_crop import SmartReceiptDetector
 from backend.services.batch_service import BatchService
 from backend.smart_crop import SmartReceiptDetector
 from backend.services.ml_feedback_service import MLFeedbackService
 from backend.services.ml_training_service import MLTrainingService
+from backend.services.batch_ocr_service import BatchOCRService
+from backend.services.ingestion_pipeline import IngestJob, get_ingestion_pipeline
+from backend.services.queue_store import get_queue_store
+from backend.logger import get_logger
 
-api_queue_bp = Blueprint('api_queue', __name__)
-
-# Persistent Queue Storage
-QUEUE_STORE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'queue_store.json')
-
-def load_queue_store():
-    """Load queue store from JSON file"""
-    try:
-        if os.path.exists(QUEUE_STORE_FILE):
-            with open(QUEUE_STORE_FILE, 'r') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"[ERROR] Failed to load queue store: {e}")
-    return {}
-
-def save_queue_store(store):
-    """Save queue store to JSON file (thread-safe)"""
-    with queue_store_lock:
-        try:
-            os.makedirs(os.path.dirname(QUEUE_STORE_FILE), exist_ok=True)
-            with open(QUEUE_STORE_FILE, 'w') as f:
-                json.dump(store, f, indent=4, default=str)
-        except Exception as e:
-            print(f"[ERROR] Failed to save queue store: {e}")
+batch_log = get_logger('batch')
+ingest_log = get_logger('ingest')
 
-# Initialize local store from file
-queue_store = load_queue_store()
+api_queue_bp = Blueprint('api_queue', __name__)
 
-# Thread safety for async processing
-import threading
-queue_store_lock = threading.Lock()
+# Persistent Queue Storage (SQLite, one row per queue and per file).
+# Read queues through it like a dict; persist changes with
+# queue_store.update() / update_file(), never by mutating the dicts.
+queue_store = get_queue_store()
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -92,6 +75,7 @@ def create_queue():
         os.makedirs(upload_folder)
         
     saved_files = []
+    ingest_jobs = []
     
     # Create batch reference
     batch_name = request.form.get('batch_name')
@@ -104,53 +88,20 @@ def create_queue():
             filepath = os.path.join(upload_folder, unique_filename)
             file.save(filepath)
 
-            # Metadata Logging
-            try:
-                conn = get_connection()
-                cur = conn.cursor()
-                
-                file_hash = calculate_file_hash(filepath)
-                file_size = os.path.getsize(filepath)
-                
-                cur.execute("""
-                    INSERT INTO file_lifecycle_meta
-                    (original_filename, stored_filename, file_path, file_size_bytes, file_hash, mime_type, 
-                     upload_batch_id, source_type, client_ip, user_agent, processing_status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    filename,
-                    unique_filename,
-                    filepath,
-                    file_size,
-                    file_hash,
-                    file.content_type,
-                    batch_id,
-                    'web_bulk_upload',
-                    request.remote_addr,
-                    request.user_agent.string,
-                    'pending'
-                ))
-                conn.commit()
-            except Exception as e:
-                print(f"[ERROR] Failed to save file metadata: {e}")
-            
-            # Run Smart Crop Detection
-            auto_crop_info = None
-            try:
-                detector = SmartReceiptDetector()
-                crop_result = detector.detect_receipt(filepath)
-                
-                if crop_result['success']:
-                    auto_crop_info = {
-                        'bbox': crop_result['bbox'],
-                        'confidence': crop_result['confidence'],
-                        'method': crop_result['method']
-                    }
-                    print(f"[SMART-CROP] Detected receipt in {filename} with confidence {crop_result['confidence']:.2f}")
-                else:
-                    print(f"[SMART-CROP] Detection failed for {filename}: {crop_result.get('error')}")
-            except Exception as e:
-                print(f"[SMART-CROP] Error: {e}")
+            # Hashing, metadata and smart-crop detection run in the ingestion
+            # pipeline once the queue is stored; auto_crop_info fills in later
+            ingest_jobs.append(IngestJob(
+                queue_id=queue_id,
+                index=len(saved_files),
+                filepath=filepath,
+                filename=filename,
+                batch_id=batch_id,
+                content_type=file.content_type,
+                client_ip=request.remote_addr,
+                user_agent=request.user_agent.string,
+                app=current_app._get_current_object(),
+                on_update=apply_ingest_update
+            ))
 
             saved_files.append({
                 'original_filename': filename,
@@ -160,7 +111,8 @@ def create_queue():
                 'parsed_data': None,
                 'validated_data': None,
                 'status': 'pending',  # pending, processing, validated, skipped
-                'auto_crop_info': auto_crop_info
+                'auto_crop_info': None,
+                'auto_crop_status': 'pending'  # pending, done
             })
             print(f"[DEBUG] Saved file: {filename} to {filepath}")
         else:
@@ -185,18 +137,97 @@ def create_queue():
     }
     
     # Update in-memory and persistent store
-    queue_store[queue_id] = queue_data
-    save_queue_store(queue_store)
+    queue_store.create(queue_data)
     
     # Store queue_id in session for easy access
     session['current_queue_id'] = queue_id
     
+    # Files are stored - the rest happens in the background
+    pipeline = get_ingestion_pipeline()
+    for job in ingest_jobs:
+        pipeline.submit(job)
+    
     return jsonify({
         'success': True,
         'queue_id': queue_id,
         'total': len(saved_files)
     })
 
+def apply_ingest_update(job, updates, pending_only=False):
+    """
+    Ingestion pipeline callback: merge a stage's results into the queue entry.
+    
+    pending_only results (auto-crop, pre-computed OCR) are dropped once the
+    user has acted on the file, so a background result never overwrites a
+    manual crop or a validation.
+    """
+    queue = queue_store.get(job.queue_id)
+    if not queue or job.index >= len(queue['files']):
+        return
+    
+    applied = queue_store.update_file(job.queue_id, job.index, updates,
+                                      expect_status='pending' if pending_only else None)
+    if not applied:
+        file_info = queue['files'][job.index]
+        ingest_log.info("[INGEST] Dropping background result for %s (status %s)", job.filename, file_info.get('status'))
+
+_ingestion_resumed = False
+_resume_lock = threading.Lock()
+
+def resume_pending_ingestion(app):
+    """
+    Re-submit stored files whose ingestion never finished.
+    
+    Pipeline jobs live only in memory, so files uploaded just before a
+    restart would otherwise stay at auto_crop_status 'pending' forever.
+    Called from create_app(), acts once per process; returns the number
+    of files submitted.
+    """
+    global _ingestion_resumed
+    with _resume_lock:
+        if _ingestion_resumed:
+            return 0
+        _ingestion_resumed = True
+    pending = queue_store.pending_ingest()
+    if not pending:
+        return 0
+    
+    pipeline = get_ingestion_pipeline()
+    for queue_id, index, file_info in pending:
+        queue = queue_store.get(queue_id) or {}
+        pipeline.submit(IngestJob(
+            queue_id=queue_id,
+            index=index,
+            filepath=file_info.get('original_path'),
+            filename=file_info.get('original_filename'),
+            batch_id=queue.get('batch_id'),
+            app=app,
+            on_update=apply_ingest_update,
+            resumed=True
+        ))
+    ingest_log.info("[INGEST] Resumed %d file(s) left pending by the previous run", len(pending))
+    return len(pending)
+
+@api_queue_bp.route('/ingest/stats', methods=['GET'])
+def ingest_stats():
+    """
+    Per-stage backlog and throughput of the upload ingestion pipeline
+    """
+    return jsonify({
+        'success': True,
+        'stages': get_ingestion_pipeline().stats()
+    })
+
+@api_queue_bp.route('/stats', methods=['GET'])
+def queue_stats():
+    """
+    Hot / archived / in-memory queue counts of the queue store
+    """
+    return jsonify({
+        'success': True,
+        'queues': queue_store.stats()
+    })
+
 @api_queue_bp.route('/<queue_id>/process_batch', methods=['POST'])
 def process_batch_ocr(queue_id):
     """
@@ -216,102 +247,63 @@ def process_batch_ocr(queue_id):
         })
 
     # Update phase immediately
-    queue['phase'] = 'processing'
-    save_queue_store(queue_store)
+    queue_store.update(queue_id, {'phase': 'processing'})
     
-    print(f"[BATCH] Starting ASYNC batch OCR for queue {queue_id}")
+    batch_log.info("[BATCH] Starting ASYNC batch OCR for queue %s", queue_id)
 
     # Define the background task
     def run_batch_task(qid):
         try:
-            print(f"[BATCH-THREAD] Started for {qid}")
+            batch_log.debug("[BATCH-THREAD] Started for %s", qid)
             
             # Re-read queue inside thread to ensure freshness if needed
             # (In this simple dict-store, reference is shared, so queue var is fine)
             
-            from backend.ocr_service import extract_text
-            
             total_files = len(queue['files'])
-            processed_count = 0
+            jobs = []
             
             for i, file_info in enumerate(queue['files']):
                 # Check for cancellation signals here if implemented
                 
                 # Skip if already complete
                 if file_info.get('status') in ['ocr_complete', 'validated']:
-                    processed_count += 1
                     continue
                 
-                print(f"[BATCH-THREAD] Processing file {i+1}/{total_files}: {file_info['original_filename']}")
-                
                 # Use cropped image if available
                 image_path = file_info.get('cropped_path') or file_info['original_path']
                 
                 if not os.path.exists(image_path):
-                    print(f"[BATCH-THREAD] Error: File not found {image_path}")
-                    file_info['ocr_result'] = {'error': 'File not found'}
+                    batch_log.warning("[BATCH-THREAD] Error: File not found %s", image_path)
+                    queue_store.update_file(qid, i, {'ocr_result': {'error': 'File not found'}})
                     continue
-                    
-                # Run OCR
-                try:
-                    ocr_result = extract_text(image_path, method='optimal')
-                    
-                    raw_text = ocr_result.get('text', '') if isinstance(ocr_result, dict) else str(ocr_result)
-                    confidence = ocr_result.get('confidence', 0) if isinstance(ocr_result, dict) else 0
-                    
-                    # QUALITY-FOCUSED EXTRACTION ENGINE (tries multiple strategies, validates rigorously)
-                    print(f"[BATCH-THREAD] Running quality-focused extraction for {file_info['original_filename']}")
-                    extraction_result = extract_with_quality(raw_text)
-                    
-                    # Convert to standard format (WITHOUT quality_report - not JSON serializable)
-                    parsed_data = {
-                        'master': {
-                            'voucher_number': extraction_result['fields']['voucher_number'].value,
-                            'voucher_date': extraction_result['fields']['voucher_date'].value,
-                            'supplier_name': extraction_result['fields']['supplier_name'].value,
-                            'gross_total': extraction_result['fields']['gross_total'].value,
-                            'net_total': extraction_result['fields']['net_total'].value,
-                        },
-                        'items': extraction_result.get('items', []),
-                        'deductions': extraction_result.get('deductions', [])
-                    }
-                    
-                    print(f"[BATCH-THREAD] Extraction confidence: {extraction_result['overall_confidence']}%")
-                    print(f"[BATCH-THREAD] Requires review: {extraction_result['requires_review']}")
-                    
-                    # ✨ Apply ML Learned Corrections
-                    try:
-                        parsed_data = MLTrainingService.apply_learned_corrections(parsed_data, raw_text)
-                        print(f"[BATCH-THREAD] Applied ML corrections for {file_info['original_filename']}")
-                    except Exception as ml_e:
-                        print(f"[BATCH-THREAD] ML correction failed: {ml_e}")
-
-                    file_info['ocr_result'] = {
-                        'text': raw_text,
-                        'confidence': confidence
-                    }
-                    file_info['parsed_data'] = parsed_data
-                    file_info['status'] = 'ocr_complete'
-                    
-                    processed_count += 1
-                    
-                    # Update progress
-                    save_queue_store(queue_store)
-                    
-                except Exception as ex:
-                    print(f"[BATCH-THREAD] Error processing file {i}: {ex}")
-                    file_info['ocr_result'] = {'error': str(ex)}
+                
+                jobs.append((i, image_path))
+            
+            def on_file_done(i, result, error):
+                # Called in this thread as each file finishes (in completion order)
+                if error is not None:
+                    batch_log.error("[BATCH-THREAD] Error processing file %s: %s", i, error)
+                    queue_store.update_file(qid, i, {'ocr_result': {'error': str(error)}})
+                    return
+                
+                # Update progress - a single file row
+                queue_store.update_file(qid, i, {
+                    'ocr_result': result['ocr_result'],
+                    'parsed_data': result['parsed_data'],
+                    'status': 'ocr_complete'
+                })
+                batch_log.info("[BATCH-THREAD] Processed file %d/%d: %s", i + 1, total_files,
+                               queue['files'][i]['original_filename'])
+            
+            # OCR -> extraction -> ML corrections, fanned out over BATCH_OCR_WORKERS
+            BatchOCRService.run(jobs, on_file_done)
             
             # Batch complete
-            queue['phase'] = 'review'
-            queue['current_index'] = 0 
-            save_queue_store(queue_store)
-            print(f"[BATCH-THREAD] Batch Complete. Ready for review.")
+            queue_store.update(qid, {'phase': 'review', 'current_index': 0})
+            batch_log.info("[BATCH-THREAD] Batch Complete. Ready for review.")
             
         except Exception as e:
-            print(f"[BATCH-THREAD] Critical Error: {e}")
-            import traceback
-            traceback.print_exc()
+            batch_log.exception("[BATCH-THREAD] Critical Error: %s", e)
             # Optionally mark queue as error state
 
     # Start Thread
@@ -338,28 +330,25 @@ def reprocess_batch(queue_id):
     queue = queue_store[queue_id]
     
     # Reset status
-    count = 0
-    for f in queue['files']:
+    file_updates = {}
+    for i, f in enumerate(queue['files']):
         # Reset everything that isn't finalized
         if f['status'] != 'validated': 
-            f['status'] = 'pending'
             # Keep crop if exists, but clear results
-            f['ocr_result'] = None 
-            f['parsed_data'] = None
-            count += 1
+            file_updates[i] = {'status': 'pending', 'ocr_result': None, 'parsed_data': None}
+    count = len(file_updates)
             
     # Reset queue state
-    queue['phase'] = 'crop' # Will let them review crops or click Process again
-    queue['current_index'] = 0
-    
-    # Recalculate completed/skipped just in case
-    queue['completed'] = sum(1 for f in queue['files'] if f['status'] == 'validated')
-    queue['skipped'] = sum(1 for f in queue['files'] if f['status'] == 'skipped') # Actually we probably want to re-process skipped too?
-    # Let's keep skipped as skipped unless user wants full reset? 
-    # Usually re-process means "try logic again", checking skipped might be useful.
-    # For now, let's strictly reset "processed but not validated".
+    queue_fields = {
+        'phase': 'crop', # Will let them review crops or click Process again
+        'current_index': 0,
+        # Recalculate completed/skipped just in case
+        'completed': sum(1 for f in queue['files'] if f['status'] == 'validated'),
+        # Non-validated files (skipped included) are reset to pending above
+        'skipped': 0
+    }
     
-    save_queue_store(queue_store)
+    queue_store.update(queue_id, queue_fields, file_updates)
     
     return jsonify({
         'success': True, 
@@ -476,7 +465,8 @@ def get_current_receipt(queue_id):
             'original_path': current_file['original_path'],
             'cropped_path': current_file.get('cropped_path'),
             'status': current_file['status'],
-            'auto_crop_info': current_file.get('auto_crop_info')
+            'auto_crop_info': current_file.get('auto_crop_info'),
+            'auto_crop_status': current_file.get('auto_crop_status', 'done')
         },
         'progress': {
             'current': current_index + 1,
@@ -537,14 +527,15 @@ def save_crop(queue_id):
         print(f"[ML-FEEDBACK] Error processing feedback: {e}")
     
     # Update queue
-    queue['files'][current_index]['cropped_path'] = cropped_path
-    queue['files'][current_index]['status'] = 'cropped'
+    queue_fields = {}
     
     # Auto-advance index in crop phase
     if queue.get('phase', 'crop') == 'crop':
-        queue['current_index'] += 1
+        queue_fields['current_index'] = current_index + 1
         
-    save_queue_store(queue_store)
+    queue_store.update(queue_id, queue_fields, {
+        current_index: {'cropped_path': cropped_path, 'status': 'cropped'}
+    })
     
     return jsonify({
         'success': True,
@@ -564,14 +555,15 @@ def skip_crop(queue_id):
     current_index = queue['current_index']
     
     # Mark as using original
-    queue['files'][current_index]['cropped_path'] = None
-    queue['files'][current_index]['status'] = 'crop_skipped'
+    queue_fields = {}
     
     # Auto-advance index in crop phase
     if queue.get('phase', 'crop') == 'crop':
-        queue['current_index'] += 1
+        queue_fields['current_index'] = current_index + 1
         
-    save_queue_store(queue_store)
+    queue_store.update(queue_id, queue_fields, {
+        current_index: {'cropped_path': None, 'status': 'crop_skipped'}
+    })
     
     return jsonify({
         'success': True,
@@ -628,13 +620,14 @@ def run_ocr(queue_id):
             print(f"[OCR] ML correction failed: {ml_e}")
         
         # Store results
-        queue['files'][current_index]['ocr_result'] = {
-            'text': raw_text,
-            'confidence': confidence
-        }
-        queue['files'][current_index]['parsed_data'] = parsed_data
-        queue['files'][current_index]['status'] = 'ocr_complete'
-        save_queue_store(queue_store)
+        queue_store.update_file(queue_id, current_index, {
+            'ocr_result': {
+                'text': raw_text,
+                'confidence': confidence
+            },
+            'parsed_data': parsed_data,
+            'status': 'ocr_complete'
+        })
         
         print(f"[OCR] Success! Returning data...")
         
@@ -664,14 +657,13 @@ def validate_receipt(queue_id):
     # Get validated data from request
     validated_data = request.get_json()
     
-    # Store validated data
-    queue['files'][current_index]['validated_data'] = validated_data
-    queue['files'][current_index]['status'] = 'validated'
-    queue['completed'] += 1
-    
-    # Move to next
-    queue['current_index'] += 1
-    save_queue_store(queue_store)
+    # Store validated data and move to next
+    queue_store.update(queue_id, {
+        'completed': queue['completed'] + 1,
+        'current_index': current_index + 1
+    }, {
+        current_index: {'validated_data': validated_data, 'status': 'validated'}
+    })
     
     return jsonify({
         'success': True,
@@ -690,13 +682,13 @@ def skip_receipt(queue_id):
     queue = queue_store[queue_id]
     current_index = queue['current_index']
     
-    # Mark as skipped
-    queue['files'][current_index]['status'] = 'skipped'
-    queue['skipped'] += 1
-    
-    # Move to next
-    queue['current_index'] += 1
-    save_queue_store(queue_store)
+    # Mark as skipped and move to next
+    queue_store.update(queue_id, {
+        'skipped': queue['skipped'] + 1,
+        'current_index': current_index + 1
+    }, {
+        current_index: {'status': 'skipped'}
+    })
     
     return jsonify({
         'success': True,
@@ -715,8 +707,7 @@ def go_previous(queue_id):
     queue = queue_store[queue_id]
     
     if queue['current_index'] > 0:
-        queue['current_index'] -= 1
-        save_queue_store(queue_store)
+        queue_store.update(queue_id, {'current_index': queue['current_index'] - 1})
     
     return jsonify({
         'success': True,
@@ -936,10 +927,8 @@ def save_batch(queue_id):
         finally:
             cur.close()
         
-        # Clean up queue
-        if queue_id in queue_store:
-            del queue_store[queue_id]
-            save_queue_store(queue_store)
+        # Move the queue out of the hot store (kept for reference, not reopened)
+        queue_store.archive(queue_id, 'saved')
         
         return jsonify({
             'success': True,
@@ -20,6 +20,10 @@ def start_training():
     """
     try:
         feedback_limit = request.json.get('feedback_limit', 5000) if request.is_json else 5000
+        # 'incremental' (default) folds in new feedback only; 'full' retrains from scratch
+        mode = request.json.get('mode', 'incremental') if request.is_json else 'incremental'
+        if mode not in ('incremental', 'full'):
+            return jsonify({'success': False, 'error': f"Unknown training mode: {mode}"}), 400
         job_id = 'job_text_' + str(int(time.time()))
 
         _training_jobs[job_id] = {
@@ -41,7 +45,8 @@ def start_training():
 
                     result = MLTrainingService.train_models(
                         feedback_limit=feedback_limit,
-                        save_models=True
+                        save_models=True,
+                        mode=mode
                     )
 
                     _training_jobs[job_id]['status'] = 'completed'
@@ -66,6 +71,7 @@ def start_training():
             'message': 'Text parsing model training job started',
             'job_id': job_id,
             'feedback_limit': feedback_limit,
+            'mode': mode,
             'eta_seconds': 120
         })
 
@@ -186,6 +192,29 @@ def get_training_status():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_training_bp.route('/registry', methods=['GET'])
+def get_registry_status():
+    """Resident model versions and load/reload counters for this process."""
+    from backend.ml_models.model_registry import get_model_registry
+    registry = get_model_registry()
+    for name in ('ocr_corrections', 'parsing_corrections', 'smart_crop'):
+        registry.get(name)  # pick up files changed since the last check
+    return jsonify({'success': True, 'models': registry.stats()})
+
+
+@api_training_bp.route('/registry/reload', methods=['POST'])
+def reload_registry():
+    """Re-read model files now (e.g. after copying in a model trained elsewhere)."""
+    from backend.ml_models.model_registry import get_model_registry
+    name = request.json.get('model') if request.is_json else None
+    registry = get_model_registry()
+    try:
+        registry.reload(name)
+    except KeyError:
+        return jsonify({'success': False, 'error': f'Unknown model {name}'}), 404
+    return jsonify({'success': True, 'models': registry.stats()})
+
+
 @api_training_bp.route('/models', methods=['GET'])
 def get_model_info():
     """Get information about all trained models (text parsing + smart crop)."""
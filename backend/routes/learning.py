@@ -2,7 +2,7 @@
 Learning history API endpoints for displaying ML learning to users
 """
 
-from flask import Blueprint, jsonify, render_template_string
+from flask import Blueprint, jsonify, render_template_string, request
 from backend.services.learning_history_tracker import LearningHistoryTracker
 
 learning_bp = Blueprint('learning', __name__, url_prefix='/api/learning')
@@ -12,14 +12,11 @@ def learning_history_page():
     """Display detailed learning history page"""
     try:
         from flask import render_template
-        history = LearningHistoryTracker.load_history()
         summary = LearningHistoryTracker.get_summary()
         
-        # Calculate total patterns
-        total_patterns = sum(len(p) for p in history.get('patterns_learned', {}).values())
-        
-        # Prepare patterns by field
-        patterns_by_field = history.get('patterns_learned', {})
+        # Pattern counts and the latest patterns per field, from the summary
+        total_patterns = summary['total_patterns']
+        patterns_by_field = LearningHistoryTracker.get_patterns_by_field()
         
         return render_template('learning_history.html',
             summary=summary,
@@ -31,9 +28,19 @@ def learning_history_page():
 
 @learning_bp.route('/history', methods=['GET'])
 def get_learning_history():
-    """Get full learning history"""
+    """Get learning history - the last ?limit= sessions (default 20), or everything with ?full=1"""
     try:
-        history = LearningHistoryTracker.load_history()
+        if request.args.get('full') == '1':
+            history = LearningHistoryTracker.load_history()
+        else:
+            summary = LearningHistoryTracker.get_summary()
+            history = {
+                'total_sessions': summary['total_sessions'],
+                'total_corrections_learned': summary['total_corrections'],
+                'training_sessions': LearningHistoryTracker.get_sessions(request.args.get('limit', 20, type=int)),
+                'patterns_learned': {field: entry['recent']
+                                     for field, entry in LearningHistoryTracker.get_patterns_by_field().items()}
+            }
         return jsonify({
             'status': 'success',
             'history': history
@@ -78,19 +85,15 @@ def get_learning_report():
 def get_learning_stats():
     """Get detailed learning statistics"""
     try:
-        history = LearningHistoryTracker.load_history()
+        summary = LearningHistoryTracker.get_summary()
         
         stats = {
-            'total_sessions': len(history.get('training_sessions', [])),
-            'total_corrections': history.get('total_corrections_learned', 0),
-            'fields_trained': list(history.get('patterns_learned', {}).keys()),
-            'patterns_by_field': {}
+            'total_sessions': summary['total_sessions'],
+            'total_corrections': summary['total_corrections'],
+            'fields_trained': list(summary['fields_trained'].keys()),
+            'patterns_by_field': summary['fields_trained']
         }
         
-        # Count patterns per field
-        for field, patterns in history.get('patterns_learned', {}).items():
-            stats['patterns_by_field'][field] = len(patterns)
-        
         return jsonify({
             'status': 'success',
             'stats': stats
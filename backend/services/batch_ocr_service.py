@@ -0,0 +1,227 @@
+"""
+Batch OCR Service - Runs the per-receipt OCR pipeline across CPU cores
+
+The queue processor used to OCR, parse and ML-correct every file one after
+another in a single thread.  This service keeps that unit of work in one
+picklable function (process_voucher_image) and fans it out over a process
+pool, handing each result back to the caller as soon as it completes.
+
+Configuration (environment):
+    BATCH_OCR_WORKERS   number of files processed in parallel (default 1 = serial)
+    BATCH_OCR_MODE      'process' (default) or 'thread'
+    LOG_DEBUG_VOUCHERS  file names whose OCR and parsing are logged at DEBUG
+                        whatever LOG_PROFILE says (backend/logger.py)
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from backend.logger import debug_requested, get_logger, voucher_debug
+
+log = get_logger('batch')
+
+
+def ocr_voucher_image(image_path: str) -> Dict:
+    """
+    OCR stage of process_voucher_image(): optimal-mode text and confidence.
+
+    Returns:
+        dict with 'text' and 'confidence'
+    """
+    from backend.ocr_service import extract_text
+
+    ocr_result = extract_text(image_path, method='optimal')
+
+    raw_text = ocr_result.get('text', '') if isinstance(ocr_result, dict) else str(ocr_result)
+    confidence = ocr_result.get('confidence', 0) if isinstance(ocr_result, dict) else 0
+
+    return {
+        'text': raw_text,
+        'confidence': confidence
+    }
+
+
+def parse_voucher_text(raw_text: str, name: str = '') -> Dict:
+    """
+    Parse stage of process_voucher_image(): quality-focused extraction
+    followed by learned ML corrections.
+
+    Returns:
+        dict with 'parsed_data', 'extraction_confidence', 'requires_review'
+    """
+    from backend.quality_focused_extractor import extract_with_quality
+    from backend.services.ml_training_service import MLTrainingService
+
+    with voucher_debug(debug_requested(name)):
+        # QUALITY-FOCUSED EXTRACTION ENGINE (tries multiple strategies, validates rigorously)
+        log.debug("[BATCH-OCR] Running quality-focused extraction for %s", name)
+        extraction_result = extract_with_quality(raw_text)
+
+    # Convert to standard format (WITHOUT quality_report - not JSON serializable)
+    parsed_data = {
+        'master': {
+            'voucher_number': extraction_result['fields']['voucher_number'].value,
+            'voucher_date': extraction_result['fields']['voucher_date'].value,
+            'supplier_name': extraction_result['fields']['supplier_name'].value,
+            'gross_total': extraction_result['fields']['gross_total'].value,
+            'net_total': extraction_result['fields']['net_total'].value,
+        },
+        'items': extraction_result.get('items', []),
+        'deductions': extraction_result.get('deductions', [])
+    }
+
+    log.debug("[BATCH-OCR] Extraction confidence: %s%%", extraction_result['overall_confidence'])
+    log.debug("[BATCH-OCR] Requires review: %s", extraction_result['requires_review'])
+
+    # Apply ML Learned Corrections
+    try:
+        parsed_data = MLTrainingService.apply_learned_corrections(parsed_data, raw_text)
+        log.debug("[BATCH-OCR] Applied ML corrections for %s", name)
+    except Exception as ml_e:
+        log.warning("[BATCH-OCR] ML correction failed: %s", ml_e)
+
+    return {
+        'parsed_data': parsed_data,
+        'extraction_confidence': extraction_result['overall_confidence'],
+        'requires_review': extraction_result['requires_review'],
+    }
+
+
+def process_voucher_image(image_path: str) -> Dict:
+    """
+    OCR -> quality-focused extraction -> learned ML corrections for one image.
+
+    Module-level so it can be shipped to worker processes.  Returns only
+    plain JSON-serialisable data.
+
+    Returns:
+        dict with 'ocr_result', 'parsed_data', 'extraction_confidence',
+        'requires_review'
+    """
+    name = os.path.basename(image_path)
+    # Runs in the worker, so the per-voucher debug flag is set where the logging happens
+    with voucher_debug(debug_requested(name)):
+        ocr_result = ocr_voucher_image(image_path)
+        return {
+            'ocr_result': ocr_result,
+            **parse_voucher_text(ocr_result['text'], name),
+        }
+
+
+def _init_worker():
+    """Worker process initializer: one warm Tesseract instance per process"""
+    os.environ.setdefault('OCR_POOL_SIZE', '1')
+
+
+class BatchOCRService:
+    """Fans process_voucher_image() out over a shared worker pool"""
+
+    _executor = None
+    _executor_key = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_worker_count() -> int:
+        """Configured parallelism (BATCH_OCR_WORKERS, default 1)"""
+        try:
+            return max(1, int(os.getenv('BATCH_OCR_WORKERS', '1')))
+        except ValueError:
+            return 1
+
+    @staticmethod
+    def get_mode() -> str:
+        """Configured execution mode (BATCH_OCR_MODE: 'process' or 'thread')"""
+        mode = os.getenv('BATCH_OCR_MODE', 'process').lower()
+        return mode if mode in ('process', 'thread') else 'process'
+
+    @classmethod
+    def _get_executor(cls, workers: int, mode: str):
+        """
+        Reuse one pool across batches so worker start-up (imports, Tesseract
+        model load) is paid once, not per batch.
+        """
+        with cls._lock:
+            if cls._executor is not None and cls._executor_key != (workers, mode):
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+
+            if cls._executor is None:
+                if mode == 'thread':
+                    cls._executor = ThreadPoolExecutor(max_workers=workers,
+                                                       thread_name_prefix='batch-ocr')
+                else:
+                    # spawn: the batch runs inside a request thread, and forking
+                    # a multi-threaded process is not safe
+                    cls._executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                    )
+                cls._executor_key = (workers, mode)
+                log.info("[BATCH-OCR] Started %s pool with %d workers", mode, workers)
+
+            return cls._executor
+
+    @classmethod
+    def _discard_executor(cls):
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+            cls._executor = None
+            cls._executor_key = None
+
+    @classmethod
+    def run(cls, jobs: Iterable[Tuple[object, str]],
+            on_result: Callable[[object, Optional[Dict], Optional[Exception]], None],
+            workers: int = None, mode: str = None,
+            func: Callable[[str], Dict] = process_voucher_image) -> None:
+        """
+        Process (key, image_path) jobs and report each one as it finishes.
+
+        on_result(key, result, error) is always called from the calling
+        thread, so callers can update shared state without extra locking.
+        Exactly one of result/error is set.
+
+        Args:
+            jobs: iterable of (key, image_path)
+            on_result: completion callback
+            workers: parallelism (default: BATCH_OCR_WORKERS)
+            mode: 'process' or 'thread' (default: BATCH_OCR_MODE)
+            func: per-file work function (must be picklable in process mode)
+        """
+        workers = workers or cls.get_worker_count()
+        mode = mode or cls.get_mode()
+        jobs = list(jobs)
+
+        if workers <= 1:
+            for key, image_path in jobs:
+                try:
+                    result = func(image_path)
+                except Exception as e:
+                    on_result(key, None, e)
+                else:
+                    on_result(key, result, None)
+            return
+
+        executor = cls._get_executor(workers, mode)
+        futures = {executor.submit(func, image_path): key for key, image_path in jobs}
+
+        broken = False
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                broken = True
+                on_result(key, None, e)
+            except Exception as e:
+                on_result(key, None, e)
+            else:
+                on_result(key, result, None)
+
+        if broken:
+            # A worker died (e.g. OOM); start fresh next batch
+            cls._discard_executor()
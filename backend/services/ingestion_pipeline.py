@@ -0,0 +1,335 @@
+"""
+Ingestion Pipeline - Staged background processing of uploaded receipts
+
+/api/queue/create used to save, hash, log and smart-crop every file
+serially inside the HTTP request, so a 100-image upload blocked for
+minutes.  The request now only stores the files; everything else runs
+here as a chain of stages, each with its own queue and worker threads:
+
+    hash -> detect -> crop -> ocr -> parse
+
+    hash    MD5 + file_lifecycle_meta row
+    detect  SmartReceiptDetector boundary -> auto_crop_info
+    crop    write the detected crop when confidence is high (INGEST_AUTO_CROP)
+    ocr     optimal-mode OCR ahead of the batch step (INGEST_AUTO_OCR)
+    parse   quality-focused extraction + ML corrections of that text
+
+Queues after the first are bounded, so a slow stage (detection, OCR)
+applies back-pressure instead of letting decoded crops pile up in memory;
+the intake queue is unbounded so submitting never blocks the request.
+A stage failure is logged and the job moves on - later stages check for
+the inputs they need; detection always publishes auto_crop_status 'done',
+so a file never waits on a crashed detector.
+
+Jobs live only in memory.  Files whose detection never finished (the
+process stopped first) are still 'pending' in the queue store and are
+submitted again at startup (api_queue.resume_pending_ingestion).
+
+Results reach the caller through job.on_update(job, updates, pending_only),
+called from the worker threads.
+
+Configuration (environment):
+    INGEST_QUEUE_SIZE       capacity of each inter-stage queue (default 8)
+    INGEST_<STAGE>_WORKERS  threads per stage (hash 2, others 1)
+    INGEST_AUTO_CROP        '1' to crop confident detections (default '0')
+    INGEST_AUTO_OCR         '1' to OCR + parse during ingestion (default '0')
+"""
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import cv2
+
+from backend.logger import debug_requested, get_logger, voucher_debug
+
+log = get_logger('ingest')
+crop_log = get_logger('smart_crop')
+
+
+def _flag(name: str) -> bool:
+    return os.getenv(name, '0').lower() in ('1', 'true', 'yes')
+
+
+def _workers(stage: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(f'INGEST_{stage.upper()}_WORKERS', str(default))))
+    except ValueError:
+        return default
+
+
+@dataclass
+class IngestJob:
+    """One uploaded file travelling through the stages"""
+    queue_id: str
+    index: int
+    filepath: str
+    filename: str
+    batch_id: Optional[int] = None
+    content_type: Optional[str] = None
+    client_ip: Optional[str] = None
+    user_agent: Optional[str] = None
+    # Flask app, so stages can use the DB pool from worker threads
+    app: object = None
+    # on_update(job, updates, pending_only) - apply results to the queue entry
+    on_update: Optional[Callable] = None
+    # Re-submitted at startup - the metadata row may already exist
+    resumed: bool = False
+
+    # Filled in by the stages
+    file_hash: Optional[str] = None
+    detection: Optional[Dict] = None
+    cropped_path: Optional[str] = None
+    ocr_result: Optional[Dict] = None
+    stage_ms: Dict[str, float] = field(default_factory=dict)
+
+    def update(self, updates: Dict, pending_only: bool = False):
+        if self.on_update is not None:
+            self.on_update(self, updates, pending_only)
+
+
+# ----------------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------------
+
+def hash_stage(job: IngestJob):
+    """MD5 the stored file and record it in file_lifecycle_meta"""
+    from backend.db import get_connection
+    from backend.ocr_cache import hash_file
+
+    job.file_hash = hash_file(job.filepath)
+    file_size = os.path.getsize(job.filepath)
+
+    try:
+        conn = get_connection()
+        cur = conn.cursor()
+        if job.resumed:
+            cur.execute("SELECT 1 FROM file_lifecycle_meta WHERE stored_filename = %s",
+                        (os.path.basename(job.filepath),))
+            if cur.fetchone():
+                return
+        cur.execute("""
+            INSERT INTO file_lifecycle_meta
+            (original_filename, stored_filename, file_path, file_size_bytes, file_hash, mime_type,
+             upload_batch_id, source_type, client_ip, user_agent, processing_status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            job.filename,
+            os.path.basename(job.filepath),
+            job.filepath,
+            file_size,
+            job.file_hash,
+            job.content_type,
+            job.batch_id,
+            'web_bulk_upload',
+            job.client_ip,
+            job.user_agent,
+            'pending'
+        ))
+        conn.commit()
+    except Exception:
+        log.exception("[INGEST] Failed to save file metadata for %s", job.filename)
+
+
+def detect_stage(job: IngestJob):
+    """Smart crop detection; publishes auto_crop_info (None when detection fails or raises)"""
+    from backend.smart_crop import SmartReceiptDetector
+
+    auto_crop_info = None
+    try:
+        crop_result = SmartReceiptDetector().detect_receipt(job.filepath)
+
+        if crop_result['success']:
+            job.detection = crop_result
+            auto_crop_info = {
+                'bbox': crop_result['bbox'],
+                'confidence': crop_result['confidence'],
+                'method': crop_result['method']
+            }
+            crop_log.debug("[SMART-CROP] Detected receipt in %s with confidence %.2f",
+                           job.filename, crop_result['confidence'])
+        else:
+            crop_log.info("[SMART-CROP] Detection failed for %s: %s", job.filename, crop_result.get('error'))
+    finally:
+        job.update({'auto_crop_info': auto_crop_info, 'auto_crop_status': 'done'})
+
+
+def crop_stage(job: IngestJob):
+    """Write the detected crop when detection is confident enough to auto-approve"""
+    from backend.smart_crop import SmartReceiptDetector
+
+    detection, job.detection = job.detection, None  # release the decoded crop
+    if not _flag('INGEST_AUTO_CROP') or not detection:
+        return
+    if detection['confidence'] < SmartReceiptDetector.HIGH_CONFIDENCE:
+        return
+
+    cropped = detection.get('cropped_image')
+    if cropped is None or detection.get('learned_corrections_applied'):
+        # The learned correction moved the box - cut it from the original
+        x, y, w, h = (int(v) for v in detection['bbox'])
+        original = cv2.imread(job.filepath)
+        cropped = original[max(y, 0):y + h, max(x, 0):x + w] if original is not None else None
+    if cropped is None or not cropped.size:
+        return
+
+    base, _ = os.path.splitext(job.filepath)
+    cropped_path = f"{base}_autocrop.jpg"
+    if cv2.imwrite(cropped_path, cropped):
+        job.cropped_path = cropped_path
+        crop_log.debug("[SMART-CROP] Auto-cropped %s", job.filename)
+        job.update({'cropped_path': cropped_path, 'auto_cropped': True}, pending_only=True)
+
+
+def ocr_stage(job: IngestJob):
+    """OCR the (auto-cropped) image ahead of the batch step"""
+    from backend.services.batch_ocr_service import ocr_voucher_image
+
+    if _flag('INGEST_AUTO_OCR'):
+        with voucher_debug(debug_requested(job.filename)):
+            job.ocr_result = ocr_voucher_image(job.cropped_path or job.filepath)
+
+
+def parse_stage(job: IngestJob):
+    """Extract fields from the OCR text; the file is then ready for review"""
+    from backend.services.batch_ocr_service import parse_voucher_text
+
+    if job.ocr_result is None:
+        return
+    parsed = parse_voucher_text(job.ocr_result['text'], job.filename)
+    job.update({
+        'ocr_result': job.ocr_result,
+        'parsed_data': parsed['parsed_data'],
+        'status': 'ocr_complete'
+    }, pending_only=True)
+
+
+# ----------------------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------------------
+
+class PipelineStage:
+    """A named step with its own input queue and worker threads"""
+
+    def __init__(self, name: str, func: Callable[[IngestJob], None], workers: int = 1, maxsize: int = 0):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize)
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0
+        self.total_ms = 0.0
+
+
+class IngestionPipeline:
+    """Bounded multi-stage pipeline run by daemon worker threads"""
+
+    def __init__(self, stages: List[PipelineStage]):
+        self.stages = stages
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for position, stage in enumerate(self.stages):
+                following = self.stages[position + 1] if position + 1 < len(self.stages) else None
+                for i in range(stage.workers):
+                    thread = threading.Thread(target=self._work, args=(stage, following),
+                                              name=f"ingest-{stage.name}-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            log.info("[INGEST] Started pipeline: %s",
+                     ' -> '.join(f"{s.name}x{s.workers}" for s in self.stages))
+
+    def submit(self, job: IngestJob):
+        """Queue a stored file; never blocks (the intake queue is unbounded)"""
+        self.start()
+        self.stages[0].queue.put(job)
+
+    def _work(self, stage: PipelineStage, following: Optional[PipelineStage]):
+        while True:
+            job = stage.queue.get()
+            with self._lock:
+                stage.busy += 1
+            start = time.perf_counter()
+            try:
+                if job.app is not None:
+                    with job.app.app_context():
+                        stage.func(job)
+                else:
+                    stage.func(job)
+            except Exception:
+                log.exception("[INGEST] %s failed for %s", stage.name, job.filename)
+                with self._lock:
+                    stage.errors += 1
+            elapsed = (time.perf_counter() - start) * 1000
+            job.stage_ms[stage.name] = round(elapsed, 2)
+            with self._lock:
+                stage.busy -= 1
+                stage.processed += 1
+                stage.total_ms += elapsed
+
+            if following is not None:
+                following.queue.put(job)  # blocks while the next stage is full
+            else:
+                try:
+                    job.update({'ingest_ms': job.stage_ms})
+                except Exception:
+                    log.exception("[INGEST] Failed to record timings for %s", job.filename)
+            stage.queue.task_done()
+
+    def join(self):
+        """Wait until every submitted job has left the last stage"""
+        for stage in self.stages:
+            stage.queue.join()
+
+    def stats(self) -> Dict:
+        """Per-stage backlog and throughput for monitoring"""
+        with self._lock:
+            return {
+                stage.name: {
+                    'workers': stage.workers,
+                    'queued': stage.queue.qsize(),
+                    'capacity': stage.queue.maxsize or None,
+                    'busy': stage.busy,
+                    'processed': stage.processed,
+                    'errors': stage.errors,
+                    'avg_ms': round(stage.total_ms / stage.processed, 2) if stage.processed else 0,
+                }
+                for stage in self.stages
+            }
+
+
+def build_pipeline() -> IngestionPipeline:
+    """The upload pipeline, sized from the environment"""
+    try:
+        maxsize = max(1, int(os.getenv('INGEST_QUEUE_SIZE', '8')))
+    except ValueError:
+        maxsize = 8
+    return IngestionPipeline([
+        PipelineStage('hash', hash_stage, _workers('hash', 2)),
+        PipelineStage('detect', detect_stage, _workers('detect', 1), maxsize),
+        PipelineStage('crop', crop_stage, _workers('crop', 1), maxsize),
+        PipelineStage('ocr', ocr_stage, _workers('ocr', 1), maxsize),
+        PipelineStage('parse', parse_stage, _workers('parse', 1), maxsize),
+    ])
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_ingestion_pipeline() -> IngestionPipeline:
+    """Return the shared process-wide pipeline, creating it on first use"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = build_pipeline()
+    return _pipeline
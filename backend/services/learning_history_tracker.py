@@ -5,55 +5,278 @@ Tracks all corrections used for training to:
 1. Show users what the system has learned
 2. Avoid retraining on same corrections
 3. Provide transparency into ML model improvement
+
+History used to be one JSON file (backend/data/learning_history.json) that
+every training session loaded, appended to and rewrote, and that every
+learning page parsed in full.  It now lives in LEARNING_HISTORY_DIR
+(default backend/data/learning_history/):
+
+    sessions.jsonl   append-only, one training session per line
+    summary.json     running totals, per-field pattern counts with the most
+                     recent patterns, and the last few sessions (light copies)
+    trained_ids.txt  append-only, one trained correction ID per line
+
+Recording a session appends one line, the new IDs, and rewrites the small
+summary.  The learning endpoints answer from summary.json; only load_history()
+and get_sessions() read the session log.  summary.json records how many bytes
+of sessions.jsonl it covers, so sessions appended by another process (or
+before a crash) are folded in on the next read.
+
+The legacy learning_history.json is imported the first time the directory is
+created; the file itself is left in place.
 """
 
 import json
 import os
+import threading
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
 class LearningHistoryTracker:
     """Track and manage ML learning history"""
-    
-    HISTORY_FILE = Path('backend/data/learning_history.json')
-    
+
+    HISTORY_DIR = Path(os.getenv('LEARNING_HISTORY_DIR') or 'backend/data/learning_history')
+    HISTORY_FILE = Path('backend/data/learning_history.json')   # legacy, imported once
+    SESSIONS_FILE = 'sessions.jsonl'
+    SUMMARY_FILE = 'summary.json'
+    TRAINED_IDS_FILE = 'trained_ids.txt'
+
+    RECENT_SESSIONS = 5     # light session copies kept in the summary
+    RECENT_PATTERNS = 10    # latest patterns kept per field (and per recent session)
+
+    _lock = threading.RLock()
+    _summary_cache = None   # (path, mtime_ns, size, summary)
+    _ids_cache = None       # [path, bytes read, set of IDs]
+
+    @staticmethod
+    def _path(name):
+        return Path(LearningHistoryTracker.HISTORY_DIR) / name
+
+    @staticmethod
+    def _empty_summary(created_at=None):
+        return {
+            'version': '2.0',
+            'created_at': created_at or datetime.now().isoformat(),
+            'total_training_sessions': 0,
+            'total_corrections_learned': 0,
+            'total_patterns': 0,
+            'patterns_by_field': {},
+            'last_training': None,
+            'recent_sessions': [],
+            'log_bytes': 0,
+        }
+
+    @staticmethod
+    def _light_session(session):
+        """Session without corrections_used/results, for the summary"""
+        new_patterns = session.get('new_patterns', [])
+        return {
+            'timestamp': session.get('timestamp'),
+            'corrections_count': session.get('corrections_count', 0),
+            'patterns_count': session.get('patterns_count', len(new_patterns)),
+            'new_patterns': new_patterns[-LearningHistoryTracker.RECENT_PATTERNS:],
+        }
+
+    @staticmethod
+    def _fold(summary, session):
+        """Add one session to the running summary"""
+        keep = LearningHistoryTracker.RECENT_PATTERNS
+        summary['total_training_sessions'] += 1
+        summary['total_corrections_learned'] += session.get('corrections_count', 0)
+        summary['last_training'] = session.get('timestamp')
+
+        for pattern in session.get('new_patterns', []):
+            field = pattern.get('field', 'unknown')
+            entry = summary['patterns_by_field'].setdefault(field, {'count': 0, 'recent': []})
+            entry['count'] += 1
+            entry['recent'] = (entry['recent'] + [pattern])[-keep:]
+            summary['total_patterns'] += 1
+
+        recent = summary['recent_sessions'] + [LearningHistoryTracker._light_session(session)]
+        summary['recent_sessions'] = recent[-LearningHistoryTracker.RECENT_SESSIONS:]
+
+    @staticmethod
+    def _session_ids(session):
+        return [c.get('id') for c in session.get('corrections_used', []) if c.get('id') is not None]
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _write_summary(summary):
+        """Atomic replace - readers never see a half-written summary"""
+        path = LearningHistoryTracker._path(LearningHistoryTracker.SUMMARY_FILE)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp, path)
+        stat = path.stat()
+        LearningHistoryTracker._summary_cache = (str(path), stat.st_mtime_ns, stat.st_size, summary)
+
+    @staticmethod
+    def _append_lines(name, lines):
+        """Append lines in one write; returns the file size afterwards"""
+        path = LearningHistoryTracker._path(name)
+        with open(path, 'ab') as f:
+            if lines:
+                f.write(''.join(line + '\n' for line in lines).encode('utf-8'))
+            f.flush()
+            return f.tell()
+
+    @staticmethod
+    def _read_sessions(start=0):
+        """Yield (session, end offset) for complete lines of the log from byte `start`"""
+        path = LearningHistoryTracker._path(LearningHistoryTracker.SESSIONS_FILE)
+        if not path.exists():
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break   # being written by another process
+                offset += len(raw)
+                if raw.strip():
+                    yield json.loads(raw), offset
+
+    @staticmethod
+    def _catch_up(summary):
+        """Fold sessions appended after summary['log_bytes']; returns True if any"""
+        known_ids = LearningHistoryTracker.get_already_trained_corrections()
+        new_ids = []
+        folded = False
+        for session, offset in LearningHistoryTracker._read_sessions(summary.get('log_bytes', 0)):
+            LearningHistoryTracker._fold(summary, session)
+            summary['log_bytes'] = offset
+            for correction_id in LearningHistoryTracker._session_ids(session):
+                if correction_id not in known_ids:
+                    known_ids.add(correction_id)
+                    new_ids.append(correction_id)
+            folded = True
+        if new_ids:
+            LearningHistoryTracker._append_lines(LearningHistoryTracker.TRAINED_IDS_FILE, new_ids)
+        return folded
+
+    @staticmethod
+    def _import_legacy():
+        """Convert learning_history.json into the session log"""
+        legacy_file = LearningHistoryTracker.HISTORY_FILE
+        try:
+            with open(legacy_file, 'r') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"[LEARNING HISTORY] Failed to read {legacy_file}: {e}")
+            legacy = {}
+
+        sessions = legacy.get('training_sessions', [])
+        LearningHistoryTracker._append_lines(LearningHistoryTracker.SESSIONS_FILE,
+                                             [json.dumps(s, default=str) for s in sessions])
+        summary = LearningHistoryTracker._empty_summary(legacy.get('created_at'))
+        LearningHistoryTracker._catch_up(summary)
+        LearningHistoryTracker._write_summary(summary)
+        print(f"[LEARNING HISTORY] Imported {len(sessions)} sessions from {legacy_file}")
+
     @staticmethod
     def _ensure_history_file():
-        """Create history file if it doesn't exist"""
-        if not LearningHistoryTracker.HISTORY_FILE.exists():
-            LearningHistoryTracker.HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-            initial_data = {
-                'version': '1.0',
-                'created_at': datetime.now().isoformat(),
-                'training_sessions': [],
-                'total_corrections_learned': 0,
-                'patterns_learned': {}
-            }
-            with open(LearningHistoryTracker.HISTORY_FILE, 'w') as f:
-                json.dump(initial_data, f, indent=2)
-    
+        """Create the history directory, importing the legacy JSON file once"""
+        if LearningHistoryTracker._path(LearningHistoryTracker.SUMMARY_FILE).exists():
+            return
+        with LearningHistoryTracker._lock:
+            if LearningHistoryTracker._path(LearningHistoryTracker.SUMMARY_FILE).exists():
+                return
+            LearningHistoryTracker._path('').mkdir(parents=True, exist_ok=True)
+            sessions_file = LearningHistoryTracker._path(LearningHistoryTracker.SESSIONS_FILE)
+            if not sessions_file.exists() and LearningHistoryTracker.HISTORY_FILE.exists():
+                LearningHistoryTracker._import_legacy()
+                return
+            # New install, or a lost summary - rebuild it from the log
+            ids_file = LearningHistoryTracker._path(LearningHistoryTracker.TRAINED_IDS_FILE)
+            if ids_file.exists():
+                ids_file.unlink()
+            LearningHistoryTracker._ids_cache = None
+            summary = LearningHistoryTracker._empty_summary()
+            LearningHistoryTracker._append_lines(LearningHistoryTracker.SESSIONS_FILE, [])
+            LearningHistoryTracker._catch_up(summary)
+            LearningHistoryTracker._write_summary(summary)
+
+    @staticmethod
+    def _load_summary():
+        """The maintained summary, caught up with the session log"""
+        LearningHistoryTracker._ensure_history_file()
+        path = LearningHistoryTracker._path(LearningHistoryTracker.SUMMARY_FILE)
+        log_size = LearningHistoryTracker._path(LearningHistoryTracker.SESSIONS_FILE).stat().st_size
+
+        with LearningHistoryTracker._lock:
+            stat = path.stat()
+            cached = LearningHistoryTracker._summary_cache
+            if cached and cached[:3] == (str(path), stat.st_mtime_ns, stat.st_size):
+                summary = cached[3]
+            else:
+                with open(path, 'r') as f:
+                    summary = json.load(f)
+
+                LearningHistoryTracker._summary_cache = (str(path), stat.st_mtime_ns, stat.st_size, summary)
+
+            if log_size > summary.get('log_bytes', 0) and LearningHistoryTracker._catch_up(summary):
+                LearningHistoryTracker._write_summary(summary)
+            return summary
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
     @staticmethod
     def load_history():
-        """Load learning history"""
+        """Load the full learning history (every session) - reads the whole log"""
+        summary = LearningHistoryTracker._load_summary()
+        history = {
+            'version': summary.get('version'),
+            'created_at': summary.get('created_at'),
+            'training_sessions': [],
+            'total_corrections_learned': 0,
+            'patterns_learned': {}
+        }
+        for session, _ in LearningHistoryTracker._read_sessions():
+            history['training_sessions'].append(session)
+            history['total_corrections_learned'] += session.get('corrections_count', 0)
+            for pattern in session.get('new_patterns', []):
+                history['patterns_learned'].setdefault(pattern.get('field', 'unknown'), []).append(pattern)
+        return history
+
+    @staticmethod
+    def get_sessions(limit=20):
+        """The last `limit` sessions, oldest first (None = all); parses only those lines"""
         LearningHistoryTracker._ensure_history_file()
-        with open(LearningHistoryTracker.HISTORY_FILE, 'r') as f:
-            return json.load(f)
-    
+        path = LearningHistoryTracker._path(LearningHistoryTracker.SESSIONS_FILE)
+        with open(path, 'rb') as f:
+            lines = deque((raw for raw in f if raw.endswith(b'\n') and raw.strip()), maxlen=limit)
+        return [json.loads(raw) for raw in lines]
+
     @staticmethod
     def get_already_trained_corrections():
         """Get set of correction IDs already used for training"""
-        history = LearningHistoryTracker.load_history()
-        trained_ids = set()
-        for session in history.get('training_sessions', []):
-            for correction in session.get('corrections_used', []):
-                trained_ids.add(correction['id'])
-        return trained_ids
-    
+        path = str(LearningHistoryTracker._path(LearningHistoryTracker.TRAINED_IDS_FILE))
+        with LearningHistoryTracker._lock:
+            cache = LearningHistoryTracker._ids_cache
+            if not cache or cache[0] != path or (os.path.exists(path) and os.path.getsize(path) < cache[1]):
+                cache = LearningHistoryTracker._ids_cache = [path, 0, set()]
+            if os.path.exists(path):
+                # Append-only: read only what was added since the last call
+                with open(path, 'rb') as f:
+                    f.seek(cache[1])
+                    for raw in f:
+                        if not raw.endswith(b'\n'):
+                            break
+                        cache[1] += len(raw)
+                        if raw.strip():
+                            cache[2].add(raw.decode('utf-8').rstrip('\n'))
+            return set(cache[2])
+
     @staticmethod
     def record_training_session(corrections_used, training_results):
-        """Record a completed training session"""
-        history = LearningHistoryTracker.load_history()
-        
+        """Record a completed training session; returns the updated summary"""
         session = {
             'timestamp': datetime.now().isoformat(),
             'corrections_count': len(corrections_used),
@@ -62,70 +285,66 @@ class LearningHistoryTracker:
             'new_patterns': training_results.get('new_patterns', []),
             'patterns_count': len(training_results.get('new_patterns', []))
         }
-        
-        history['training_sessions'].append(session)
-        history['total_corrections_learned'] += len(corrections_used)
-        
-        # Update patterns learned
-        for pattern in training_results.get('new_patterns', []):
-            field = pattern.get('field', 'unknown')
-            if field not in history['patterns_learned']:
-                history['patterns_learned'][field] = []
-            history['patterns_learned'][field].append(pattern)
-        
-        with open(LearningHistoryTracker.HISTORY_FILE, 'w') as f:
-            json.dump(history, f, indent=2)
-        
-        return history
-    
+
+        with LearningHistoryTracker._lock:
+            summary = LearningHistoryTracker._load_summary()
+            LearningHistoryTracker._append_lines(LearningHistoryTracker.SESSIONS_FILE,
+                                                 [json.dumps(session, default=str)])
+            # Folds this session (and anything another process appended first)
+            LearningHistoryTracker._catch_up(summary)
+            LearningHistoryTracker._write_summary(summary)
+            return summary
+
+    @staticmethod
+    def get_patterns_by_field():
+        """{field: {'count': n, 'recent': [latest patterns]}}"""
+        return LearningHistoryTracker._load_summary().get('patterns_by_field', {})
+
     @staticmethod
     def get_summary():
         """Get summary of learning history"""
-        history = LearningHistoryTracker.load_history()
-        
-        sessions = history.get('training_sessions', [])
-        patterns_by_field = history.get('patterns_learned', {})
-        
-        # Count corrections per field
-        fields_trained = {}
-        for field, patterns in patterns_by_field.items():
-            fields_trained[field] = len(patterns)
-        
+        history = LearningHistoryTracker._load_summary()
+        patterns_by_field = history.get('patterns_by_field', {})
+
         summary = {
-            'total_sessions': len(sessions),
+            'total_sessions': history.get('total_training_sessions', 0),
             'total_corrections': history.get('total_corrections_learned', 0),
-            'total_patterns': sum(len(p) for p in patterns_by_field.values()),
-            'fields_trained': fields_trained,
-            'last_training': sessions[-1]['timestamp'] if sessions else None,
-            'recent_sessions': sessions[-5:] if sessions else []  # Last 5 sessions
+            'total_patterns': history.get('total_patterns', 0),
+            'fields_trained': {field: entry['count'] for field, entry in patterns_by_field.items()},
+            'last_training': history.get('last_training'),
+            'recent_sessions': history.get('recent_sessions', [])  # Last 5 sessions
         }
-        
+        # Names the training and learning pages read
+        summary['total_training_sessions'] = summary['total_sessions']
+        summary['total_corrections_learned'] = summary['total_corrections']
+
         return summary
-    
+
     @staticmethod
     def generate_report():
         """Generate human-readable learning report"""
-        history = LearningHistoryTracker.load_history()
-        sessions = history.get('training_sessions', [])
-        patterns = history.get('patterns_learned', {})
-        
+        history = LearningHistoryTracker._load_summary()
+        sessions = history.get('recent_sessions', [])
+        patterns = history.get('patterns_by_field', {})
+
         report = []
         report.append("=" * 80)
         report.append("ML LEARNING HISTORY REPORT")
         report.append("=" * 80)
-        
-        report.append(f"\nTotal Training Sessions: {len(sessions)}")
+
+        report.append(f"\nTotal Training Sessions: {history.get('total_training_sessions', 0)}")
         report.append(f"Total Corrections Used: {history.get('total_corrections_learned', 0)}")
-        report.append(f"Total Patterns Learned: {sum(len(p) for p in patterns.values())}")
-        
+        report.append(f"Total Patterns Learned: {history.get('total_patterns', 0)}")
+
         report.append("\n--- PATTERNS LEARNED BY FIELD ---")
-        for field, field_patterns in patterns.items():
-            report.append(f"\n{field.upper()}: {len(field_patterns)} patterns")
-            for pattern in field_patterns[-3:]:  # Show last 3
+        for field, entry in patterns.items():
+            count = entry.get('count', 0)
+            report.append(f"\n{field.upper()}: {count} patterns")
+            for pattern in entry.get('recent', [])[-3:]:  # Show last 3
                 report.append(f"  - {pattern.get('auto', 'empty')} → {pattern.get('corrected', '?')}")
-            if len(field_patterns) > 3:
-                report.append(f"  ... and {len(field_patterns) - 3} more")
-        
+            if count > 3:
+                report.append(f"  ... and {count - 3} more")
+
         report.append("\n--- RECENT TRAINING SESSIONS ---")
         for i, session in enumerate(sessions[-5:], 1):
             timestamp = session.get('timestamp', '')
@@ -133,7 +352,7 @@ class LearningHistoryTracker:
             patterns_count = session.get('patterns_count', 0)
             report.append(f"\n[{i}] {timestamp}")
             report.append(f"    Corrections: {corr_count} | Patterns learned: {patterns_count}")
-        
+
         report.append("\n" + "=" * 80)
-        
+
         return "\n".join(report)
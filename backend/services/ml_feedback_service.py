@@ -280,34 +280,12 @@ class MLFeedbackService:
         Get all corrections from both batch and regular validation sources.
         
         Returns:
-            Dictionary with batch_corrections and regular_corrections lists
+            Dictionary with batch_corrections and regular_corrections lists, and
+            'offsets' - where each file ended when it was read (a watermark for
+            read_corrections_since)
         """
         try:
-            corrections = {
-                'batch_corrections': [],
-                'regular_corrections': [],
-                'total': 0
-            }
-            
-            # Read batch corrections
-            if os.path.exists(cls.BATCH_CORRECTIONS_FILE):
-                with open(cls.BATCH_CORRECTIONS_FILE, 'r') as f:
-                    for line in f:
-                        try:
-                            record = json.loads(line)
-                            corrections['batch_corrections'].append(record)
-                        except:
-                            pass
-            
-            # Read regular corrections
-            if os.path.exists(cls.REGULAR_CORRECTIONS_FILE):
-                with open(cls.REGULAR_CORRECTIONS_FILE, 'r') as f:
-                    for line in f:
-                        try:
-                            record = json.loads(line)
-                            corrections['regular_corrections'].append(record)
-                        except:
-                            pass
+            corrections, offsets = cls.read_corrections_since({})
             
             # Apply limit if specified
             if limit:
@@ -317,12 +295,60 @@ class MLFeedbackService:
                 corrections['regular_corrections'] = [c for c in total_corrections if c['source'] == 'regular_validation']
             
             corrections['total'] = len(corrections['batch_corrections']) + len(corrections['regular_corrections'])
+            corrections['offsets'] = offsets
             return corrections
             
         except Exception as e:
             ml_logger.exception(f"[ML-FEEDBACK] Error getting corrections: {e}")
             return {'error': str(e)}
 
+    @classmethod
+    def read_corrections_since(cls, offsets: dict, limit: int = None):
+        """
+        Read the correction records appended after the given byte offsets.
+        
+        Args:
+            offsets: {file name: byte offset} from a previous call ({} = from the start)
+            limit: max records per file; the rest is left for the next call
+        
+        Returns:
+            (corrections, new_offsets) - corrections shaped like get_all_corrections().
+            A file shorter than its offset has been replaced and is read from the start;
+            a last line without its newline is still being written and is left for later.
+        """
+        corrections = {
+            'batch_corrections': [],
+            'regular_corrections': [],
+            'total': 0
+        }
+        new_offsets = dict(offsets or {})
+        
+        for key, path in (('batch_corrections', cls.BATCH_CORRECTIONS_FILE),
+                          ('regular_corrections', cls.REGULAR_CORRECTIONS_FILE)):
+            name = os.path.basename(path)
+            if not os.path.exists(path):
+                new_offsets[name] = 0
+                continue
+            
+            position = new_offsets.get(name, 0)
+            if os.path.getsize(path) < position:
+                position = 0
+            
+            with open(path, 'rb') as f:
+                f.seek(position)
+                for line in f:
+                    if not line.endswith(b'\n') or (limit and len(corrections[key]) >= limit):
+                        break
+                    position += len(line)
+                    try:
+                        corrections[key].append(json.loads(line))
+                    except ValueError:
+                        pass
+            new_offsets[name] = position
+        
+        corrections['total'] = len(corrections['batch_corrections']) + len(corrections['regular_corrections'])
+        return corrections, new_offsets
+
     @classmethod
     def get_dataset_stats(cls) -> dict:
         """
@@ -5,8 +5,10 @@ ML Training Service - Trains correction models from user feedback
 import json
 import os
 from datetime import datetime
+from typing import Dict
 from backend.db import get_connection
-from backend.ml_models.ml_correction_model import OCRCorrectionModel, ParsingCorrectionModel
+from backend.ml_models.ml_correction_model import AnchorSearchIndex, OCRCorrectionModel, ParsingCorrectionModel
+from backend.ml_models.model_registry import get_model_registry
 from backend.services.ml_feedback_service import MLFeedbackService
 import logging
 from backend.services.learning_history_tracker import LearningHistoryTracker
@@ -22,14 +24,28 @@ class MLTrainingService:
     PARSING_MODEL_NAME = 'parsing_corrections_model.json'
     
     @staticmethod
-    def collect_training_data(limit: int = 5000):
+    def collect_training_data(limit: int = 5000, watermark: Dict = None):
         """
         Collect training data from:
         1. Database validated vouchers (regular /validate page)
         2. Batch validation feedback (batch processing workflow)
         3. Regular validation feedback (recorded corrections)
         
-        Returns list of training examples
+        Without a watermark the most recent `limit` vouchers / feedback records
+        are collected (full rebuild).  With the watermark of a previous run only
+        what was validated or recorded after it is collected, oldest first, up
+        to `limit` per source - anything beyond is left for the next run.
+        
+        Returns list of training examples; training_data['watermark'] is the
+        position to pass next time:
+            {'database': {'validated_at': iso, 'id': int, 'consumed': [voucher ids]},
+             'feedback': {file: byte offset}}
+        
+        validated_at is set by the first validation only, so a re-validated
+        voucher stays behind the watermark; its new values are learned by the
+        next full rebuild.  'consumed' holds the vouchers a full rebuild trained
+        that lie after its watermark (validated while it ran); incremental runs
+        skip them and drop each id once the watermark has passed it.
         """
         training_data = {
             'ocr_corrections': [],
@@ -38,8 +54,10 @@ class MLTrainingService:
                 'database': 0,
                 'batch_feedback': 0,
                 'regular_feedback': 0
-            }
+            },
+            'watermark': dict(watermark or {})
         }
+        incremental = watermark is not None
         
         # Source 1: Database validated vouchers
         try:
@@ -48,24 +66,37 @@ class MLTrainingService:
             
             # Get vouchers where user made corrections
             # Compare parsed_json_original (OCR output) with parsed_json (user corrections)
-            cur.execute("""
-                SELECT 
-                    id,
-                    raw_ocr_text,
-                    parsed_json_original,
-                    parsed_json,
-                    supplier_name as user_supplier,
-                    voucher_date as user_date,
-                    voucher_number as user_voucher
-                FROM vouchers_master
-                WHERE validation_status = 'VALIDATED' AND parsed_json_original IS NOT NULL
-                ORDER BY created_at DESC
-                LIMIT %s
-            """, (limit,))
-            
-            vouchers = cur.fetchall()
+            if incremental and watermark.get('database') is None:
+                # The last full rebuild could not place a database watermark
+                ml_logger.warning("[ML-TRAINING] No database watermark - validated vouchers are only "
+                                  "picked up by a full rebuild (mode='full')")
+                vouchers = []
+            elif incremental:
+                vouchers = MLTrainingService._fetch_vouchers_since(cur, watermark['database'], limit)
+            else:
+                # Place the watermark before reading, so a voucher validated in between
+                # is trained now and recorded as consumed rather than missed
+                position = MLTrainingService._latest_validation(conn, cur)
+                cur.execute(f"""
+                    SELECT 
+                        id,{' validated_at,' if position is not None else ''}
+                        raw_ocr_text,
+                        parsed_json_original,
+                        parsed_json,
+                        supplier_name as user_supplier,
+                        voucher_date as user_date,
+                        voucher_number as user_voucher
+                    FROM vouchers_master
+                    WHERE validation_status = 'VALIDATED' AND parsed_json_original IS NOT NULL
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                """, (limit,))
+                vouchers = cur.fetchall()
             
+            consumed = set((watermark.get('database') or {}).get('consumed', [])) if incremental else set()
             for voucher in vouchers:
+                if voucher['id'] in consumed:
+                    continue
                 raw_ocr = voucher['raw_ocr_text'] or ''
                 
                 # Get original OCR data
@@ -137,12 +168,33 @@ class MLTrainingService:
                             'source': 'database'
                         })
                      training_data['source_breakdown']['database'] += 1
+            
+            if incremental:
+                if vouchers:
+                    last = vouchers[-1]
+                    # Consumed ids stay only until the watermark passes them
+                    ahead = consumed - {v['id'] for v in vouchers} if len(vouchers) >= limit else set()
+                    training_data['watermark']['database'] = {'validated_at': str(last['validated_at']),
+                                                              'id': last['id'], 'consumed': sorted(ahead)}
+            else:
+                if position is not None:
+                    # Trained vouchers the next incremental run would fetch again
+                    position['consumed'] = sorted(
+                        v['id'] for v in vouchers
+                        if MLTrainingService._after(v, position)
+                    )
+                training_data['watermark']['database'] = position
         except Exception as e:
             ml_logger.error(f"[ML-TRAINING] Error collecting database training data: {e}")
         
         # Source 2 & 3: Batch and regular validation feedback
         try:
-            all_corrections = MLFeedbackService.get_all_corrections(limit=limit)
+            if incremental:
+                all_corrections, offsets = MLFeedbackService.read_corrections_since(
+                    watermark.get('feedback', {}), limit)
+            else:
+                all_corrections = MLFeedbackService.get_all_corrections(limit=limit)
+                offsets = all_corrections.get('offsets', {})
             
             # Process batch validation feedback
             for correction in all_corrections.get('batch_corrections', []):
@@ -236,13 +288,73 @@ class MLTrainingService:
                                         })
                                         training_data['source_breakdown']['regular_feedback'] += 1
         
+            
+            training_data['watermark']['feedback'] = offsets
+        
         except Exception as e:
             ml_logger.error(f"[ML-TRAINING] Error collecting feedback training data: {e}")
         
         return training_data
     
     @staticmethod
-    def train_models(feedback_limit: int = 5000, save_models: bool = True):
+    def _fetch_vouchers_since(cur, position: Dict, limit: int):
+        """Validated vouchers after (validated_at, id), oldest first"""
+        query = """
+            SELECT 
+                id,
+                validated_at,
+                raw_ocr_text,
+                parsed_json_original,
+                parsed_json,
+                supplier_name as user_supplier,
+                voucher_date as user_date,
+                voucher_number as user_voucher
+            FROM vouchers_master
+            WHERE validation_status = 'VALIDATED' AND parsed_json_original IS NOT NULL
+              AND validated_at IS NOT NULL
+        """
+        params = []
+        if position.get('validated_at'):
+            query += " AND (validated_at, id) > (%s::timestamp, %s)"
+            params += [position['validated_at'], position['id']]
+        query += " ORDER BY validated_at, id LIMIT %s"
+        cur.execute(query, params + [limit])
+        return cur.fetchall()
+    
+    @staticmethod
+    def _after(voucher: Dict, position: Dict) -> bool:
+        """Whether _fetch_vouchers_since(position) would return this voucher"""
+        if voucher.get('validated_at') is None:
+            return False
+        if not position.get('validated_at'):
+            return True
+        return (str(voucher['validated_at']), voucher['id']) > (position['validated_at'], position['id'])
+    
+    @staticmethod
+    def _latest_validation(conn, cur):
+        """
+        (validated_at, id) of the newest validation - where incremental runs start
+        after a full rebuild.  None if vouchers_master has no validated_at column yet
+        (scripts/migrate_add_validated_at.py); incremental runs then skip the database.
+        """
+        try:
+            cur.execute("""
+                SELECT validated_at, id FROM vouchers_master
+                WHERE validated_at IS NOT NULL
+                ORDER BY validated_at DESC, id DESC
+                LIMIT 1
+            """)
+            row = cur.fetchone()
+        except Exception as e:
+            conn.rollback()
+            ml_logger.warning(f"[ML-TRAINING] No validation watermark for the database: {e}")
+            return None
+        if row is None:
+            return {'validated_at': None, 'id': 0}
+        return {'validated_at': str(row['validated_at']), 'id': row['id']}
+    
+    @staticmethod
+    def train_models(feedback_limit: int = 5000, save_models: bool = True, mode: str = 'incremental'):
         """
         Train OCR and Parsing correction models from collected user feedback.
         
@@ -251,9 +363,12 @@ class MLTrainingService:
         Args:
             feedback_limit: Max number of corrections to use
             save_models: Whether to save trained models to disk
+            mode: 'incremental' folds only feedback newer than the saved model's
+                  watermark into it; 'full' retrains both models from scratch
         
         Returns: {
             'status': 'success|error',
+            'mode': 'incremental|full',
             'ocr_model_stats': {...},
             'parsing_model_stats': {...},
             'total_samples': int,
@@ -273,14 +388,14 @@ class MLTrainingService:
         
         try:
             # Train OCR and Parsing models
-            correction_result = MLTrainingService._train_correction_models(feedback_limit, save_models)
+            correction_result = MLTrainingService._train_correction_models(feedback_limit, save_models, mode)
+            training_data = correction_result.pop('training_data', {})
             result.update(correction_result)
             
             result['training_time'] = time.time() - start_time
             
-            # Record this training session in history
+            # Record this training session in history (the same data the models were trained on)
             corrections_used = []
-            training_data = MLTrainingService.collect_training_data(feedback_limit)
             for corr in training_data.get('parsing_corrections', []):
                 corrections_used.append({
                     'id': f"{corr.get('field')}_{corr.get('auto')}_{corr.get('corrected')}",
@@ -321,18 +436,36 @@ class MLTrainingService:
         return result
     
     @staticmethod
-    def _train_correction_models(feedback_limit: int = 5000, save_models: bool = True) -> Dict:
+    def _train_correction_models(feedback_limit: int = 5000, save_models: bool = True,
+                                 mode: str = 'incremental') -> Dict:
         """
         Train OCR and Parsing correction models.
         Separated from main train_models for modularity.
+        
+        Incremental mode loads the saved models and folds in only the corrections
+        after parsing_model.training_watermark, so the cost follows new feedback.
+        It falls back to a full rebuild when there is no saved model or watermark.
+        The watermark is saved inside the parsing model, so a model file and the
+        feedback it has consumed never disagree.
         """
         try:
-            # Collect training data
-            training_data = MLTrainingService.collect_training_data(feedback_limit)
-            
             # Initialize models
             ocr_model = OCRCorrectionModel()
             parsing_model = ParsingCorrectionModel()
+            watermark = None
+            if mode == 'incremental':
+                if parsing_model.load_model(MLTrainingService.PARSING_MODEL_NAME) and \
+                        parsing_model.training_watermark is not None:
+                    ocr_model.load_model(MLTrainingService.OCR_MODEL_NAME)
+                    watermark = parsing_model.training_watermark
+                else:
+                    ml_logger.info("[ML-TRAINING] No saved watermark - running a full rebuild")
+                    parsing_model = ParsingCorrectionModel()
+                    mode = 'full'
+            
+            # Collect training data
+            training_data = MLTrainingService.collect_training_data(feedback_limit, watermark)
+            new_samples = len(training_data['ocr_corrections']) + len(training_data['parsing_corrections'])
             
             # Train OCR correction model
             for correction in training_data.get('ocr_corrections', []):
@@ -364,14 +497,25 @@ class MLTrainingService:
                         supplier_name=supplier_name
                     )
             
-            # Save models if requested
-            if save_models:
+            parsing_model.training_watermark = training_data['watermark']
+            
+            # Save models if requested (an incremental run with nothing new leaves them as they are)
+            if save_models and (mode == 'full' or training_data['watermark'] != watermark):
                 ocr_model.save_model(MLTrainingService.OCR_MODEL_NAME)
+                # Saved last: it carries the watermark
                 parsing_model.save_model(MLTrainingService.PARSING_MODEL_NAME)
+                # Publish the new versions to this process right away
+                registry = get_model_registry()
+                registry.reload('ocr_corrections')
+                registry.reload('parsing_corrections')
             
             return {
                 'status': 'success',
-                'total_samples': len(training_data['ocr_corrections']) + len(training_data['parsing_corrections']),
+                'mode': mode,
+                'total_samples': new_samples,
+                'model_total_samples': parsing_model.total_samples,
+                'watermark': training_data['watermark'],
+                'training_data': training_data,
                 'ocr_samples': len(training_data['ocr_corrections']),
                 'parsing_samples': len(training_data['parsing_corrections']),
                 'source_breakdown': training_data.get('source_breakdown', {}),
@@ -393,26 +537,28 @@ class MLTrainingService:
     @staticmethod
     def get_training_status():
         """Get status of text parsing models: OCR and Parsing."""
-        ocr_model = OCRCorrectionModel()
-        parsing_model = ParsingCorrectionModel()
+        registry = get_model_registry()
+        ocr_model = registry.model('ocr_corrections')
+        parsing_model = registry.model('parsing_corrections')
         
-        ocr_loaded = ocr_model.load_model(MLTrainingService.OCR_MODEL_NAME)
-        parsing_loaded = parsing_model.load_model(MLTrainingService.PARSING_MODEL_NAME)
+        ocr_loaded = ocr_model is not None
+        parsing_loaded = parsing_model is not None
         
         return {
             'ocr_model_available': ocr_loaded,
             'parsing_model_available': parsing_loaded,
             'ocr_stats': ocr_model.get_stats() if ocr_loaded else None,
             'parsing_fields': list(parsing_model.parsing_corrections.keys()) if parsing_loaded else [],
-            'last_trained': ocr_model.last_trained if isinstance(ocr_model.last_trained, str) else (ocr_model.last_trained.isoformat() if ocr_model.last_trained else None)
+            'last_trained': ocr_model.last_trained if ocr_loaded else None,
+            'registry': registry.stats()
         }
     
     @staticmethod
     def apply_ocr_character_corrections(raw_text: str) -> str:
         """Globally apply OCR character swaps learned from user corrections before standard parsing."""
         try:
-            ocr_model = OCRCorrectionModel()
-            if ocr_model.load_model(MLTrainingService.OCR_MODEL_NAME):
+            ocr_model = get_model_registry().model('ocr_corrections')
+            if ocr_model is not None:
                 return ocr_model.apply_ocr_corrections(raw_text)
         except Exception as e:
             ml_logger.error(f"[ML] Error applying OCR corrections: {e}")
@@ -432,16 +578,20 @@ class MLTrainingService:
         corrected = auto_extracted_data.copy()
         
         try:
-            # Load trained models
-            ocr_model = OCRCorrectionModel()
-            parsing_model = ParsingCorrectionModel()
+            # Resident models (read once, reloaded when retrained)
+            registry = get_model_registry()
+            ocr_model = registry.model('ocr_corrections')
+            parsing_model = registry.model('parsing_corrections')
             
-            ocr_loaded = ocr_model.load_model(MLTrainingService.OCR_MODEL_NAME)
-            parsing_loaded = parsing_model.load_model(MLTrainingService.PARSING_MODEL_NAME)
+            ocr_loaded = ocr_model is not None
+            parsing_loaded = parsing_model is not None
             
             if not (ocr_loaded or parsing_loaded):
                 return corrected  # Return original if no trained models
             
+            # One tokenised view of the text shared by every anchor lookup below
+            anchor_index = AnchorSearchIndex.ensure(raw_ocr)
+            
             # Apply OCR-level corrections
             if 'master' in corrected:
                 master = corrected['master']
@@ -465,7 +615,7 @@ class MLTrainingService:
                 
                 if supplier_name and parsing_loaded:
                     # 1. Recover/Overwrite Date
-                    anchor_result = parsing_model.find_value_by_anchor('voucher_date', raw_ocr, supplier_name)
+                    anchor_result = parsing_model.find_value_by_anchor('voucher_date', anchor_index, supplier_name)
                     if anchor_result and anchor_result.get('confidence', 0) > 0.8:
                         from backend.parser import try_parse_date
                         parsed_date = try_parse_date(anchor_result['value'])
@@ -473,7 +623,7 @@ class MLTrainingService:
                             master['voucher_date'] = parsed_date
                     
                     # 2. Recover/Overwrite Voucher Number
-                    anchor_result = parsing_model.find_value_by_anchor('voucher_number', raw_ocr, supplier_name)
+                    anchor_result = parsing_model.find_value_by_anchor('voucher_number', anchor_index, supplier_name)
                     if anchor_result and anchor_result.get('confidence', 0) > 0.8:
                         cleaned_vn = "".join(c for c in anchor_result['value'] if c.isalnum() or c in '-/')
                         if cleaned_vn:
@@ -481,7 +631,7 @@ class MLTrainingService:
                                 
                     # 3. Recover/Overwrite Totals
                     for total_field in ['net_total', 'gross_total']:
-                        anchor_result = parsing_model.find_value_by_anchor(total_field, raw_ocr, supplier_name)
+                        anchor_result = parsing_model.find_value_by_anchor(total_field, anchor_index, supplier_name)
                         if anchor_result and anchor_result.get('confidence', 0) > 0.8:
                             from backend.parser import safe_float_conversion
                             val = safe_float_conversion(anchor_result['value'])
@@ -542,7 +692,7 @@ class MLTrainingService:
                 for field, anchors in learned_deductions.items():
                     if field.startswith('deduction_'):
                         ded_type = field.replace('deduction_', '')
-                        anchor_result = parsing_model.find_value_by_anchor(field, raw_ocr, supplier_name)
+                        anchor_result = parsing_model.find_value_by_anchor(field, anchor_index, supplier_name)
                         
                         if anchor_result and anchor_result.get('confidence', 0) > 0.8:
                             val = safe_float_conversion(anchor_result['value'])
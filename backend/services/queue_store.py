@@ -0,0 +1,494 @@
+"""
+Queue Store - Transactional persistence for wizard queues
+
+The wizard queues used to live in one dict that save_queue_store() dumped to
+backend/data/queue_store.json (indent=4) after every processed file, crop,
+validate and skip - rewriting every queue ever created, non-atomically, so a
+crash mid-write could lose all of them.
+
+Queues now live in SQLite (WAL mode), one row per queue and one row per
+file, and every change is a small transaction that touches only the rows it
+changes:
+
+    queues       queue_id, phase, created_at, updated_at, data (queue fields, JSON)
+    queue_files  queue_id, idx, status, updated_at, data (file entry, JSON)
+
+Reads go through an in-process cache of queue dicts (loaded from SQLite on
+first access), so route code keeps working with plain dicts.  Callers must
+not persist by mutating those dicts - use update() / update_file(), which
+apply the change to the cached dict and the database under one lock.
+
+Lifecycle - so memory and the hot tables stay flat as the deployment ages:
+    - the cache is an LRU of at most QUEUE_CACHE_MAX queues; entries idle
+      for QUEUE_CACHE_IDLE_SECONDS are dropped (queues in the 'processing'
+      phase stay, their batch thread is still working on them)
+    - sweep() moves queues out of the hot tables into archived_queues
+      (one zlib-compressed JSON row per queue):
+          saved       save_batch wrote the vouchers (archive(..., 'saved'))
+          completed   every file validated/skipped, idle QUEUE_ARCHIVE_COMPLETED_HOURS
+          idle        untouched for QUEUE_ARCHIVE_TTL_HOURS
+    - get() lazy-loads archived completed/idle queues back into the hot
+      tables; saved queues stay archived (their vouchers are already in the
+      database) and are only readable through get_archived()
+    - archived queues older than QUEUE_ARCHIVE_RETENTION_DAYS are purged
+      (0 = keep forever)
+sweep() runs when the store opens and then at most every
+QUEUE_SWEEP_SECONDS, piggy-backed on reads.  stats() reports the counts.
+
+The legacy queue_store.json is imported once per database (recorded in
+store_meta); the file itself is left in place.
+
+Configuration (environment):
+    QUEUE_STORE_DB                 SQLite file (default backend/data/queue_store.db)
+    QUEUE_CACHE_MAX                queues kept in memory (default 32)
+    QUEUE_CACHE_IDLE_SECONDS       drop cached queues idle this long (default 900)
+    QUEUE_ARCHIVE_TTL_HOURS        archive queues idle this long (default 72)
+    QUEUE_ARCHIVE_COMPLETED_HOURS  archive finished queues idle this long (default 1)
+    QUEUE_ARCHIVE_RETENTION_DAYS   purge archived queues after this many days (default 0 = never)
+    QUEUE_SWEEP_SECONDS            interval between archive sweeps (default 300)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+LEGACY_JSON_FILE = os.path.join(DATA_DIR, 'queue_store.json')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queues (
+    queue_id   TEXT PRIMARY KEY,
+    phase      TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    data       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS queue_files (
+    queue_id   TEXT NOT NULL REFERENCES queues(queue_id) ON DELETE CASCADE,
+    idx        INTEGER NOT NULL,
+    status     TEXT,
+    updated_at TEXT,
+    data       TEXT NOT NULL,
+    PRIMARY KEY (queue_id, idx)
+);
+CREATE TABLE IF NOT EXISTS archived_queues (
+    queue_id    TEXT PRIMARY KEY,
+    reason      TEXT NOT NULL,
+    phase       TEXT,
+    created_at  TEXT,
+    archived_at TEXT NOT NULL,
+    data        BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_queues_updated_at ON queues (updated_at);
+CREATE INDEX IF NOT EXISTS idx_archived_queues_archived_at ON archived_queues (archived_at);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=str, separators=(',', ':'))
+
+
+def _queue_fields(queue: Dict) -> Dict:
+    return {k: v for k, v in queue.items() if k != 'files'}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+# File statuses that leave nothing for the user to do
+FINISHED_STATUSES = ('validated', 'skipped')
+
+# Archive reasons get() will bring back into the hot tables
+RESTORABLE_REASONS = ('completed', 'idle')
+
+
+class QueueStore:
+    """Per-queue, per-file queue persistence with a read-through dict cache"""
+
+    def __init__(self, db_path: str = None, legacy_json: str = LEGACY_JSON_FILE,
+                 cache_max: int = None, cache_idle_seconds: float = None,
+                 ttl_hours: float = None, completed_hours: float = None,
+                 retention_days: float = None, sweep_seconds: float = None):
+        self.db_path = db_path or os.getenv('QUEUE_STORE_DB') or os.path.join(DATA_DIR, 'queue_store.db')
+        self.cache_max = int(cache_max if cache_max is not None else _env_float('QUEUE_CACHE_MAX', 32))
+        self.cache_idle_seconds = (cache_idle_seconds if cache_idle_seconds is not None
+                                   else _env_float('QUEUE_CACHE_IDLE_SECONDS', 900))
+        self.ttl_hours = ttl_hours if ttl_hours is not None else _env_float('QUEUE_ARCHIVE_TTL_HOURS', 72)
+        self.completed_hours = (completed_hours if completed_hours is not None
+                                else _env_float('QUEUE_ARCHIVE_COMPLETED_HOURS', 1))
+        self.retention_days = (retention_days if retention_days is not None
+                               else _env_float('QUEUE_ARCHIVE_RETENTION_DAYS', 0))
+        self.sweep_seconds = sweep_seconds if sweep_seconds is not None else _env_float('QUEUE_SWEEP_SECONDS', 300)
+
+        self._lock = threading.RLock()
+        self._cache: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._swept_at = None
+        self._counters = {'cache_hits': 0, 'cache_misses': 0, 'evictions': 0,
+                          'archived': 0, 'restored': 0, 'purged': 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(_SCHEMA)
+
+        if legacy_json:
+            self.import_json(legacy_json)
+        self.sweep()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, queue_id: str) -> Optional[Dict]:
+        """The queue dict (files included), or None - restores completed/idle archived queues"""
+        with self._lock:
+            self._maybe_sweep()
+            now = time.monotonic()
+            queue = self._cache.get(queue_id)
+            if queue is not None:
+                self._counters['cache_hits'] += 1
+                self._cache.move_to_end(queue_id)
+                self._last_access[queue_id] = now
+                return queue
+
+            queue = self._load(queue_id)
+            if queue is None:
+                queue = self._restore(queue_id)
+                if queue is None:
+                    return None
+            self._counters['cache_misses'] += 1
+            self._cache_put(queue_id, queue)
+            return queue
+
+    def __contains__(self, queue_id: str) -> bool:
+        return self.get(queue_id) is not None
+
+    def __getitem__(self, queue_id: str) -> Dict:
+        queue = self.get(queue_id)
+        if queue is None:
+            raise KeyError(queue_id)
+        return queue
+
+    def queue_ids(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute('SELECT queue_id FROM queues ORDER BY created_at').fetchall()
+        return [row[0] for row in rows]
+
+    def pending_ingest(self) -> List[Tuple[str, int, Dict]]:
+        """(queue_id, index, file entry) for hot-queue files still waiting on ingestion"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT f.queue_id, f.idx, f.data FROM queue_files f JOIN queues q ON q.queue_id = f.queue_id '
+                'WHERE f.data LIKE ? ORDER BY q.created_at, f.idx', ('%"auto_crop_status":"pending"%',)).fetchall()
+        pending = [(queue_id, index, json.loads(data)) for queue_id, index, data in rows]
+        return [entry for entry in pending if entry[2].get('auto_crop_status') == 'pending']
+
+    def get_archived(self, queue_id: str) -> Optional[Dict]:
+        """Read an archived queue (any reason) without restoring it"""
+        with self._lock:
+            row = self._conn.execute('SELECT reason, archived_at, data FROM archived_queues WHERE queue_id = ?',
+                                     (queue_id,)).fetchone()
+        if row is None:
+            return None
+        queue = json.loads(zlib.decompress(row[2]))
+        queue['archive'] = {'reason': row[0], 'archived_at': row[1]}
+        return queue
+
+    def _load(self, queue_id: str) -> Optional[Dict]:
+        row = self._conn.execute('SELECT data FROM queues WHERE queue_id = ?', (queue_id,)).fetchone()
+        if row is None:
+            return None
+        queue = json.loads(row[0])
+        queue['files'] = [json.loads(data) for (data,) in self._conn.execute(
+            'SELECT data FROM queue_files WHERE queue_id = ? ORDER BY idx', (queue_id,))]
+        return queue
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def create(self, queue: Dict) -> None:
+        """Store a new queue and all of its files in one transaction"""
+        with self._lock:
+            with self._transaction():
+                self._conn.execute('DELETE FROM archived_queues WHERE queue_id = ?', (queue['queue_id'],))
+                self._insert(queue)
+            self._cache_put(queue['queue_id'], queue)
+
+    def update(self, queue_id: str, fields: Dict = None, files: Dict[int, Dict] = None) -> bool:
+        """
+        Apply queue-level fields and per-file updates atomically.
+
+        Args:
+            queue_id: queue to change
+            fields: queue keys to set (phase, current_index, completed, ...)
+            files: {file index: {key: value}} to merge into those file entries
+
+        Returns False if the queue does not exist.
+        """
+        with self._lock:
+            queue = self.get(queue_id)
+            if queue is None:
+                return False
+            now = datetime.now().isoformat()
+            merged_files = {index: dict(queue['files'][index], **updates)
+                            for index, updates in (files or {}).items()}
+            with self._transaction():
+                if fields:
+                    self._conn.execute(
+                        'UPDATE queues SET phase = ?, updated_at = ?, data = ? WHERE queue_id = ?',
+                        (fields.get('phase', queue.get('phase')), now,
+                         _dumps(dict(_queue_fields(queue), **fields)), queue_id))
+                else:
+                    # Keep the queue's idle clock current for sweep()
+                    self._conn.execute('UPDATE queues SET updated_at = ? WHERE queue_id = ?', (now, queue_id))
+                for index, file_info in merged_files.items():
+                    self._conn.execute(
+                        'UPDATE queue_files SET status = ?, updated_at = ?, data = ? '
+                        'WHERE queue_id = ? AND idx = ?',
+                        (file_info.get('status'), now, _dumps(file_info), queue_id, index))
+
+            # Committed - now apply the same change to the cached dicts
+            if fields:
+                queue.update(fields)
+            for index, updates in (files or {}).items():
+                queue['files'][index].update(updates)
+            return True
+
+    def update_file(self, queue_id: str, index: int, updates: Dict, expect_status: str = None) -> bool:
+        """
+        Merge updates into one file entry - a single-row write.
+
+        With expect_status the update is applied only while the file still
+        has that status (checked under the store lock).
+        """
+        with self._lock:
+            queue = self.get(queue_id)
+            if queue is None or index >= len(queue['files']):
+                return False
+            if expect_status is not None and queue['files'][index].get('status') != expect_status:
+                return False
+            return self.update(queue_id, files={index: updates})
+
+    def delete(self, queue_id: str) -> None:
+        """Remove a queue from the hot tables and the archive"""
+        with self._lock:
+            with self._transaction():
+                self._conn.execute('DELETE FROM queues WHERE queue_id = ?', (queue_id,))
+                self._conn.execute('DELETE FROM archived_queues WHERE queue_id = ?', (queue_id,))
+            self._cache_drop(queue_id)
+
+    def _insert(self, queue: Dict, updated_at: str = None) -> None:
+        now = datetime.now().isoformat()
+        queue_id = queue['queue_id']
+        self._conn.execute(
+            'INSERT OR REPLACE INTO queues (queue_id, phase, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?)',
+            (queue_id, queue.get('phase'), queue.get('created_at') or now, updated_at or now,
+             _dumps(_queue_fields(queue))))
+        self._conn.executemany(
+            'INSERT INTO queue_files (queue_id, idx, status, updated_at, data) VALUES (?, ?, ?, ?, ?)',
+            [(queue_id, i, f.get('status'), now, _dumps(f)) for i, f in enumerate(queue.get('files', []))])
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _cache_put(self, queue_id: str, queue: Dict) -> None:
+        self._cache[queue_id] = queue
+        self._cache.move_to_end(queue_id)
+        self._last_access[queue_id] = time.monotonic()
+        self._evict()
+
+    def _cache_drop(self, queue_id: str) -> None:
+        self._cache.pop(queue_id, None)
+        self._last_access.pop(queue_id, None)
+
+    def _evict(self) -> None:
+        """Drop idle entries, then least recently used ones beyond cache_max"""
+        now = time.monotonic()
+        evictable = [qid for qid, queue in self._cache.items() if queue.get('phase') != 'processing']
+        over = len(self._cache) - self.cache_max
+        for queue_id in evictable:  # oldest first
+            idle = now - self._last_access.get(queue_id, now) >= self.cache_idle_seconds
+            if over > 0 or idle:
+                self._cache_drop(queue_id)
+                self._counters['evictions'] += 1
+                over -= 1
+
+    # ------------------------------------------------------------------
+    # Archive
+    # ------------------------------------------------------------------
+
+    def archive(self, queue_id: str, reason: str) -> bool:
+        """Move a queue from the hot tables into archived_queues"""
+        with self._lock:
+            queue = self._load(queue_id)
+            if queue is None:
+                return False
+            with self._transaction():
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO archived_queues (queue_id, reason, phase, created_at, archived_at, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (queue_id, reason, queue.get('phase'), queue.get('created_at'), datetime.now().isoformat(),
+                     zlib.compress(_dumps(queue).encode('utf-8'))))
+                self._conn.execute('DELETE FROM queues WHERE queue_id = ?', (queue_id,))
+            self._cache_drop(queue_id)
+            self._counters['archived'] += 1
+            print(f"[QUEUE STORE] Archived queue {queue_id} ({reason})")
+            return True
+
+    def _restore(self, queue_id: str) -> Optional[Dict]:
+        """Bring an archived completed/idle queue back into the hot tables"""
+        row = self._conn.execute('SELECT reason, data FROM archived_queues WHERE queue_id = ?',
+                                 (queue_id,)).fetchone()
+        if row is None or row[0] not in RESTORABLE_REASONS:
+            return None
+        queue = json.loads(zlib.decompress(row[1]))
+        with self._transaction():
+            self._insert(queue)
+            self._conn.execute('DELETE FROM archived_queues WHERE queue_id = ?', (queue_id,))
+        self._counters['restored'] += 1
+        print(f"[QUEUE STORE] Restored archived queue {queue_id} ({row[0]})")
+        return queue
+
+    def _maybe_sweep(self) -> None:
+        if self._swept_at is None or time.monotonic() - self._swept_at >= self.sweep_seconds:
+            self.sweep()
+
+    def sweep(self) -> Dict[str, int]:
+        """Archive finished and idle queues, purge expired archives, drop idle cache entries"""
+        with self._lock:
+            self._swept_at = time.monotonic()
+            now = datetime.now()
+            ttl_cutoff = (now - timedelta(hours=self.ttl_hours)).isoformat()
+            completed_cutoff = (now - timedelta(hours=self.completed_hours)).isoformat()
+            placeholders = ', '.join('?' for _ in FINISHED_STATUSES)
+
+            # Completed = has files and all of them finished; an empty queue only ages out as idle
+            completed = [row[0] for row in self._conn.execute(
+                f'SELECT queue_id FROM queues q WHERE updated_at < ? '
+                f'AND EXISTS (SELECT 1 FROM queue_files f WHERE f.queue_id = q.queue_id) '
+                f'AND NOT EXISTS (SELECT 1 FROM queue_files f WHERE f.queue_id = q.queue_id '
+                f'AND (f.status IS NULL OR f.status NOT IN ({placeholders})))',
+                (completed_cutoff, *FINISHED_STATUSES))]
+            finished = set(completed)
+            idle = [queue_id for (queue_id,) in self._conn.execute(
+                'SELECT queue_id FROM queues WHERE updated_at < ?', (ttl_cutoff,)) if queue_id not in finished]
+
+            for queue_id in completed:
+                self.archive(queue_id, 'completed')
+            for queue_id in idle:
+                self.archive(queue_id, 'idle')
+
+            purged = 0
+            if self.retention_days > 0:
+                purge_cutoff = (now - timedelta(days=self.retention_days)).isoformat()
+                with self._transaction():
+                    purged = self._conn.execute('DELETE FROM archived_queues WHERE archived_at < ?',
+                                                (purge_cutoff,)).rowcount
+                self._counters['purged'] += purged
+
+            self._evict()
+            return {'completed': len(completed), 'idle': len(idle), 'purged': purged}
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Hot / archived / cached queue counts and cache counters"""
+        with self._lock:
+            hot = self._conn.execute('SELECT COUNT(*) FROM queues').fetchone()[0]
+            hot_files = self._conn.execute('SELECT COUNT(*) FROM queue_files').fetchone()[0]
+            archived = dict(self._conn.execute('SELECT reason, COUNT(*) FROM archived_queues GROUP BY reason'))
+            return {
+                'hot_queues': hot,
+                'hot_files': hot_files,
+                'archived_queues': sum(archived.values()),
+                'archived_by_reason': archived,
+                'cached_queues': len(self._cache),
+                'cache_max': self.cache_max,
+                'db_bytes': sum(os.path.getsize(path) for path in (self.db_path, self.db_path + '-wal')
+                                if os.path.exists(path)),
+                **self._counters,
+            }
+
+    # ------------------------------------------------------------------
+    # Legacy JSON import
+    # ------------------------------------------------------------------
+
+    def import_json(self, path: str) -> int:
+        """Import queue_store.json once; returns the number of queues imported"""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM store_meta WHERE key = 'json_imported'").fetchone()
+            if done is not None or not os.path.exists(path):
+                return 0
+            try:
+                with open(path, 'r') as f:
+                    legacy = json.load(f)
+            except Exception as e:
+                print(f"[QUEUE STORE] Failed to read {path}: {e}")
+                return 0
+
+            imported = 0
+            with self._transaction():
+                for queue_id, queue in legacy.items():
+                    if not isinstance(queue, dict):
+                        continue
+                    queue.setdefault('queue_id', queue_id)
+                    self._conn.execute('DELETE FROM queues WHERE queue_id = ?', (queue_id,))
+                    # Last touched when created - lets sweep() archive long-abandoned queues
+                    self._insert(queue, updated_at=queue.get('created_at'))
+                    imported += 1
+                self._conn.execute("INSERT INTO store_meta (key, value) VALUES ('json_imported', ?)",
+                                   (datetime.now().isoformat(),))
+            print(f"[QUEUE STORE] Imported {imported} queues from {path}")
+            return imported
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_queue_store() -> QueueStore:
+    """Return the shared queue store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = QueueStore()
+    return _store
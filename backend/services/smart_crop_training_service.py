@@ -10,6 +10,8 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from backend.services.ml_feedback_service import MLFeedbackService
+from backend.ml_models.model_registry import get_model_registry
+from backend.ml_models.model_store import save_state
 
 # Initialize ML logger
 ml_logger = logging.getLogger('ml')
@@ -249,8 +251,8 @@ class SmartCropTrainingService:
             
             # Save model
             os.makedirs(cls.MODELS_DIR, exist_ok=True)
-            with open(cls.SMART_CROP_MODEL, 'w') as f:
-                json.dump(model_data, f, indent=2, default=str)
+            save_state(cls.SMART_CROP_MODEL, 'smart_crop', 1, model_data)
+            get_model_registry().reload('smart_crop')
             
             training_time = time.time() - start_time
             
@@ -388,16 +390,14 @@ class SmartCropTrainingService:
             }
         """
         try:
-            if not os.path.exists(cls.SMART_CROP_MODEL):
+            model_data = cls.load_model()
+            if model_data is None:
                 return {
                     'model_available': False,
                     'model_path': cls.SMART_CROP_MODEL,
                     'message': 'No trained model yet'
                 }
             
-            with open(cls.SMART_CROP_MODEL, 'r') as f:
-                model_data = json.load(f)
-            
             return {
                 'model_available': True,
                 'model_path': cls.SMART_CROP_MODEL,
@@ -418,15 +418,14 @@ class SmartCropTrainingService:
     @classmethod
     def load_model(cls) -> Optional[Dict]:
         """
-        Load trained smart crop model
+        Trained smart crop model from the model registry (read once per
+        process, reloaded when the file changes)
         
         Returns:
-            Model data dict or None if not available
+            Model data dict (shared - do not modify) or None if not available
         """
         try:
-            if os.path.exists(cls.SMART_CROP_MODEL):
-                with open(cls.SMART_CROP_MODEL, 'r') as f:
-                    return json.load(f)
+            return get_model_registry().model('smart_crop')
         except Exception as e:
             ml_logger.exception(f"[SMART-CROP-TRAINING] Error loading model: {e}")
         
@@ -172,7 +172,8 @@ class VoucherService:
                 net_total = %s,
                 parsed_json = %s,
                 parsed_json_original = %s,
-                validation_status = 'VALIDATED'
+                validation_status = 'VALIDATED',
+                validated_at = COALESCE(validated_at, CURRENT_TIMESTAMP)
             WHERE id = %s
         """, (
             master_data.get('supplier_name'),
@@ -11,25 +11,45 @@ Features:
 
 import cv2
 import numpy as np
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, Optional, Callable
+import io
 import os
 
+from PIL import Image
+
+# Detection runs on a reduced decode whose long side is at least this many
+# pixels (JPEGs are decoded straight to 1/2, 1/4 or 1/8 size via DCT scaling)
+DETECTION_MAX_SIDE = int(os.getenv('SMART_CROP_MAX_SIDE', '1000'))
+
+# Re-fit bounding-box edges on full-resolution strips around the found edges
+DETECTION_REFINE = os.getenv('SMART_CROP_REFINE', '1').lower() not in ('0', 'false', 'no')
+
+REDUCED_COLOR_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Outward growth of the edge map from the 5x5, 2-iteration dilation
+EDGE_DILATION_PX = 4
+
+
 class SmartReceiptDetector:
     """
     Intelligent receipt boundary detection with confidence scoring
     """
     
+    # Confidence thresholds
+    HIGH_CONFIDENCE = 0.85  # Auto-approve
+    MEDIUM_CONFIDENCE = 0.65  # Show preview
+    LOW_CONFIDENCE = 0.0  # Force manual
+    
     def __init__(self):
         # Detection thresholds
         self.MIN_AREA_RATIO = 0.1  # Receipt should be at least 10% of image
         self.MAX_AREA_RATIO = 0.95  # But not the entire image
         self.MIN_ASPECT_RATIO = 0.3  # Receipts are usually tall/narrow
         self.MAX_ASPECT_RATIO = 3.0
-        
-        # Confidence thresholds
-        self.HIGH_CONFIDENCE = 0.85  # Auto-approve
-        self.MEDIUM_CONFIDENCE = 0.65  # Show preview
-        self.LOW_CONFIDENCE = 0.0  # Force manual
     
     def detect_receipt(self, image_path: str) -> Dict:
         """
@@ -50,27 +70,26 @@ class SmartReceiptDetector:
             }
         """
         try:
-            # Load image
-            image = cv2.imread(image_path)
+            # Load image: detection runs on a reduced copy, full resolution
+            # is decoded only once a candidate needs cropping
+            image, load_full = self._load_for_detection(image_path)
             if image is None:
                 return self._failed_result("Could not load image")
             
-            original_h, original_w = image.shape[:2]
-            
             # Strategy 1: Edge Detection (Best for clean backgrounds)
-            result = self._edge_detection_method(image)
+            result = self._edge_detection_method(image, load_full)
             if result['confidence'] >= self.MEDIUM_CONFIDENCE:
                 # CRITICAL: Apply learned corrections before returning!
                 result = self._apply_learned_corrections(result)
-                result['preview_path'] = self._save_preview(image, result, image_path)
+                result['preview_path'] = self._save_preview(load_full(), result, image_path)
                 return result
             
             # Strategy 2: Contour Detection (Fallback for noisy backgrounds)
-            result = self._contour_method(image)
+            result = self._contour_method(image, load_full)
             if result['confidence'] >= self.MEDIUM_CONFIDENCE:
                 # CRITICAL: Apply learned corrections before returning!
                 result = self._apply_learned_corrections(result)
-                result['preview_path'] = self._save_preview(image, result, image_path)
+                result['preview_path'] = self._save_preview(load_full(), result, image_path)
                 return result
             
             # Both failed - force manual
@@ -79,10 +98,115 @@ class SmartReceiptDetector:
         except Exception as e:
             return self._failed_result(f"Detection error: {e}")
     
-    def _edge_detection_method(self, image: np.ndarray) -> Dict:
+    @staticmethod
+    def _reduction_factor(data: np.ndarray) -> int:
+        """Largest of 1/2/4/8 that keeps the long side >= DETECTION_MAX_SIDE"""
+        try:
+            # Header only - PIL does not decode pixels for .size
+            width, height = Image.open(io.BytesIO(data.tobytes())).size
+        except Exception:
+            return 1
+        factor = 1
+        while factor < 8 and max(width, height) / (factor * 2) >= DETECTION_MAX_SIDE:
+            factor *= 2
+        return factor
+    
+    def _load_for_detection(self, image_path: str) -> Tuple[Optional[np.ndarray], Callable[[], np.ndarray]]:
+        """
+        Read the file once and return (detection image, full-resolution loader)
+        
+        The loader decodes the full-resolution BGR image on first call only.
+        """
+        with open(image_path, 'rb') as f:
+            data = np.frombuffer(f.read(), np.uint8)
+        
+        full = []
+        
+        def load_full() -> np.ndarray:
+            if not full:
+                full.append(cv2.imdecode(data, cv2.IMREAD_COLOR))
+            return full[0]
+        
+        factor = self._reduction_factor(data)
+        if factor == 1:
+            return load_full(), load_full
+        return cv2.imdecode(data, REDUCED_COLOR_FLAGS[factor]), load_full
+    
+    @staticmethod
+    def _scale_to(image: np.ndarray, full: np.ndarray) -> Tuple[float, float]:
+        """(x, y) factors mapping detection-image coordinates to full resolution"""
+        return full.shape[1] / image.shape[1], full.shape[0] / image.shape[0]
+    
+    def _refine_bbox(self, full: np.ndarray, bbox, scale: Tuple[float, float], grown_by: int):
+        """
+        Re-locate each side of a bbox mapped up from the reduced image
+        
+        Each side is searched in a thin full-resolution strip around its
+        estimated position; the outermost row/column carrying a strong
+        share of Canny edge pixels becomes the new side. grown_by is the
+        outward growth (in detection pixels) of the edge map the bbox came
+        from, re-applied at full resolution so results match a full-size run.
+        """
+        x, y, w, h = bbox
+        sx, sy = scale
+        img_h, img_w = full.shape[:2]
+        sides = {'left': x, 'top': y, 'right': x + w, 'bottom': y + h}
+        
+        for side in sides:
+            horizontal = side in ('left', 'right')
+            step = sx if horizontal else sy
+            outward = -1 if side in ('left', 'top') else 1
+            # Undo the reduced-scale growth; the true edge lies within one reduced pixel
+            estimate = sides[side] - outward * grown_by * step
+            radius = int(np.ceil(step)) + 2
+            lo = int(max(0, estimate - radius))
+            hi = int(min(img_w if horizontal else img_h, estimate + radius + 1))
+            if hi - lo < 3:
+                continue
+            
+            if horizontal:
+                strip = full[int(sides['top']):int(sides['bottom']), lo:hi]
+            else:
+                strip = full[lo:hi, int(sides['left']):int(sides['right'])]
+            if strip.size == 0:
+                continue
+            
+            gray = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY)
+            edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150, apertureSize=3)
+            counts = np.count_nonzero(edges, axis=0 if horizontal else 1)
+            if counts.max() == 0:
+                continue
+            strong = np.flatnonzero(counts >= 0.25 * counts.max())
+            position = lo + (strong[0] if outward < 0 else strong[-1])
+            sides[side] = position + outward * grown_by
+        
+        left = int(max(0, min(sides['left'], img_w - 1)))
+        top = int(max(0, min(sides['top'], img_h - 1)))
+        right = int(min(img_w, max(sides['right'], left + 1)))
+        bottom = int(min(img_h, max(sides['bottom'], top + 1)))
+        return left, top, right - left, bottom - top
+    
+    def _full_resolution_bbox(self, image: np.ndarray, full: np.ndarray, rect, grown_by: int):
+        """Map a detection-image bbox to full resolution (refining it when enabled)"""
+        if full is image:
+            return rect
+        sx, sy = self._scale_to(image, full)
+        x, y, w, h = rect
+        left, top = int(round(x * sx)), int(round(y * sy))
+        bbox = (left, top,
+                min(full.shape[1], int(round((x + w) * sx))) - left,
+                min(full.shape[0], int(round((y + h) * sy))) - top)
+        if DETECTION_REFINE:
+            bbox = self._refine_bbox(full, bbox, (sx, sy), grown_by)
+        return bbox
+    
+    def _edge_detection_method(self, image: np.ndarray, load_full: Callable[[], np.ndarray] = None) -> Dict:
         """
         Strategy 1: Use Canny edge detection + contour approximation
         Works best for receipts with clear edges
+        
+        image may be a reduced copy; load_full() then returns the
+        full-resolution image that bbox, corners and crop refer to.
         """
         try:
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -117,10 +241,19 @@ class SmartReceiptDetector:
                 epsilon = 0.02 * cv2.arcLength(contour, True)
                 approx = cv2.approxPolyDP(contour, epsilon, True)
                 
+                full = load_full() if load_full else image
+                
                 # If 4 corners (rectangle), apply perspective transform
                 if len(approx) == 4:
-                    rect = self._order_points(approx.reshape(4, 2))
-                    warped = self._four_point_transform(image, rect)
+                    corners = approx.reshape(4, 2).astype(np.float32)
+                    if full is not image:
+                        scale = np.float32(self._scale_to(image, full))
+                        # The dilation pushed each corner out by EDGE_DILATION_PX detection
+                        # pixels; keep that growth at full-resolution size instead
+                        outward = np.sign(corners - corners.mean(axis=0))
+                        corners = corners * scale - outward * EDGE_DILATION_PX * (scale - 1)
+                    rect = self._order_points(corners)
+                    warped = self._four_point_transform(full, rect)
                     
                     # Calculate confidence based on shape quality
                     confidence = self._calculate_confidence(warped, area_ratio, 'rectangle')
@@ -133,21 +266,22 @@ class SmartReceiptDetector:
                         'confidence': confidence,
                         'method': 'edge_detection_perspective',
                         'needs_manual_review': confidence < self.HIGH_CONFIDENCE,
-                        'corners': approx.reshape(4, 2).tolist()
+                        'corners': np.round(corners).astype(int).tolist()
                     }
                 
                 # Otherwise use bounding box
                 else:
-                    x, y, w, h = cv2.boundingRect(contour)
+                    x, y, w, h = self._full_resolution_bbox(
+                        image, full, cv2.boundingRect(contour), EDGE_DILATION_PX)
                     
                     # Add small padding
                     padding = int(min(w, h) * 0.02)
                     x = max(0, x - padding)
                     y = max(0, y - padding)
-                    w = min(image.shape[1] - x, w + 2 * padding)
-                    h = min(image.shape[0] - y, h + 2 * padding)
+                    w = min(full.shape[1] - x, w + 2 * padding)
+                    h = min(full.shape[0] - y, h + 2 * padding)
                     
-                    cropped = image[y:y+h, x:x+w]
+                    cropped = full[y:y+h, x:x+w]
                     confidence = self._calculate_confidence(cropped, area_ratio, 'bounding_box')
                     
                     return {
@@ -164,10 +298,12 @@ class SmartReceiptDetector:
         except Exception as e:
             return self._failed_result(f"Edge detection failed: {e}")
     
-    def _contour_method(self, image: np.ndarray) -> Dict:
+    def _contour_method(self, image: np.ndarray, load_full: Callable[[], np.ndarray] = None) -> Dict:
         """
         Strategy 2: Simple contour detection (fallback)
         More robust for noisy backgrounds
+        
+        image may be a reduced copy (see _edge_detection_method).
         """
         try:
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -190,16 +326,17 @@ class SmartReceiptDetector:
             if area_ratio < self.MIN_AREA_RATIO:
                 return self._failed_result("Receipt area too small")
             
-            x, y, w, h = cv2.boundingRect(largest)
+            full = load_full() if load_full else image
+            x, y, w, h = self._full_resolution_bbox(image, full, cv2.boundingRect(largest), 0)
             
             # Add padding
             padding = int(min(w, h) * 0.03)
             x = max(0, x - padding)
             y = max(0, y - padding)
-            w = min(image.shape[1] - x, w + 2 * padding)
-            h = min(image.shape[0] - y, h + 2 * padding)
+            w = min(full.shape[1] - x, w + 2 * padding)
+            h = min(full.shape[0] - y, h + 2 * padding)
             
-            cropped = image[y:y+h, x:x+w]
+            cropped = full[y:y+h, x:x+w]
             confidence = self._calculate_confidence(cropped, area_ratio, 'contour')
             
             return {
@@ -293,8 +430,10 @@ class SmartReceiptDetector:
             confidence += 0.05
         
         # Factor 4: Image clarity (check if not too blurry)
+        # Measured at full resolution - downscaling makes blurry crops look sharp.
+        # The 3x3 Laplacian of uint8 is integer-valued, so float32 is exact.
         gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+        laplacian_var = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_32F))[1][0, 0] ** 2
         
         if laplacian_var > 100:  # Sharp image
             confidence += 0.1
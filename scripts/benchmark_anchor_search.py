@@ -0,0 +1,159 @@
+"""
+Learned-anchor search benchmark: per-call window scan vs shared index
+
+For a supplier with N learned anchors spread over the fields that
+apply_learned_corrections looks up (date, voucher number, totals,
+deductions), times one voucher's worth of find_value_by_anchor calls:
+
+    legacy   re-split the text and run SequenceMatcher.ratio() on every
+             window for every anchor and field (previous implementation)
+    indexed  one AnchorSearchIndex per voucher, ratio() only for windows
+             that pass the length / shared-character bounds
+
+and checks that both return the same values.
+
+Usage:
+    python -m scripts.benchmark_anchor_search
+    python -m scripts.benchmark_anchor_search --anchors 10,100,500,1000 --text sample_ocr.txt --json reports/anchor_search.json
+"""
+import argparse
+import difflib
+import random
+import re
+import string
+
+from backend.ml_models.ml_correction_model import AnchorSearchIndex, ParsingCorrectionModel
+from scripts.benchmark_utils import summarize_latencies, time_call, write_report
+
+SUPPLIER = 'SRI LAKSHMI TRADERS'
+
+FIELDS = ['voucher_date', 'voucher_number', 'net_total', 'gross_total',
+          'deduction_commission', 'deduction_coolie', 'deduction_transport']
+
+# The labels really present in SAMPLE_TEXT, one per field
+TRUE_ANCHORS = {
+    'voucher_date': 'Date',
+    'voucher_number': 'Voucher No',
+    'net_total': 'Net Total',
+    'gross_total': 'Gross Total',
+    'deduction_commission': 'Commission @4%',
+    'deduction_coolie': 'Coolie Charges',
+    'deduction_transport': 'Transport',
+}
+
+SAMPLE_TEXT = """TK FRUITS & VEGETABLES COMMISSION AGENTS
+Shop No 12 Market Yard Kurnool
+Supplier Name: SRI LAKSHMI TRADERS
+Voucher No: 1234 Date: 04/01/2026
+Item Qty Rate Amount
+""" + "\n".join(f"{name} {qty} {rate:.2f} {qty * rate:.2f}" for name, qty, rate in [
+    ('Mango Banganapalli', 12, 45.5), ('Tomato Local', 8, 22.0), ('Onion Big', 30, 18.25),
+    ('Potato Agra', 25, 21.0), ('Banana Robusta', 40, 6.5), ('Carrot Ooty', 10, 38.0),
+    ('Beans French', 6, 52.0), ('Cabbage', 14, 12.0), ('Brinjal Long', 9, 28.0),
+    ('Capsicum Green', 7, 44.0), ('Lemon', 50, 3.0), ('Ginger', 5, 95.0),
+] * 3) + """
+Gross Total 1602.50
+Commission @4% 64.10
+Coolie Charges 35.00
+Transport 120.00
+Net Total 1383.40
+Thank you visit again"""
+
+
+def legacy_find(model, field_name, raw_ocr, supplier_name):
+    """find_value_by_anchor as it was before AnchorSearchIndex"""
+    supplier_key = supplier_name.strip().upper()
+    anchors = model.learned_anchors[supplier_key].get(field_name, {})
+    if not anchors:
+        return None
+    lines = [line.strip() for line in raw_ocr.split('\n') if line.strip()]
+    for anchor_text, count in sorted(anchors.items(), key=lambda x: x[1], reverse=True):
+        if count < 1:
+            continue
+        anchor_len = len(anchor_text.split())
+        for line_idx, line in enumerate(lines):
+            words = line.split()
+            if len(words) < anchor_len:
+                continue
+            for window_idx in range(len(words) - anchor_len + 1):
+                window = " ".join(words[window_idx:window_idx + anchor_len])
+                if difflib.SequenceMatcher(None, anchor_text.lower(), window.lower()).ratio() > 0.82:
+                    value = re.sub(r"^[\s:=-]+", "", " ".join(words[window_idx + anchor_len:])).strip()
+                    if not value and line_idx + 1 < len(lines):
+                        value = lines[line_idx + 1].strip()
+                    if value:
+                        return {'value': re.sub(r"\s{2,}.*", "", value),
+                                'confidence': 0.85 + (min(count, 10) / 100.0), 'anchor': anchor_text}
+    return None
+
+
+def random_anchor(rng):
+    words = [''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(3, 9)))
+             for _ in range(rng.randint(1, 4))]
+    return ' '.join(words)
+
+
+def build_model(anchor_count, rng):
+    model = ParsingCorrectionModel()
+    per_field = model.learned_anchors[SUPPLIER]
+    for field, label in TRUE_ANCHORS.items():
+        per_field[field][label] = 1  # lowest count: searched after the noise
+    while sum(len(a) for a in per_field.values()) < anchor_count:
+        per_field[rng.choice(FIELDS)][random_anchor(rng)] = rng.randint(2, 20)
+    return model
+
+
+def voucher_legacy(model, text):
+    return [legacy_find(model, field, text, SUPPLIER) for field in FIELDS]
+
+
+def voucher_indexed(model, text):
+    index = AnchorSearchIndex(text)
+    return [model.find_value_by_anchor(field, index, SUPPLIER) for field in FIELDS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--anchors', default='10,100,500,1000', help='Comma-separated learned anchor counts')
+    parser.add_argument('--text', help='OCR text to search (default: synthetic voucher)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per size and implementation')
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    if args.text:
+        with open(args.text, encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = SAMPLE_TEXT
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.anchors.split(',') if s.strip()]
+    lines = len([l for l in text.split('\n') if l.strip()])
+    print(f"{len(FIELDS)} field lookups per voucher over {lines} lines, {args.repeat} runs per size")
+    print(f"\n{'anchors':>8} {'legacy ms':>10} {'indexed ms':>11} {'speed-up':>9} {'same':>5}")
+
+    results = []
+    for size in sizes:
+        model = build_model(size, rng)
+        legacy_ms, indexed_ms = [], []
+        same = True
+        for _ in range(args.repeat):
+            expected, elapsed = time_call(voucher_legacy, model, text)
+            legacy_ms.append(elapsed)
+            found, elapsed = time_call(voucher_indexed, model, text)
+            indexed_ms.append(elapsed)
+            same = same and found == expected
+
+        legacy, indexed = summarize_latencies(legacy_ms), summarize_latencies(indexed_ms)
+        speedup = round(legacy['p50_ms'] / indexed['p50_ms'], 2) if indexed['p50_ms'] else 0
+        results.append({'anchors': size, 'legacy': legacy, 'indexed': indexed,
+                        'speedup_p50': speedup, 'identical_results': same})
+        print(f"{size:>8} {legacy['p50_ms']:>10.2f} {indexed['p50_ms']:>11.2f} {speedup:>8}x {str(same):>5}")
+
+    if args.json:
+        write_report(args.json, 'anchor_search', {'lines': lines, 'fields': FIELDS, 'sizes': results})
+
+
+if __name__ == "__main__":
+    main()
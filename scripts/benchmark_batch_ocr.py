@@ -0,0 +1,98 @@
+"""
+Batch OCR throughput benchmark
+
+Runs the queue processor's per-file pipeline (OCR -> extract_with_quality ->
+ML corrections) over a folder of receipt images at increasing worker counts
+and reports throughput and speed-up relative to the serial run (workers=1
+is always measured, first).  Each count gets a warm-up pass on its own pool
+right before it is measured, so worker start-up and model load are not
+billed to the timed run.  The OCR cache is off unless --ocr-cache is given -
+otherwise every run after the first would be served from the cache.
+
+Usage:
+    python -m scripts.benchmark_batch_ocr --images uploads --workers 1 2 4 8
+    python -m scripts.benchmark_batch_ocr --images uploads --mode thread --json reports/batch_ocr.json
+"""
+import argparse
+import os
+import time
+
+from backend.services.batch_ocr_service import BatchOCRService
+from scripts.benchmark_utils import find_images, summarize_latencies, write_report
+
+
+def run_once(images, workers, mode):
+    completed = []
+    errors = []
+    start = time.perf_counter()
+
+    def on_result(key, result, error):
+        elapsed = (time.perf_counter() - start) * 1000
+        if error is not None:
+            errors.append((key, str(error)))
+        else:
+            completed.append(elapsed)
+
+    BatchOCRService.run(list(enumerate(images)), on_result, workers=workers, mode=mode)
+    wall = time.perf_counter() - start
+
+    return {
+        'workers': workers,
+        'mode': mode if workers > 1 else 'serial',
+        'files': len(images),
+        'errors': len(errors),
+        'wall_seconds': round(wall, 3),
+        'files_per_second': round(len(images) / wall, 3) if wall else 0,
+        # Time until each file was written back (what the UI progress sees)
+        'completion_ms': summarize_latencies(completed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', default='uploads', help='Folder with receipt images')
+    parser.add_argument('--limit', type=int, default=None, help='Use at most N images')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='Worker counts to compare (1 is always included)')
+    parser.add_argument('--mode', choices=['process', 'thread'], default='process')
+    parser.add_argument('--ocr-cache', action='store_true', help='Keep the OCR cache enabled')
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    if not args.ocr_cache:
+        # Before the first OCR call creates the cache (process workers inherit it)
+        os.environ['OCR_CACHE_ENABLED'] = '0'
+
+    images = find_images(args.images, args.limit)
+    if not images:
+        print(f"No images found in {args.images}")
+        return
+
+    print(f"Benchmarking batch OCR on {len(images)} images ({args.mode} mode)")
+
+    # Serial first - it is the speed-up baseline
+    worker_counts = [1] + sorted(set(w for w in args.workers if w > 1))
+
+    results = []
+    for workers in worker_counts:
+        # The pool is rebuilt when the worker count changes, so warm up this
+        # count's pool (or the serial process) immediately before measuring it
+        run_once(images[:workers], workers, args.mode)
+        results.append(run_once(images, workers, args.mode))
+
+    baseline = results[0]['files_per_second']
+    for result in results:
+        result['speedup'] = round(result['files_per_second'] / baseline, 2) if baseline else 0
+
+    print(f"\n{'workers':>8} {'mode':>8} {'files/s':>9} {'speedup':>8} {'p50 ms':>10} {'p95 ms':>10} {'errors':>7}")
+    for r in results:
+        print(f"{r['workers']:>8} {r['mode']:>8} {r['files_per_second']:>9.2f} {r['speedup']:>7.2f}x "
+              f"{r['completion_ms'].get('p50_ms', 0):>10.0f} {r['completion_ms'].get('p95_ms', 0):>10.0f} "
+              f"{r['errors']:>7}")
+
+    if args.json:
+        write_report(args.json, 'batch_ocr', results)
+
+
+if __name__ == "__main__":
+    main()
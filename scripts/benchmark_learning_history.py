@@ -0,0 +1,125 @@
+"""
+Learning history benchmark: one JSON file vs append-only log + summary
+
+For a growing number of recorded training sessions, times:
+    record    record_training_session - legacy loads, appends and rewrites
+              learning_history.json; the tracker appends one line and
+              rewrites summary.json
+    summary   get_summary (what /api/learning/summary and the training page
+              call) - legacy parses the whole file
+    trained   get_already_trained_corrections
+
+Sessions are shaped like the real ones (corrections_used + full results).
+
+Usage:
+    python -m scripts.benchmark_learning_history
+    python -m scripts.benchmark_learning_history --sessions 10,100,400 --json reports/learning_history.json
+"""
+import argparse
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from backend.services.learning_history_tracker import LearningHistoryTracker
+from scripts.benchmark_utils import summarize_latencies, time_call, write_report
+
+FIELDS = ['supplier_name', 'voucher_number', 'voucher_date', 'deduction_Commission', 'deduction_UnLoading']
+
+
+def make_session_args(n, corrections):
+    used = [{'id': f'{FIELDS[i % 5]}_{n}_{i}', 'field': FIELDS[i % 5], 'auto': f'{i}O',
+             'corrected': f'{i}0', 'source': 'database'} for i in range(corrections)]
+    results = {'status': 'success', 'total_samples': corrections, 'source_breakdown': {'database': corrections},
+               'new_patterns': [{k: c[k] for k in ('field', 'auto', 'corrected', 'source')} for c in used],
+               'corrections_used_count': corrections}
+    return used, results
+
+
+class LegacyTracker:
+    """The single-file tracker, as it was"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'w') as f:
+            json.dump({'version': '1.0', 'created_at': datetime.now().isoformat(), 'training_sessions': [],
+                       'total_corrections_learned': 0, 'patterns_learned': {}}, f, indent=2)
+
+    def load(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def record(self, corrections_used, training_results):
+        history = self.load()
+        history['training_sessions'].append({
+            'timestamp': datetime.now().isoformat(), 'corrections_count': len(corrections_used),
+            'corrections_used': corrections_used, 'results': training_results,
+            'new_patterns': training_results['new_patterns'],
+            'patterns_count': len(training_results['new_patterns'])})
+        history['total_corrections_learned'] += len(corrections_used)
+        for pattern in training_results['new_patterns']:
+            history['patterns_learned'].setdefault(pattern['field'], []).append(pattern)
+        with open(self.path, 'w') as f:
+            json.dump(history, f, indent=2)
+
+    def summary(self):
+        history = self.load()
+        return {'total_sessions': len(history['training_sessions']),
+                'fields_trained': {k: len(v) for k, v in history['patterns_learned'].items()}}
+
+    def trained(self):
+        return {c['id'] for s in self.load()['training_sessions'] for c in s['corrections_used']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', default='10,50,200', help='Comma-separated history sizes (sessions)')
+    parser.add_argument('--corrections', type=int, default=370, help='Corrections per session')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed calls per size and operation')
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sessions.split(',') if s.strip()]
+    print(f"{args.corrections} corrections per session, {args.repeat} calls per operation")
+    print(f"\n{'sessions':>8} {'op':>8} {'legacy ms':>10} {'log ms':>8} {'speed-up':>9}")
+
+    results = []
+    for size in sizes:
+        tmp = Path(tempfile.mkdtemp(prefix='learning_history_bench_'))
+        try:
+            legacy = LegacyTracker(tmp / 'learning_history.json')
+            with mock.patch.object(LearningHistoryTracker, 'HISTORY_DIR', tmp / 'history'), \
+                    mock.patch.object(LearningHistoryTracker, 'HISTORY_FILE', tmp / 'missing.json'):
+                for n in range(size):
+                    session_args = make_session_args(n, args.corrections)
+                    legacy.record(*session_args)
+                    LearningHistoryTracker.record_training_session(*session_args)
+
+                ops = {
+                    'record': (legacy.record, LearningHistoryTracker.record_training_session),
+                    'summary': (legacy.summary, LearningHistoryTracker.get_summary),
+                    'trained': (legacy.trained, LearningHistoryTracker.get_already_trained_corrections),
+                }
+                row = {'sessions': size, 'legacy_bytes': (tmp / 'learning_history.json').stat().st_size}
+                for op, (old, new) in ops.items():
+                    old_ms, new_ms = [], []
+                    for i in range(args.repeat):
+                        call_args = make_session_args(size + i, args.corrections) if op == 'record' else ()
+                        old_ms.append(time_call(old, *call_args)[1])
+                        new_ms.append(time_call(new, *call_args)[1])
+                    old_s, new_s = summarize_latencies(old_ms), summarize_latencies(new_ms)
+                    speedup = round(old_s['p50_ms'] / new_s['p50_ms'], 1) if new_s['p50_ms'] else 0
+                    row[op] = {'legacy': old_s, 'log': new_s, 'speedup_p50': speedup}
+                    print(f"{size:>8} {op:>8} {old_s['p50_ms']:>10.2f} {new_s['p50_ms']:>8.2f} {speedup:>8}x")
+            results.append(row)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        write_report(args.json, 'learning_history', {'sizes': results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Model load benchmark: indent=2 JSON vs the binary model store
+
+Builds synthetic parsing-correction models with growing anchor and
+field_stats tables (plus an OCR model with the same number of patterns),
+saves each once as JSON and once as binary, and times load_model for both
+files. Reports file sizes, raw read/decode time and full load_model time.
+
+Usage:
+    python -m scripts.benchmark_model_store
+    python -m scripts.benchmark_model_store --sizes 1000,10000,100000 --json reports/model_store.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import string
+import tempfile
+
+from backend.ml_models import model_store
+from backend.ml_models.ml_correction_model import OCRCorrectionModel, ParsingCorrectionModel
+from scripts.benchmark_utils import summarize_latencies, time_call, write_report
+
+FIELDS = ['supplier_name', 'voucher_number', 'voucher_date', 'gross_total', 'net_total',
+          'deduction_commission', 'deduction_coolie', 'deduction_transport', 'item_quantity']
+
+
+def _word(rng, low=3, high=10):
+    return ''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(low, high)))
+
+
+def build_models(size, rng):
+    """Parsing model with ~size anchors and ~size field_stats entries, OCR model with size patterns"""
+    parsing = ParsingCorrectionModel()
+    for _ in range(size):
+        supplier = f"SUPPLIER {rng.randint(0, max(1, size // 20))}"
+        parsing.learned_anchors[supplier][rng.choice(FIELDS)][f"{_word(rng)} {_word(rng)}"] += rng.randint(1, 9)
+    for _ in range(size):
+        field = rng.choice(FIELDS)
+        stats = parsing.field_stats.setdefault(field, {})
+        stats.setdefault(_word(rng, 2, 8), {})[_word(rng, 2, 8)] = rng.randint(1, 9)
+    parsing.total_samples = size
+
+    ocr = OCRCorrectionModel()
+    for _ in range(size):
+        bad = _word(rng, 1, 4)
+        ocr.pattern_stats.setdefault(bad, {})[_word(rng, len(bad), len(bad))] = rng.randint(2, 9)
+    return parsing, ocr
+
+
+def time_load(model_cls, directory, filename, repeat):
+    def load():
+        model = model_cls()
+        model._model_dir = directory
+        return model.load_model(filename)
+    return summarize_latencies([time_call(load)[1] for _ in range(repeat)])
+
+
+def time_decode(path, repeat):
+    if path.endswith(model_store.BINARY_EXT):
+        def read():
+            with open(path, 'rb') as f:
+                return model_store.decode(f.read())
+    else:
+        def read():
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return summarize_latencies([time_call(read)[1] for _ in range(repeat)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,50000', help='Comma-separated table sizes')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed loads per size and format')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    print(f"{args.repeat} loads per size and format")
+    print(f"\n{'model':>8} {'size':>7} {'json KB':>9} {'bin KB':>8} {'json.load ms':>13} {'decode ms':>10} "
+          f"{'load json ms':>13} {'load bin ms':>12} {'speed-up':>9}")
+
+    results = []
+    for size in sizes:
+        parsing, ocr = build_models(size, rng)
+        for name, model in (('parsing', parsing), ('ocr', ocr)):
+            dirs = {fmt: tempfile.mkdtemp(prefix=f'model_store_{fmt}_') for fmt in ('json', 'binary')}
+            try:
+                filename = f'{name}_model.json'
+                for fmt, directory in dirs.items():
+                    model._model_dir = directory
+                    os.environ['MODEL_STORE_FORMAT'] = fmt
+                    model.save_model(filename)
+                os.environ.pop('MODEL_STORE_FORMAT', None)
+
+                json_file = os.path.join(dirs['json'], filename)
+                bin_file = model_store.binary_path(os.path.join(dirs['binary'], filename))
+                row = {
+                    'model': name,
+                    'size': size,
+                    'json_bytes': os.path.getsize(json_file),
+                    'binary_bytes': os.path.getsize(bin_file),
+                    'json_decode': time_decode(json_file, args.repeat),
+                    'binary_decode': time_decode(bin_file, args.repeat),
+                    'json_load': time_load(type(model), dirs['json'], filename, args.repeat),
+                    'binary_load': time_load(type(model), dirs['binary'], filename, args.repeat),
+                }
+            finally:
+                for directory in dirs.values():
+                    shutil.rmtree(directory, ignore_errors=True)
+
+            json_p50, bin_p50 = row['json_load']['p50_ms'], row['binary_load']['p50_ms']
+            row['speedup_p50'] = round(json_p50 / bin_p50, 2) if bin_p50 else 0
+            results.append(row)
+            print(f"{name:>8} {size:>7} {row['json_bytes'] / 1024:>9.1f} {row['binary_bytes'] / 1024:>8.1f} "
+                  f"{row['json_decode']['p50_ms']:>13.2f} {row['binary_decode']['p50_ms']:>10.2f} "
+                  f"{json_p50:>13.2f} {bin_p50:>12.2f} {row['speedup_p50']:>8}x")
+
+    if args.json:
+        write_report(args.json, 'model_store', {'sizes': results})
+
+
+if __name__ == "__main__":
+    main()
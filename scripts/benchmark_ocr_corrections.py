@@ -0,0 +1,109 @@
+"""
+OCR correction benchmark: per-pattern str.replace vs compiled single pass
+
+Fills an OCRCorrectionModel with N synthetic high-confidence swaps for each
+table size and times apply_ocr_corrections against the previous
+implementation (sum/max per pattern on every call, then one str.replace
+per pattern). Also reports the one-off compile cost.
+
+Usage:
+    python -m scripts.benchmark_ocr_corrections
+    python -m scripts.benchmark_ocr_corrections --sizes 10,100,1000,5000 --text sample_ocr.txt --json reports/ocr_corrections.json
+"""
+import argparse
+import random
+import string
+from collections import defaultdict
+
+from backend.ml_models.ml_correction_model import OCRCorrectionModel
+from scripts.benchmark_utils import summarize_latencies, time_call, write_report
+
+ALPHABET = string.ascii_letters + string.digits + '.,:/-@'
+
+SAMPLE_LINES = [
+    'TK FRUITS & VEGETABLES  Voucher No: 1234  Date: 04/01/2026',
+    'Supplier Name: SRI LAKSHMI TRADERS',
+    'Mango Banganapalli   12   45.50   546.00',
+    'Tomato Local          8   22.00   176.00',
+    'Commission @4% 64.10   Coolie 35.00   Transport 120.00',
+    'Gross Total 1602.50   Net Total 1383.40',
+]
+
+
+def legacy_apply(model, text):
+    """apply_ocr_corrections as it was before compiled rules"""
+    corrected_text = text
+    for bad_char, corrections in model.pattern_stats.items():
+        total = sum(corrections.values())
+        if total == 0:
+            continue
+        best_correction = max(corrections.items(), key=lambda x: x[1])
+        if best_correction[1] / total >= 0.8 and total >= 2:
+            corrected_text = corrected_text.replace(bad_char, best_correction[0])
+    return corrected_text
+
+
+def build_model(size, rng):
+    model = OCRCorrectionModel()
+    while len(model.pattern_stats) < size:
+        bad = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4)))
+        good = ''.join(rng.choice(ALPHABET) for _ in range(len(bad)))
+        if bad == good or bad in model.pattern_stats:
+            continue
+        stats = defaultdict(int)
+        stats[good] = rng.randint(2, 20)
+        if rng.random() < 0.3:
+            stats[rng.choice(ALPHABET)] = rng.randint(1, 10)  # some fall below 80%
+        model.pattern_stats[bad] = stats
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,100,1000,5000', help='Comma-separated pattern table sizes')
+    parser.add_argument('--text', help='OCR text file to correct (default: synthetic receipt text)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per size and implementation')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    if args.text:
+        with open(args.text, encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = '\n'.join(SAMPLE_LINES * 8)
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    print(f"Correcting {len(text)} chars of text, {args.repeat} runs per size")
+    print(f"\n{'patterns':>9} {'rules':>6} {'compile ms':>11} {'legacy ms':>10} {'compiled ms':>12} {'speed-up':>9}")
+
+    results = []
+    for size in sizes:
+        model = build_model(size, rng)
+        _, compile_ms = time_call(model.compile_rules)
+        model.apply_ocr_corrections(text)  # warm the compiled replacer
+
+        legacy_ms = [time_call(legacy_apply, model, text)[1] for _ in range(args.repeat)]
+        compiled_ms = [time_call(model.apply_ocr_corrections, text)[1] for _ in range(args.repeat)]
+        legacy, compiled = summarize_latencies(legacy_ms), summarize_latencies(compiled_ms)
+        speedup = round(legacy['p50_ms'] / compiled['p50_ms'], 2) if compiled['p50_ms'] else 0
+
+        rules = len(model.correction_rules())
+        results.append({
+            'patterns': size,
+            'rules': rules,
+            'compile_ms': round(compile_ms, 3),
+            'legacy': legacy,
+            'compiled': compiled,
+            'speedup_p50': speedup,
+        })
+        print(f"{size:>9} {rules:>6} {compile_ms:>11.2f} {legacy['p50_ms']:>10.3f} "
+              f"{compiled['p50_ms']:>12.3f} {speedup:>8}x")
+
+    if args.json:
+        write_report(args.json, 'ocr_corrections', {'text_chars': len(text), 'sizes': results})
+
+
+if __name__ == "__main__":
+    main()
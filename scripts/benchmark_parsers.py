@@ -0,0 +1,193 @@
+"""
+Parser benchmark: every receipt parser over the same raw OCR corpus
+
+Runs each parser entry point (PARSERS) on every text in the corpus
+(scripts.benchmark_utils.load_ocr_corpus: exported vouchers_master rows,
+wizard queue OCR results, correction feedback, or --corpus files) and
+reports per parser:
+    latency      p50/p95/p99 per voucher over --repeat passes
+    throughput   vouchers and OCR characters per second
+    allocations  peak and retained Python memory per voucher (tracemalloc,
+                 in a separate untimed pass so tracing does not skew latency)
+    errors       vouchers on which the parser raised
+
+--export-db writes vouchers_master.raw_ocr_text to a JSONL file (needs
+DATABASE_URL) and adds it to the corpus; later runs can pass it back with
+--corpus so reports from different versions use the same texts.
+--baseline compares p50 latency and peak memory with an earlier --json report.
+
+Parsers print their own debug output; stdout is sent to /dev/null while
+measuring.  The quality-focused extractor's trace follows LOG_PROFILE - run
+with LOG_PROFILE=production to time it as deployed.
+
+Usage:
+    python -m scripts.benchmark_parsers
+    python -m scripts.benchmark_parsers --export-db reports/raw_ocr.jsonl --limit 500
+    python -m scripts.benchmark_parsers --corpus reports/raw_ocr.jsonl --repeat 50 --json reports/parsers.json
+    python -m scripts.benchmark_parsers --parsers tkfl_v2,quality_focused --baseline reports/parsers_before.json
+"""
+import argparse
+import contextlib
+import gc
+import importlib
+import json
+import os
+import tracemalloc
+
+from scripts.benchmark_utils import load_ocr_corpus, summarize_latencies, time_call, write_report
+
+# Benchmark name -> (module, entry point taking the raw OCR text)
+PARSERS = {
+    'parser': ('backend.parser', 'parse_receipt_text'),
+    'tkfl': ('backend.tkfl_parser', 'parse_receipt_text_tkfl'),
+    'tkfl_v2': ('backend.tkfl_parser_v2', 'parse_receipt_text_tkfl_v2'),
+    'adaptive_robust': ('backend.adaptive_robust_parser', 'parse_receipt_text_adaptive'),
+    'enhanced': ('backend.enhanced_parser', 'parse_receipt_text_enhanced'),
+    'robust': ('backend.robust_parser', 'parse_receipt_text_robust'),
+    'quality_focused': ('backend.quality_focused_extractor', 'extract_with_quality'),
+}
+
+
+def export_db_corpus(path, limit):
+    """Write vouchers_master.raw_ocr_text (newest first) to a JSONL file"""
+    from backend import create_app
+    from backend.db import get_connection
+
+    app = create_app()
+    with app.app_context():
+        cur = get_connection().cursor()
+        cur.execute("""
+            SELECT id, raw_ocr_text FROM vouchers_master
+            WHERE raw_ocr_text IS NOT NULL AND raw_ocr_text <> ''
+            ORDER BY id DESC LIMIT %s
+        """, (limit,))
+        rows = cur.fetchall()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:  # RealDictCursor rows
+            f.write(json.dumps({'id': row['id'], 'raw_ocr_text': row['raw_ocr_text']}) + '\n')
+    print(f"Exported {len(rows)} vouchers to {path}")
+
+
+def load_parsers(names):
+    """Entry points by name; parsers that fail to import are reported and skipped"""
+    parsers = {}
+    for name in names:
+        module_name, func_name = PARSERS[name]
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                parsers[name] = getattr(importlib.import_module(module_name), func_name)
+        except Exception as e:
+            print(f"[SKIP] {name}: {e}")
+    return parsers
+
+
+def call(func, text):
+    """Run one parser on one text; returns (elapsed_ms, raised)"""
+    try:
+        return time_call(func, text)[1], False
+    except Exception:
+        return 0.0, True
+
+
+def measure_allocations(func, corpus):
+    """Peak and retained traced memory (KB) per voucher"""
+    peaks, retained = [], []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for text in corpus:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call(func, text)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+            retained.append((current - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    return {
+        'peak_kb_p50': round(peaks[len(peaks) // 2], 1),
+        'peak_kb_max': round(peaks[-1], 1),
+        'retained_kb_total': round(sum(retained), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', action='append', help='JSON/JSONL/.txt path or glob (repeatable)')
+    parser.add_argument('--export-db', help='Export vouchers_master.raw_ocr_text to this JSONL file and use it')
+    parser.add_argument('--limit', type=int, default=1000, help='Vouchers to export with --export-db')
+    parser.add_argument('--parsers', help=f"Comma-separated subset of: {', '.join(PARSERS)}")
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the corpus')
+    parser.add_argument('--baseline', help='Earlier --json report to compare against')
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    sources = list(args.corpus or [])
+    if args.export_db:
+        export_db_corpus(args.export_db, args.limit)
+        sources.append(args.export_db)
+    corpus = load_ocr_corpus(sources or None)
+    if not corpus:
+        raise SystemExit("No OCR texts found - pass --corpus or --export-db")
+
+    names = [n.strip() for n in args.parsers.split(',')] if args.parsers else list(PARSERS)
+    unknown = [n for n in names if n not in PARSERS]
+    if unknown:
+        raise SystemExit(f"Unknown parser(s): {', '.join(unknown)}")
+    parsers = load_parsers(names)
+
+    chars = sum(len(text) for text in corpus)
+    print(f"{len(corpus)} vouchers ({chars // len(corpus)} chars on average), {args.repeat} passes")
+
+    latencies = {name: [] for name in parsers}
+    errors = dict.fromkeys(parsers, 0)
+    allocations = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for name, func in parsers.items():
+            # Warm-up (lazy imports, model loads) and the error count
+            errors[name] = sum(call(func, text)[1] for text in corpus)
+            allocations[name] = measure_allocations(func, corpus)
+        # Parsers alternate on each text so drift (thermal, other load) hits them all alike
+        for _ in range(args.repeat):
+            for text in corpus:
+                for name, func in parsers.items():
+                    elapsed, raised = call(func, text)
+                    if not raised:
+                        latencies[name].append(elapsed)
+
+    results = {}
+    print(f"\n{'parser':>16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'vouchers/s':>11} "
+          f"{'peak KB':>8} {'errors':>7}")
+    for name in parsers:
+        summary = summarize_latencies(latencies[name])
+        mean_ms = summary.get('mean_ms', 0)
+        summary['vouchers_per_second'] = round(1000 / mean_ms, 1) if mean_ms else 0
+        summary['chars_per_second'] = round(chars / len(corpus) * 1000 / mean_ms) if mean_ms else 0
+        results[name] = {'latency': summary, 'allocations': allocations[name], 'errors': errors[name]}
+        print(f"{name:>16} {summary.get('p50_ms', 0):>8.3f} {summary.get('p95_ms', 0):>8.3f} "
+              f"{summary.get('p99_ms', 0):>8.3f} {summary['vouchers_per_second']:>11.1f} "
+              f"{allocations[name]['peak_kb_p50']:>8.1f} {errors[name]:>7}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            before = json.load(f)['results']['parsers']
+        print(f"\n{'parser':>16} {'p50 before':>11} {'p50 now':>8} {'speed-up':>9} {'peak KB before':>15} {'now':>8}")
+        for name, now in results.items():
+            if name not in before:
+                continue
+            old_p50, new_p50 = before[name]['latency'].get('p50_ms', 0), now['latency'].get('p50_ms', 0)
+            speedup = round(old_p50 / new_p50, 2) if new_p50 else 0
+            now['speedup_p50_vs_baseline'] = speedup
+            print(f"{name:>16} {old_p50:>11.3f} {new_p50:>8.3f} {speedup:>8}x "
+                  f"{before[name]['allocations']['peak_kb_p50']:>15.1f} {now['allocations']['peak_kb_p50']:>8.1f}")
+
+    if args.json:
+        write_report(args.json, 'parsers', {'vouchers': len(corpus), 'chars': chars, 'passes': args.repeat,
+                                            'parsers': results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+QualityFocusedExtractor micro-benchmark over the stored raw OCR corpus
+
+Times extract_with_quality per voucher on every text in the corpus
+(scripts.benchmark_utils.load_ocr_corpus: exported vouchers_master rows,
+wizard queue OCR results, correction feedback, or --corpus files).  With
+--before-rev the extractor from that git revision is loaded side by side,
+timed on the same texts in alternation, and its results are compared with
+the working tree's.
+
+The extractor logs its debug trace through the 'parser' subsystem logger;
+stdout is sent to /dev/null while timing, so the numbers include
+formatting but not terminal I/O.  Run with LOG_PROFILE=production to time
+the extractor as deployed (no debug log kept or formatted).
+
+Usage:
+    python -m scripts.benchmark_quality_extractor
+    LOG_PROFILE=production python -m scripts.benchmark_quality_extractor
+    python -m scripts.benchmark_quality_extractor --before-rev a3b58f0 --repeat 50 --json reports/qfee.json
+    python -m scripts.benchmark_quality_extractor --corpus 'exports/*.txt' --corpus raw_ocr.jsonl
+"""
+import argparse
+import contextlib
+import os
+import subprocess
+import types
+
+from backend import quality_focused_extractor
+from scripts.benchmark_utils import load_ocr_corpus, summarize_latencies, time_call, write_report
+
+MODULE_PATH = 'backend/quality_focused_extractor.py'
+
+
+def load_revision(rev):
+    """quality_focused_extractor as it was at a git revision, as a separate module"""
+    source = subprocess.check_output(['git', 'show', f'{rev}:{MODULE_PATH}'], text=True)
+    module = types.ModuleType(f'quality_focused_extractor_{rev}')
+    module.__file__ = f'{rev}:{MODULE_PATH}'
+    exec(compile(source, module.__file__, 'exec'), module.__dict__)
+    return module
+
+
+def comparable(result):
+    """The parts of a result the pipeline uses (debug log and attempts excluded)"""
+    return ({name: (field.value, field.confidence, field.status.value) for name, field in result['fields'].items()},
+            result['items'], result['deductions'], result['overall_confidence'], result['requires_review'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', action='append', help='JSON/JSONL/.txt path or glob (repeatable)')
+    parser.add_argument('--before-rev', help='Git revision of the extractor to compare against')
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the corpus')
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    corpus = load_ocr_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit("No OCR texts found - pass --corpus")
+    chars = sum(len(text) for text in corpus)
+    print(f"{len(corpus)} vouchers ({chars // len(corpus)} chars on average), {args.repeat} passes")
+
+    versions = {'current': quality_focused_extractor}
+    if args.before_rev:
+        versions = {'before': load_revision(args.before_rev), 'current': quality_focused_extractor}
+
+    latencies = {name: [] for name in versions}
+    mismatches = 0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for text in corpus:
+            # Warm-up, and the equivalence check
+            results = {name: module.extract_with_quality(text) for name, module in versions.items()}
+            if len(results) > 1 and comparable(results['before']) != comparable(results['current']):
+                mismatches += 1
+        for _ in range(args.repeat):
+            for text in corpus:
+                for name, module in versions.items():
+                    latencies[name].append(time_call(module.extract_with_quality, text)[1])
+
+    summaries = {name: summarize_latencies(values) for name, values in latencies.items()}
+    print(f"\n{'version':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'vouchers/s':>11}")
+    for name, summary in summaries.items():
+        throughput = 1000 / summary['mean_ms'] if summary['mean_ms'] else 0
+        summary['vouchers_per_second'] = round(throughput, 1)
+        print(f"{name:>8} {summary['p50_ms']:>8.3f} {summary['p95_ms']:>8.3f} {summary['p99_ms']:>8.3f} "
+              f"{summary['mean_ms']:>8.3f} {throughput:>11.1f}")
+
+    report = {'vouchers': len(corpus), 'passes': args.repeat, 'latency': summaries}
+    if args.before_rev:
+        before, current = summaries['before'], summaries['current']
+        report['before_rev'] = args.before_rev
+        report['speedup_p50'] = round(before['p50_ms'] / current['p50_ms'], 2) if current['p50_ms'] else 0
+        report['mismatches'] = mismatches
+        print(f"\nspeed-up (p50): {report['speedup_p50']}x, results differing from {args.before_rev}: {mismatches}")
+
+    if args.json:
+        write_report(args.json, 'quality_extractor', report)
+
+
+if __name__ == "__main__":
+    main()
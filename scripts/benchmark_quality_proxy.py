@@ -0,0 +1,153 @@
+"""
+Image-quality analysis benchmark: full resolution vs bounded-size proxy
+
+Runs analyze_image_quality in 'full' and 'proxy' mode on every image and
+reports latency, agreement of each needs_* decision and of quality_score(),
+and per-metric relative error. With --fit it also prints PROXY_CALIBRATION
+factors (median full/proxy ratio per metric) fitted on the image set.
+
+Usage:
+    python -m scripts.benchmark_quality_proxy --images uploads
+    python -m scripts.benchmark_quality_proxy --images uploads --max-side 800 --fit --json reports/quality_proxy.json
+"""
+import argparse
+import statistics
+
+from backend import image_quality
+from backend.image_context import ImageContext
+from backend.image_quality import PROXY_CALIBRATION, analyze_image_quality
+from scripts.benchmark_utils import find_images, summarize_latencies, time_call, write_report
+
+DECISIONS = (
+    'needs_brightness_correction',
+    'needs_contrast_enhancement',
+    'needs_sharpening',
+    'needs_denoising',
+    'needs_deskewing',
+    'needs_upscaling',
+)
+
+CALIBRATED_METRICS = tuple(PROXY_CALIBRATION)
+
+
+def measure(path, mode):
+    # Fresh context per run so cached Laplacian/edges are not shared between modes
+    with open(path, 'rb') as f:
+        data = f.read()
+    context = ImageContext.from_bytes(data, path)
+    return time_call(analyze_image_quality, context, mode=mode)
+
+
+def relative_error(full, proxy):
+    if full == proxy:
+        return 0.0
+    return abs(proxy - full) / max(abs(full), 1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', default='uploads', help='Folder with receipt images')
+    parser.add_argument('--limit', type=int, default=None, help='Use at most N images')
+    parser.add_argument('--max-side', type=int, default=None,
+                        help=f'Proxy size budget (default {image_quality.PROXY_MAX_SIDE})')
+    parser.add_argument('--fit', action='store_true', help='Print fitted PROXY_CALIBRATION factors')
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    if args.max_side:
+        image_quality.PROXY_MAX_SIDE = args.max_side
+
+    images = find_images(args.images, args.limit)
+    if not images:
+        print(f"No images found in {args.images}")
+        return
+
+    print(f"Comparing full vs proxy ({image_quality.PROXY_MAX_SIDE}px) quality analysis on {len(images)} images")
+
+    full_ms, proxy_ms = [], []
+    agreements = {name: 0 for name in DECISIONS}
+    score_matches = 0
+    score_diffs = []
+    errors = {metric: [] for metric in CALIBRATED_METRICS + ('skew_angle',)}
+    ratios = {metric: [] for metric in CALIBRATED_METRICS}
+    per_image = []
+
+    for path in images:
+        full, full_elapsed = measure(path, 'full')
+        proxy, proxy_elapsed = measure(path, 'proxy')
+        full_ms.append(full_elapsed)
+        proxy_ms.append(proxy_elapsed)
+
+        disagreements = []
+        for name in DECISIONS:
+            if getattr(full, name)() == getattr(proxy, name)():
+                agreements[name] += 1
+            else:
+                disagreements.append(name)
+
+        score_diff = abs(full.quality_score() - proxy.quality_score())
+        score_diffs.append(score_diff)
+        score_matches += score_diff == 0
+
+        for metric in CALIBRATED_METRICS:
+            full_value, proxy_value = getattr(full, metric), getattr(proxy, metric)
+            errors[metric].append(relative_error(full_value, proxy_value))
+            raw_proxy = proxy_value / PROXY_CALIBRATION[metric]
+            if raw_proxy > 0 and full_value > 0:
+                ratios[metric].append(full_value / raw_proxy)
+        errors['skew_angle'].append(abs(full.skew_angle - proxy.skew_angle))
+
+        per_image.append({
+            'image': path,
+            'resolution': full.resolution,
+            'full_ms': round(full_elapsed, 3),
+            'proxy_ms': round(proxy_elapsed, 3),
+            'full_score': full.quality_score(),
+            'proxy_score': proxy.quality_score(),
+            'disagreements': disagreements,
+        })
+
+    total = len(images)
+    full_summary = summarize_latencies(full_ms)
+    proxy_summary = summarize_latencies(proxy_ms)
+    result = {
+        'images': total,
+        'max_side': image_quality.PROXY_MAX_SIDE,
+        'full_latency': full_summary,
+        'proxy_latency': proxy_summary,
+        'speedup_mean': round(full_summary['mean_ms'] / proxy_summary['mean_ms'], 2) if proxy_summary['mean_ms'] else 0,
+        'decision_agreement': {name: round(count / total, 4) for name, count in agreements.items()},
+        'quality_score_exact_match': round(score_matches / total, 4),
+        'quality_score_mean_abs_diff': round(sum(score_diffs) / total, 3),
+        'median_relative_error': {m: round(statistics.median(v), 4) for m, v in errors.items() if m != 'skew_angle'},
+        'skew_mean_abs_diff_deg': round(sum(errors['skew_angle']) / total, 3),
+        'per_image': per_image,
+    }
+
+    print(f"\n{'':>12} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for label, summary in (('full', full_summary), ('proxy', proxy_summary)):
+        print(f"{label:>12} {summary['mean_ms']:>10.1f} {summary['p50_ms']:>10.1f} {summary['p95_ms']:>10.1f}")
+    print(f"Speed-up: {result['speedup_mean']}x")
+
+    print("\nDecision agreement:")
+    for name, rate in result['decision_agreement'].items():
+        print(f"  {name:<30} {rate * 100:6.1f}%")
+    print(f"  {'quality_score exact match':<30} {result['quality_score_exact_match'] * 100:6.1f}%"
+          f"  (mean |diff| {result['quality_score_mean_abs_diff']})")
+
+    print("\nMedian relative error:")
+    for metric, err in result['median_relative_error'].items():
+        print(f"  {metric:<12} {err * 100:6.2f}%")
+    print(f"  {'skew':<12} {result['skew_mean_abs_diff_deg']:6.2f} deg mean |diff|")
+
+    if args.fit:
+        fitted = {m: round(statistics.median(v), 4) if v else 1.0 for m, v in ratios.items()}
+        result['fitted_calibration'] = fitted
+        print(f"\nFitted PROXY_CALIBRATION = {fitted}")
+
+    if args.json:
+        write_report(args.json, 'quality_proxy', result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Queue persistence benchmark: full queue_store.json rewrite vs per-file rows
+
+For a growing number of stored queues, times one status update the way the
+batch thread does it after every processed file:
+    legacy  json.dump of every queue (indent=4), as save_queue_store did
+    store   QueueStore.update_file - one file row in a SQLite transaction
+
+Usage:
+    python -m scripts.benchmark_queue_store
+    python -m scripts.benchmark_queue_store --queues 10,100,500 --files 20 --json reports/queue_store.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+
+from backend.services.queue_store import QueueStore
+from scripts.benchmark_utils import summarize_latencies, time_call, write_report
+
+OCR_TEXT = "TK FRUITS & VEGETABLES\nSupplier Name: SRI LAKSHMI TRADERS\nMango 12 45.50 546.00\n" * 6
+
+
+def make_queue(queue_id, files):
+    return {
+        'queue_id': queue_id,
+        'batch_id': 1,
+        'files': [{
+            'original_filename': f'receipt_{i}.jpg',
+            'original_path': f'uploads/{queue_id}_receipt_{i}.jpg',
+            'cropped_path': None,
+            'ocr_result': {'text': OCR_TEXT, 'confidence': 88.5},
+            'parsed_data': {'master': {'supplier_name': 'SRI LAKSHMI TRADERS', 'net_total': '1383.40'},
+                            'items': [{'item_name': 'Mango', 'quantity': 12}] * 5},
+            'validated_data': None,
+            'status': 'ocr_complete',
+        } for i in range(files)],
+        'current_index': 0,
+        'phase': 'review',
+        'total': files,
+        'completed': 0,
+        'skipped': 0,
+        'created_at': '2026-01-04T10:00:00',
+    }
+
+
+def legacy_save(path, store):
+    with open(path, 'w') as f:
+        json.dump(store, f, indent=4, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queues', default='10,100,500', help='Comma-separated numbers of stored queues')
+    parser.add_argument('--files', type=int, default=20, help='Files per queue')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed updates per size and implementation')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.queues.split(',') if s.strip()]
+    print(f"{args.files} files per queue, {args.repeat} updates per size")
+    print(f"\n{'queues':>7} {'json MB':>8} {'legacy ms':>10} {'store ms':>9} {'speed-up':>9}")
+
+    results = []
+    for size in sizes:
+        tmp = tempfile.mkdtemp(prefix='queue_store_bench_')
+        try:
+            queues = {f'q{n}': make_queue(f'q{n}', args.files) for n in range(size)}
+            store = QueueStore(os.path.join(tmp, 'queues.db'), legacy_json=None)
+            for queue in queues.values():
+                store.create(json.loads(json.dumps(queue)))
+
+            json_file = os.path.join(tmp, 'queue_store.json')
+            legacy_ms, store_ms = [], []
+            for _ in range(args.repeat):
+                queue_id = f'q{rng.randrange(size)}'
+                index = rng.randrange(args.files)
+                queues[queue_id]['files'][index]['status'] = 'validated'
+                legacy_ms.append(time_call(legacy_save, json_file, queues)[1])
+                store_ms.append(time_call(store.update_file, queue_id, index, {'status': 'validated'})[1])
+
+            legacy, stored = summarize_latencies(legacy_ms), summarize_latencies(store_ms)
+            speedup = round(legacy['p50_ms'] / stored['p50_ms'], 1) if stored['p50_ms'] else 0
+            json_mb = os.path.getsize(json_file) / 1e6
+            results.append({'queues': size, 'files_per_queue': args.files, 'json_bytes': os.path.getsize(json_file),
+                            'legacy': legacy, 'store': stored, 'speedup_p50': speedup})
+            print(f"{size:>7} {json_mb:>8.1f} {legacy['p50_ms']:>10.2f} {stored['p50_ms']:>9.3f} {speedup:>8}x")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        write_report(args.json, 'queue_store', {'sizes': results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Shared helpers for the scripts/benchmark_*.py tools
+"""
+import glob
+import json
+import os
+import platform
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+
+# Raw OCR text already stored in the tree
+DEFAULT_OCR_CORPUS = [
+    'test_outputs/raw_text_output.json',   # exported vouchers_master rows
+    # wizard queues (files[].ocr_result.text), as backend/services/queue_store.py finds them
+    os.getenv('QUEUE_STORE_DB') or 'backend/data/queue_store.db',
+    'backend/ml_dataset/*.jsonl',          # correction feedback (raw_ocr_text)
+]
+
+# Keys whose string value is a voucher's full OCR text
+OCR_TEXT_KEYS = ('raw_text', 'raw_ocr_text', 'ocr_text')
+
+# Receipt image files picked up by find_images
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff')
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile (pct in 0-100) of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize_latencies(latencies_ms):
+    """p50/p95/p99/mean/max summary of latencies in milliseconds"""
+    if not latencies_ms:
+        return {'count': 0}
+    return {
+        'count': len(latencies_ms),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 3),
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p95_ms': round(percentile(latencies_ms, 95), 3),
+        'p99_ms': round(percentile(latencies_ms, 99), 3),
+        'max_ms': round(max(latencies_ms), 3),
+    }
+
+
+def _collect_ocr_texts(value, texts):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in OCR_TEXT_KEYS and isinstance(item, str):
+                texts.append(item)
+            elif key == 'ocr_result' and isinstance(item, dict) and isinstance(item.get('text'), str):
+                texts.append(item['text'])
+            else:
+                _collect_ocr_texts(item, texts)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_ocr_texts(item, texts)
+
+
+def _queue_store_entries(path):
+    """File entries (hot and archived queues) of a SQLite queue store, opened read-only"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        entries = [json.loads(data) for (data,) in conn.execute('SELECT data FROM queue_files')]
+        for (data,) in conn.execute('SELECT data FROM archived_queues'):
+            entries.extend(json.loads(zlib.decompress(data)).get('files', []))
+    finally:
+        conn.close()
+    return entries
+
+
+def load_ocr_corpus(sources=None, min_chars=20):
+    """
+    Distinct raw OCR texts from JSON / JSONL exports (any nesting, see
+    OCR_TEXT_KEYS), SQLite queue stores (.db, files[].ocr_result.text) and
+    .txt files (one voucher per file).  Sources are paths or glob patterns;
+    missing ones are skipped.
+    """
+    texts = []
+    for source in sources or DEFAULT_OCR_CORPUS:
+        for path in sorted(glob.glob(source)):
+            if path.endswith('.txt'):
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    texts.append(f.read())
+            elif path.endswith('.db'):
+                _collect_ocr_texts(_queue_store_entries(path), texts)
+            elif path.endswith('.jsonl'):
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            _collect_ocr_texts(json.loads(line), texts)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    _collect_ocr_texts(json.load(f), texts)
+    return [text for text in dict.fromkeys(texts) if len(text.strip()) >= min_chars]
+
+
+def find_images(folder, limit=None):
+    """Receipt images in folder, sorted (smart-crop previews skipped)"""
+    images = []
+    for pattern in IMAGE_PATTERNS:
+        images.extend(glob.glob(os.path.join(folder, pattern)))
+    # Skip smart-crop previews, they are not receipts
+    images = sorted(p for p in images if not os.path.basename(p).startswith('preview_'))
+    return images[:limit] if limit else images
+
+
+def time_call(func, *args, **kwargs):
+    """Run func once and return (result, elapsed_ms)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def environment_info():
+    """Machine details recorded alongside every report"""
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def write_report(path, name, results):
+    """Write a JSON benchmark report that can be diffed between versions"""
+    report = {
+        'benchmark': name,
+        'environment': environment_info(),
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True, default=str)
+    print(f"Report written to {path}")
+    return report
@@ -0,0 +1,258 @@
+"""
+Synthetic TKFL voucher generator (images + ground truth)
+
+Renders vouchers laid out like the scanned TKFL ones (voucher number,
+date, supplier, Qty/Price/Amount item table, Total line, Commission @4%,
+Less for Damages @5%, UnLoading, L/F And Cash, GrandTotal) and degrades
+them the way phone photos of paper vouchers are degraded:
+    --noise        Gaussian pixel noise (sigma, 0-255 scale)
+    --blur         Gaussian blur radius (pixels)
+    --skew         rotation, uniform in +/- degrees
+    --perspective  corner displacement, up to this fraction of the size
+    --background   'none', 'plain' (paper on a darker surface) or
+                   'texture' (noisy, uneven surface)
+Every voucher gets its own random draw up to these limits, so a run
+covers a spread of difficulty; --seed makes it reproducible.
+
+For each voucher <out>/synthetic_NNNN.jpg is written next to
+synthetic_NNNN.json: the ground truth in the parsers' output shape
+(master / items / deductions) plus the degradation actually applied.
+<out>/manifest.json lists all of them (scripts.load_test_pipeline reads it).
+
+Usage:
+    python -m scripts.generate_synthetic_receipts --count 50 --out synthetic_receipts
+    python -m scripts.generate_synthetic_receipts --count 200 --noise 12 --blur 1.5 --skew 4 \
+        --perspective 0.05 --background texture --seed 7
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# Supplier names as they are printed on the vouchers (NAME/INITIAL)
+SUPPLIERS = [
+    'MACHAGIRI/A', 'VANITHA/D', 'RAMESH/K', 'LAKSHMI/S', 'MURUGAN/P', 'SELVI/R',
+    'KRISHNAN/M', 'PARVATHI/N', 'GANESAN/T', 'SARASWATHI/V', 'ANBU/C', 'KANNAN/G',
+]
+
+# Produce and typical per-unit prices
+ITEMS = {
+    'Mango': (300, 900), 'Banana': (150, 450), 'Papaya': (120, 400), 'Guava': (200, 600),
+    'Pomegranate': (500, 1500), 'Sapota': (200, 550), 'Orange': (250, 800), 'Grapes': (400, 1200),
+}
+
+HEADER = ['TK FRUITS & VEGETABLES', 'COMMISSION AGENTS']
+
+FONT_CANDIDATES = ['DejaVuSans.ttf', 'arial.ttf', 'LiberationSans-Regular.ttf']
+
+
+def load_font(path=None, size=30):
+    """TrueType font for the voucher text (Pillow's built-in one if none is found)"""
+    for candidate in ([path] if path else []) + FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def make_voucher(rng, number, voucher_date, suppliers):
+    """Ground truth for one voucher; totals are consistent like the real ones"""
+    items = []
+    for name in rng.sample(sorted(ITEMS), rng.randint(1, 5)):
+        low, high = ITEMS[name]
+        quantity = rng.randint(1, 12)
+        unit_price = float(rng.randrange(low, high, 10))
+        items.append({'item_name': name, 'quantity': quantity, 'unit_price': unit_price,
+                      'line_amount': round(quantity * unit_price, 2)})
+    gross = round(sum(item['line_amount'] for item in items), 2)
+
+    deductions = [
+        {'deduction_type': 'Commission @4%', 'amount': round(gross * 0.04, 2)},
+        {'deduction_type': 'Less for Damages', 'amount': round(gross * 0.05, 2)},
+        {'deduction_type': 'Unloading', 'amount': float(rng.randrange(10, 150, 2))},
+    ]
+    if rng.random() < 0.7:
+        deductions.append({'deduction_type': 'L/F Cash', 'amount': float(rng.randrange(20, 400, 10))})
+    net = round(gross - sum(d['amount'] for d in deductions), 2)
+
+    return {
+        'master': {
+            'voucher_number': str(number),
+            'voucher_date': voucher_date.isoformat(),
+            'supplier_name': rng.choice(suppliers),
+            'gross_total': gross,
+            'net_total': net,
+        },
+        'items': items,
+        'deductions': deductions,
+    }
+
+
+def voucher_lines(truth):
+    """The printed lines of a voucher, top to bottom"""
+    master = truth['master']
+    printed_date = date.fromisoformat(master['voucher_date']).strftime('%d/%m/%Y')
+    lines = HEADER + [
+        '',
+        f"VoucherNumber {master['voucher_number']}",
+        f"VoucherDate {printed_date}",
+        f"Supp Name {master['supplier_name']}",
+        '',
+        'Item Qty Price Amount',
+    ]
+    for item in truth['items']:
+        lines.append(f"{item['item_name']} {item['quantity']} {item['unit_price']:.2f} {item['line_amount']:.2f}")
+    lines.append(f"Total {sum(i['quantity'] for i in truth['items'])} {master['gross_total']:.2f}")
+    labels = {'Commission @4%': '(-) Comm @4.00', 'Less for Damages': '(-) Less For Damages',
+              'Unloading': '(-) UnLoading', 'L/F Cash': '(-) L/F And Cash'}
+    for deduction in truth['deductions']:
+        lines.append(f"{labels[deduction['deduction_type']]} {deduction['amount']:.2f}")
+    lines.append(f"GrandTotal {master['net_total']:.2f}")
+    return lines
+
+
+def render(lines, font, width=900):
+    """Black text on white paper"""
+    line_height = int(font.size * 1.6)
+    margin = font.size * 2
+    image = Image.new('L', (width, margin * 2 + line_height * len(lines)), 255)
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        x = (width - draw.textlength(line, font=font)) // 2 if i < len(HEADER) else margin
+        draw.text((x, margin + i * line_height), line, fill=20, font=font)
+    return image
+
+
+def perspective_coefficients(src, dst):
+    """Image.transform PERSPECTIVE data mapping output points dst to input points src"""
+    rows = []
+    for (x, y), (u, v) in zip(dst, src):
+        rows.append([x, y, 1, 0, 0, 0, -u * x, -u * y])
+        rows.append([0, 0, 0, x, y, 1, -v * x, -v * y])
+    return np.linalg.solve(np.array(rows, dtype=float), np.array(src, dtype=float).reshape(8)).tolist()
+
+
+def degrade(image, rng, noise=0.0, blur=0.0, skew=0.0, perspective=0.0, background='none'):
+    """Photo-like degradation; returns (RGB image, parameters applied)"""
+    applied = {}
+    paper = image.convert('RGB')
+
+    if perspective > 0:
+        w, h = paper.size
+        corners = [(0, 0), (w, 0), (w, h), (0, h)]
+        shifted = [(x + rng.uniform(-perspective, perspective) * w, y + rng.uniform(-perspective, perspective) * h)
+                   for x, y in corners]
+        min_x, min_y = min(x for x, _ in shifted), min(y for _, y in shifted)
+        shifted = [(x - min_x, y - min_y) for x, y in shifted]
+        size = (int(max(x for x, _ in shifted)), int(max(y for _, y in shifted)))
+        paper = paper.transform(size, Image.Transform.PERSPECTIVE, perspective_coefficients(corners, shifted),
+                                Image.Resampling.BICUBIC, fillcolor=None)
+        # Outside the warped sheet becomes transparent so the background shows
+        mask = Image.new('L', image.size, 255).transform(size, Image.Transform.PERSPECTIVE,
+                                                         perspective_coefficients(corners, shifted))
+        applied['perspective_corners'] = [[round(x), round(y)] for x, y in shifted]
+    else:
+        mask = Image.new('L', paper.size, 255)
+
+    if skew > 0:
+        angle = rng.uniform(-skew, skew)
+        paper = paper.rotate(angle, Image.Resampling.BICUBIC, expand=True, fillcolor=(255, 255, 255))
+        mask = mask.rotate(angle, Image.Resampling.BICUBIC, expand=True, fillcolor=0)
+        applied['skew_degrees'] = round(angle, 2)
+
+    if background != 'none':
+        margin = int(max(paper.size) * rng.uniform(0.08, 0.2))
+        size = (paper.width + 2 * margin, paper.height + 2 * margin)
+        tint = np.array([rng.randint(40, 120) + rng.randint(-15, 15) for _ in range(3)], dtype=np.float32)
+        surface = np.broadcast_to(tint, (size[1], size[0], 3)).copy()
+        if background == 'texture':
+            # Smooth uneven lighting plus grain, the same on every channel
+            np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+            coarse = Image.fromarray(np_rng.normal(0, 30, (size[1] // 60 + 2, size[0] // 60 + 2)).astype(np.float32))
+            shading = np.asarray(coarse.resize(size, Image.Resampling.BICUBIC), dtype=np.float32)
+            surface += (shading + np_rng.normal(0, 6, shading.shape).astype(np.float32))[..., None]
+        canvas = Image.fromarray(np.clip(surface, 0, 255).astype(np.uint8))
+        canvas.paste(paper, (margin, margin), mask)
+        paper = canvas
+        applied['background'] = background
+    elif perspective > 0 or skew > 0:
+        white = Image.new('RGB', paper.size, (255, 255, 255))
+        white.paste(paper, (0, 0), mask)
+        paper = white
+
+    if blur > 0:
+        radius = rng.uniform(0, blur)
+        paper = paper.filter(ImageFilter.GaussianBlur(radius))
+        applied['blur_radius'] = round(radius, 2)
+
+    if noise > 0:
+        sigma = rng.uniform(0, noise)
+        np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+        pixels = np.asarray(paper, dtype=np.float32) + np_rng.normal(0, sigma, (paper.height, paper.width, 1))
+        paper = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        applied['noise_sigma'] = round(sigma, 2)
+
+    return paper, applied
+
+
+def generate(out_dir, count, seed=0, font_path=None, suppliers=None, start_number=100,
+             noise=0.0, blur=0.0, skew=0.0, perspective=0.0, background='none'):
+    """Write count vouchers (+ ground truth) to out_dir; returns the manifest entries"""
+    rng = random.Random(seed)
+    font = load_font(font_path)
+    os.makedirs(out_dir, exist_ok=True)
+    first_date = date(2026, 1, 1)
+
+    manifest = []
+    for n in range(count):
+        truth = make_voucher(rng, start_number + n, first_date + timedelta(days=rng.randrange(365)),
+                             suppliers or SUPPLIERS)
+        image, applied = degrade(render(voucher_lines(truth), font), rng, noise=noise, blur=blur,
+                                 skew=skew, perspective=perspective, background=background)
+        name = f'synthetic_{n + 1:04d}'
+        image.save(os.path.join(out_dir, f'{name}.jpg'), quality=rng.randint(70, 95))
+        truth['degradation'] = applied
+        with open(os.path.join(out_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(truth, f, indent=2)
+        manifest.append({'image': f'{name}.jpg', 'truth': f'{name}.json'})
+
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'seed': seed, 'count': count, 'noise': noise, 'blur': blur, 'skew': skew,
+                   'perspective': perspective, 'background': background, 'vouchers': manifest}, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20, help='Vouchers to generate')
+    parser.add_argument('--out', default='synthetic_receipts', help='Output directory')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--noise', type=float, default=6.0, help='Max Gaussian noise sigma (0 = off)')
+    parser.add_argument('--blur', type=float, default=0.8, help='Max blur radius in pixels (0 = off)')
+    parser.add_argument('--skew', type=float, default=2.0, help='Max rotation in degrees (0 = off)')
+    parser.add_argument('--perspective', type=float, default=0.03, help='Max corner shift as a fraction (0 = off)')
+    parser.add_argument('--background', choices=['none', 'plain', 'texture'], default='plain')
+    parser.add_argument('--font', help='TrueType font file (default: DejaVuSans / Arial)')
+    parser.add_argument('--suppliers', help='JSON list of supplier names (or {"vendors": [...]})')
+    args = parser.parse_args()
+
+    suppliers = None
+    if args.suppliers:
+        with open(args.suppliers, 'r', encoding='utf-8') as f:
+            suppliers = json.load(f)
+        if isinstance(suppliers, dict):
+            suppliers = suppliers.get('vendors') or suppliers.get('suppliers')
+
+    manifest = generate(args.out, args.count, seed=args.seed, font_path=args.font, suppliers=suppliers,
+                        noise=args.noise, blur=args.blur, skew=args.skew, perspective=args.perspective,
+                        background=args.background)
+    print(f"Wrote {len(manifest)} vouchers with ground truth to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
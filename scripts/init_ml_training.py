@@ -63,7 +63,8 @@ def init_ml_system():
             start_time = time.time()
             result = MLTrainingService.train_models(
                 feedback_limit=10000,
-                save_models=True
+                save_models=True,
+                mode='full'
             )
             elapsed_time = time.time() - start_time
             
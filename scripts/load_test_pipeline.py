@@ -0,0 +1,291 @@
+"""
+End-to-end load test: upload -> smart crop -> OCR -> parse, with accuracy
+
+Pushes synthetic vouchers (scripts.generate_synthetic_receipts) through the
+wizard endpoints with the Flask test client, --concurrency queues at a time:
+
+    POST /api/queue/create                 upload --files-per-queue images
+    (ingestion pipeline)                   hash + smart-crop detection
+    POST /api/queue/<id>/process_batch     OCR -> extraction -> ML corrections
+
+Completion is read from the queue store (the same process), so polling
+adds no HTTP traffic.  Reported:
+    throughput   vouchers per second over the whole run (vouchers whose OCR
+                 failed are reported as file errors and not counted)
+    latency      p50/p95/p99 per queue: upload, ingest (until detection is
+                 done for every file), batch (until the queue reaches
+                 review) and end to end
+    accuracy     share of vouchers whose parsed field matches the ground
+                 truth (amounts within 0.01), item count, and deductions
+                 found with the right amount
+
+The app runs against a scratch queue store and upload folder, with the OCR
+cache off unless --ocr-cache is given.  /api/queue/create records a batch
+in PostgreSQL; --no-db replaces that one call with a local id so the run
+works without DATABASE_URL (the file metadata insert then fails and is
+logged, as it would be with the database down).  Saving to
+vouchers_master is not exercised.  Batch OCR parallelism follows
+BATCH_OCR_WORKERS / BATCH_OCR_MODE as in production.
+
+Usage:
+    python -m scripts.load_test_pipeline --generate 20 --concurrency 4 --no-db
+    python -m scripts.generate_synthetic_receipts --count 200 --out synthetic_receipts --seed 3
+    BATCH_OCR_WORKERS=4 python -m scripts.load_test_pipeline --dataset synthetic_receipts --count 200 \
+        --concurrency 8 --files-per-queue 5 --json reports/load_test.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from scripts.benchmark_utils import summarize_latencies, write_report
+
+MASTER_FIELDS = ('voucher_number', 'voucher_date', 'supplier_name', 'gross_total', 'net_total')
+AMOUNT_FIELDS = ('gross_total', 'net_total')
+
+
+def load_dataset(dataset, count):
+    """(image path, ground truth) pairs from a generator manifest, cycled up to count"""
+    with open(os.path.join(dataset, 'manifest.json'), 'r', encoding='utf-8') as f:
+        entries = json.load(f)['vouchers']
+    if not entries:
+        raise SystemExit(f"No vouchers in {dataset}/manifest.json")
+    vouchers = []
+    for n in range(count or len(entries)):
+        entry = entries[n % len(entries)]
+        with open(os.path.join(dataset, entry['truth']), 'r', encoding='utf-8') as f:
+            vouchers.append((os.path.join(dataset, entry['image']), json.load(f)))
+    return vouchers
+
+
+def same_value(field, parsed, expected):
+    if parsed is None or expected is None:
+        return parsed == expected
+    if field in AMOUNT_FIELDS:
+        try:
+            return abs(float(parsed) - float(expected)) <= 0.01
+        except (TypeError, ValueError):
+            return False
+    return str(parsed).strip().upper() == str(expected).strip().upper()
+
+
+def file_error(file_info):
+    """Why a file has no usable OCR result (None if it has one)"""
+    ocr_result = file_info.get('ocr_result')
+    if not ocr_result:
+        return 'no OCR result'
+    if ocr_result.get('error'):
+        return ocr_result['error']
+    # extract_text reports its own failures in the text
+    if (ocr_result.get('text') or '').startswith('[OCR ERROR]'):
+        return ocr_result['text']
+    return None
+
+
+def score(parsed, truth):
+    """Per-field correctness of one voucher's parsed_data against its ground truth"""
+    parsed = parsed or {}
+    master = parsed.get('master') or {}
+    scores = {field: same_value(field, master.get(field), truth['master'][field]) for field in MASTER_FIELDS}
+    scores['item_count'] = len(parsed.get('items') or []) == len(truth['items'])
+
+    found = {}
+    for deduction in parsed.get('deductions') or []:
+        found.setdefault(deduction.get('deduction_type'), deduction.get('amount'))
+    matched = sum(1 for d in truth['deductions']
+                  if same_value('gross_total', found.get(d['deduction_type']), d['amount']))
+    return scores, matched, len(truth['deductions'])
+
+
+class LoadTest:
+    """Runs queues through the app and collects timings and parsed results"""
+
+    def __init__(self, app, queue_store, files_per_queue, timeout, poll_seconds=0.05):
+        self.app = app
+        self.queue_store = queue_store
+        self.files_per_queue = files_per_queue
+        self.timeout = timeout
+        self.poll_seconds = poll_seconds
+        self.lock = threading.Lock()
+        self.timings = {'upload': [], 'ingest': [], 'batch': [], 'total': []}
+        self.outcomes = []
+        self.file_errors = []
+        self.failures = []
+
+    def wait_for(self, queue_id, done):
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            queue = self.queue_store.get(queue_id)
+            if queue and done(queue):
+                return queue
+            time.sleep(self.poll_seconds)
+        raise TimeoutError(f"queue {queue_id} did not finish within {self.timeout}s")
+
+    def run_queue(self, vouchers):
+        client = self.app.test_client()
+        start = time.perf_counter()
+        handles = [open(path, 'rb') for path, _ in vouchers]
+        try:
+            response = client.post('/api/queue/create', content_type='multipart/form-data', data={
+                'batch_name': 'load test',
+                'files': [(handle, os.path.basename(path)) for handle, (path, _) in zip(handles, vouchers)],
+            })
+        finally:
+            for handle in handles:
+                handle.close()
+        uploaded = time.perf_counter()
+        body = response.get_json(silent=True) or {}
+        if response.status_code != 200 or not body.get('success'):
+            raise RuntimeError(f"create failed ({response.status_code}): {body.get('message') or body}")
+        queue_id = body['queue_id']
+
+        self.wait_for(queue_id, lambda q: all(f.get('auto_crop_status') == 'done' for f in q['files']))
+        ingested = time.perf_counter()
+
+        response = client.post(f'/api/queue/{queue_id}/process_batch')
+        if response.status_code not in (200, 202):
+            raise RuntimeError(f"process_batch failed ({response.status_code})")
+        queue = self.wait_for(queue_id, lambda q: q.get('phase') == 'review')
+        finished = time.perf_counter()
+
+        with self.lock:
+            self.timings['upload'].append((uploaded - start) * 1000)
+            self.timings['ingest'].append((ingested - uploaded) * 1000)
+            self.timings['batch'].append((finished - ingested) * 1000)
+            self.timings['total'].append((finished - start) * 1000)
+            for file_info, (_, truth) in zip(queue['files'], vouchers):
+                error = file_error(file_info)
+                if error:
+                    self.file_errors.append(f"{file_info.get('original_filename')}: {error}")
+                else:
+                    self.outcomes.append((file_info.get('parsed_data'), truth))
+
+    def run(self, vouchers, concurrency):
+        queues = [vouchers[i:i + self.files_per_queue] for i in range(0, len(vouchers), self.files_per_queue)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='load-test') as executor:
+            futures = [executor.submit(self.run_queue, queue) for queue in queues]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    self.failures.append(str(e))
+        return time.perf_counter() - start
+
+
+def accuracy(outcomes):
+    """Share of vouchers with each field right, plus deduction recall"""
+    if not outcomes:
+        return {}
+    totals = dict.fromkeys(MASTER_FIELDS + ('item_count',), 0)
+    deductions_matched = deductions_expected = 0
+    for parsed, truth in outcomes:
+        scores, matched, expected = score(parsed, truth)
+        for field, ok in scores.items():
+            totals[field] += ok
+        deductions_matched += matched
+        deductions_expected += expected
+    result = {field: round(hits / len(outcomes), 3) for field, hits in totals.items()}
+    result['deductions'] = round(deductions_matched / deductions_expected, 3) if deductions_expected else 0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', help='Directory written by scripts.generate_synthetic_receipts')
+    parser.add_argument('--generate', type=int, help='Generate this many vouchers into a scratch directory')
+    parser.add_argument('--count', type=int, help='Vouchers to push (default: the whole dataset; cycles)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Queues in flight at once')
+    parser.add_argument('--files-per-queue', type=int, default=1, help='Images uploaded per queue')
+    parser.add_argument('--timeout', type=float, default=600, help='Seconds to wait for one queue')
+    parser.add_argument('--no-db', action='store_true', help='Run without PostgreSQL (local batch ids)')
+    parser.add_argument('--ocr-cache', action='store_true', help='Keep the OCR cache enabled')
+    parser.add_argument('--verbose', action='store_true', help="Show the app's own output")
+    parser.add_argument('--json', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    if not args.dataset and not args.generate:
+        raise SystemExit("Pass --dataset or --generate")
+
+    scratch = tempfile.mkdtemp(prefix='load_test_')
+    try:
+        dataset = args.dataset
+        if args.generate:
+            from scripts.generate_synthetic_receipts import generate
+            dataset = os.path.join(scratch, 'dataset')
+            generate(dataset, args.generate, seed=0, noise=6, blur=0.8, skew=2, perspective=0.03,
+                     background='plain')
+        vouchers = load_dataset(dataset, args.count)
+
+        # Before the app (and its queue store) is created
+        os.environ['QUEUE_STORE_DB'] = os.path.join(scratch, 'queue_store.db')
+        if not args.ocr_cache:
+            os.environ['OCR_CACHE_ENABLED'] = '0'
+
+        from backend import create_app
+        from backend.routes.api_queue import queue_store
+        from backend.services.batch_service import BatchService
+
+        app = create_app()
+        app.config['UPLOAD_FOLDER'] = os.path.join(scratch, 'uploads')
+
+        test = LoadTest(app, queue_store, max(1, args.files_per_queue), args.timeout)
+        print(f"{len(vouchers)} vouchers from {dataset}, {args.files_per_queue} per queue, "
+              f"concurrency {args.concurrency}")
+
+        with contextlib.ExitStack() as stack:
+            if args.no_db:
+                stack.enter_context(mock.patch.object(BatchService, 'create_batch',
+                                                      lambda *a, **kw: str(uuid.uuid4())))
+            if not args.verbose:
+                devnull = stack.enter_context(open(os.devnull, 'w'))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+                stack.enter_context(contextlib.redirect_stderr(devnull))
+            elapsed = test.run(vouchers, args.concurrency)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    processed = len(test.outcomes)
+    latency = {stage: summarize_latencies(values) for stage, values in test.timings.items()}
+    field_accuracy = accuracy(test.outcomes)
+
+    print(f"\n{processed}/{len(vouchers)} vouchers in {elapsed:.1f}s "
+          f"({processed / elapsed if elapsed else 0:.2f} vouchers/s), {len(test.file_errors)} file errors, "
+          f"{len(test.failures)} failed queues")
+    print(f"\n{'stage':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, summary in latency.items():
+        if summary['count']:
+            print(f"{stage:>8} {summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f}")
+    if field_accuracy:
+        print(f"\n{'field':>16} {'accuracy':>9}")
+        for field, value in field_accuracy.items():
+            print(f"{field:>16} {value:>9.1%}")
+    for error in test.file_errors[:5]:
+        print(f"[FILE ERROR] {error}", file=sys.stderr)
+    for failure in test.failures[:5]:
+        print(f"[FAILED] {failure}", file=sys.stderr)
+
+    if args.json:
+        write_report(args.json, 'load_test_pipeline', {
+            'vouchers': len(vouchers), 'processed': processed, 'file_errors': len(test.file_errors),
+            'failed_queues': len(test.failures),
+            'concurrency': args.concurrency, 'files_per_queue': args.files_per_queue,
+            'batch_ocr_workers': os.getenv('BATCH_OCR_WORKERS', '1'),
+            'batch_ocr_mode': os.getenv('BATCH_OCR_MODE', 'process'),
+            'elapsed_s': round(elapsed, 2),
+            'vouchers_per_second': round(processed / elapsed, 3) if elapsed else 0,
+            'latency': latency, 'accuracy': field_accuracy, 'failures': test.failures[:20],
+            'file_error_samples': test.file_errors[:20],
+        })
+
+
+if __name__ == "__main__":
+    main()
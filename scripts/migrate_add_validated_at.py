@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Migration: Add validated_at column to vouchers_master.
+
+Incremental ML training (MLTrainingService.train_models(mode='incremental'))
+uses (validated_at, id) as its watermark for validated vouchers, so it only
+reads vouchers validated since the previous run.
+"""
+
+from backend import create_app
+from backend.db import get_connection
+
+def add_validated_at_column():
+    """Add the validation timestamp column and backfill it (safe to re-run)"""
+    app = create_app()
+    with app.app_context():
+        conn = get_connection()
+        cur = conn.cursor()
+        
+        try:
+            # init_db() already creates the column; both statements are no-ops then
+            cur.execute("""
+                ALTER TABLE vouchers_master 
+                ADD COLUMN IF NOT EXISTS validated_at TIMESTAMP DEFAULT NULL
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_vouchers_master_validated_at
+                ON vouchers_master (validated_at, id)
+            """)
+            print("[OK] Column 'validated_at' present")
+            
+            # Already validated vouchers count as validated when they were created
+            cur.execute("""
+                UPDATE vouchers_master 
+                SET validated_at = created_at 
+                WHERE validation_status = 'VALIDATED' AND validated_at IS NULL
+            """)
+            affected = cur.rowcount
+            
+            conn.commit()
+            print(f"[OK] Backfilled validated_at for {affected} existing validated vouchers")
+            print("[INFO] Run a full training rebuild (mode='full') to start incremental training")
+            
+        except Exception as e:
+            print(f"[ERROR] {e}")
+            conn.rollback()
+
+if __name__ == '__main__':
+    add_validated_at_column()
@@ -0,0 +1,77 @@
+"""
+Inspect and convert learned model files (see backend/ml_models/model_store.py)
+
+Usage:
+    python -m scripts.model_store_tool info backend/ml_models/parsing_corrections_model.bin
+    python -m scripts.model_store_tool export backend/ml_models/parsing_corrections_model.bin [-o out.json]
+    python -m scripts.model_store_tool convert backend/ml_models/parsing_corrections_model.json --kind parsing_corrections
+
+`convert` reads a JSON model and writes it as binary next to it; the JSON
+file is left in place (load_state reads the binary, which is now newer).
+"""
+import argparse
+import json
+import os
+
+from backend.ml_models import model_store
+
+# Default kind for the built-in model files
+KNOWN_KINDS = {
+    'ocr_corrections_model': 'ocr_corrections',
+    'parsing_corrections_model': 'parsing_corrections',
+    'smart_crop_model': 'smart_crop',
+    'continuous_learning_model': 'continuous_learning',
+}
+
+
+def cmd_info(args):
+    header = model_store.read_header(args.path)
+    size = os.path.getsize(model_store.binary_path(args.path))
+    print(f"{model_store.binary_path(args.path)}")
+    for key, value in header.items():
+        print(f"  {key:<15} {value}")
+    print(f"  {'file_bytes':<15} {size}")
+    print(f"  {'active file':<15} {model_store.resolve(args.path)}")
+
+
+def cmd_export(args):
+    model_store.export_json(args.path, args.output)
+
+
+def cmd_convert(args):
+    base = os.path.splitext(os.path.basename(args.path))[0]
+    kind = args.kind or KNOWN_KINDS.get(base)
+    if not kind:
+        raise SystemExit(f"Cannot tell the model kind of {args.path}; pass --kind")
+    with open(model_store.json_path(args.path), 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    schema_version = state.pop('schema_version', 1)
+    written = model_store.save_state(args.path, kind, schema_version, state, fmt='binary')
+    print(f"[MODEL STORE] Converted {model_store.json_path(args.path)} -> {written} "
+          f"({kind}, schema {schema_version})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    info = sub.add_parser('info', help='Show the header of a binary model')
+    info.add_argument('path')
+    info.set_defaults(func=cmd_info)
+
+    export = sub.add_parser('export', help='Write a binary model as indented JSON')
+    export.add_argument('path')
+    export.add_argument('-o', '--output', help='Output file (default foo_model.export.json)')
+    export.set_defaults(func=cmd_export)
+
+    convert = sub.add_parser('convert', help='Convert a JSON model to binary')
+    convert.add_argument('path')
+    convert.add_argument('--kind', help='Model kind (default: from the file name)')
+    convert.set_defaults(func=cmd_convert)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from backend import adaptive_ocr_service
+from backend.adaptive_ocr_service import AdaptiveOCRService
+from backend.ocr_engine import OCRCancelled, raise_if_stopped
+
+
+class FakeContext:
+    def __init__(self, score):
+        self._score = score
+
+    def quality(self):
+        metrics = mock.Mock()
+        metrics.quality_score.return_value = self._score
+        return metrics
+
+
+def fake_extract(results, delays):
+    """base_extract_text stand-in: sleeps per mode, honouring cancellation"""
+    def extract(image_path, method, image_context=None, cancel_event=None, deadline=None):
+        end = time.monotonic() + delays.get(method, 0)
+        while time.monotonic() < end:
+            raise_if_stopped(cancel_event)
+            time.sleep(0.005)
+        text, confidence = results[method]
+        return {'text': text, 'confidence': confidence, 'processing_time_ms': 1}
+    return extract
+
+
+class TestConcurrentAdaptiveOCR(unittest.TestCase):
+    def setUp(self):
+        # Quality 50 -> modes ['optimal', 'aggressive', 'enhanced']
+        patcher = mock.patch.object(adaptive_ocr_service.ImageContext, 'from_path',
+                                    return_value=FakeContext(50))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        AdaptiveOCRService._executor = None
+        with mock.patch.dict('os.environ', {'ADAPTIVE_OCR_WORKERS': '3'}):
+            AdaptiveOCRService._get_executor()
+
+    def run_adaptive(self, results, delays, **kwargs):
+        with mock.patch.object(adaptive_ocr_service, 'base_extract_text', fake_extract(results, delays)), \
+                mock.patch.dict('os.environ', {'ADAPTIVE_OCR_WORKERS': '3'}):
+            return AdaptiveOCRService.extract_text_adaptive('x.jpg', execution='concurrent', **kwargs)
+
+    def test_confident_attempt_cancels_the_rest(self):
+        results = {'optimal': ('slow', 60), 'aggressive': ('fast', 95), 'enhanced': ('slow', 50)}
+        delays = {'enhanced': 2.0, 'aggressive': 0.01, 'optimal': 2.0}
+        start = time.monotonic()
+        result = self.run_adaptive(results, delays)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual([a.mode for a in result.attempts], ['aggressive'])
+        self.assertEqual(result.text, 'fast')
+
+    def test_attempts_merge_in_mode_order(self):
+        results = {'enhanced': ('a', 40), 'aggressive': ('b', 45), 'optimal': ('c', 50)}
+        delays = {'optimal': 0.15, 'aggressive': 0.1, 'enhanced': 0.0}
+        result = self.run_adaptive(results, delays)
+        self.assertEqual([a.mode for a in result.attempts], ['optimal', 'aggressive', 'enhanced'])
+
+    def test_budget_abandons_unfinished_attempts(self):
+        results = {'enhanced': ('a', 40), 'aggressive': ('b', 45), 'optimal': ('c', 50)}
+        delays = {'optimal': 2.0, 'aggressive': 2.0, 'enhanced': 0.0}
+        start = time.monotonic()
+        result = self.run_adaptive(results, delays, time_budget_ms=300)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual([a.mode for a in result.attempts], ['enhanced'])
+
+    def test_sequential_skips_modes_after_budget(self):
+        results = {'enhanced': ('a', 40), 'aggressive': ('b', 45), 'optimal': ('c', 50)}
+        delays = {'optimal': 0.2}
+        with mock.patch.object(adaptive_ocr_service, 'base_extract_text', fake_extract(results, delays)):
+            result = AdaptiveOCRService.extract_text_adaptive('x.jpg', execution='sequential',
+                                                              time_budget_ms=100)
+        self.assertEqual([a.mode for a in result.attempts], ['optimal'])
+
+    def test_executor_is_created_once(self):
+        executor = AdaptiveOCRService._get_executor()
+        with mock.patch.dict('os.environ', {'ADAPTIVE_OCR_WORKERS': '5'}):
+            self.assertIs(AdaptiveOCRService._get_executor(), executor)
+        self.assertEqual(executor._max_workers, 3)
+
+    def test_invalid_setting_is_ignored(self):
+        with mock.patch.dict('os.environ', {'ADAPTIVE_OCR_BUDGET_MS': '2s'}), \
+                self.assertLogs('tkfl.ocr', level='WARNING'):
+            self.assertEqual(adaptive_ocr_service._env_int('ADAPTIVE_OCR_BUDGET_MS'), 0)
+
+    def test_raise_if_stopped(self):
+        event = threading.Event()
+        raise_if_stopped(event, time.monotonic() + 10)
+        event.set()
+        with self.assertRaises(OCRCancelled):
+            raise_if_stopped(event)
+
+
+if __name__ == '__main__':
+    unittest.main()
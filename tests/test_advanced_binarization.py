@@ -0,0 +1,63 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from backend.advanced_binarization import (LocalStatistics, adaptive_mean_threshold, compare_binarization_methods,
+                                          sauvola_threshold)
+
+
+def reference_sauvola(gray, window_size=15, k=0.2, R=128):
+    """Whole-image float64 Sauvola, as originally implemented"""
+    img = gray.astype(np.float64)
+    mean = cv2.boxFilter(img, -1, (window_size, window_size), normalize=True)
+    mean_sq = cv2.boxFilter(img ** 2, -1, (window_size, window_size), normalize=True)
+    std = np.sqrt(np.maximum(mean_sq - mean ** 2, 0))
+    threshold = mean * (1 + k * ((std / R) - 1))
+    return np.where(img > threshold, 255, 0).astype(np.uint8)
+
+
+class TestLocalStatistics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        # Uneven lighting gradient with dark text-like blocks and noise
+        gradient = np.linspace(90, 220, 640)[None, :].repeat(480, axis=0)
+        image = gradient + rng.normal(0, 6, gradient.shape)
+        for y in range(40, 440, 30):
+            image[y:y + 12, 50:590:3] -= 80
+        self.gray = np.clip(image, 0, 255).astype(np.uint8)
+
+    def test_sauvola_matches_float64_reference(self):
+        for k in (0.2, 0.3):
+            expected = reference_sauvola(self.gray, 15, k)
+            actual = sauvola_threshold(self.gray, window_size=15, k=k)
+            # float32 statistics may only flip pixels sitting exactly on the threshold
+            self.assertLess(np.count_nonzero(expected != actual), self.gray.size * 1e-4)
+
+    def test_tiling_is_exact(self):
+        whole = LocalStatistics(self.gray, 15, tile_size=10000).run(
+            sauvola={'k': 0.3, 'R': 128}, adaptive_mean={'C': 2})
+        tiled = LocalStatistics(self.gray, 15, tile_size=64).run(
+            sauvola={'k': 0.3, 'R': 128}, adaptive_mean={'C': 2})
+
+        np.testing.assert_array_equal(whole['sauvola'], tiled['sauvola'])
+        np.testing.assert_array_equal(whole['adaptive_mean'], tiled['adaptive_mean'])
+
+    def test_even_window_is_rounded_up(self):
+        self.assertEqual(LocalStatistics(self.gray, 14).window_size, 15)
+
+    def test_compare_keeps_every_method(self):
+        results = compare_binarization_methods(self.gray)
+        self.assertEqual(set(results), {'otsu', 'adaptive_gaussian', 'adaptive_mean', 'sauvola'})
+        np.testing.assert_array_equal(results['sauvola'], sauvola_threshold(self.gray))
+        np.testing.assert_array_equal(results['adaptive_mean'], adaptive_mean_threshold(self.gray))
+
+    def test_non_uint8_values_are_not_rescaled(self):
+        # A dim uint16 scan: rescaling to 0-255 would change the thresholds
+        scan = self.gray.astype(np.uint16) * 40
+        expected = reference_sauvola(scan, 15, 0.2)
+        self.assertLess(np.count_nonzero(expected != sauvola_threshold(scan)), scan.size * 1e-4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import difflib
+import random
+import string
+import unittest
+
+from backend.ml_models.ml_correction_model import AnchorSearchIndex, ParsingCorrectionModel
+
+TEXT = """TK FRUITS & VEGETABLES
+Supplier Name: SRI LAKSHMI TRADERS
+Voucher No: 1234 Date: 04/01/2026
+Mango 12 45.50 546.00
+Gross Total 1602.50
+Commision @4%
+64.10
+Net Total 1383.40"""
+
+
+def model_with(anchors, supplier='SRI LAKSHMI TRADERS'):
+    model = ParsingCorrectionModel()
+    for field, labels in anchors.items():
+        for label, count in labels.items():
+            model.learned_anchors[supplier][field][label] = count
+    return model
+
+
+class TestAnchorSearch(unittest.TestCase):
+    def test_finds_values_after_fuzzy_anchor(self):
+        model = model_with({
+            'net_total': {'Net Tota1': 3},
+            'voucher_number': {'Voucher No': 2},
+            'deduction_commission': {'Commission @4%': 1},
+        })
+        index = AnchorSearchIndex(TEXT)
+        self.assertEqual(model.find_value_by_anchor('net_total', index, 'sri lakshmi traders')['value'], '1383.40')
+        self.assertEqual(model.find_value_by_anchor('voucher_number', index, 'SRI LAKSHMI TRADERS')['value'],
+                         '1234 Date: 04/01/2026')
+        # Nothing after the label on its line - value comes from the next line
+        self.assertEqual(model.find_value_by_anchor('deduction_commission', index, 'SRI LAKSHMI TRADERS')['value'],
+                         '64.10')
+
+    def test_text_and_index_give_same_result(self):
+        model = model_with({'gross_total': {'Gross Totl': 2, 'Grand Total': 5}})
+        by_text = model.find_value_by_anchor('gross_total', TEXT, 'SRI LAKSHMI TRADERS')
+        by_index = model.find_value_by_anchor('gross_total', AnchorSearchIndex(TEXT), 'SRI LAKSHMI TRADERS')
+        self.assertEqual(by_text, by_index)
+        # 'Grand Total' is tried first (higher count) but is not close enough
+        self.assertEqual(by_text['anchor'], 'Gross Totl')
+        self.assertEqual(by_text['value'], '1602.50')
+
+    def test_unknown_supplier_or_field(self):
+        model = model_with({'net_total': {'Net Total': 1}})
+        self.assertIsNone(model.find_value_by_anchor('net_total', TEXT, 'OTHER'))
+        self.assertIsNone(model.find_value_by_anchor('voucher_date', TEXT, 'SRI LAKSHMI TRADERS'))
+        self.assertIsNone(model.find_value_by_anchor('net_total', TEXT, None))
+
+    def test_candidates_never_drop_a_match(self):
+        rng = random.Random(3)
+        alphabet = string.ascii_lowercase[:6] + ' '
+        for _ in range(200):
+            text = '\n'.join(''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+                             for _ in range(4))
+            anchor = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 12))).strip() or 'a'
+            index = AnchorSearchIndex(text)
+            size = len(anchor.split())
+
+            expected = []
+            for line_idx, words in enumerate(index.words):
+                for window_idx in range(len(words) - size + 1):
+                    window = ' '.join(words[window_idx:window_idx + size]).lower()
+                    if difflib.SequenceMatcher(None, anchor, window).ratio() > 0.82:
+                        expected.append((line_idx, window_idx))
+
+            kept = [(line_idx, window_idx) for line_idx, window_idx, _ in index.candidates(anchor, 0.82)]
+            # Every real match survives the prefilter, in reading order
+            self.assertEqual([pos for pos in kept if pos in expected], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
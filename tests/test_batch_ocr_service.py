@@ -0,0 +1,103 @@
+import os
+import threading
+import unittest
+from unittest import mock
+
+from backend.services.batch_ocr_service import BatchOCRService
+
+
+class Recorder:
+    """on_result callback that keeps every report in arrival order"""
+
+    def __init__(self):
+        self.reports = []
+        self.threads = set()
+
+    def __call__(self, key, result, error):
+        self.reports.append((key, result, error))
+        self.threads.add(threading.current_thread())
+
+    def keys(self):
+        return [key for key, _, _ in self.reports]
+
+
+class TestBatchOCRService(unittest.TestCase):
+    def tearDown(self):
+        BatchOCRService._discard_executor()
+
+    def test_out_of_order_results_map_to_their_file(self):
+        jobs = [(f'file-{i}', f'/uploads/{i}.jpg') for i in range(4)]
+        last_reported = threading.Event()
+        recorder = Recorder()
+
+        def on_result(key, result, error):
+            recorder(key, result, error)
+            if key == 'file-3':
+                last_reported.set()
+
+        def func(image_path):
+            # Every file but the last waits until the last one has been reported
+            if not image_path.endswith('3.jpg'):
+                last_reported.wait(timeout=5)
+            return {'path': image_path}
+
+        BatchOCRService.run(jobs, on_result, workers=4, mode='thread', func=func)
+
+        self.assertEqual(recorder.keys()[0], 'file-3')
+        self.assertEqual(sorted(recorder.keys()), [key for key, _ in jobs])
+        paths = dict(jobs)
+        for key, result, error in recorder.reports:
+            self.assertIsNone(error)
+            self.assertEqual(result['path'], paths[key])
+        self.assertEqual(recorder.threads, {threading.current_thread()})
+
+    def test_process_pool_maps_results(self):
+        jobs = [(i, f'/uploads/{i}.jpg') for i in range(3)]
+        recorder = Recorder()
+
+        BatchOCRService.run(jobs, recorder, workers=2, mode='process', func=os.path.basename)
+
+        self.assertEqual(sorted((key, result) for key, result, _ in recorder.reports),
+                         [(0, '0.jpg'), (1, '1.jpg'), (2, '2.jpg')])
+
+    def test_exactly_one_of_result_or_error_per_file(self):
+        jobs = [(i, f'/uploads/{i}.jpg') for i in range(6)]
+
+        def func(image_path):
+            if int(os.path.basename(image_path)[0]) % 2:
+                raise ValueError(image_path)
+            return {'path': image_path}
+
+        for workers in (1, 3):
+            with self.subTest(workers=workers):
+                recorder = Recorder()
+                BatchOCRService.run(jobs, recorder, workers=workers, mode='thread', func=func)
+
+                self.assertEqual(sorted(recorder.keys()), list(range(6)))
+                for key, result, error in recorder.reports:
+                    self.assertTrue((result is None) != (error is None))
+                    if key % 2:
+                        self.assertIsInstance(error, ValueError)
+                    else:
+                        self.assertEqual(result, {'path': f'/uploads/{key}.jpg'})
+
+    def test_single_worker_runs_serially(self):
+        jobs = [(i, f'/uploads/{i}.jpg') for i in range(3)]
+        calls = []
+        recorder = Recorder()
+
+        def func(image_path):
+            calls.append((image_path, threading.current_thread()))
+            return {'path': image_path}
+
+        with mock.patch.dict(os.environ, {'BATCH_OCR_WORKERS': '1'}), \
+                mock.patch.object(BatchOCRService, '_get_executor') as get_executor:
+            BatchOCRService.run(jobs, recorder, func=func)
+
+        get_executor.assert_not_called()
+        self.assertEqual(calls, [(path, threading.current_thread()) for _, path in jobs])
+        self.assertEqual(recorder.keys(), [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from backend.image_context import ImageContext
+from backend.image_quality import analyze_image_quality
+
+
+def make_receipt(width, height, angle=0.0, seed=0):
+    """Grey page with dark horizontal text-like bars, optionally rotated"""
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width), 200, np.uint8)
+    line_height = max(4, height // 60)
+    for y in range(line_height * 3, height - line_height * 3, line_height * 2):
+        x = int(width * 0.08)
+        while x < width * 0.9:
+            word = int(rng.integers(width // 40, width // 12))
+            cv2.rectangle(page, (x, y), (min(x + word, int(width * 0.9)), y + line_height), 40, -1)
+            x += word + width // 60
+    if angle:
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        page = cv2.warpAffine(page, matrix, (width, height), borderValue=200)
+    return page
+
+
+class TestQualityProxy(unittest.TestCase):
+    def test_small_images_are_measured_in_full(self):
+        context = ImageContext(make_receipt(800, 600))
+        self.assertEqual(analyze_image_quality(context, mode='proxy'),
+                         analyze_image_quality(context, mode='full'))
+
+    def test_proxy_matches_full_resolution_decisions(self):
+        context = ImageContext(make_receipt(2400, 3200))
+        full = analyze_image_quality(context, mode='full')
+        proxy = analyze_image_quality(context, mode='proxy')
+
+        self.assertEqual(proxy.resolution, (2400, 3200))
+        self.assertAlmostEqual(proxy.brightness, full.brightness, delta=full.brightness * 0.02)
+        self.assertAlmostEqual(proxy.contrast, full.contrast, delta=full.contrast * 0.05)
+        self.assertAlmostEqual(proxy.sharpness, full.sharpness, delta=full.sharpness * 0.25)
+        self.assertEqual(proxy.quality_score(), full.quality_score())
+
+    def test_proxy_detects_skew(self):
+        context = ImageContext(make_receipt(2400, 3200, angle=4))
+        proxy = analyze_image_quality(context, mode='proxy')
+        self.assertTrue(proxy.needs_deskewing())
+        self.assertAlmostEqual(proxy.skew_angle, -4, delta=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
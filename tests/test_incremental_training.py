@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from backend.ml_models.ml_correction_model import ParsingCorrectionModel
+from backend.services.ml_feedback_service import MLFeedbackService
+from backend.services.ml_training_service import MLTrainingService
+
+
+def record(field, original, corrected):
+    return {
+        'source': 'batch_validation',
+        'raw_ocr_text': f'{field}: {original}',
+        'corrections': {field: {'original': original, 'corrected': corrected}},
+    }
+
+
+class TestIncrementalTraining(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='incremental_training_test_')
+        self.batch_file = os.path.join(self.tmp, 'batch_corrections.jsonl')
+        self.parsing_path = os.path.join(self.tmp, 'parsing_corrections_model.json')
+        patches = [
+            mock.patch.object(MLFeedbackService, 'BATCH_CORRECTIONS_FILE', self.batch_file),
+            mock.patch.object(MLFeedbackService, 'REGULAR_CORRECTIONS_FILE',
+                              os.path.join(self.tmp, 'regular_corrections.jsonl')),
+            # Absolute names - os.path.join(model_dir, name) keeps them in tmp
+            mock.patch.object(MLTrainingService, 'PARSING_MODEL_NAME', self.parsing_path),
+            mock.patch.object(MLTrainingService, 'OCR_MODEL_NAME',
+                              os.path.join(self.tmp, 'ocr_corrections_model.json')),
+            mock.patch('backend.services.ml_training_service.get_model_registry'),
+            mock.patch('backend.services.ml_training_service.LearningHistoryTracker'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def append(self, *records):
+        with open(self.batch_file, 'a') as f:
+            for rec in records:
+                f.write(json.dumps(rec) + '\n')
+
+    def saved_model(self):
+        model = ParsingCorrectionModel()
+        self.assertTrue(model.load_model(self.parsing_path))
+        return model
+
+    def test_incremental_folds_only_new_feedback(self):
+        self.append(record('supplier_name', 'SRI LAKSHM1', 'SRI LAKSHMI'),
+                    record('supplier_name', 'SRI LAKSHM1', 'SRI LAKSHMI'),
+                    record('net_total', '1383.4O', '1383.40'))
+        first = MLTrainingService.train_models(save_models=True, mode='full')
+        self.assertEqual((first['mode'], first['total_samples']), ('full', 3))
+
+        self.append(record('supplier_name', 'SRI LAKSHM1', 'SRI LAKSHMI'),
+                    record('voucher_number', '12E4', '1234'))
+        second = MLTrainingService.train_models(save_models=True)
+        self.assertEqual((second['mode'], second['total_samples']), ('incremental', 2))
+        self.assertEqual(second['corrections_used_count'], 2)
+        self.assertEqual(second['model_total_samples'], 5)
+
+        # Same counters as retraining on everything
+        folded = self.saved_model()
+        MLTrainingService.train_models(save_models=True, mode='full')
+        rebuilt = self.saved_model()
+        self.assertEqual(folded.field_stats, rebuilt.field_stats)
+        self.assertEqual(folded.total_samples, rebuilt.total_samples)
+        self.assertEqual(folded.field_stats['supplier_name']['SRI LAKSHM1']['SRI LAKSHMI'], 3)
+
+    def test_nothing_new_leaves_model_untouched(self):
+        self.append(record('net_total', '1383.4O', '1383.40'))
+        MLTrainingService.train_models(save_models=True, mode='full')
+        before = os.stat(self.parsing_path.replace('.json', '.bin')).st_mtime_ns
+
+        result = MLTrainingService.train_models(save_models=True)
+        self.assertEqual((result['mode'], result['total_samples']), ('incremental', 0))
+        self.assertEqual(os.stat(self.parsing_path.replace('.json', '.bin')).st_mtime_ns, before)
+
+    def test_without_saved_watermark_runs_full(self):
+        self.append(record('net_total', '1383.4O', '1383.40'))
+        result = MLTrainingService.train_models(save_models=True)
+        self.assertEqual((result['mode'], result['total_samples']), ('full', 1))
+        self.assertIn('batch_corrections.jsonl', self.saved_model().training_watermark['feedback'])
+
+    def test_collects_once_per_run(self):
+        self.append(record('net_total', '1383.4O', '1383.40'))
+        with mock.patch.object(MLTrainingService, 'collect_training_data',
+                               wraps=MLTrainingService.collect_training_data) as collect:
+            MLTrainingService.train_models(save_models=False, mode='full')
+        self.assertEqual(collect.call_count, 1)
+
+    def test_limit_leaves_the_rest_for_next_run(self):
+        self.append(record('net_total', '1', '2'))
+        MLTrainingService.train_models(save_models=True, mode='full')
+        self.append(*[record('net_total', f'{n}O', f'{n}0') for n in range(5)])
+
+        self.assertEqual(MLTrainingService.train_models(feedback_limit=3, save_models=True)['total_samples'], 3)
+        self.assertEqual(MLTrainingService.train_models(feedback_limit=3, save_models=True)['total_samples'], 2)
+        self.assertEqual(self.saved_model().total_samples, 6)
+
+    @staticmethod
+    def voucher(voucher_id, corrected):
+        return {'id': voucher_id, 'validated_at': f'2026-01-0{voucher_id} 10:00:00', 'raw_ocr_text': '',
+                'parsed_json_original': {'master': {'supplier_name': 'SRI LAKSHM1'}},
+                'parsed_json': {'master': {'supplier_name': corrected}}}
+
+    def test_consumed_voucher_is_not_counted_twice(self):
+        watermark = {'database': {'validated_at': '2026-01-04 10:00:00', 'id': 4, 'consumed': [5, 7]},
+                     'feedback': {}}
+        fetched = [self.voucher(5, 'SRI LAKSHMI STORES'), self.voucher(6, 'SRI LAKSHMI')]
+        with mock.patch('backend.services.ml_training_service.get_connection'), \
+                mock.patch.object(MLTrainingService, '_fetch_vouchers_since', return_value=fetched):
+            data = MLTrainingService.collect_training_data(limit=2, watermark=watermark)
+
+        self.assertEqual([c['corrected'] for c in data['parsing_corrections']], ['SRI LAKSHMI'])
+        # 5 is behind the new watermark now; 7 was not reached yet
+        self.assertEqual(data['watermark']['database'],
+                         {'validated_at': '2026-01-06 10:00:00', 'id': 6, 'consumed': [7]})
+
+    def test_full_rebuild_reads_watermark_before_vouchers(self):
+        cur = mock.MagicMock()
+        cur.fetchone.return_value = {'validated_at': '2026-01-05 10:00:00', 'id': 5}
+        # 6 was validated after the watermark was read, 4 before
+        cur.fetchall.return_value = [self.voucher(6, 'SRI LAKSHMI'), self.voucher(4, 'SRI LAKSHMI')]
+        with mock.patch('backend.services.ml_training_service.get_connection') as get_connection:
+            get_connection.return_value.cursor.return_value = cur
+            data = MLTrainingService.collect_training_data()
+
+        queries = [call.args[0] for call in cur.execute.call_args_list]
+        self.assertIn('ORDER BY validated_at DESC', queries[0])
+        self.assertIn('ORDER BY created_at DESC', queries[1])
+        self.assertEqual(len(data['parsing_corrections']), 2)
+        self.assertEqual(data['watermark']['database'],
+                         {'validated_at': '2026-01-05 10:00:00', 'id': 5, 'consumed': [6]})
+
+
+class TestReadCorrectionsSince(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='feedback_offsets_test_')
+        self.batch_file = os.path.join(self.tmp, 'batch_corrections.jsonl')
+        for name, path in (('BATCH_CORRECTIONS_FILE', self.batch_file),
+                           ('REGULAR_CORRECTIONS_FILE', os.path.join(self.tmp, 'regular.jsonl'))):
+            patch = mock.patch.object(MLFeedbackService, name, path)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_partial_line_and_replaced_file(self):
+        with open(self.batch_file, 'w') as f:
+            f.write(json.dumps(record('a', '1', '2')) + '\n' + '{"source": "batch_val')
+        corrections, offsets = MLFeedbackService.read_corrections_since({})
+        self.assertEqual(corrections['total'], 1)
+
+        # The half-written record is picked up once it is complete
+        with open(self.batch_file, 'a') as f:
+            f.write('idation", "corrections": {}}\n')
+        corrections, offsets = MLFeedbackService.read_corrections_since(offsets)
+        self.assertEqual(corrections['batch_corrections'], [{'source': 'batch_validation', 'corrections': {}}])
+
+        # A file shorter than the watermark was replaced - read it again from the start
+        with open(self.batch_file, 'w') as f:
+            f.write(json.dumps(record('b', '1', '2')) + '\n')
+        corrections, _ = MLFeedbackService.read_corrections_since(offsets)
+        self.assertEqual(corrections['batch_corrections'][0]['corrections'], {'b': {'original': '1', 'corrected': '2'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from backend.services import ingestion_pipeline
+from backend.services.ingestion_pipeline import IngestJob, IngestionPipeline, PipelineStage
+
+
+def make_job(index, updates=None, path='x.jpg'):
+    def on_update(job, changes, pending_only):
+        updates.append((job.index, changes, pending_only))
+    return IngestJob(queue_id='q', index=index, filepath=path, filename=path,
+                     on_update=on_update if updates is not None else None)
+
+
+class TestIngestionPipeline(unittest.TestCase):
+    def test_jobs_pass_every_stage_in_order(self):
+        seen = []
+        lock = threading.Lock()
+
+        def record(name):
+            def stage(job):
+                with lock:
+                    seen.append((name, job.index))
+            return stage
+
+        pipeline = IngestionPipeline([
+            PipelineStage('a', record('a'), workers=2),
+            PipelineStage('b', record('b'), workers=1, maxsize=1),
+        ])
+        updates = []
+        for i in range(5):
+            pipeline.submit(make_job(i, updates))
+        pipeline.join()
+
+        for i in range(5):
+            self.assertLess(seen.index(('a', i)), seen.index(('b', i)))
+        stats = pipeline.stats()
+        self.assertEqual(stats['a']['processed'], 5)
+        self.assertEqual(stats['b']['processed'], 5)
+        # Final stage reports per-stage timings
+        self.assertEqual(sorted(u[0] for u in updates), list(range(5)))
+        self.assertEqual(set(updates[0][1]['ingest_ms']), {'a', 'b'})
+
+    def test_submit_does_not_wait_for_slow_stages(self):
+        release = threading.Event()
+        pipeline = IngestionPipeline([
+            PipelineStage('fast', lambda job: None),
+            PipelineStage('slow', lambda job: release.wait(5), maxsize=1),
+        ])
+        start = time.monotonic()
+        for i in range(10):
+            pipeline.submit(make_job(i))
+        self.assertLess(time.monotonic() - start, 0.5)
+        time.sleep(0.1)
+        # Bounded: one job in the slow stage, one waiting in its queue
+        self.assertLessEqual(pipeline.stats()['slow']['queued'], 1)
+        release.set()
+        pipeline.join()
+        self.assertEqual(pipeline.stats()['slow']['processed'], 10)
+
+    def test_stage_failure_does_not_stop_the_job(self):
+        reached = []
+
+        def fail(job):
+            raise RuntimeError('boom')
+
+        pipeline = IngestionPipeline([
+            PipelineStage('fail', fail),
+            PipelineStage('next', lambda job: reached.append(job.index)),
+        ])
+        pipeline.submit(make_job(0))
+        pipeline.join()
+        self.assertEqual(reached, [0])
+        self.assertEqual(pipeline.stats()['fail']['errors'], 1)
+
+
+class TestDetectStage(unittest.TestCase):
+    def test_detector_crash_still_finishes_detection(self):
+        updates = []
+        job = make_job(0, updates)
+        with mock.patch('backend.smart_crop.SmartReceiptDetector.detect_receipt', side_effect=MemoryError):
+            with self.assertRaises(MemoryError):
+                ingestion_pipeline.detect_stage(job)
+        self.assertEqual(updates, [(0, {'auto_crop_info': None, 'auto_crop_status': 'done'}, False)])
+
+
+class TestCropStage(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='ingest_')
+        self.path = os.path.join(self.folder, 'receipt.jpg')
+        cv2.imwrite(self.path, np.full((200, 100, 3), 255, np.uint8))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def detection(self, confidence):
+        return {'bbox': [10, 20, 50, 100], 'confidence': confidence, 'method': 'edge_detection',
+                'cropped_image': np.zeros((100, 50, 3), np.uint8)}
+
+    def test_confident_detection_is_cropped_when_enabled(self):
+        updates = []
+        job = make_job(0, updates, self.path)
+        job.detection = self.detection(0.9)
+        with mock.patch.dict(os.environ, {'INGEST_AUTO_CROP': '1'}):
+            ingestion_pipeline.crop_stage(job)
+        self.assertTrue(os.path.exists(job.cropped_path))
+        self.assertEqual(cv2.imread(job.cropped_path).shape[:2], (100, 50))
+        self.assertEqual(updates[0][1]['cropped_path'], job.cropped_path)
+        self.assertTrue(updates[0][2])  # only while the file is still pending
+        self.assertIsNone(job.detection)
+
+    def test_low_confidence_or_disabled_leaves_file_alone(self):
+        for env, confidence in (({'INGEST_AUTO_CROP': '1'}, 0.7), ({'INGEST_AUTO_CROP': '0'}, 0.95)):
+            updates = []
+            job = make_job(0, updates, self.path)
+            job.detection = self.detection(confidence)
+            with mock.patch.dict(os.environ, env):
+                ingestion_pipeline.crop_stage(job)
+            self.assertIsNone(job.cropped_path)
+            self.assertEqual(updates, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
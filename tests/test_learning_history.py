@@ -0,0 +1,97 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from backend.services.learning_history_tracker import LearningHistoryTracker
+
+
+def session(n, field='net_total', patterns=1):
+    corrections = [{'id': f'{field}_{n}_{i}', 'field': field, 'auto': f'{n}O', 'corrected': f'{n}0'}
+                   for i in range(patterns)]
+    return corrections, {'new_patterns': [dict(c) for c in corrections], 'status': 'success'}
+
+
+class TestLearningHistoryTracker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix='learning_history_test_'))
+        self.legacy = self.tmp / 'learning_history.json'
+        patches = [
+            mock.patch.object(LearningHistoryTracker, 'HISTORY_DIR', self.tmp / 'history'),
+            mock.patch.object(LearningHistoryTracker, 'HISTORY_FILE', self.legacy),
+            mock.patch.object(LearningHistoryTracker, '_summary_cache', None),
+            mock.patch.object(LearningHistoryTracker, '_ids_cache', None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_record_appends_and_summarises(self):
+        for n in range(8):
+            LearningHistoryTracker.record_training_session(*session(n, patterns=2))
+        LearningHistoryTracker.record_training_session(*session(8, field='supplier_name'))
+
+        summary = LearningHistoryTracker.get_summary()
+        self.assertEqual(summary['total_sessions'], 9)
+        self.assertEqual(summary['total_corrections'], 17)
+        self.assertEqual(summary['fields_trained'], {'net_total': 16, 'supplier_name': 1})
+        self.assertEqual(len(summary['recent_sessions']), 5)
+        self.assertNotIn('corrections_used', summary['recent_sessions'][-1])
+
+        lines = (self.tmp / 'history' / 'sessions.jsonl').read_text().splitlines()
+        self.assertEqual(len(lines), 9)
+        self.assertEqual(len(LearningHistoryTracker.get_already_trained_corrections()), 17)
+        self.assertEqual([s['corrections_count'] for s in LearningHistoryTracker.get_sessions(2)], [2, 1])
+
+        recent = LearningHistoryTracker.get_patterns_by_field()['net_total']
+        self.assertEqual((recent['count'], len(recent['recent'])), (16, 10))
+        self.assertEqual(recent['recent'][-1]['auto'], '7O')
+
+    def test_legacy_json_imported_once(self):
+        legacy = {'version': '1.0', 'created_at': '2025-11-01T09:00:00', 'training_sessions': [],
+                  'total_corrections_learned': 0, 'patterns_learned': {}}
+        for n in range(3):
+            corrections, results = session(n)
+            legacy['training_sessions'].append({
+                'timestamp': f'2025-11-0{n + 1}T10:00:00', 'corrections_count': 1,
+                'corrections_used': corrections, 'results': results,
+                'new_patterns': results['new_patterns'], 'patterns_count': 1})
+        self.legacy.write_text(json.dumps(legacy))
+
+        history = LearningHistoryTracker.load_history()
+        self.assertEqual(history['training_sessions'], legacy['training_sessions'])
+        self.assertEqual(history['created_at'], '2025-11-01T09:00:00')
+        self.assertEqual(LearningHistoryTracker.get_summary()['last_training'], '2025-11-03T10:00:00')
+
+        # Only new sessions are added afterwards - the JSON file is not read again
+        LearningHistoryTracker.record_training_session(*session(9))
+        self.assertEqual(LearningHistoryTracker.get_summary()['total_sessions'], 4)
+        self.assertTrue(self.legacy.exists())
+        self.assertEqual(json.loads(self.legacy.read_text()), legacy)
+
+    def test_summary_catches_up_with_log(self):
+        LearningHistoryTracker.record_training_session(*session(1))
+        # Another process appended a session (or we crashed before rewriting the summary)
+        corrections, results = session(2, field='voucher_date')
+        with open(self.tmp / 'history' / 'sessions.jsonl', 'a') as f:
+            f.write(json.dumps({'timestamp': 't', 'corrections_count': 1, 'corrections_used': corrections,
+                                'results': results, 'new_patterns': results['new_patterns']}) + '\n')
+
+        self.assertEqual(LearningHistoryTracker.get_summary()['fields_trained'],
+                         {'net_total': 1, 'voucher_date': 1})
+        self.assertIn('voucher_date_2_0', LearningHistoryTracker.get_already_trained_corrections())
+
+        # A lost summary is rebuilt from the log
+        (self.tmp / 'history' / 'summary.json').unlink()
+        LearningHistoryTracker._summary_cache = None
+        self.assertEqual(LearningHistoryTracker.get_summary()['total_sessions'], 2)
+        self.assertEqual(len(LearningHistoryTracker.get_already_trained_corrections()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
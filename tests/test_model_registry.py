@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from backend.ml_models.ml_correction_model import OCRCorrectionModel
+from backend.ml_models.model_registry import ModelRegistry, load_ocr_corrections, load_smart_crop
+from backend.ml_models.model_store import save_state
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='model_registry_test_')
+        self.path = os.path.join(self.tmp, 'model.json')
+        self.registry = ModelRegistry(check_interval=0)
+        self.calls = []
+
+        def loader(path):
+            self.calls.append(path)
+            return load_smart_crop(path)
+
+        self.registry.register('crop', self.path, loader)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, data, fmt='binary'):
+        save_state(self.path, 'smart_crop', 1, data, fmt=fmt)
+
+    def test_loads_once_and_serves_same_snapshot(self):
+        self.write({'version': '2.0', 'trained_at': 't1'})
+        first = self.registry.get('crop')
+        for _ in range(20):
+            self.assertIs(self.registry.get('crop'), first)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(first.generation, 1)
+        self.assertEqual(first.model_version, '2.0')
+        self.assertEqual(first.trained_at, 't1')
+
+    def test_file_change_swaps_snapshot(self):
+        self.write({'version': '2.0', 'value': 1})
+        old = self.registry.get('crop')
+        self.write({'version': '2.0', 'value': 2})
+
+        new = self.registry.get('crop')
+        self.assertIsNot(new, old)
+        self.assertEqual(new.model['value'], 2)
+        self.assertEqual(new.generation, 2)
+        # A reader holding the old snapshot still sees the old model
+        self.assertEqual(old.model['value'], 1)
+        stats = self.registry.stats()['crop']
+        self.assertEqual((stats['loads'], stats['reloads']), (2, 1))
+
+    def test_check_interval_throttles_stat(self):
+        registry = ModelRegistry(check_interval=3600)
+        registry.register('crop', self.path, load_smart_crop)
+        self.write({'value': 1})
+        snapshot = registry.get('crop')
+        self.write({'value': 2})
+        self.assertIs(registry.get('crop'), snapshot)
+        # An explicit reload does not wait for the interval
+        registry.reload('crop')
+        self.assertEqual(registry.get('crop').model['value'], 2)
+
+    def test_bad_file_keeps_previous_version(self):
+        self.write({'value': 1})
+        good = self.registry.get('crop')
+        with open(self.path.replace('.json', '.bin'), 'wb') as f:
+            f.write(b'TKML garbage')
+
+        self.assertIs(self.registry.get('crop'), good)
+        stats = self.registry.stats()['crop']
+        self.assertEqual(stats['failures'], 1)
+        self.assertIsNotNone(stats['last_error'])
+
+    def test_missing_file(self):
+        self.assertIsNone(self.registry.get('crop'))
+        self.write({'value': 1})
+        self.assertIsNotNone(self.registry.get('crop'))
+        os.remove(self.path.replace('.json', '.bin'))
+        self.assertIsNone(self.registry.model('crop'))
+
+    def test_concurrent_readers_load_once(self):
+        self.write({'value': 1})
+        barrier = threading.Barrier(8)
+        seen = []
+
+        def reader():
+            barrier.wait()
+            seen.append(self.registry.get('crop'))
+
+        threads = [threading.Thread(target=reader) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len({id(s) for s in seen}), 1)
+
+    def test_correction_model_round_trip(self):
+        model = OCRCorrectionModel()
+        model.learn_from_correction('', 'S00', '500')
+        model.learn_from_correction('', 'S1', '51')
+        path = os.path.join(self.tmp, 'ocr_corrections_model.json')
+        self.assertTrue(model.save_model(path))
+
+        self.registry.register('ocr', path, load_ocr_corrections)
+        loaded = self.registry.model('ocr')
+        self.assertEqual(loaded.apply_ocr_corrections('S25'), '525')
+        self.assertEqual(os.listdir(self.tmp), ['ocr_corrections_model.bin'])
+
+    def test_json_model_still_loads_and_binary_supersedes_it(self):
+        self.write({'version': '2.0', 'value': 'json'}, fmt='json')
+        self.assertEqual(self.registry.model('crop')['value'], 'json')
+        self.write({'version': '2.0', 'value': 'binary'})
+        self.assertEqual(self.registry.model('crop')['value'], 'binary')
+
+
+if __name__ == '__main__':
+    unittest.main()
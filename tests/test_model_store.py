@@ -0,0 +1,121 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from collections import defaultdict
+from datetime import datetime
+from unittest import mock
+
+from backend.ml_models import model_store
+from backend.ml_models.ml_correction_model import ParsingCorrectionModel
+from backend.ml_models.model_store import ModelFormatError, load_state, save_state
+
+
+class TestModelStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='model_store_test_')
+        self.path = os.path.join(self.tmp, 'demo_model.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_binary_state_matches_json_round_trip(self):
+        counts = defaultdict(int, {'a': 2})
+        state = {
+            'counts': counts,
+            'pair': (1, 'x'),
+            'when': datetime(2026, 1, 4, 10, 30),
+            'ids': {1: 'one', None: 'none'},
+            'nested': {'f': [1.5, True, None]},
+        }
+        save_state(self.path, 'demo', 3, state)
+        schema, loaded = load_state(self.path, 'demo')
+
+        self.assertEqual(schema, 3)
+        self.assertEqual(loaded, json.loads(json.dumps(state, default=str)))
+        self.assertIs(type(loaded['counts']), dict)
+        self.assertEqual(sorted(os.listdir(self.tmp)), ['demo_model.bin'])
+
+    def test_header_and_export(self):
+        save_state(self.path, 'demo', 2, {'x': 1})
+        header = model_store.read_header(self.path)
+        self.assertEqual((header['kind'], header['schema_version'], header['format_version']),
+                         ('demo', 2, model_store.FORMAT_VERSION))
+
+        out = model_store.export_json(self.path)
+        self.assertTrue(out.endswith('demo_model.export.json'))
+        with open(out) as f:
+            self.assertEqual(json.load(f), {'x': 1, 'schema_version': 2})
+        # The export does not shadow the binary
+        self.assertEqual(model_store.resolve(self.path), model_store.binary_path(self.path))
+
+    def test_newer_file_wins(self):
+        save_state(self.path, 'demo', 1, {'from': 'binary'})
+        time.sleep(0.01)
+        save_state(self.path, 'demo', 1, {'from': 'json'}, fmt='json')
+        self.assertEqual(load_state(self.path, 'demo')[1]['from'], 'json')
+        save_state(self.path, 'demo', 1, {'from': 'binary again'})
+        self.assertEqual(load_state(self.path, 'demo')[1]['from'], 'binary again')
+
+    def test_missing_model(self):
+        self.assertIsNone(load_state(self.path, 'demo'))
+
+    def test_rejects_corrupt_or_foreign_files(self):
+        save_state(self.path, 'demo', 1, {'x': 'y' * 100})
+        bin_path = model_store.binary_path(self.path)
+        with open(bin_path, 'rb') as f:
+            data = bytearray(f.read())
+
+        with self.assertRaises(ModelFormatError):
+            load_state(self.path, 'other_kind')
+        with self.assertRaises(ModelFormatError):
+            load_state(self.path, 'demo', max_schema=0)
+
+        data[-5] ^= 0xFF
+        with open(bin_path, 'wb') as f:
+            f.write(bytes(data))
+        with self.assertRaisesRegex(ModelFormatError, 'corrupt'):
+            load_state(self.path, 'demo')
+
+    def test_payload_cannot_name_globals(self):
+        payload = pickle.dumps(os.getcwd, protocol=5)  # resolves os.getcwd on load
+        header = model_store._HEADER.pack(model_store.MAGIC, model_store.FORMAT_VERSION, 1,
+                                          b'demo', len(payload), __import__('zlib').crc32(payload))
+        with open(model_store.binary_path(self.path), 'wb') as f:
+            f.write(header + payload)
+        with self.assertRaisesRegex(ModelFormatError, 'only plain data'):
+            load_state(self.path, 'demo')
+
+    def test_parsing_model_binary_equals_json(self):
+        model = ParsingCorrectionModel()
+        model.learned_anchors['SUPPLIER A']['net_total']['Net Total'] = 3
+        model.learn_from_correction('item_quantity', '', '1O', '10')
+
+        model._model_dir = self.tmp
+        with mock.patch.dict(os.environ, {'MODEL_STORE_FORMAT': 'both'}):
+            self.assertTrue(model.save_model('parsing.json'))
+
+        from_binary = ParsingCorrectionModel()
+        from_binary._model_dir = self.tmp
+        self.assertTrue(from_binary.load_model('parsing.json'))
+        self.assertEqual(model_store.resolve(os.path.join(self.tmp, 'parsing.json')),
+                         os.path.join(self.tmp, 'parsing.bin'))
+
+        os.remove(os.path.join(self.tmp, 'parsing.bin'))
+        from_json = ParsingCorrectionModel()
+        from_json._model_dir = self.tmp
+        self.assertTrue(from_json.load_model('parsing.json'))
+
+        for loaded in (from_binary, from_json):
+            self.assertEqual(loaded.learned_anchors['SUPPLIER A']['net_total'], {'Net Total': 3})
+            self.assertEqual(loaded.get_correction_suggestion('item_quantity', '1O')['suggestion'], '10')
+            # Loaded models can keep learning
+            loaded.learn_from_correction('item_quantity', '', '2O', '20')
+            self.assertEqual(loaded.field_stats['item_quantity']['2O']['20'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from backend import multi_scale_ocr
+from backend.image_context import ImageContext
+
+
+def fake_process(confidences, calls):
+    lock = threading.Lock()
+
+    def process(context, scale, config):
+        with lock:
+            calls.append(scale)
+        return {'text': f'text@{scale}', 'confidence': confidences[scale], 'scale': scale, 'word_count': 10}
+    return process
+
+
+class TestRunScales(unittest.TestCase):
+    def setUp(self):
+        self.context = ImageContext(np.full((20, 30), 255, np.uint8))
+        self.confidences = {1.0: 70.0, 1.5: 92.0, 2.0: 88.0}
+
+    def run_scales(self, **kwargs):
+        calls = []
+        with mock.patch.object(multi_scale_ocr, 'process_at_scale', fake_process(self.confidences, calls)):
+            results = multi_scale_ocr.run_scales(self.context, [2.0, 1.0, 1.5], '--psm 6', **kwargs)
+        return results, calls
+
+    def test_results_keep_requested_order(self):
+        for workers in (1, 3):
+            results, calls = self.run_scales(workers=workers)
+            self.assertEqual([r['scale'] for r in results], [2.0, 1.0, 1.5])
+            self.assertEqual(sorted(calls), [1.0, 1.5, 2.0])
+
+    def test_early_exit_skips_larger_scales(self):
+        results, calls = self.run_scales(workers=1, target_confidence=90)
+        self.assertEqual(calls, [1.0, 1.5])
+        self.assertEqual([r['scale'] for r in results], [1.0, 1.5])
+
+    def test_failed_scale_is_skipped(self):
+        def process(context, scale, config):
+            if scale == 1.5:
+                raise RuntimeError('boom')
+            return {'text': '', 'confidence': 50.0, 'scale': scale, 'word_count': 0}
+
+        with mock.patch.object(multi_scale_ocr, 'process_at_scale', process):
+            results = multi_scale_ocr.run_scales(self.context, [1.0, 1.5, 2.0], '--psm 6', workers=2)
+        self.assertEqual([r['scale'] for r in results], [1.0, 2.0])
+
+    def test_concurrent_calls_with_different_scale_counts(self):
+        def process(context, scale, config):
+            return {'text': '', 'confidence': 50.0, 'scale': scale, 'word_count': 0}
+
+        scale_lists = [[1.0, 1.5], [1.0, 1.5, 2.0], [1.0, 1.5, 2.0, 2.5]]
+        outcomes, lock = [], threading.Lock()
+
+        def call(scales):
+            try:
+                results = multi_scale_ocr.run_scales(self.context, scales, '--psm 6', workers=len(scales))
+                outcome = [r['scale'] for r in results] == scales
+            except Exception as e:
+                outcome = e
+            with lock:
+                outcomes.append(outcome)
+
+        with mock.patch.object(multi_scale_ocr, 'process_at_scale', process):
+            threads = [threading.Thread(target=call, args=(scale_lists[i % 3],)) for i in range(60)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(outcomes, [True] * 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
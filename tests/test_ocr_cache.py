@@ -0,0 +1,74 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from backend.ocr_cache import OCRResultCache, hash_file
+
+
+class TestOCRResultCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix='ocr_cache_test_')
+        self.cache = OCRResultCache(self.cache_dir, max_bytes=10 * 1024 * 1024, enabled=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_round_trip_and_counters(self):
+        key = self.cache.make_key('abc', 'optimal', '--oem 1 --psm 4', 'tesseract 5.3.0')
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.put(key, {'raw_text': 'Commission @4% 64.10', 'confidence': 91.5})
+        self.assertEqual(self.cache.get(key)['raw_text'], 'Commission @4% 64.10')
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_key_covers_every_component(self):
+        base = ('abc', 'optimal', '--psm 4', 'v5')
+        keys = {
+            self.cache.make_key(*base),
+            self.cache.make_key('abd', 'optimal', '--psm 4', 'v5'),
+            self.cache.make_key('abc', 'enhanced', '--psm 4', 'v5'),
+            self.cache.make_key('abc', 'optimal', '--psm 6', 'v5'),
+            self.cache.make_key('abc', 'optimal', '--psm 4', 'v4'),
+            self.cache.make_key(*base, crop_box=(0, 0, 100, 200)),
+        }
+        self.assertEqual(len(keys), 6)
+
+    def test_lru_eviction_keeps_recently_used(self):
+        cache = OCRResultCache(self.cache_dir, max_bytes=1000, enabled=True)
+        keys = [cache.make_key(str(i), 'm', 'c', 'v') for i in range(20)]
+        for i, key in enumerate(keys):
+            cache.put(key, {'raw_text': 'x' * 80})
+            # Keep the first entry hot
+            cache.get(keys[0])
+            time.sleep(0.01)
+
+        stats = cache.stats()
+        self.assertLessEqual(stats['size_bytes'], 1000)
+        self.assertGreater(stats['evictions'], 0)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[-1]))
+        self.assertIsNone(cache.get(keys[1]))
+
+    def test_disabled_cache_is_a_no_op(self):
+        cache = OCRResultCache(self.cache_dir, enabled=False)
+        key = cache.make_key('abc', 'm', 'c', 'v')
+        cache.put(key, {'raw_text': 'x'})
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_hash_file_matches_content(self):
+        path = os.path.join(self.cache_dir, 'a.bin')
+        with open(path, 'wb') as f:
+            f.write(b'receipt')
+        self.assertEqual(hash_file(path), hashlib.md5(b'receipt').hexdigest())
+
+
+if __name__ == '__main__':
+    unittest.main()
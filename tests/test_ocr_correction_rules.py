@@ -0,0 +1,71 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from collections import defaultdict
+
+from backend.ml_models.ml_correction_model import OCRCorrectionModel
+
+
+def model_with(stats):
+    model = OCRCorrectionModel()
+    for bad, corrections in stats.items():
+        model.pattern_stats[bad] = defaultdict(int, corrections)
+    return model
+
+
+class TestCompiledCorrections(unittest.TestCase):
+    def test_only_confident_rules_apply(self):
+        model = model_with({
+            'S': {'5': 4},                # applied
+            'O': {'0': 3, 'Q': 1},        # 75% - below RULE_MIN_CONFIDENCE
+            'l': {'1': 1},                # one sample only
+        })
+        self.assertEqual(model.correction_rules(), {'S': '5'})
+        self.assertEqual(model.apply_ocr_corrections('SOl'), '5Ol')
+
+    def test_longest_pattern_wins(self):
+        model = model_with({'S': {'5': 2}, 'S0': {'50': 2}, 'S00': {'500': 2}})
+        self.assertEqual(model.apply_ocr_corrections('S S0 S00 S000'), '5 50 500 5000')
+
+    def test_replacements_are_not_rescanned(self):
+        # Sequential str.replace turned 'Tl' into '1' and then '1' into 'I'
+        model = model_with({'Tl': {'1': 2}, '1': {'I': 2}})
+        self.assertEqual(model.apply_ocr_corrections('Tl 1'), '1 I')
+
+    def test_result_independent_of_insertion_order(self):
+        stats = {'ab': {'X': 2}, 'bc': {'Y': 2}, 'a': {'Z': 2}, 'c': {'W': 2}}
+        items = list(stats.items())
+        outputs = set()
+        for seed in range(10):
+            random.Random(seed).shuffle(items)
+            outputs.add(model_with(dict(items)).apply_ocr_corrections('abcabc'))
+        self.assertEqual(outputs, {'XWXW'})
+
+    def test_special_characters_are_literal(self):
+        model = model_with({'.': {',': 2}, '(': {'C': 2}, '\\': {'/': 2}})
+        self.assertEqual(model.apply_ocr_corrections('1.5 (a) \\'), '1,5 Ca) /')
+
+    def test_learning_recompiles(self):
+        model = OCRCorrectionModel()
+        self.assertEqual(model.apply_ocr_corrections('S25'), 'S25')
+        model.learn_from_correction('', 'S00', '500')
+        model.learn_from_correction('', 'S1', '51')
+        self.assertEqual(model.apply_ocr_corrections('S25'), '525')
+
+    def test_load_compiles_rules(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, 'model.json')
+            model_with({'O': {'0': 5}}).save_model(path)
+            loaded = OCRCorrectionModel()
+            self.assertTrue(loaded.load_model(path))
+            self.assertIsNotNone(loaded._replacer)
+            self.assertEqual(loaded.apply_ocr_corrections('1O5'), '105')
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
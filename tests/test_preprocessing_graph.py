@@ -0,0 +1,51 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from backend.image_context import ImageContext
+from backend.preprocessing_graph import Step, run_preprocessing
+
+
+def make_receipt():
+    page = np.full((600, 1200), 210, np.uint8)
+    for y in range(40, 560, 36):
+        cv2.putText(page, 'Commission @4% 64.10', (40, y), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 30, 2)
+    return page
+
+
+class TestPreprocessingGraph(unittest.TestCase):
+    def test_modes_share_common_prefix(self):
+        context = ImageContext(make_receipt())
+        simple = run_preprocessing(context, 'simple')
+        experimental = run_preprocessing(context, 'experimental')
+
+        self.assertFalse(simple.steps[-1]['cached'])
+        by_step = {s['step']: s['cached'] for s in experimental.steps}
+        self.assertTrue(by_step['ocr_base'])
+        self.assertTrue(by_step['quality'])
+        self.assertTrue(by_step['pil_median(size=3)'])
+        self.assertFalse(by_step['otsu'])
+
+    def test_memoized_result_matches_fresh_run(self):
+        shared = ImageContext(make_receipt())
+        for method in ('optimal', 'aggressive', 'enhanced', 'adaptive'):
+            run_preprocessing(shared, method)
+        for method in ('optimal', 'aggressive', 'enhanced', 'adaptive'):
+            fresh = run_preprocessing(ImageContext(make_receipt()), method)
+            again = run_preprocessing(shared, method)
+            self.assertTrue(all(s['cached'] for s in again.steps))
+            np.testing.assert_array_equal(fresh.image, again.image)
+
+    def test_intermediates_are_read_only(self):
+        run = run_preprocessing(ImageContext(make_receipt()), 'enhanced')
+        self.assertFalse(run.image.flags.writeable)
+
+    def test_step_identity_ignores_log_text(self):
+        self.assertEqual(Step.of('clahe', clip_limit=1.2),
+                         Step.of('clahe', log_result='x', clip_limit=1.2))
+        self.assertNotEqual(Step.of('clahe', clip_limit=1.2), Step.of('clahe', clip_limit=2.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import contextlib
+import io
+import re
+import unittest
+
+from backend.quality_focused_extractor import (DEDUCTION_PATTERNS, PATTERNS, VoucherLineIndex,
+                                               extract_with_quality)
+
+SAMPLE = """VoucherNumber116
+VoucherDate 11/01/2026
+Supp Name MACHAGIRI/A
+Qty Price Amount
+Mango 1 550.00 550.00
+2 100.00 200.00
+Total 3 750.00
+(-) UnLoading 16.00"""
+
+
+def extract(text):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return extract_with_quality(text)
+
+
+class TestQualityFocusedExtractor(unittest.TestCase):
+    def test_sample_voucher(self):
+        result = extract(SAMPLE)
+        fields = {name: field.value for name, field in result['fields'].items()}
+        self.assertEqual(fields, {'voucher_number': '116', 'voucher_date': '2026-01-11',
+                                  'supplier_name': 'MACHAGIRI/A', 'gross_total': 750.0, 'net_total': None})
+        self.assertEqual(result['items'], [
+            {'item_name': 'Mango', 'quantity': 1, 'unit_price': 550.0, 'line_amount': 550.0},
+            {'item_name': 'Item 2', 'quantity': 2, 'unit_price': 100.0, 'line_amount': 200.0},
+        ])
+        self.assertEqual(result['deductions'], [
+            {'deduction_type': 'Unloading', 'amount': 16.0},
+            {'deduction_type': 'Commission @4%', 'amount': 30.0},
+            {'deduction_type': 'Less for Damages', 'amount': 37.5},
+        ])
+
+    def test_ocr_fixes_apply_before_indexing(self):
+        result = extract("VoucherNumber115\nVoucherDate 1170172026\nUn1oading 16.00")
+        self.assertEqual(result['fields']['voucher_date'].value, '2026-01-11')
+        self.assertEqual(result['deductions'][0], {'deduction_type': 'Unloading', 'amount': 16.0})
+
+    def test_patterns_compiled_once(self):
+        self.assertTrue(all(isinstance(p, re.Pattern) for p in PATTERNS.values()))
+        self.assertTrue(all(isinstance(p, re.Pattern)
+                            for config in DEDUCTION_PATTERNS.values() for p in config['patterns']))
+
+    def test_line_index_memoizes(self):
+        index = VoucherLineIndex("  Supp Name X  \n\nQty Price Amount\n1 550.00 550.00")
+        self.assertEqual(index.lines, ['Supp Name X', 'Qty Price Amount', '1 550.00 550.00'])
+        self.assertEqual(index.first('items_header')[0], 1)
+        self.assertEqual(index.first('items_header', start=2), (-1, None))
+        self.assertIs(index.search('supp_indicator', 0), index.search('supp_indicator', 0))
+        self.assertEqual(index.numbers(2), ['1', '550.00', '550.00'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from backend.services.queue_store import QueueStore
+
+
+def make_queue(queue_id, files=3):
+    return {
+        'queue_id': queue_id,
+        'batch_id': 7,
+        'files': [{'original_filename': f'r{i}.jpg', 'original_path': f'/u/r{i}.jpg',
+                   'ocr_result': None, 'status': 'pending'} for i in range(files)],
+        'current_index': 0,
+        'phase': 'crop',
+        'total': files,
+        'completed': 0,
+        'skipped': 0,
+        'created_at': '2026-01-04T10:00:00',
+    }
+
+
+class TestQueueStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='queue_store_test_')
+        self.db = os.path.join(self.tmp, 'queues.db')
+        self.store = QueueStore(self.db, legacy_json=None)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def reopen(self):
+        return QueueStore(self.db, legacy_json=None)
+
+    def test_create_and_reload(self):
+        self.store.create(make_queue('q1'))
+        self.assertIn('q1', self.store)
+        self.assertNotIn('missing', self.store)
+        with self.assertRaises(KeyError):
+            self.store['missing']
+
+        reloaded = self.reopen()['q1']
+        self.assertEqual(reloaded, make_queue('q1'))
+
+    def test_updates_touch_only_their_rows(self):
+        self.store.create(make_queue('q1'))
+        self.store.create(make_queue('q2'))
+        conn = sqlite3.connect(self.db)
+        before = dict(conn.execute('SELECT queue_id || idx, updated_at FROM queue_files'))
+
+        self.store.update('q1', {'current_index': 1, 'completed': 1},
+                          {0: {'status': 'validated', 'validated_data': {'master': {}}}})
+
+        after = dict(conn.execute('SELECT queue_id || idx, updated_at FROM queue_files'))
+        changed = sorted(k for k in after if after[k] != before[k])
+        self.assertEqual(changed, ['q10'])
+        conn.close()
+
+        queue = self.reopen()['q1']
+        self.assertEqual((queue['current_index'], queue['completed']), (1, 1))
+        self.assertEqual(queue['files'][0]['status'], 'validated')
+        self.assertEqual(queue['files'][1]['status'], 'pending')
+        # The cached dict reflects the change too
+        self.assertEqual(self.store['q1']['files'][0]['validated_data'], {'master': {}})
+
+    def test_expect_status(self):
+        self.store.create(make_queue('q1'))
+        self.assertTrue(self.store.update_file('q1', 0, {'auto_crop_info': {'bbox': [1]}}, expect_status='pending'))
+        self.store.update_file('q1', 1, {'status': 'cropped'})
+        self.assertFalse(self.store.update_file('q1', 1, {'cropped_path': 'auto.jpg'}, expect_status='pending'))
+        self.assertFalse(self.store.update_file('missing', 0, {}))
+        self.assertIsNone(self.reopen()['q1']['files'][1].get('cropped_path'))
+
+    def test_failed_write_changes_nothing(self):
+        self.store.create(make_queue('q1'))
+        with self.assertRaises(ValueError):
+            # The queue row is written, then the file row fails (circular) - all rolled back
+            loop = {}
+            loop['self'] = loop
+            self.store.update('q1', {'phase': 'review'}, {0: {'parsed_data': loop}})
+        self.assertEqual(self.store['q1']['phase'], 'crop')
+        self.assertEqual(self.reopen()['q1']['phase'], 'crop')
+
+    def test_pending_ingest(self):
+        queue = make_queue('q1')
+        for file_info, status in zip(queue['files'], ('pending', 'done', 'pending')):
+            file_info['auto_crop_status'] = status
+        self.store.create(queue)
+        self.store.update_file('q1', 2, {'auto_crop_status': 'done'})
+        self.assertEqual([(q, i) for q, i, _ in self.reopen().pending_ingest()], [('q1', 0)])
+
+    def test_delete(self):
+        self.store.create(make_queue('q1'))
+        self.store.delete('q1')
+        self.assertNotIn('q1', self.store)
+        conn = sqlite3.connect(self.db)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM queue_files').fetchone()[0], 0)
+        conn.close()
+
+    def test_concurrent_file_updates(self):
+        self.store.create(make_queue('q1', files=40))
+
+        def worker(start):
+            for i in range(start, 40, 4):
+                self.store.update_file('q1', i, {'status': 'ocr_complete', 'ocr_result': {'text': str(i)}})
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        files = self.reopen()['q1']['files']
+        self.assertTrue(all(f['status'] == 'ocr_complete' for f in files))
+        self.assertEqual([f['ocr_result']['text'] for f in files], [str(i) for i in range(40)])
+
+    def test_legacy_json_imported_once(self):
+        legacy = os.path.join(self.tmp, 'queue_store.json')
+        with open(legacy, 'w') as f:
+            json.dump({'old': make_queue('old', files=2)}, f)
+
+        db = os.path.join(self.tmp, 'imported.db')
+        store = QueueStore(db, legacy_json=legacy)
+        self.assertEqual(store['old']['total'], 2)
+        store.delete('old')
+
+        # A deleted queue does not come back from the JSON file
+        self.assertNotIn('old', QueueStore(db, legacy_json=legacy))
+        self.assertTrue(os.path.exists(legacy))
+
+
+class TestQueueLifecycle(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='queue_lifecycle_test_')
+        self.db = os.path.join(self.tmp, 'queues.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def open_store(self, **kwargs):
+        options = dict(legacy_json=None, cache_max=2, cache_idle_seconds=3600,
+                       ttl_hours=72, completed_hours=1, sweep_seconds=3600)
+        options.update(kwargs)
+        return QueueStore(self.db, **options)
+
+    def age(self, queue_id, hours):
+        conn = sqlite3.connect(self.db)
+        with conn:
+            conn.execute('UPDATE queues SET updated_at = ? WHERE queue_id = ?',
+                         ((datetime.now() - timedelta(hours=hours)).isoformat(), queue_id))
+        conn.close()
+
+    def test_cache_is_bounded_lru(self):
+        store = self.open_store()
+        for n in range(5):
+            store.create(make_queue(f'q{n}'))
+        store.update('q2', {'phase': 'processing'})
+        store.get('q3')
+        store.get('q4')
+
+        stats = store.stats()
+        self.assertEqual(stats['hot_queues'], 5)
+        # q2 is pinned while processing, q4 is the most recently used
+        self.assertEqual(set(store._cache), {'q2', 'q4'})
+        self.assertEqual(stats['cached_queues'], 2)
+        # Evicted queues load again from SQLite
+        self.assertEqual(store['q0']['total'], 3)
+
+    def test_sweep_archives_finished_and_idle_queues(self):
+        store = self.open_store()
+        store.create(make_queue('active'))
+        store.create(make_queue('idle'))
+        store.create(make_queue('finished', files=2))
+        store.update('finished', {'completed': 1, 'skipped': 1},
+                     {0: {'status': 'validated'}, 1: {'status': 'skipped'}})
+        store.create(make_queue('recently_finished', files=1))
+        store.update_file('recently_finished', 0, {'status': 'validated'})
+        self.age('idle', 100)
+        self.age('finished', 2)
+        self.age('active', 10)
+
+        self.assertEqual(store.sweep(), {'completed': 1, 'idle': 1, 'purged': 0})
+        stats = store.stats()
+        self.assertEqual(stats['hot_queues'], 2)
+        self.assertEqual(stats['archived_by_reason'], {'completed': 1, 'idle': 1})
+        self.assertNotIn('idle', store._cache)
+
+        # Lazy-loaded back on access, with its files
+        restored = store['idle']
+        self.assertEqual(len(restored['files']), 3)
+        self.assertEqual(store.stats()['hot_queues'], 3)
+        self.assertEqual(store.stats()['restored'], 1)
+
+    def test_empty_queue_only_ages_out_as_idle(self):
+        store = self.open_store()
+        store.create(make_queue('empty', files=0))
+        store.create(make_queue('abandoned', files=0))
+        self.age('empty', 2)
+        self.age('abandoned', 100)
+
+        self.assertEqual(store.sweep(), {'completed': 0, 'idle': 1, 'purged': 0})
+        self.assertIn('empty', store)
+        self.assertEqual(store.stats()['archived_by_reason'], {'idle': 1})
+
+    def test_saved_queue_is_not_reopened(self):
+        store = self.open_store()
+        store.create(make_queue('saved'))
+        self.assertTrue(store.archive('saved', 'saved'))
+
+        self.assertNotIn('saved', store)
+        archived = store.get_archived('saved')
+        self.assertEqual(archived['archive']['reason'], 'saved')
+        self.assertEqual(len(archived['files']), 3)
+        # Survives a restart
+        self.assertEqual(self.open_store().stats()['archived_by_reason'], {'saved': 1})
+
+    def test_retention_purges_old_archives(self):
+        store = self.open_store(retention_days=30)
+        store.create(make_queue('old'))
+        store.archive('old', 'saved')
+        conn = sqlite3.connect(self.db)
+        with conn:
+            conn.execute("UPDATE archived_queues SET archived_at = '2020-01-01T00:00:00'")
+        conn.close()
+
+        self.assertEqual(store.sweep()['purged'], 1)
+        self.assertIsNone(store.get_archived('old'))
+
+    def test_startup_sweep(self):
+        store = self.open_store()
+        store.create(make_queue('stale'))
+        self.age('stale', 100)
+        self.assertEqual(self.open_store().stats()['archived_queues'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
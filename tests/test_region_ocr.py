@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from backend import adaptive_ocr_service
+from backend.adaptive_ocr_service import FieldSpecificOCR
+from backend.image_context import ImageContext
+from backend.ocr_engine import OCREngine, RecognitionResult
+from backend.preprocessing_graph import run_preprocessing
+
+
+def make_receipt():
+    page = np.full((600, 1200), 210, np.uint8)
+    for y in range(40, 560, 36):
+        cv2.putText(page, 'Grand Total 1602.50', (40, y), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 30, 2)
+    return page
+
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = []
+
+    def recognize_many(self, images, lang=None, config=''):
+        self.calls.append([np.array(img) for img in images])
+        return [RecognitionResult(text=f'region {i}\n', data={'conf': ['90']}) for i in range(len(images))]
+
+
+class TestFieldSpecificOCR(unittest.TestCase):
+    def setUp(self):
+        self.engine = FakeEngine()
+        patcher = mock.patch.object(adaptive_ocr_service, 'get_ocr_engine', return_value=self.engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_regions_recognised_in_one_call_from_memory(self):
+        context = ImageContext(make_receipt())
+        regions = {'header': FieldSpecificOCR.REGION_TOP, 'totals': FieldSpecificOCR.REGION_BOTTOM}
+        results = FieldSpecificOCR.extract_from_regions(context, regions)
+
+        self.assertEqual(len(self.engine.calls), 1)
+        header, totals = self.engine.calls[0]
+        self.assertEqual(header.shape, (180, 1200))
+        self.assertEqual(totals.shape, (180, 1200))
+        self.assertEqual(results['header']['box'], (0, 0, 1200, 180))
+        self.assertEqual(results['totals']['box'], (0, 420, 1200, 180))
+        self.assertEqual(results['totals']['raw_text'], 'region 1\n')
+        self.assertEqual(results['totals']['confidence'], 90)
+
+    def test_region_is_a_slice_of_the_shared_base(self):
+        context = ImageContext(make_receipt())
+        box = (0, 420, 1200, 180)
+        full = run_preprocessing(context, 'enhanced')
+        region = run_preprocessing(context, 'enhanced', region=box)
+        self.assertEqual(region.image.shape, (180, 1200))
+        # Same plan as the full page (metrics come from the whole image)
+        self.assertEqual([s['step'] for s in region.steps], [s['step'] for s in full.steps])
+        self.assertTrue(region.steps[1]['cached'])
+        self.assertFalse(region.steps[-1]['cached'])
+
+    def test_no_temp_files_written(self):
+        folder = tempfile.mkdtemp(prefix='region_ocr_')
+        path = os.path.join(folder, 'receipt.png')
+        cv2.imwrite(path, make_receipt())
+        FieldSpecificOCR.extract_from_region(path, FieldSpecificOCR.REGION_TOP)
+        self.assertEqual(os.listdir(folder), ['receipt.png'])
+        os.remove(path)
+        os.rmdir(folder)
+
+    def test_boxes_clipped_to_image(self):
+        boxes = FieldSpecificOCR.region_boxes(1000, 500, [(0.9, 0.8, 0.5, 0.5), (0, 0.7, 1.0, 0.3)])
+        self.assertEqual(boxes, [(900, 400, 100, 100), (0, 350, 1000, 150)])
+
+
+class TestRecognizeRegions(unittest.TestCase):
+    def test_regions_are_clipped_slices(self):
+        engine = OCREngine(backend='pytesseract')
+        image = np.arange(100 * 80, dtype=np.uint8).reshape(100, 80)
+        with mock.patch.object(engine, 'recognize_many', side_effect=lambda crops, *a: crops) as many:
+            crops = engine.recognize_regions(image, [(10, 20, 30, 40), (70, 90, 50, 50), (90, 0, 5, 5)])
+        many.assert_called_once()
+        np.testing.assert_array_equal(crops[0], image[20:60, 10:40])
+        self.assertEqual(crops[1].shape, (10, 10))
+        self.assertEqual(crops[2].size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from backend import smart_crop
+from backend.smart_crop import SmartReceiptDetector
+
+
+def write_receipt(path, width, height, box, cut=0):
+    """Light receipt (optionally with a cut-off corner) on a dark background"""
+    x, y, w, h = box
+    image = np.full((height, width, 3), 60, np.uint8)
+    points = [(x + cut, y), (x + w, y), (x + w, y + h), (x, y + h), (x, y + cut)]
+    cv2.fillPoly(image, [np.array(points, np.int32)], (235, 235, 235))
+    for row in range(y + max(cut, 40), y + h - 40, 60):
+        cv2.putText(image, 'ITEM 12.50', (x + 40, row), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (30, 30, 30), 3)
+    cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 92])
+
+
+class TestReducedDetection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.detector = SmartReceiptDetector()
+        # Keep learned corrections out of the geometry under test
+        patcher = mock.patch.object(SmartReceiptDetector, '_apply_learned_corrections', side_effect=lambda r: r)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_reduction_factor_keeps_long_side(self):
+        path = f"{self.tmp}/big.jpg"
+        write_receipt(path, 3200, 4000, (800, 600, 1400, 2600))
+        with open(path, 'rb') as f:
+            data = np.frombuffer(f.read(), np.uint8)
+        factor = self.detector._reduction_factor(data)
+        self.assertEqual(factor, 4)
+        self.assertGreaterEqual(4000 // factor, smart_crop.DETECTION_MAX_SIDE)
+
+        small = f"{self.tmp}/small.jpg"
+        write_receipt(small, 900, 1200, (200, 150, 450, 900))
+        with open(small, 'rb') as f:
+            self.assertEqual(self.detector._reduction_factor(np.frombuffer(f.read(), np.uint8)), 1)
+
+    def test_perspective_corners_in_full_resolution(self):
+        path = f"{self.tmp}/rect.jpg"
+        box = (800, 600, 1400, 2600)
+        write_receipt(path, 3200, 4000, box)
+
+        result = self.detector.detect_receipt(path)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['method'], 'edge_detection_perspective')
+        corners = np.array(result['corners'])
+        self.assertLessEqual(abs(corners[:, 0].min() - box[0]), 6)
+        self.assertLessEqual(abs(corners[:, 1].min() - box[1]), 6)
+        self.assertLessEqual(abs(corners[:, 0].max() - (box[0] + box[2])), 6)
+        self.assertLessEqual(abs(corners[:, 1].max() - (box[1] + box[3])), 6)
+        # The warp is taken from the full-resolution image
+        crop_h, crop_w = result['cropped_image'].shape[:2]
+        self.assertLessEqual(abs(crop_w - box[2]), 12)
+        self.assertLessEqual(abs(crop_h - box[3]), 12)
+
+    def test_bbox_edges_refined_at_full_resolution(self):
+        path = f"{self.tmp}/cut.jpg"
+        box = (800, 600, 1400, 2600)
+        write_receipt(path, 3200, 4000, box, cut=400)
+
+        result = self.detector.detect_receipt(path)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['method'], 'edge_detection_bbox')
+        x, y, w, h = result['bbox']
+        # Same box full-resolution detection gives: the dilated edge map
+        # plus 2% of the shorter side on every edge
+        pad = int(min(box[2], box[3]) * 0.02) + smart_crop.EDGE_DILATION_PX
+        self.assertLessEqual(abs(x - (box[0] - pad)), 2)
+        self.assertLessEqual(abs(y - (box[1] - pad)), 2)
+        self.assertLessEqual(abs(w - (box[2] + 2 * pad)), 4)
+        self.assertLessEqual(abs(h - (box[3] + 2 * pad)), 4)
+        self.assertEqual(result['cropped_image'].shape[:2], (h, w))
+
+
+if __name__ == '__main__':
+    unittest.main()
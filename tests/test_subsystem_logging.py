@@ -0,0 +1,82 @@
+import contextlib
+import io
+import logging
+import os
+import unittest
+from unittest import mock
+
+from backend.logger import configure_subsystem_logging, debug_requested, get_logger, voucher_debug
+from backend.quality_focused_extractor import extract_with_quality
+
+SAMPLE = "VoucherNumber116\nVoucherDate 11/01/2026\nSupp Name MACHAGIRI/A\nTotal 3 750.00"
+
+
+class Explodes:
+    """Fails if the logger formats it"""
+
+    def __str__(self):
+        raise AssertionError("formatted a suppressed message")
+
+
+class TestSubsystemLogging(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(configure_subsystem_logging, force=True)
+
+    def configure(self, profile, levels=''):
+        configure_subsystem_logging(profile, levels, force=True)
+
+    def test_profiles_and_overrides(self):
+        self.configure('development')
+        self.assertTrue(get_logger('parser').debug_enabled)
+
+        self.configure('production')
+        self.assertFalse(get_logger('parser').debug_enabled)
+        self.assertTrue(get_logger('batch').isEnabledFor(logging.INFO))
+        self.assertFalse(get_logger('ocr').isEnabledFor(logging.INFO))
+
+        self.configure('production', 'ocr=debug, batch=ERROR')
+        self.assertTrue(get_logger('ocr').debug_enabled)
+        self.assertFalse(get_logger('batch').isEnabledFor(logging.INFO))
+
+    def test_suppressed_messages_are_not_formatted(self):
+        self.configure('production')
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            get_logger('ocr').debug("[OCR] %s", Explodes())
+            get_logger('ocr').warning("[WARN] Deskew failed: %s", 'bad angle')
+        self.assertEqual(out.getvalue(), "[WARN] Deskew failed: bad angle\n")
+
+    def test_voucher_debug_traces_one_voucher(self):
+        self.configure('production')
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            quiet = extract_with_quality(SAMPLE)
+            with voucher_debug():
+                traced = extract_with_quality(SAMPLE)
+        self.assertEqual(quiet['debug_log'], [])
+        self.assertIn("STARTING QUALITY-FOCUSED EXTRACTION", traced['debug_log'])
+        self.assertIn("[QFEE] STARTING QUALITY-FOCUSED EXTRACTION", out.getvalue())
+        self.assertEqual(quiet['fields']['voucher_number'].value, traced['fields']['voucher_number'].value)
+        self.assertEqual(extract_with_quality(SAMPLE, debug=True)['debug_log'], traced['debug_log'])
+
+    def test_production_config_uses_production_profile(self):
+        from backend import create_app
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('LOG_PROFILE', None)
+            os.environ.pop('FLASK_CONFIG', None)
+            app = create_app('production')
+            self.assertEqual(app.config['LOG_PROFILE'], 'production')
+            self.assertFalse(get_logger('parser').debug_enabled)
+            # Spawned batch OCR workers configure themselves from the environment
+            self.assertEqual(os.environ['LOG_PROFILE'], 'production')
+
+    def test_debug_requested(self):
+        with mock.patch.dict(os.environ, {'LOG_DEBUG_VOUCHERS': 'IMG_0042.jpg, IMG_0043.jpg'}):
+            self.assertTrue(debug_requested('/uploads/q1/IMG_0043.jpg'))
+            self.assertFalse(debug_requested('IMG_0044.jpg'))
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(debug_requested('IMG_0042.jpg'))
+
+
+if __name__ == '__main__':
+    unittest.main()